@@ -0,0 +1,210 @@
+import asyncio
+from uuid import UUID
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from . import caches
+
+ROLES_PREFIX = 'authz:roles:'
+ROLES_TIMEOUT = getattr(settings, 'ORGANISATION_CACHE_TIMEOUT', 60 * 5)
+# See apps.organisations.cache: invalidated entries are briefly pinned so that a
+# reader racing a write cannot cache the pre-write roles again.
+_INVALIDATED = 'invalidated'
+_INVALIDATION_GRACE = 5
+
+
+class AuthorizationContext:
+    """
+    Everything the permission checks need to know about one user, loaded once.
+
+    The user's global group names and their {organisation_id: is_org_admin} map are
+    fetched together in a single query on first use, after which has_role(),
+    is_member_of() and is_org_admin_of() are answered from memory for the rest
+    of the request.
+
+    When the groups are already known (a cached user snapshot), the membership map
+    comes from the shared cache as well, so a warm request makes no query at all.
+    apps.organisations invalidates it on every membership write. Roles are only
+    cached when every process shares the cache (apps.core.caches): an admin demoted
+    through one process must not stay an admin in the others' own caches.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self._groups = None
+        self._org_roles = None
+        # The aload() in progress, which concurrent callers wait for too.
+        self._loading = None
+
+    # --- LOADING ---
+
+    def _rows(self):
+        if self._groups is not None:
+            # Groups are already known (primed from a cached user snapshot).
+            return self.user.memberships.values_list('organisation_id', 'is_org_admin').order_by()
+        # LEFT JOINs over groups and memberships: a user has a handful of groups,
+        # so the cross product stays small and we avoid a second round trip.
+        return type(self.user).objects.filter(pk=self.user.pk).values_list(
+            'groups__name', 'memberships__organisation_id', 'memberships__is_org_admin'
+        ).order_by()
+
+    def _store(self, rows):
+        if self._groups is not None:
+            self._org_roles = dict(rows)
+            return
+        groups, org_roles = set(), {}
+        for group_name, organisation_id, is_org_admin in rows:
+            if group_name is not None:
+                groups.add(group_name)
+            if organisation_id is not None:
+                org_roles[organisation_id] = is_org_admin
+        self._groups, self._org_roles = groups, org_roles
+
+    def _load(self):
+        if self._org_roles is not None:
+            return
+        if not self.user.is_authenticated:
+            self._store([])
+            return
+        shared = caches.is_shared()
+        if self._groups is not None and shared:
+            roles = cache.get(_roles_key(self.user.pk))
+            if roles not in (None, _INVALIDATED):
+                self._org_roles = roles
+                return
+        self._store(list(self._rows()))
+        if shared:
+            cache.add(_roles_key(self.user.pk), self._org_roles, ROLES_TIMEOUT)
+
+    async def aload(self):
+        """
+        Loads the context with the async ORM; call before checks made on the event loop.
+        Root fields resolve concurrently on the async view: they all wait for the
+        same load, which is started once and not cancelled with any one of them.
+        """
+        if self._org_roles is None:
+            if self._loading is None:
+                self._loading = asyncio.ensure_future(self._aload())
+            await asyncio.shield(self._loading)
+        return self
+
+    async def _aload(self):
+        try:
+            if not self.user.is_authenticated:
+                self._store([])
+                return
+            shared = caches.is_shared()
+            if self._groups is not None and shared:
+                roles = await cache.aget(_roles_key(self.user.pk))
+                if roles not in (None, _INVALIDATED):
+                    self._org_roles = roles
+                    return
+            self._store([row async for row in self._rows()])
+            if shared:
+                await cache.aadd(_roles_key(self.user.pk), self._org_roles, ROLES_TIMEOUT)
+        finally:
+            # A failed load is tried again by the next caller.
+            self._loading = None
+
+    def prime_groups(self, group_names):
+        """Seeds the group names when they are already known; memberships still load lazily."""
+        if self._groups is None:
+            self._groups = set(group_names)
+        return self
+
+    @property
+    def groups(self):
+        if self._groups is None:
+            self._load()
+        return frozenset(self._groups)
+
+    @property
+    def org_roles(self):
+        self._load()
+        return dict(self._org_roles)
+
+    # --- CHECKS ---
+
+    @property
+    def is_authenticated(self):
+        return self.user.is_authenticated
+
+    @property
+    def is_superuser(self):
+        return self.user.is_authenticated and self.user.is_superuser
+
+    def has_role(self, role_name):
+        if self._groups is None:
+            self._load()
+        return role_name in self._groups
+
+    def is_member_of(self, organisation_id):
+        self._load()
+        return _as_uuid(organisation_id) in self._org_roles
+
+    def is_org_admin_of(self, organisation_id):
+        self._load()
+        return self._org_roles.get(_as_uuid(organisation_id), False)
+
+    # --- KEEPING IN SYNC WITH WRITES MADE DURING THE REQUEST ---
+
+    def record_membership(self, organisation_id, is_org_admin):
+        if self._org_roles is not None:
+            self._org_roles[_as_uuid(organisation_id)] = is_org_admin
+
+    def forget_membership(self, organisation_id):
+        if self._org_roles is not None:
+            self._org_roles.pop(_as_uuid(organisation_id), None)
+
+
+def _roles_key(user_id):
+    return f"{ROLES_PREFIX}{user_id}"
+
+
+def invalidate_roles(*user_ids):
+    """
+    Drops the cached organisation roles of the given users, now and again when the
+    surrounding transaction commits. Call it whenever their memberships change.
+    """
+    keys = [_roles_key(user_id) for user_id in set(user_ids) if user_id]
+    if not keys or not caches.is_shared():
+        return
+
+    def tombstone():
+        cache.set_many({key: _INVALIDATED for key in keys}, _INVALIDATION_GRACE)
+
+    tombstone()
+    transaction.on_commit(tombstone)
+
+
+def _as_uuid(value):
+    if isinstance(value, UUID):
+        return value
+    try:
+        return UUID(str(value))
+    except ValueError:
+        return None
+
+
+def authorization_for(user):
+    """Returns the AuthorizationContext cached on a user instance, creating it if needed."""
+    context = getattr(user, '_authorization', None)
+    if context is None:
+        context = AuthorizationContext(user)
+        # AnonymousUser instances are shared per request as well, so caching is safe.
+        setattr(user, '_authorization', context)
+    return context
+
+
+def get_authorization(info):
+    """
+    Returns the authorization context for the requesting user and attaches it to
+    info.context, so every resolver of the request shares the same loaded state.
+    """
+    context = getattr(info.context, 'authorization', None)
+    if context is None or context.user is not info.context.user:
+        context = authorization_for(info.context.user)
+        setattr(info.context, 'authorization', context)
+    return context
@@ -0,0 +1,34 @@
+from django.core.exceptions import ValidationError
+from django.db import DataError, IntegrityError, transaction
+
+# What one bad row raises: a broken constraint (e.g. a foreign key to a deleted
+# row), a value the column rejects, one the field cannot convert (a malformed UUID),
+# or one the driver cannot send (a NUL in text on PostgreSQL). Anything else, such
+# as a lost connection, fails every row alike and is left to the caller to retry.
+ROW_ERRORS = (DataError, IntegrityError, ValidationError, ValueError)
+
+
+def apply_isolated(rows, apply, set_aside):
+    """
+    Calls apply(rows) for a batch in one savepoint. If a row error (ROW_ERRORS)
+    fails it, retries each row on its own so one bad row cannot hold back the
+    others, and passes every row that still fails to set_aside(row, error), e.g.
+    to drop it or move it to a dead-letter table. Returns the rows applied.
+    """
+    try:
+        with transaction.atomic():
+            apply(rows)
+        return rows
+    except ROW_ERRORS:
+        pass
+
+    applied = []
+    for row in rows:
+        try:
+            with transaction.atomic():
+                apply([row])
+        except ROW_ERRORS as error:
+            set_aside(row, error)
+        else:
+            applied.append(row)
+    return applied
@@ -0,0 +1,155 @@
+import asyncio
+import threading
+from collections import deque
+
+from django.conf import settings
+from django.db import transaction
+
+# Events buffered per subscription for a client that reads slower than they are
+# published; beyond it the subscription is closed, so a stalled client costs no more.
+QUEUE_SIZE = getattr(settings, 'GRAPHQL_WS_QUEUE_SIZE', 32)
+
+
+class QueueOverflow(Exception):
+    """Ends a subscription whose subscriber fell more than its queue size behind."""
+
+    def __init__(self, maxsize):
+        super().__init__(f"More than {maxsize} events were waiting to be sent; subscribe again and refetch.")
+
+
+class Subscription:
+    """
+    One subscriber's bounded stream of the events published to a topic, consumed
+    with `async for` on the event loop that subscribed. A subscriber that falls
+    `maxsize` events behind is unsubscribed and its stream raises QueueOverflow,
+    rather than silently missing events.
+
+    Events are shared between all subscribers of a topic, so a queued event costs
+    each subscription one pointer.
+    """
+
+    __slots__ = ('topic', 'loop', 'overflowed', '_broker', '_events', '_waiter', '_closed')
+
+    def __init__(self, broker, topic, loop, maxsize):
+        self.topic = topic
+        self.loop = loop
+        self.overflowed = False
+        self._broker = broker
+        self._events = deque(maxlen=maxsize)
+        self._waiter = None
+        self._closed = False
+
+    def _push(self, event):
+        # Runs on self.loop.
+        if self._closed:
+            return
+        if len(self._events) == self._events.maxlen:
+            self.overflowed = True
+            self._events.clear()
+            self.close()
+            return
+        self._events.append(event)
+        self._wake()
+
+    def _wake(self):
+        waiter = self._waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self._events:
+            if self.overflowed:
+                raise QueueOverflow(self._events.maxlen)
+            if self._closed:
+                raise StopAsyncIteration
+            self._waiter = self.loop.create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+        return self._events.popleft()
+
+    def close(self):
+        """Unsubscribes; the stream ends once the events already queued are consumed."""
+        if not self._closed:
+            self._closed = True
+            self._broker._remove(self)
+            self._wake()
+
+
+def _deliver(subscriptions, event):
+    for subscription in subscriptions:
+        subscription._push(event)
+
+
+class Broker:
+    """
+    In-process publish/subscribe between the code handling writes and the event
+    loops serving GraphQL subscriptions.
+
+    publish() may be called from any thread (synchronous mutations run in worker
+    threads): events reach each event loop with one call_soon_threadsafe() however
+    many of its subscribers listen to the topic. Only subscribers in this process
+    are reached, so writes must be served by the same processes as subscriptions.
+    """
+
+    def __init__(self, queue_size=QUEUE_SIZE):
+        self.queue_size = queue_size
+        # {topic: {loop: {subscription: None}}}
+        self._topics = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, topic):
+        loop = asyncio.get_running_loop()
+        subscription = Subscription(self, topic, loop, self.queue_size)
+        with self._lock:
+            self._topics.setdefault(topic, {}).setdefault(loop, {})[subscription] = None
+        return subscription
+
+    def _remove(self, subscription):
+        with self._lock:
+            loops = self._topics.get(subscription.topic)
+            if loops is None:
+                return
+            subscriptions = loops.get(subscription.loop)
+            if subscriptions is not None:
+                subscriptions.pop(subscription, None)
+                if not subscriptions:
+                    del loops[subscription.loop]
+            if not loops:
+                del self._topics[subscription.topic]
+
+    def publish(self, topic, event):
+        with self._lock:
+            loops = self._topics.get(topic)
+            if not loops:
+                return
+            targets = [(loop, tuple(subscriptions)) for loop, subscriptions in loops.items()]
+
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        for loop, subscriptions in targets:
+            if loop is running:
+                _deliver(subscriptions, event)
+            else:
+                try:
+                    loop.call_soon_threadsafe(_deliver, subscriptions, event)
+                except RuntimeError:
+                    # The loop was closed with subscribers still registered.
+                    pass
+
+    def publish_on_commit(self, topic, event):
+        """Publishes once the surrounding transaction commits, so subscribers never see rolled-back writes."""
+        transaction.on_commit(lambda: self.publish(topic, event))
+
+    def subscriber_count(self, topic):
+        with self._lock:
+            return sum(len(subscriptions) for subscriptions in self._topics.get(topic, {}).values())
+
+
+broker = Broker()
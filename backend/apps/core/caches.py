@@ -0,0 +1,12 @@
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def is_shared(alias=DEFAULT_CACHE_ALIAS):
+    """
+    Whether every server process sees the same cache (Redis, Memcached, a database
+    table, ...). A LocMemCache lives in one process, so dropping an entry there
+    leaves the other processes serving their own copy until it expires: anything
+    writes must invalidate is only cached when this is True (see settings.CACHES).
+    """
+    return not isinstance(caches[alias], LocMemCache)
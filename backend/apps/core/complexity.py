@@ -0,0 +1,236 @@
+from django.conf import settings
+from graphql import (
+    FieldNode,
+    FragmentDefinitionNode,
+    FragmentSpreadNode,
+    GraphQLError,
+    InlineFragmentNode,
+    IntValueNode,
+    OperationDefinitionNode,
+    ValidationRule,
+    get_named_type,
+    get_nullable_type,
+    is_composite_type,
+    is_list_type,
+)
+from graphql.utilities import type_from_ast
+
+from .pagination import MAX_PAGE_SIZE
+
+MAX_QUERY_COST = getattr(settings, 'GRAPHQL_MAX_QUERY_COST', 5000)
+MAX_QUERY_DEPTH = getattr(settings, 'GRAPHQL_MAX_QUERY_DEPTH', 10)
+DEFAULT_LIST_SIZE = getattr(settings, 'GRAPHQL_DEFAULT_LIST_SIZE', 10)
+
+# Expected number of items of list fields whose size differs from DEFAULT_LIST_SIZE,
+# keyed by "ParentType.fieldName".
+LIST_SIZES = {
+    'Query.users': 1000,             # every user in the system, unpaginated
+    'Query.allMemberships': 200,
+    'OrganisationType.users': 200,
+    'OrganisationType.memberships': 200,
+}
+
+# List fields sized by one of their arguments, keyed by "ParentType.fieldName":
+# (argument, most items the resolver returns, items for an argument value).
+# Filled through limit_list() by the schema modules, next to the maximum each resolver enforces.
+LIST_LIMITS = {}
+
+# Extra cost of fields that are expensive on top of the objects they return.
+FIELD_WEIGHTS = {
+    'Query.searchUsers': 20,         # trigram index scan (apps.users.search)
+    'Query.searchMembers': 20,
+    'Query.auditLog': 10,            # time range scan of the organisation's events
+    'Query.nearMe': 5,               # in-memory index search (apps.places.index)
+}
+
+
+def limit_list(field, maximum, argument='first', items=None):
+    """
+    Prices the list field "ParentType.fieldName" from its `argument`, at most
+    `maximum`, instead of LIST_SIZES. `items` maps an argument value to the number
+    of items returned, when that is not the value itself.
+    """
+    LIST_LIMITS[field] = (argument, maximum, items or (lambda value: value))
+
+
+# --- 1. STATIC COST MODEL ---
+
+class OperationCost:
+    """The estimated cost and nesting depth of one operation of a document."""
+
+    __slots__ = ('cost', 'depth')
+
+    def __init__(self, cost=0, depth=0):
+        self.cost = cost
+        self.depth = depth
+
+    def as_extension(self):
+        return {'requestedQueryCost': self.cost, 'maximumAvailable': MAX_QUERY_COST, 'depth': self.depth}
+
+
+def _page_size(node):
+    """The `first`/`last` of a connection field; unknown (variable) sizes count as a full page."""
+    sizes = [
+        argument.value for argument in node.arguments
+        if argument.name.value in ('first', 'last')
+    ]
+    if not sizes:
+        return None
+    if all(isinstance(value, IntValueNode) for value in sizes):
+        return min(max(int(value.value) for value in sizes), MAX_PAGE_SIZE)
+    return MAX_PAGE_SIZE
+
+
+def _limited_size(node, field, limit):
+    """
+    The items a list field limited by an argument returns: the literal argument or,
+    when it is omitted, its schema default, capped at the resolver's maximum.
+    Unknown (variable) values count as the maximum.
+    """
+    argument, maximum, items = limit
+    values = [given.value for given in node.arguments if given.name.value == argument]
+    if values:
+        if not isinstance(values[0], IntValueNode):
+            return items(maximum)
+        value = int(values[0].value)
+    else:
+        value = getattr(field.args.get(argument), 'default_value', None)
+        if not isinstance(value, int):
+            return None
+    return items(min(max(value, 0), maximum))
+
+
+def _list_size(parent_type, node, field, page_size):
+    if not is_list_type(get_nullable_type(field.type)):
+        return 1
+    if node.name.value == 'edges' and parent_type.name.endswith('Connection'):
+        # A connection's page size applies to its edges, not to its pageInfo.
+        return page_size or MAX_PAGE_SIZE
+    key = f"{parent_type.name}.{node.name.value}"
+    size = _limited_size(node, field, LIST_LIMITS[key]) if key in LIST_LIMITS else None
+    return LIST_SIZES.get(key, DEFAULT_LIST_SIZE) if size is None else size
+
+
+class CostCalculator:
+    """
+    Walks an operation's selection sets (following fragments) against the schema.
+
+    Every composite value a field returns costs 1, multiplied by the expected list
+    size, so the cost approximates the number of objects the server would load:
+
+        cost(field) = weight + list_size * (1 + cost(sub-selection))
+
+    Scalars are free. Connections and the list fields in LIST_LIMITS are sized by
+    their `first`/`last` (or limiting) argument, capped at the resolver's maximum.
+    Variables cannot be known when a cached document is validated, so a list sized
+    by a variable is assumed to return its maximum.
+    """
+
+    def __init__(self, schema, fragments):
+        self.schema = schema
+        self.fragments = fragments
+
+    def operation_cost(self, operation):
+        root_type = self.schema.get_root_type(operation.operation)
+        if root_type is None:
+            return OperationCost()
+        cost, depth = self._selection_set(root_type, operation.selection_set, frozenset(), None)
+        return OperationCost(cost, depth)
+
+    def _selection_set(self, parent_type, selection_set, visited_fragments, page_size):
+        cost = depth = 0
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                field_cost, field_depth = self._field(parent_type, selection, visited_fragments, page_size)
+            elif isinstance(selection, InlineFragmentNode):
+                fragment_type = parent_type
+                if selection.type_condition is not None:
+                    fragment_type = type_from_ast(self.schema, selection.type_condition) or parent_type
+                field_cost, field_depth = self._selection_set(
+                    fragment_type, selection.selection_set, visited_fragments, page_size
+                )
+            elif isinstance(selection, FragmentSpreadNode):
+                name = selection.name.value
+                fragment = self.fragments.get(name)
+                if fragment is None or name in visited_fragments:
+                    # Unknown or cyclic fragments are reported by the standard rules.
+                    continue
+                fragment_type = type_from_ast(self.schema, fragment.type_condition) or parent_type
+                field_cost, field_depth = self._selection_set(
+                    fragment_type, fragment.selection_set, visited_fragments | {name}, page_size
+                )
+            else:
+                continue
+            cost += field_cost
+            depth = max(depth, field_depth)
+        return cost, depth
+
+    def _field(self, parent_type, node, visited_fragments, page_size):
+        name = node.name.value
+        if name.startswith('__'):
+            # Introspection (GraphiQL, codegen) is bounded by the schema itself.
+            return 0, 0
+
+        field = getattr(parent_type, 'fields', {}).get(name)
+        if field is None:
+            return 0, 0
+
+        cost = FIELD_WEIGHTS.get(f"{parent_type.name}.{name}", 0)
+        field_type = get_named_type(field.type)
+        if node.selection_set is None or not is_composite_type(field_type):
+            return cost, 1
+
+        child_cost, child_depth = self._selection_set(
+            field_type, node.selection_set, visited_fragments, _page_size(node)
+        )
+        cost += _list_size(parent_type, node, field, page_size) * (1 + child_cost)
+        return cost, child_depth + 1
+
+
+def _fragments(document):
+    return {
+        definition.name.value: definition for definition in document.definitions
+        if isinstance(definition, FragmentDefinitionNode)
+    }
+
+
+def measure_document(schema, document):
+    """Returns {operation name (None if anonymous): OperationCost} for a valid document."""
+    calculator = CostCalculator(schema, _fragments(document))
+    return {
+        definition.name.value if definition.name else None: calculator.operation_cost(definition)
+        for definition in document.definitions
+        if isinstance(definition, OperationDefinitionNode)
+    }
+
+
+# --- 2. VALIDATION RULE ---
+
+class QueryCostRule(ValidationRule):
+    """
+    Rejects operations whose static cost exceeds GRAPHQL_MAX_QUERY_COST or whose
+    selections nest deeper than GRAPHQL_MAX_QUERY_DEPTH, before anything executes.
+
+    Runs as part of validation, so its verdict is cached with the parsed document
+    (apps.core.documents) and costs nothing on repeated operations.
+    """
+
+    def enter_operation_definition(self, node, *_args):
+        measured = CostCalculator(self.context.schema, _fragments(self.context.document)).operation_cost(node)
+        name = node.name.value if node.name else 'anonymous'
+
+        if measured.depth > MAX_QUERY_DEPTH:
+            self.report_error(GraphQLError(
+                f"Operation '{name}' is nested {measured.depth} levels deep, "
+                f"exceeding the maximum depth of {MAX_QUERY_DEPTH}.",
+                node,
+                extensions={'code': 'QUERY_TOO_DEEP', 'depth': measured.depth, 'maximumDepth': MAX_QUERY_DEPTH},
+            ))
+        if measured.cost > MAX_QUERY_COST:
+            self.report_error(GraphQLError(
+                f"Operation '{name}' has an estimated cost of {measured.cost}, "
+                f"exceeding the budget of {MAX_QUERY_COST}.",
+                node,
+                extensions={'code': 'QUERY_TOO_COMPLEX', 'cost': measured.as_extension()},
+            ))
+        return self.SKIP
@@ -0,0 +1,260 @@
+import asyncio
+from inspect import isawaitable
+
+
+# --- 1. SYNCHRONOUS DATALOADER ---
+
+class _Selection:
+    """
+    The fields the values of a loader's next batch will be resolved under.
+
+    A batch function queueing the next level (e.g. the members of the organisations
+    it loaded) only queues the relations these fields select: resolvers and queueing
+    helpers call select() with their FieldNodes before load() or enqueue(), and the
+    batch function reads them back with take_selection().
+    """
+
+    def select(self, field_nodes):
+        for node in field_nodes:
+            self._field_nodes[id(node)] = node
+        return self
+
+    def take_selection(self):
+        field_nodes, self._field_nodes = list(self._field_nodes.values()), {}
+        return field_nodes
+
+
+class DataLoader(_Selection):
+    """
+    Per-request batching loader for synchronous graphene resolvers.
+
+    graphql-core resolves list items depth-first, so the siblings of a nested
+    field are not known when the first one is resolved. List resolvers therefore
+    enqueue the keys their children will ask for, and the first load() flushes
+    the whole queue through batch_load_fn in a single call. Results are cached
+    for the remainder of the request.
+    """
+
+    def __init__(self, batch_load_fn):
+        # batch_load_fn(keys) must return a list of values in the same order as keys.
+        self.batch_load_fn = batch_load_fn
+        self._cache = {}
+        # A dict is used as an insertion-ordered set of pending keys.
+        self._queue = {}
+        self._field_nodes = {}
+
+    def __contains__(self, key):
+        return key in self._cache
+
+    def enqueue(self, keys):
+        """Registers keys to be fetched by the next batch, without loading them yet."""
+        for key in keys:
+            if key is not None and key not in self._cache:
+                self._queue[key] = None
+        return self
+
+    def load(self, key):
+        if key is None:
+            return None
+        if key not in self._cache:
+            self.enqueue([key])
+            self._dispatch()
+        return self._cache.get(key)
+
+    def load_many(self, keys):
+        keys = list(keys)
+        self.enqueue(keys)
+        if self._queue:
+            self._dispatch()
+        return [self._cache.get(key) for key in keys]
+
+    def prime(self, key, value):
+        """Seeds the cache with an already known value."""
+        self._cache.setdefault(key, value)
+        self._queue.pop(key, None)
+        return self
+
+    def clear(self, key):
+        """Evicts a key, e.g. after a mutation changed the underlying rows."""
+        self._cache.pop(key, None)
+        return self
+
+    def _dispatch(self):
+        keys = list(self._queue)
+        self._queue.clear()
+        values = self.batch_load_fn(keys)
+        if len(values) != len(keys):
+            raise ValueError(
+                f"DataLoader batch function returned {len(values)} values for {len(keys)} keys."
+            )
+        self._cache.update(zip(keys, values))
+
+
+# --- 2. ASYNCHRONOUS DATALOADER ---
+
+class AsyncDataLoader(_Selection):
+    """
+    asyncio counterpart of DataLoader, used when the operation runs on the async view.
+
+    load() returns a future; every key requested during the same event-loop tick
+    (i.e. by all sibling resolvers graphql-core starts together) is fetched with a
+    single await of the async batch_load_fn. The interface otherwise mirrors
+    DataLoader, so resolvers and the queueing helpers work with either.
+    """
+
+    def __init__(self, batch_load_fn):
+        self.batch_load_fn = batch_load_fn
+        self._cache = {}
+        self._queue = {}
+        self._field_nodes = {}
+        self._scheduled = False
+
+    def __contains__(self, key):
+        return key in self._cache
+
+    def enqueue(self, keys):
+        # Enqueued keys ride along with the next dispatch; they never trigger one.
+        for key in keys:
+            if key is not None and key not in self._cache:
+                self._queue.setdefault(key, None)
+        return self
+
+    def load(self, key):
+        if key is None:
+            return None
+        future = self._cache.get(key)
+        if future is None:
+            future = self._cache[key] = asyncio.get_running_loop().create_future()
+            self._queue[key] = future
+            self._schedule()
+        return future
+
+    def load_many(self, keys):
+        return asyncio.gather(*(self._as_awaitable(self.load(key)) for key in keys))
+
+    def prime(self, key, value):
+        if key not in self._cache:
+            self._cache[key] = self._resolved(value)
+        self._queue.pop(key, None)
+        return self
+
+    def clear(self, key):
+        self._cache.pop(key, None)
+        return self
+
+    @staticmethod
+    def _resolved(value):
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(value)
+        return future
+
+    def _as_awaitable(self, value):
+        return value if isawaitable(value) else self._resolved(value)
+
+    def _schedule(self):
+        if not self._scheduled:
+            self._scheduled = True
+            loop = asyncio.get_running_loop()
+            loop.call_soon(lambda: loop.create_task(self._dispatch()))
+
+    async def _dispatch(self):
+        self._scheduled = False
+        batch, self._queue = self._queue, {}
+        keys = list(batch)
+        try:
+            values = await self.batch_load_fn(keys)
+            if len(values) != len(keys):
+                raise ValueError(
+                    f"DataLoader batch function returned {len(values)} values for {len(keys)} keys."
+                )
+        except Exception as error:
+            for key, future in batch.items():
+                self._cache.pop(key, None)
+                if future is not None and not future.done():
+                    future.set_exception(error)
+            return
+
+        for key, value in zip(keys, values):
+            future = batch[key]
+            if future is None:
+                # Enqueued but never loaded: cache the value for a later load().
+                self._cache.setdefault(key, self._resolved(value))
+            elif not future.done():
+                future.set_result(value)
+
+
+# --- 3. PER-REQUEST REGISTRY ---
+
+def is_async_execution():
+    """True when called from a coroutine on the event loop (the async GraphQL view)."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def get_loader(info, name, factory, async_factory=None):
+    """
+    Returns the loader called `name` for the current request, creating it with
+    factory(info) on first use. Loaders live on info.context (the HttpRequest),
+    so nothing is shared between requests.
+
+    Resolvers running on the event loop get the loader built by async_factory
+    instead; code running in a sync_to_async worker thread keeps the sync one.
+    """
+    context = info.context
+    loaders = getattr(context, '_dataloaders', None)
+    if loaders is None:
+        loaders = {}
+        setattr(context, '_dataloaders', loaders)
+
+    use_async = is_async_execution()
+    if use_async and async_factory is None:
+        raise RuntimeError(f"Loader '{name}' has no async implementation.")
+
+    loader = loaders.get((name, use_async))
+    if loader is None:
+        loader = loaders[(name, use_async)] = (async_factory if use_async else factory)(info)
+    return loader
+
+
+def clear_loader_key(info, name, key):
+    """Evicts `key` from the sync and async variants of a loader, e.g. after a write."""
+    for (loader_name, _), loader in getattr(info.context, '_dataloaders', {}).items():
+        if loader_name == name:
+            loader.clear(key)
+
+
+def then(value, on_resolve):
+    """
+    Applies on_resolve to a loader result, which is a plain value in sync execution
+    and an awaitable in async execution. Awaitables returned by on_resolve are
+    awaited as well, so loaders can be chained.
+    """
+    if not isawaitable(value):
+        return on_resolve(value)
+
+    async def chained():
+        result = on_resolve(await value)
+        if isawaitable(result):
+            result = await result
+        return result
+
+    return chained()
+
+
+# --- 4. INSTANCE CACHE HELPERS ---
+
+def cached_relation(instance, name, default=None):
+    """
+    Returns a relation the query optimizer already loaded onto `instance`
+    (select_related or prefetch_related), or `default` if it was not preloaded.
+    Lets loader-backed resolvers skip the loader when the data is already there.
+    """
+    if name in instance._state.fields_cache:
+        return instance._state.fields_cache[name]
+    prefetched = getattr(instance, '_prefetched_objects_cache', {})
+    if name in prefetched:
+        return list(prefetched[name])
+    return default
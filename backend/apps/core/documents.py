@@ -0,0 +1,158 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from graphql import GraphQLError, parse, validate
+
+from .complexity import measure_document
+
+
+def query_hash(query):
+    """The sha256 hex digest of a query, as used by Apollo automatic persisted queries."""
+    return hashlib.sha256(query.encode('utf-8')).hexdigest()
+
+
+# --- 1. PARSED + VALIDATED DOCUMENT CACHE ---
+
+class CachedDocument:
+    """
+    A parsed document together with the outcome of validating it against the schema,
+    and the static cost of each of its operations (apps.core.complexity).
+    """
+
+    __slots__ = ('document', 'errors', 'costs')
+
+    def __init__(self, document=None, errors=None, costs=None):
+        self.document = document
+        self.errors = errors or []
+        self.costs = costs or {}
+
+    def cost_of(self, operation_ast):
+        """The OperationCost of the operation about to execute, if it was measured."""
+        if operation_ast is None:
+            return None
+        return self.costs.get(operation_ast.name.value if operation_ast.name else None)
+
+
+class DocumentCache:
+    """
+    Thread-safe LRU of CachedDocuments keyed by (schema, validation rules, query hash).
+
+    The React client only ever sends a handful of distinct operations, so after
+    warm-up every request skips both parse() and validate(). Documents that fail to
+    parse or validate are cached too, so a client retrying a broken query does not
+    pay for validation on every attempt either.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+document_cache = DocumentCache(maxsize=getattr(settings, 'GRAPHQL_DOCUMENT_CACHE_SIZE', 256))
+
+
+def get_document(schema, query, validation_rules=None, max_errors=None, digest=None):
+    """
+    Returns the CachedDocument for `query`, parsing and validating it only on a miss.
+
+    `digest` may be passed when the sha256 of the query is already known (APQ). With
+    a digest, `query` may be None: a warm cache then serves the request without even
+    fetching the persisted query text.
+    """
+    key = (id(schema), validation_rules and tuple(validation_rules), digest or query_hash(query))
+    entry = document_cache.get(key)
+    if entry is not None:
+        return entry
+
+    if query is None:
+        query = load_persisted_query(digest)
+
+    try:
+        document = parse(query)
+    except GraphQLError as error:
+        entry = CachedDocument(errors=[error])
+    else:
+        errors = validate(schema, document, validation_rules, max_errors=max_errors)
+        entry = CachedDocument(document, errors, None if errors else measure_document(schema, document))
+
+    document_cache.set(key, entry)
+    return entry
+
+
+# --- 2. AUTOMATIC PERSISTED QUERIES ---
+
+PERSISTED_QUERY_TIMEOUT = getattr(settings, 'GRAPHQL_PERSISTED_QUERY_TIMEOUT', 60 * 60 * 24)
+PERSISTED_QUERY_PREFIX = 'graphql:apq:'
+
+
+class PersistedQueryNotFound(GraphQLError):
+    """Tells an APQ client to retry with the full query text (Apollo's wire format)."""
+
+    def __init__(self):
+        super().__init__('PersistedQueryNotFound', extensions={'code': 'PERSISTED_QUERY_NOT_FOUND'})
+
+
+def resolve_persisted_query(query, extensions):
+    """
+    Implements the Apollo automatic persisted query protocol.
+
+    Returns (query, digest). When the client sends both, the pair is verified and
+    stored in Django's cache for subsequent hash-only requests. When it sends only a
+    sha256Hash, query is returned as None and get_document() looks the text up only
+    if the parsed document is not already cached. Requests without the extension
+    pass through unchanged.
+    """
+    persisted = (extensions or {}).get('persistedQuery')
+    if not persisted:
+        return query, None
+
+    if persisted.get('version') != 1:
+        raise GraphQLError('Unsupported persisted query version.', extensions={'code': 'PERSISTED_QUERY_NOT_SUPPORTED'})
+
+    digest = persisted.get('sha256Hash')
+    if not isinstance(digest, str):
+        raise GraphQLError('Persisted query is missing its sha256Hash.')
+
+    if query:
+        if query_hash(query) != digest:
+            raise GraphQLError('Provided sha256Hash does not match query.')
+        cache.set(PERSISTED_QUERY_PREFIX + digest, query, PERSISTED_QUERY_TIMEOUT)
+    return query, digest
+
+
+def load_persisted_query(digest):
+    query = cache.get(PERSISTED_QUERY_PREFIX + digest)
+    if query is None:
+        raise PersistedQueryNotFound()
+    return query
@@ -0,0 +1,81 @@
+import atexit
+import logging
+import os
+import threading
+
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundDrain:
+    """
+    Calls `drain` from a daemon thread, started on first use, once this process
+    has recorded work for it: every `seconds`, or as soon as `batch` records are
+    waiting. The drain takes everything waiting, so one call covers them all.
+
+    A failed drain is logged and its records kept, so it is retried `seconds`
+    later; close_old_connections() drops a broken connection after every attempt.
+    At exit the thread is stopped, not drained one last time: the database may
+    be gone by then (a test run destroys it first), so what is left waits for the
+    next process.
+    """
+
+    def __init__(self, drain, seconds, batch, name):
+        self.drain = drain
+        self.seconds = seconds
+        self.batch = batch
+        self.name = name
+        self._after_fork()
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def recorded(self, count=1):
+        """Called when work for the drain was recorded, e.g. when the transaction recording it commits."""
+        with self._lock:
+            self._recorded += count
+            if self._thread is None and not self._stopped:
+                self._start()
+            due = self._recorded >= self.batch
+        if due:
+            self._due.set()
+
+    def _start(self):
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def _run(self):
+        while True:
+            self._due.wait(self.seconds)
+            self._due.clear()
+            with self._lock:
+                if self._stopped:
+                    return
+                recorded, self._recorded = self._recorded, 0
+            if not recorded:
+                continue
+            try:
+                self.drain()
+            except Exception:
+                logger.exception("%s failed; retrying in %s s.", self.name, self.seconds)
+                with self._lock:
+                    self._recorded += recorded
+            finally:
+                close_old_connections()
+
+    def stop(self):
+        """Stops the thread once a drain it is running finishes; nothing is drained after that."""
+        with self._lock:
+            self._stopped = True
+            thread = self._thread
+        self._due.set()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(self.seconds)
+
+    def _after_fork(self):
+        # The child starts with nothing recorded, and its own thread on first use.
+        self._recorded = 0
+        self._stopped = False
+        self._lock = threading.Lock()
+        self._due = threading.Event()
+        self._thread = None
@@ -0,0 +1,24 @@
+from asgiref.sync import sync_to_async
+
+
+def async_mutation(mutation_class):
+    """
+    Returns a subclass of `mutation_class` whose mutate() runs the original,
+    synchronous mutate() in a single sync_to_async hop.
+
+    Used by the async schema: Django's async ORM cannot run transaction.atomic()
+    blocks, so each mutation's transactional body executes in one worker thread,
+    while its arguments, output type and GraphQL name stay identical to the sync
+    schema's.
+    """
+    sync_mutate = sync_to_async(mutation_class.mutate)
+
+    async def mutate(cls, root, info, **kwargs):
+        return await sync_mutate(root, info, **kwargs)
+
+    meta = type('Meta', (), {'name': mutation_class._meta.name})
+    return type(
+        f"Async{mutation_class.__name__}",
+        (mutation_class,),
+        {'Meta': meta, 'mutate': classmethod(mutate), '__module__': mutation_class.__module__},
+    )
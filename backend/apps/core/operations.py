@@ -0,0 +1,19 @@
+from django.db import migrations
+
+
+# --- 1. POSTGRESQL-ONLY SCHEMA ---
+
+class AddPostgresIndex(migrations.AddIndex):
+    """
+    AddIndex for indexes only PostgreSQL can build (operator classes such as
+    text_pattern_ops or gin_trgm_ops, GIN, BRIN). On other databases, such as SQLite
+    in development, the index is recorded in the migration state but not created.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
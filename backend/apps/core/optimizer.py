@@ -0,0 +1,184 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from graphene.utils.str_converters import to_camel_case
+from graphql import FieldNode, FragmentSpreadNode, InlineFragmentNode, get_named_type
+
+
+# --- 1. SELECTION SET HELPERS ---
+
+def _iter_fields(info, selection_set, type_name):
+    """Yields the FieldNodes of a selection set, expanding fragments that apply to type_name."""
+    if selection_set is None:
+        return
+    for selection in selection_set.selections:
+        if isinstance(selection, FieldNode):
+            yield selection
+        elif isinstance(selection, FragmentSpreadNode):
+            fragment = info.fragments[selection.name.value]
+            if fragment.type_condition.name.value == type_name:
+                yield from _iter_fields(info, fragment.selection_set, type_name)
+        elif isinstance(selection, InlineFragmentNode):
+            condition = selection.type_condition
+            if condition is None or condition.name.value == type_name:
+                yield from _iter_fields(info, selection.selection_set, type_name)
+
+
+def _python_field_names(graphene_type):
+    """Maps GraphQL (camelCase) field names of a graphene type back to their Python names."""
+    return {
+        getattr(field, 'name', None) or to_camel_case(name): name
+        for name, field in graphene_type._meta.fields.items()
+    }
+
+
+def _model_of(graphql_type):
+    graphene_type = getattr(graphql_type, 'graphene_type', None)
+    meta = getattr(graphene_type, '_meta', None)
+    return graphene_type, getattr(meta, 'model', None)
+
+
+def _connection_nodes(info, field_nodes, connection_type):
+    """Returns the `node` FieldNodes and node type below a Relay connection's edges."""
+    edge_type = get_named_type(connection_type.fields['edges'].type)
+    node_type = get_named_type(edge_type.fields['node'].type)
+    node_fields = [
+        node
+        for parent in field_nodes
+        for edges in _iter_fields(info, parent.selection_set, connection_type.name)
+        if edges.name.value == 'edges'
+        for node in _iter_fields(info, edges.selection_set, edge_type.name)
+        if node.name.value == 'node'
+    ]
+    return node_fields, node_type
+
+
+def selection(info, field_nodes=None, graphql_type=None):
+    """
+    The fields selected below `field_nodes` of `graphql_type` (default: the field
+    being resolved), as {GraphQL field name: [FieldNode]}. A Relay connection is
+    looked through to the selection of its nodes.
+    """
+    if field_nodes is None:
+        field_nodes = info.field_nodes
+    if graphql_type is None:
+        graphql_type = get_named_type(info.return_type)
+    if 'edges' in getattr(graphql_type, 'fields', {}):
+        field_nodes, graphql_type = _connection_nodes(info, field_nodes, graphql_type)
+
+    selected = {}
+    for parent in field_nodes:
+        for node in _iter_fields(info, parent.selection_set, graphql_type.name):
+            selected.setdefault(node.name.value, []).append(node)
+    return selected
+
+
+# --- 2. PLAN BUILDING ---
+
+class QueryPlan:
+    """Collects the only()/select_related()/prefetch_related() arguments for one queryset."""
+
+    def __init__(self):
+        self.only = set()
+        self.select_related = set()
+        self.prefetch_related = []
+
+    def apply(self, queryset):
+        if self.select_related:
+            queryset = queryset.select_related(*sorted(self.select_related))
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        if self.only:
+            queryset = queryset.only(*sorted(self.only))
+        return queryset
+
+
+def _always_loaded(model):
+    """
+    The primary key and every forward foreign key column. The ids are a few bytes
+    each and are what custom resolvers and the DataLoaders key on, so deferring
+    them would turn one query into one per row.
+    """
+    names = [model._meta.pk.attname]
+    names += [
+        field.attname for field in model._meta.concrete_fields
+        if field.is_relation and (field.many_to_one or field.one_to_one)
+    ]
+    return names
+
+
+def _build_plan(info, plan, model, graphql_type, field_nodes, prefix=''):
+    graphene_type, _ = _model_of(graphql_type)
+    names = _python_field_names(graphene_type)
+
+    plan.only.update(prefix + name for name in _always_loaded(model))
+
+    selected = (
+        field for parent in field_nodes
+        for field in _iter_fields(info, parent.selection_set, graphql_type.name)
+    )
+    for node in selected:
+        gql_name = node.name.value
+        python_name = names.get(gql_name)
+        if python_name is None:
+            continue
+
+        try:
+            model_field = model._meta.get_field(python_name)
+        except FieldDoesNotExist:
+            # Computed fields (e.g. memberCount) resolve themselves.
+            continue
+
+        related_graphql_type = get_named_type(graphql_type.fields[gql_name].type)
+        _, related_model = _model_of(related_graphql_type)
+
+        if not model_field.is_relation:
+            plan.only.add(prefix + model_field.attname)
+
+        elif model_field.concrete and (model_field.many_to_one or model_field.one_to_one):
+            # Forward FK: join it and keep walking down the same query.
+            path = prefix + model_field.name
+            plan.select_related.add(path)
+            if related_model is not None:
+                _build_plan(info, plan, related_model, related_graphql_type, [node], path + '__')
+
+        elif related_model is not None:
+            # Reverse FK or M2M: a separate, itself optimized, prefetch query.
+            related_plan = QueryPlan()
+            _build_plan(info, related_plan, related_model, related_graphql_type, [node])
+            if model_field.one_to_many:
+                # The prefetch matches rows back to their parent through this column.
+                related_plan.only.add(model_field.field.attname)
+            related_queryset = related_plan.apply(related_model._default_manager.all())
+            plan.prefetch_related.append(Prefetch(prefix + model_field.name, queryset=related_queryset))
+
+
+# --- 3. PUBLIC ENTRY POINT ---
+
+def optimize(queryset, info, field_nodes=None, graphql_type=None, always_load=()):
+    """
+    Adds select_related/prefetch_related/only() to `queryset` based on the fields
+    the client selected below the current field, so list resolvers run a fixed
+    number of queries and unselected columns are never fetched.
+
+    Works for any resolver returning a queryset of a DjangoObjectType model.
+    field_nodes/graphql_type default to the field currently being resolved;
+    always_load names extra columns the caller itself needs (e.g. a cursor key).
+    """
+    if field_nodes is None:
+        field_nodes = info.field_nodes
+    if graphql_type is None:
+        graphql_type = get_named_type(info.return_type)
+
+    _, model = _model_of(graphql_type)
+    if model is None and 'edges' in getattr(graphql_type, 'fields', {}):
+        # Relay connection: optimize for the selection under edges { node { ... } }.
+        field_nodes, graphql_type = _connection_nodes(info, field_nodes, graphql_type)
+        _, model = _model_of(graphql_type)
+
+    if model is None or model is not queryset.model:
+        return queryset
+
+    plan = QueryPlan()
+    plan.only.update(always_load)
+    _build_plan(info, plan, model, graphql_type, field_nodes)
+    return plan.apply(queryset)
@@ -0,0 +1,143 @@
+from datetime import datetime
+from functools import partial
+from inspect import isawaitable
+from uuid import UUID
+
+import graphene
+from django.db.models import Q
+from graphql import GraphQLError
+from graphql_relay.utils import base64, unbase64
+
+from .dataloaders import is_async_execution
+from .optimizer import optimize
+
+CURSOR_PREFIX = 'keyset:'
+MAX_PAGE_SIZE = 100
+
+
+# --- 1. CURSOR ENCODING ---
+
+def encode_cursor(instance):
+    """Opaque cursor for a row of an AbstractBaseModel subclass: its (created_at, id) pair."""
+    return base64(f"{CURSOR_PREFIX}{instance.created_at.isoformat()}|{instance.pk}")
+
+
+def decode_cursor(cursor):
+    try:
+        value = unbase64(cursor)
+        if not value.startswith(CURSOR_PREFIX):
+            raise ValueError
+        created_at, pk = value[len(CURSOR_PREFIX):].split('|', 1)
+        return datetime.fromisoformat(created_at), UUID(pk)
+    except (ValueError, TypeError):
+        raise GraphQLError("Invalid pagination cursor.")
+
+
+# --- 2. KEYSET FILTERS ---
+
+# Rows are ordered newest first, matching AbstractBaseModel.Meta.ordering, with the
+# UUID as a tie breaker so the order is total and every cursor is unambiguous.
+KEYSET_ORDERING = ('-created_at', '-id')
+REVERSE_KEYSET_ORDERING = ('created_at', 'id')
+
+
+def _older_than(cursor):
+    created_at, pk = cursor
+    return Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+
+
+def _newer_than(cursor):
+    created_at, pk = cursor
+    return Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+
+
+# --- 3. CONNECTION FIELD ---
+
+class KeysetConnectionField(graphene.relay.ConnectionField):
+    """
+    Relay connection field paginating a queryset by (created_at, id) instead of
+    OFFSET. Each page is a single indexed range scan of at most page_size + 1 rows,
+    so fetching page 1,000 costs the same as fetching page 1.
+
+    The wrapped resolver must return a queryset of an AbstractBaseModel subclass.
+    `prepare(info, items)` is called with the rows of the page, e.g. to enqueue
+    DataLoader keys for the nested fields.
+    """
+
+    def __init__(self, type_, *args, max_page_size=MAX_PAGE_SIZE, prepare=None, **kwargs):
+        self.max_page_size = max_page_size
+        self.prepare = prepare
+        super().__init__(type_, *args, **kwargs)
+
+    def wrap_resolve(self, parent_resolver):
+        resolver = super(graphene.relay.ConnectionField, self).wrap_resolve(parent_resolver)
+        return partial(self.resolve_page, resolver)
+
+    def _page_size(self, requested):
+        if requested is None:
+            return self.max_page_size
+        if requested < 0:
+            raise GraphQLError("Pagination arguments 'first' and 'last' must be non-negative.")
+        return min(requested, self.max_page_size)
+
+    def resolve_page(self, resolver, root, info, first=None, last=None, after=None, before=None, **args):
+        queryset = resolver(root, info, **args)
+        page = dict(first=first, last=last, after=after, before=before)
+        if is_async_execution():
+            return self._aresolve_page(queryset, info, page)
+        if queryset is None:
+            return None
+
+        window = self._window(queryset, info, **page)
+        return self._connection(info, list(window), **page)
+
+    async def _aresolve_page(self, queryset, info, page):
+        if isawaitable(queryset):
+            queryset = await queryset
+        if queryset is None:
+            return None
+
+        window = self._window(queryset, info, **page)
+        return self._connection(info, [row async for row in window], **page)
+
+    def _window(self, queryset, info, first, last, after, before):
+        """The lazily evaluated slice of at most page_size + 1 rows for this page."""
+        if first is not None and last is not None:
+            raise GraphQLError("Provide either 'first' or 'last', not both.")
+
+        queryset = optimize(queryset, info, always_load=('created_at',))
+        if after:
+            queryset = queryset.filter(_older_than(decode_cursor(after)))
+        if before:
+            queryset = queryset.filter(_newer_than(decode_cursor(before)))
+
+        backwards = last is not None
+        page_size = self._page_size(last if backwards else first)
+        ordering = REVERSE_KEYSET_ORDERING if backwards else KEYSET_ORDERING
+
+        # One extra row tells us whether another page exists without a COUNT(*).
+        return queryset.order_by(*ordering)[:page_size + 1]
+
+    def _connection(self, info, rows, first, last, after, before):
+        connection_type = self.type
+        if isinstance(connection_type, graphene.NonNull):
+            connection_type = connection_type.of_type
+
+        backwards = last is not None
+        page_size = self._page_size(last if backwards else first)
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if backwards:
+            rows.reverse()
+
+        if self.prepare is not None:
+            self.prepare(info, rows)
+
+        edges = [connection_type.Edge(node=row, cursor=encode_cursor(row)) for row in rows]
+        page_info = graphene.relay.PageInfo(
+            start_cursor=edges[0].cursor if edges else None,
+            end_cursor=edges[-1].cursor if edges else None,
+            has_previous_page=has_more if backwards else bool(after),
+            has_next_page=bool(before) if backwards else has_more,
+        )
+        return connection_type(edges=edges, page_info=page_info)
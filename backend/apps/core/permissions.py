@@ -2,8 +2,7 @@ import graphene
 from graphql import GraphQLError
 from django.contrib.auth import get_user_model
 
-# Assume OrganizationMembership model is imported or referenced
-# from apps.organisations.models import OrganizationMembership
+from .authorization import get_authorization
 
 User = get_user_model()
 
@@ -88,26 +87,18 @@ class AllowOrgMember(BasePermission):
             # We cannot check membership if we don't know the organization ID
             return False, "The target organisation ID is missing from the input."
 
-        # NOTE: In a real Django application, we would decode the global ID
-        # and query the OrganizationMembership model directly.
-        # Placeholder logic using the assumed reverse relationship 'memberships'
         try:
-            from graphene.utils.resolve_only_args import get_global_id
             from graphql_relay.node.node import from_global_id
 
             # Decode the organization's global ID to its local ID
             org_type, local_id = from_global_id(organisation_id)
-
-            # Placeholder: Check if user has a membership for this local_id
-            is_member = user.memberships.filter(organisation_id=local_id).exists()
-
-            if is_member:
-                return True, ""
-            return False, "You are not a member of this organization."
-
         except Exception:
-            # Handle cases where the ID is invalid or models aren't set up yet
-            return False, "Invalid organization ID or database error during membership check."
+            return False, "Invalid organization ID."
+
+        # Answered from the per-request authorization context (one query per request).
+        if get_authorization(info).is_member_of(local_id):
+            return True, ""
+        return False, "You are not a member of this organization."
 
 
 class AllowOrgAdmin(BasePermission):
@@ -129,19 +120,12 @@ class AllowOrgAdmin(BasePermission):
 
             # Decode the organization's global ID to its local ID
             org_type, local_id = from_global_id(organisation_id)
-
-            # Placeholder: Check if user has an ADMIN or OWNER role for this local_id
-            is_admin = user.memberships.filter(
-                organisation_id=local_id,
-                role__in=['ADMIN', 'OWNER']
-            ).exists()
-
-            if is_admin:
-                return True, ""
-            return False, "Organization Admin privileges required for this action."
-
         except Exception:
-            return False, "Invalid organization ID or database error during admin check."
+            return False, "Invalid organization ID."
+
+        if get_authorization(info).is_org_admin_of(local_id):
+            return True, ""
+        return False, "Organization Admin privileges required for this action."
 
 
 # --- 2. AUTH MIXIN CLASSES ---
@@ -0,0 +1,143 @@
+import random
+
+MAX_LEVEL = 32
+# Each level keeps about a quarter of the nodes of the one below it.
+PROMOTION = 0.25
+
+
+class _Node:
+    __slots__ = ('key', 'value', 'forward', 'width')
+
+    def __init__(self, key, value, level):
+        self.key = key
+        self.value = value
+        # forward[i] is the next node on level i; width[i] how many level-0 steps it skips.
+        self.forward = [None] * level
+        self.width = [1] * level
+
+
+def _random_level():
+    level = 1
+    while level < MAX_LEVEL and random.random() < PROMOTION:
+        level += 1
+    return level
+
+
+class RankedSkipList:
+    """
+    Sorted keys with values, answering position queries in O(log n): how many keys
+    sort before a given one (count_less()), and which key sits at a position (at()).
+    Insertions and removals are O(log n) as well.
+
+    Every link records how many entries it skips, so walking from the head while
+    summing widths yields a node's position without visiting the nodes skipped.
+    """
+
+    def __init__(self):
+        self._head = _Node(None, None, MAX_LEVEL)
+        self._level = 1
+        self._size = 0
+
+    @classmethod
+    def from_sorted(cls, items):
+        """Builds the list in O(n) from (key, value) pairs already in ascending key order."""
+        skiplist = cls()
+        head = skiplist._head
+        last = [head] * MAX_LEVEL
+        last_position = [0] * MAX_LEVEL
+        position = 0
+        for key, value in items:
+            position += 1
+            level = _random_level()
+            node = _Node(key, value, level)
+            for i in range(level):
+                last[i].forward[i] = node
+                last[i].width[i] = position - last_position[i]
+                last[i], last_position[i] = node, position
+            skiplist._level = max(skiplist._level, level)
+        # Links of the last node on each level skip to the end of the list.
+        for i in range(MAX_LEVEL):
+            last[i].width[i] = position + 1 - last_position[i]
+        skiplist._size = position
+        return skiplist
+
+    def __len__(self):
+        return self._size
+
+    def _path(self, key):
+        """The rightmost node before `key` on every level, and its position."""
+        update = [self._head] * MAX_LEVEL
+        positions = [0] * MAX_LEVEL
+        node, position = self._head, 0
+        for i in range(self._level - 1, -1, -1):
+            while node.forward[i] is not None and node.forward[i].key < key:
+                position += node.width[i]
+                node = node.forward[i]
+            update[i], positions[i] = node, position
+        return update, positions
+
+    def insert(self, key, value=None):
+        update, positions = self._path(key)
+        level = _random_level()
+        if level > self._level:
+            for i in range(self._level, level):
+                update[i], positions[i] = self._head, 0
+                self._head.width[i] = self._size + 1
+            self._level = level
+
+        node = _Node(key, value, level)
+        position = positions[0] + 1
+        for i in range(level):
+            previous = update[i]
+            node.forward[i] = previous.forward[i]
+            previous.forward[i] = node
+            # The previous link is split around the new node.
+            node.width[i] = previous.width[i] - (position - positions[i]) + 1
+            previous.width[i] = position - positions[i]
+        for i in range(level, self._level):
+            update[i].width[i] += 1
+        self._size += 1
+
+    def remove(self, key):
+        """Removes `key`, returning its value; raises KeyError if it is absent."""
+        update, _ = self._path(key)
+        node = update[0].forward[0]
+        if node is None or node.key != key:
+            raise KeyError(key)
+        for i in range(self._level):
+            if update[i].forward[i] is node:
+                update[i].width[i] += node.width[i] - 1
+                update[i].forward[i] = node.forward[i]
+            else:
+                update[i].width[i] -= 1
+        while self._level > 1 and self._head.forward[self._level - 1] is None:
+            self._level -= 1
+        self._size -= 1
+        return node.value
+
+    def count_less(self, key):
+        """The number of keys sorting strictly before `key`."""
+        return self._path(key)[1][0]
+
+    def at(self, index):
+        """The node at 0-based position `index`."""
+        if not 0 <= index < self._size:
+            raise IndexError(index)
+        node, position = self._head, 0
+        target = index + 1
+        for i in range(self._level - 1, -1, -1):
+            while node.forward[i] is not None and position + node.width[i] <= target:
+                position += node.width[i]
+                node = node.forward[i]
+        return node
+
+    def slice(self, start, count):
+        """Up to `count` (key, value) pairs from position `start`: O(log n + count)."""
+        if count <= 0 or start >= self._size:
+            return []
+        node = self.at(max(start, 0))
+        items = []
+        while node is not None and len(items) < count:
+            items.append((node.key, node.value))
+            node = node.forward[0]
+        return items
@@ -0,0 +1,199 @@
+import math
+import threading
+import time
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from graphql import GraphQLError
+
+# {root field: {scope: "N/s|m|h"}}. Scopes: "ip" (the client address), "username"
+# (the mutation's `username` argument, case-insensitive) and "user" (the authenticated
+# user, checked by the resolver itself, see check_user()). Each scope is its own bucket
+# per operation, e.g. tokenAuth allows 10 attempts a minute on one username however
+# many addresses they come from.
+RATE_LIMITS = getattr(settings, 'GRAPHQL_RATE_LIMITS', {
+    'tokenAuth': {'ip': '120/m', 'username': '10/m'},
+    'registerUser': {'ip': '30/h'},
+    'refreshToken': {'ip': '120/m'},
+    'recordGameScore': {'user': '30/m'},
+})
+# "local" keeps buckets in this process; "cache" shares them through the Django cache.
+BACKEND = getattr(settings, 'GRAPHQL_RATE_LIMIT_BACKEND', 'local')
+# META key of a header the trusted reverse proxy sets to the client address, e.g.
+# "HTTP_X_FORWARDED_FOR" (its last entry is used). None uses REMOTE_ADDR.
+IP_HEADER = getattr(settings, 'GRAPHQL_RATE_LIMIT_IP_HEADER', None)
+
+CACHE_PREFIX = 'ratelimit:'
+_PERIODS = {'s': 1, 'm': 60, 'h': 3600}
+
+
+class Limit:
+    """
+    A token bucket of `capacity` tokens refilled over `period` seconds, stored as
+    GCRA's theoretical arrival time: one float per key, updated in O(1).
+    """
+
+    __slots__ = ('scope', 'text', 'interval', 'tolerance')
+
+    def __init__(self, scope, text):
+        count, _, unit = text.partition('/')
+        capacity, period = int(count), _PERIODS[unit]
+        self.scope = scope
+        self.text = text
+        self.interval = period / capacity  # seconds per token
+        self.tolerance = period            # a full bucket allows `capacity` at once
+
+    def advance(self, arrival, now):
+        """Returns (new arrival time, 0) if a token is available, else (None, seconds until one is)."""
+        arrival = max(arrival or now, now) + self.interval
+        wait = arrival - self.tolerance - now
+        if wait > 0:
+            return None, wait
+        return arrival, 0.0
+
+
+def _parse(limits):
+    return {
+        field: tuple(Limit(scope, text) for scope, text in scopes.items())
+        for field, scopes in limits.items()
+    }
+
+
+# --- 1. BACKENDS ---
+
+class LocalBuckets:
+    """
+    Buckets in a dict guarded by one lock: a few dict operations per request.
+    The dict is kept in least recently hit order, so past `max_keys` buckets the
+    full ones go first and then the longest idle, never the active ones.
+    """
+
+    clock = staticmethod(time.monotonic)
+
+    def __init__(self, max_keys=100_000):
+        self.max_keys = max_keys
+        self._arrivals = {}
+        self._lock = threading.Lock()
+
+    def hit(self, key, limit):
+        now = self.clock()
+        with self._lock:
+            # Popped and reinserted, throttled or not, to move the key to the end.
+            previous = self._arrivals.pop(key, None)
+            arrival, wait = limit.advance(previous, now)
+            self._arrivals[key] = previous if arrival is None else arrival
+            if len(self._arrivals) > self.max_keys:
+                self._prune(now)
+        return wait
+
+    def _prune(self, now):
+        # Buckets whose arrival time has passed are full again: forgetting them changes nothing.
+        self._arrivals = {key: arrival for key, arrival in self._arrivals.items() if arrival > now}
+        excess = len(self._arrivals) - self.max_keys * 9 // 10
+        if excess > 0:
+            # Still too many live buckets: drop the least recently hit, down to 90% so
+            # the next prune is max_keys / 10 new keys away.
+            for key in list(islice(self._arrivals, excess)):
+                del self._arrivals[key]
+
+    def clear(self):
+        with self._lock:
+            self._arrivals.clear()
+
+
+class CacheBuckets:
+    """
+    Buckets in the Django cache, shared by every process using it. The read and
+    write are not atomic, so concurrent hits from different processes may both
+    pass; the limit holds to within that overlap.
+    """
+
+    clock = staticmethod(time.time)
+
+    def hit(self, key, limit):
+        now = self.clock()
+        cache_key = CACHE_PREFIX + key
+        arrival, wait = limit.advance(cache.get(cache_key), now)
+        if arrival is not None:
+            cache.set(cache_key, arrival, math.ceil(arrival - now) + 1)
+        return wait
+
+    def clear(self):
+        pass
+
+
+limits = _parse(RATE_LIMITS)
+buckets = CacheBuckets() if BACKEND == 'cache' else LocalBuckets()
+
+
+# --- 2. GRAPHENE MIDDLEWARE ---
+
+def client_ip(request):
+    if IP_HEADER:
+        forwarded = request.META.get(IP_HEADER)
+        if forwarded:
+            return forwarded.rsplit(',', 1)[-1].strip()
+    return request.META.get('REMOTE_ADDR') or 'unknown'
+
+
+def _scope_value(scope, info, args):
+    if scope == 'ip':
+        return client_ip(info.context)
+    if scope == 'username':
+        username = args.get('username')
+        return username.lower() if isinstance(username, str) else None
+    if scope == 'user':
+        # See check_user().
+        return None
+    raise ValueError(f"Unknown rate limit scope '{scope}'.")
+
+
+class RateLimitMiddleware:
+    """
+    Graphene middleware throttling the root fields in GRAPHQL_RATE_LIMITS (sign-in,
+    registration, token refresh) with token buckets per operation and scope.
+
+    A throttled call fails with a GraphQL error whose extensions carry
+    code RATE_LIMITED and retryAfter (seconds). Other fields cost one dict lookup.
+    """
+
+    def resolve(self, next, root, info, **args):
+        if info.path.prev is None:
+            field_limits = limits.get(info.field_name)
+            if field_limits is not None:
+                check(info, field_limits, args)
+        return next(root, info, **args)
+
+
+def check(info, field_limits, args):
+    for limit in field_limits:
+        value = _scope_value(limit.scope, info, args)
+        if value is not None:
+            _hit(info, limit, value)
+
+
+def check_user(info):
+    """
+    Applies the field's "user" limits to info.context.user. Called by resolvers
+    once the user is authenticated: RateLimitMiddleware runs before the JWT
+    middleware has done so.
+    """
+    for limit in limits.get(info.field_name, ()):
+        if limit.scope == 'user':
+            _hit(info, limit, str(info.context.user.pk))
+
+
+def _hit(info, limit, value):
+    wait = buckets.hit(f"{info.field_name}:{limit.scope}:{value}", limit)
+    if wait:
+        retry_after = math.ceil(wait)
+        raise GraphQLError(
+            f"Too many {info.field_name} requests; retry in {retry_after} second(s).",
+            extensions={
+                'code': 'RATE_LIMITED',
+                'retryAfter': retry_after,
+                'scope': limit.scope,
+                'limit': limit.text,
+            },
+        )
@@ -0,0 +1,137 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from graphql import OperationType
+
+from . import caches
+
+PRIMARY = DEFAULT_DB_ALIAS
+PIN_PREFIX = 'db:pinned:'
+# How long a user's reads stay on the primary after a mutation; should exceed replica lag.
+PIN_SECONDS = getattr(settings, 'DATABASE_REPLICA_PIN_SECONDS', 5)
+
+# The alias GraphQL reads go to in the current request. None outside a GraphQL
+# operation (admin, management commands, ...), where everything uses the primary.
+_read_database = ContextVar('read_database', default=None)
+_UNDECIDED = object()
+
+
+def replicas():
+    return list(getattr(settings, 'DATABASE_REPLICAS', ()))
+
+
+# --- 1. READ-YOUR-WRITES PINNING ---
+# Pins live in the Django cache, so they only hold across server processes when the
+# cache is shared (apps.core.caches). Without one, a later request served by another
+# process could not see the pin, so queries stay on the primary (see _choose()).
+
+def _pin_key(user):
+    return f"{PIN_PREFIX}{user.pk}"
+
+
+def pin_to_primary(user):
+    """Keeps `user`'s reads on the primary for PIN_SECONDS, until replicas caught up with their write."""
+    if user is not None and user.is_authenticated and replicas():
+        cache.set(_pin_key(user), True, PIN_SECONDS)
+
+
+async def apin_to_primary(user):
+    if user is not None and user.is_authenticated and replicas():
+        await cache.aset(_pin_key(user), True, PIN_SECONDS)
+
+
+def _is_pinned(user):
+    return user is not None and user.is_authenticated and cache.get(_pin_key(user)) is not None
+
+
+async def _ais_pinned(user):
+    return user is not None and user.is_authenticated and await cache.aget(_pin_key(user)) is not None
+
+
+# --- 2. CHOOSING THE DATABASE OF AN OPERATION ---
+
+def _choose(operation, pinned):
+    aliases = replicas()
+    if operation != OperationType.QUERY or pinned or not aliases or not caches.is_shared():
+        return PRIMARY
+    # One replica per request, so all of its reads see the same snapshot.
+    return random.choice(aliases)
+
+
+def database_for(operation, user):
+    """The alias a GraphQL operation of `user` reads from: mutations always use the primary."""
+    return _choose(operation, operation == OperationType.QUERY and _is_pinned(user))
+
+
+async def adatabase_for(operation, user):
+    return _choose(operation, operation == OperationType.QUERY and await _ais_pinned(user))
+
+
+@contextmanager
+def routing_scope(database=_UNDECIDED):
+    """
+    Scopes the read database to one GraphQL operation. The view enters it around
+    execution; when `database` is not given, DatabaseRoutingMiddleware decides on
+    the first root field, once authentication has run.
+    """
+    token = _read_database.set(database)
+    try:
+        yield
+    finally:
+        _read_database.reset(token)
+
+
+def current_read_database():
+    database = _read_database.get()
+    return database if isinstance(database, str) else None
+
+
+# --- 3. ROUTER AND GRAPHENE MIDDLEWARE ---
+
+class PrimaryReplicaRouter:
+    """
+    Sends the reads of GraphQL query operations to a replica from
+    settings.DATABASE_REPLICAS, and everything else to the primary. Replicas are
+    only read when the cache holding read-your-writes pins is shared by every
+    process (REDIS_URL).
+
+    Writes always go to the primary, even for instances read from a replica.
+    Replicas are copies of the primary, so migrations only run on the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        return current_read_database()
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in replicas():
+            return False
+        return None
+
+
+class DatabaseRoutingMiddleware:
+    """
+    Graphene middleware that picks the read database of the operation when its
+    first root field resolves: a replica for queries, the primary for mutations
+    and for users pinned by a recent write (see pin_to_primary()).
+
+    Must be listed before graphql_jwt's JSONWebTokenMiddleware in
+    GRAPHENE["MIDDLEWARE"], so it runs inside it and sees the authenticated user.
+    """
+
+    def resolve(self, next, root, info, **args):
+        if info.path.prev is None and _read_database.get() is _UNDECIDED:
+            _read_database.set(database_for(info.operation.operation, info.context.user))
+        return next(root, info, **args)
@@ -0,0 +1,481 @@
+import bisect
+import json
+import random
+import tempfile
+import threading
+import uuid
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError, connection
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from graphql import OperationType, parse
+from graphql_jwt.shortcuts import get_token
+from graphql_relay import to_global_id
+from graphql_relay.utils import base64
+
+from apps.organisations.models import Organisation, OrganisationMembership
+from apps.users.schema import UserQuery
+from backend.schema import schema
+
+from . import complexity, documents, ratelimit, routers
+from .batches import apply_isolated
+from .drains import BackgroundDrain
+from .views import AsyncGraphQLView
+from .ranking import RankedSkipList
+
+# A cache every process would see (a directory), standing in for Redis.
+SHARED_CACHE = {'default': {
+    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+    'LOCATION': tempfile.mkdtemp(),
+}}
+
+
+# --- 1. READ REPLICA ROUTING ---
+
+@override_settings(DATABASE_REPLICAS=['replica_0'])
+class ReplicaRoutingTests(SimpleTestCase):
+
+    def setUp(self):
+        self.user = get_user_model()(pk=uuid.uuid4())
+
+    @override_settings(CACHES=SHARED_CACHE)
+    def test_queries_read_from_a_replica_until_their_author_writes(self):
+        cache.clear()
+        self.assertEqual(routers.database_for(OperationType.QUERY, self.user), 'replica_0')
+        self.assertEqual(routers.database_for(OperationType.MUTATION, self.user), routers.PRIMARY)
+
+        routers.pin_to_primary(self.user)
+
+        self.assertEqual(routers.database_for(OperationType.QUERY, self.user), routers.PRIMARY)
+
+    def test_process_local_cache_keeps_reads_on_the_primary(self):
+        # Another process could not see this process's pins.
+        self.assertEqual(routers.database_for(OperationType.QUERY, self.user), routers.PRIMARY)
+
+
+# --- 2. RATE LIMITS ---
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class LocalBucketTests(SimpleTestCase):
+
+    def setUp(self):
+        self.limit = ratelimit.Limit('ip', '3/m')
+        self.buckets = ratelimit.LocalBuckets(max_keys=10)
+        self.buckets.clock = FakeClock()
+
+    def hits(self, key, count):
+        return [self.buckets.hit(key, self.limit) for _ in range(count)]
+
+    def test_full_bucket_allows_a_burst_then_refills_one_token_per_interval(self):
+        self.assertEqual(self.hits('a', 3), [0, 0, 0])
+        self.assertAlmostEqual(self.buckets.hit('a', self.limit), 20)
+
+        self.buckets.clock.now += 20
+
+        self.assertEqual(self.hits('a', 2), [0, 20])
+
+    def test_keys_are_limited_independently(self):
+        self.hits('a', 3)
+
+        self.assertEqual(self.hits('b', 1), [0])
+        self.assertGreater(self.buckets.hit('a', self.limit), 0)
+
+    def test_prune_forgets_full_buckets_first(self):
+        self.hits('busy', 3)
+        self.buckets.clock.now += 60
+        self.hits('old', 1)  # full again by the time of the prune
+        self.buckets.clock.now += 60
+        for number in range(10):
+            self.hits(f'key{number}', 1)
+
+        self.assertNotIn('old', self.buckets._arrivals)
+        self.assertLessEqual(len(self.buckets._arrivals), 10)
+
+    def test_prune_keeps_recently_hit_buckets(self):
+        self.hits('busy', 3)
+        for number in range(10):
+            self.hits(f'key{number}', 1)
+            self.buckets.hit('busy', self.limit)
+
+        self.assertEqual(len(self.buckets._arrivals), 9)
+        self.assertIn('busy', self.buckets._arrivals)
+        self.assertGreater(self.buckets.hit('busy', self.limit), 0)
+
+
+TOKEN_AUTH = json.dumps({'query': '''
+    mutation { tokenAuth(username: "Alice", password: "wrong") { token } }
+'''})
+
+
+class RateLimitMiddlewareTests(TestCase):
+
+    def setUp(self):
+        buckets = ratelimit.LocalBuckets()
+        buckets.clock = FakeClock()
+        for patcher in (
+            mock.patch.object(ratelimit, 'buckets', buckets),
+            mock.patch.object(ratelimit, 'limits', ratelimit._parse({'tokenAuth': {'username': '2/m'}})),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def sign_in(self):
+        response = self.client.post('/graphql/', TOKEN_AUTH, content_type='application/json')
+        return response.json()['errors'][0]
+
+    def test_throttled_sign_in_reports_when_to_retry(self):
+        self.assertNotIn('extensions', self.sign_in())
+        self.sign_in()
+
+        error = self.sign_in()
+
+        self.assertEqual(error['extensions'], {
+            'code': 'RATE_LIMITED', 'retryAfter': 30, 'scope': 'username', 'limit': '2/m',
+        })
+
+
+# --- 3. RANKED SKIP LIST ---
+
+class RankedSkipListTests(SimpleTestCase):
+
+    def assertMatches(self, skiplist, keys):
+        self.assertEqual(len(skiplist), len(keys))
+        self.assertEqual([key for key, _ in skiplist.slice(0, len(keys) + 1)], keys)
+        for index, key in enumerate(keys):
+            self.assertEqual(skiplist.at(index).key, key)
+            self.assertEqual(skiplist.count_less(key), index)
+
+    def test_matches_a_sorted_list_through_inserts_and_removals(self):
+        rng = random.Random(0)
+        keys = sorted(rng.sample(range(10_000), 300))
+        skiplist = RankedSkipList.from_sorted((key, str(key)) for key in keys)
+        self.assertMatches(skiplist, keys)
+
+        for _ in range(500):
+            if keys and rng.random() < 0.5:
+                key = keys.pop(rng.randrange(len(keys)))
+                self.assertEqual(skiplist.remove(key), str(key))
+            else:
+                key = rng.randrange(10_000)
+                if key not in keys:
+                    bisect.insort(keys, key)
+                    skiplist.insert(key, str(key))
+
+        self.assertMatches(skiplist, keys)
+        self.assertEqual(skiplist.count_less(10_000), len(keys))
+
+    def test_slices_and_missing_keys(self):
+        skiplist = RankedSkipList.from_sorted((key, None) for key in range(10))
+
+        self.assertEqual([key for key, _ in skiplist.slice(8, 5)], [8, 9])
+        self.assertEqual(skiplist.slice(10, 5), [])
+        with self.assertRaises(KeyError):
+            skiplist.remove(10)
+        with self.assertRaises(IndexError):
+            skiplist.at(10)
+
+
+# --- 4. ISOLATED BATCHES ---
+
+class ApplyIsolatedTests(TestCase):
+
+    def test_bad_rows_are_set_aside_and_the_rest_applied(self):
+        applied, set_aside = [], []
+
+        def apply(rows):
+            if 'bad' in rows:
+                raise IntegrityError('bad row')
+            applied.extend(rows)
+
+        result = apply_isolated(['a', 'bad', 'b'], apply, lambda row, error: set_aside.append(row))
+
+        self.assertEqual((result, applied, set_aside), (['a', 'b'], ['a', 'b'], ['bad']))
+
+    def test_other_errors_fail_the_batch(self):
+        def apply(rows):
+            raise ConnectionError('database gone')
+
+        with self.assertRaises(ConnectionError):
+            apply_isolated(['a', 'b'], apply, self.fail)
+
+
+# --- 5. QUERY OPTIMIZER ---
+
+def run_query(query, user, **variables):
+    request = RequestFactory().post('/graphql/')
+    request.user = user
+    with CaptureQueriesContext(connection) as queries:
+        result = schema.execute(query, variable_values=variables, context_value=request)
+    return result, [query['sql'] for query in queries]
+
+
+class OptimizerTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.admin = User.objects.create(username='admin', email='admin@example.com')
+        self.organisation = Organisation.objects.create(name='Org', slug='org')
+        OrganisationMembership.objects.create(user=self.admin, organisation=self.organisation, is_org_admin=True)
+        for number in range(3):
+            member = User.objects.create(username=f'member{number}', email=f'member{number}@example.com')
+            OrganisationMembership.objects.create(user=member, organisation=self.organisation)
+        self.organisation_id = to_global_id('OrganisationType', self.organisation.pk)
+
+    def test_only_selected_columns_are_read(self):
+        for query in ('query { users { username } }', 'query { usersConnection(first: 2) { edges { node { username } } } }'):
+            result, statements = run_query(query, self.admin)
+
+            self.assertIsNone(result.errors)
+            [select] = [sql for sql in statements if 'FROM "users_user"' in sql]
+            self.assertIn('"username"', select)
+            self.assertNotIn('"email"', select)
+
+    def test_selected_foreign_keys_are_joined(self):
+        for selection in ('user { username }', '... on OrganisationMembershipType { user { username } }'):
+            result, statements = run_query(
+                f'query ($id: ID!) {{ allMemberships(organisationId: $id) {{ isOrgAdmin {selection} }} }}',
+                self.admin, id=self.organisation_id,
+            )
+
+            self.assertIsNone(result.errors)
+            self.assertEqual(len(result.data['allMemberships']), 4)
+            [select] = [sql for sql in statements if 'FROM "organisations_organisationmembership"' in sql]
+            self.assertIn('JOIN "users_user"', select)
+            # ... so the loaders have no user left to read.
+            self.assertFalse([sql for sql in statements if sql.startswith('SELECT "users_user"')])
+
+
+# --- 6. KEYSET PAGINATION ---
+
+USERS_PAGE = '''
+    query ($first: Int, $after: String, $last: Int, $before: String) {
+        usersConnection(first: $first, after: $after, last: $last, before: $before) {
+            edges { node { username } }
+            pageInfo { hasNextPage hasPreviousPage startCursor endCursor }
+        }
+    }
+'''
+
+
+class KeysetPaginationTests(TestCase):
+
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create(username='user0', email='user0@example.com')
+        for number in range(1, 7):
+            User.objects.create(username=f'user{number}', email=f'user{number}@example.com')
+        # Rows created at the same moment are ordered by id.
+        User.objects.filter(username__in=['user2', 'user3', 'user4']).update(created_at=timezone.now())
+        self.newest_first = list(User.objects.order_by('-created_at', '-id').values_list('username', flat=True))
+
+    def page(self, **variables):
+        result, _ = run_query(USERS_PAGE, self.user, **variables)
+        connection = (result.data or {}).get('usersConnection')
+        return result.errors, connection and (
+            [edge['node']['username'] for edge in connection['edges']], connection['pageInfo'],
+        )
+
+    def test_pages_stay_put_when_rows_are_inserted(self):
+        seen, after = [], None
+        while True:
+            errors, (usernames, page_info) = self.page(first=3, after=after)
+            self.assertIsNone(errors)
+            seen += usernames
+            if not page_info['hasNextPage']:
+                break
+            after = page_info['endCursor']
+            get_user_model().objects.create(username=f'new{len(seen)}', email=f'new{len(seen)}@example.com')
+
+        self.assertEqual(seen, self.newest_first)
+
+    def test_backwards_pages(self):
+        _, (usernames, page_info) = self.page(last=2)
+        self.assertEqual(usernames, self.newest_first[-2:])
+        self.assertTrue(page_info['hasPreviousPage'])
+
+        _, (usernames, _) = self.page(last=3, before=page_info['startCursor'])
+        self.assertEqual(usernames, self.newest_first[-5:-2])
+
+    def test_page_size_bounds(self):
+        field = UserQuery._meta.fields['users_connection']
+        with mock.patch.object(field, 'max_page_size', 2):
+            _, (usernames, page_info) = self.page(first=1000)
+            self.assertEqual((len(usernames), page_info['hasNextPage']), (2, True))
+            _, (usernames, _) = self.page()
+            self.assertEqual(len(usernames), 2)
+
+        self.assertEqual(self.page(first=0)[1][0], [])
+        self.assertIn("must be non-negative", self.page(first=-1)[0][0].message)
+        self.assertIn("not both", self.page(first=1, last=1)[0][0].message)
+        for cursor in ('garbage', base64('audit:2026-01-01T00:00:00|1')):
+            self.assertEqual(self.page(first=1, after=cursor)[0][0].message, "Invalid pagination cursor.")
+
+
+# --- 7. DOCUMENT CACHE AND PERSISTED QUERIES ---
+
+HELLO = 'query { hello }'
+
+
+class PersistedQueryTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        documents.document_cache.clear()
+
+    def post(self, query=None, digest=None, version=1):
+        body = {}
+        if query is not None:
+            body['query'] = query
+        if digest is not None:
+            body['extensions'] = {'persistedQuery': {'version': version, 'sha256Hash': digest}}
+        return self.client.post('/graphql/', body, content_type='application/json').json()
+
+    def test_parsed_documents_are_reused(self):
+        with mock.patch.object(documents, 'parse', wraps=documents.parse) as parse:
+            self.assertEqual(self.post(HELLO)['data'], {'hello': 'Hello, world!'})
+            self.post(HELLO)
+
+        parse.assert_called_once()
+        self.assertEqual((documents.document_cache.hits, documents.document_cache.misses), (1, 1))
+
+    def test_hash_miss_then_register_then_hit(self):
+        digest = documents.query_hash(HELLO)
+
+        [error] = self.post(digest=digest)['errors']
+        self.assertEqual(error['extensions']['code'], 'PERSISTED_QUERY_NOT_FOUND')
+
+        self.assertEqual(self.post(HELLO, digest)['data'], {'hello': 'Hello, world!'})
+        documents.document_cache.clear()
+        self.assertEqual(self.post(digest=digest)['data'], {'hello': 'Hello, world!'})
+
+    def test_bad_hashes_are_rejected(self):
+        self.assertEqual(self.post(HELLO, '0' * 64)['errors'][0]['message'], 'Provided sha256Hash does not match query.')
+        self.assertEqual(self.post(HELLO, documents.query_hash(HELLO), version=2)['errors'][0]['extensions']['code'],
+                         'PERSISTED_QUERY_NOT_SUPPORTED')
+        self.assertEqual(self.post(digest='0' * 64)['errors'][0]['extensions']['code'], 'PERSISTED_QUERY_NOT_FOUND')
+        self.assertIsNone(cache.get(documents.PERSISTED_QUERY_PREFIX + '0' * 64))
+
+
+# --- 8. ASYNC VIEW ---
+
+class AsyncViewTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create(username='alice', email='alice@example.com')
+        self.organisation = Organisation.objects.create(name='Org', slug='org')
+        OrganisationMembership.objects.create(user=self.user, organisation=self.organisation, is_org_admin=True)
+
+    async def test_root_fields_resolving_together_share_one_authorization_load(self):
+        query = '''
+            query ($id: ID!) {
+                organisation(id: $id) { name memberships { user { username } } }
+                leaderboard(organisationId: $id) { total }
+                myMemberships { isOrgAdmin }
+            }
+        '''
+        request = AsyncRequestFactory().post(
+            '/graphql/', {'query': query, 'variables': {'id': to_global_id('OrganisationType', self.organisation.pk)}},
+            content_type='application/json', headers={'Authorization': f'JWT {get_token(self.user)}'},
+        )
+
+        response = await AsyncGraphQLView.as_view()(request)
+
+        self.assertEqual(json.loads(response.content), {'data': {
+            'organisation': {'name': 'Org', 'memberships': [{'user': {'username': 'alice'}}]},
+            'leaderboard': {'total': 1},
+            'myMemberships': [{'isOrgAdmin': True}],
+        }, 'extensions': mock.ANY})
+
+
+# --- 9. QUERY COST ---
+
+def cost(query):
+    [measured] = complexity.measure_document(schema.graphql_schema, parse(query)).values()
+    return measured.cost
+
+
+class QueryCostTests(TestCase):
+
+    def setUp(self):
+        documents.document_cache.clear()
+
+    def test_limited_lists_are_priced_from_their_argument(self):
+        weight = complexity.FIELD_WEIGHTS['Query.searchUsers']
+        search = 'query ($first: Int) {{ searchUsers(prefix: "al"{}) {{ username }} }}'
+
+        self.assertEqual(cost(search.format(', first: 5')), weight + 5)
+        self.assertEqual(cost(search.format('')), weight + 10)        # the argument's default
+        self.assertEqual(cost(search.format(', first: 1000')), weight + 50)
+        self.assertEqual(cost(search.format(', first: $first')), weight + 50)
+        self.assertEqual(cost('query { leaderboard(organisationId: "x") { aroundMe(neighbours: 3) { rank } } }'), 1 + 7)
+        self.assertEqual(cost('query { leaderboard(organisationId: "x") { top(first: 1000) { rank } } }'), 1 + 100)
+
+    def test_over_budget_documents_are_rejected_before_execution(self):
+        query = 'query { users { username } }'
+        self.assertGreater(cost(query), 500)
+
+        with mock.patch.object(complexity, 'MAX_QUERY_COST', 500), CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/graphql/', {'query': query}, content_type='application/json').json()
+
+        [error] = response['errors']
+        self.assertEqual(error['extensions']['code'], 'QUERY_TOO_COMPLEX')
+        self.assertNotIn('data', response)
+        self.assertFalse([query for query in queries if 'FROM "users_user"' in query['sql']])
+
+
+# --- 10. BACKGROUND DRAINS ---
+
+class BackgroundDrainTests(SimpleTestCase):
+
+    def background(self, drain, seconds=60, batch=2):
+        background = BackgroundDrain(drain, seconds, batch, 'test-drain')
+        self.addCleanup(background.stop)
+        return background
+
+    def test_drains_once_a_batch_is_recorded(self):
+        drained = threading.Event()
+        background = self.background(drained.set)
+
+        background.recorded()
+        self.assertFalse(drained.wait(0.2))
+        background.recorded()
+        self.assertTrue(drained.wait(5))
+
+    def test_a_failed_drain_keeps_its_records_for_the_retry(self):
+        drained, calls = threading.Event(), []
+
+        def drain():
+            calls.append(None)
+            if len(calls) == 1:
+                raise ConnectionError('database gone')
+            drained.set()
+
+        background = self.background(drain, seconds=0.05, batch=1)
+        with self.assertLogs('apps.core.drains', 'ERROR'):
+            background.recorded()
+            self.assertTrue(drained.wait(5))
+        self.assertEqual(len(calls), 2)
+
+    def test_stopping_drains_nothing_more(self):
+        drain = mock.Mock()
+        background = self.background(drain, batch=100)
+        background.recorded()
+
+        background.stop()
+        background.recorded(100)
+
+        self.assertFalse(background._thread.is_alive())
+        drain.assert_not_called()
@@ -0,0 +1,328 @@
+import json
+from inspect import isawaitable
+
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection, transaction
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseNotAllowed
+from django.utils.translation import gettext as _
+from django.views import View
+from graphene_django.constants import MUTATION_ERRORS_FLAG
+from graphene_django.settings import graphene_settings
+from graphene_django.utils.utils import set_rollback
+from graphene_django.views import GraphQLView, HttpError
+from graphql import (
+    ExecutionResult,
+    GraphQLError,
+    OperationType,
+    execute,
+    get_operation_ast,
+    specified_rules,
+    validate_schema,
+)
+from graphql_jwt.exceptions import JSONWebTokenError
+from graphql_jwt.middleware import JSONWebTokenMiddleware
+from graphql_jwt.utils import get_http_authorization
+
+from apps.users.authentication import aget_user_by_token
+
+from .complexity import QueryCostRule
+from .documents import get_document, resolve_persisted_query
+from .routers import adatabase_for, apin_to_primary, pin_to_primary, routing_scope
+
+
+def _is_mutation(operation_ast):
+    return operation_ast is not None and operation_ast.operation == OperationType.MUTATION
+
+
+def with_cost(result, cost):
+    """Reports the executed operation's static cost in the response extensions."""
+    if cost is not None:
+        result.extensions = {**(result.extensions or {}), 'cost': cost.as_extension()}
+    return result
+
+
+class CachedGraphQLView(GraphQLView):
+    """
+    GraphQLView that serves parsed-and-validated documents from an LRU cache and
+    supports Apollo automatic persisted queries (APQ).
+
+    Execution is identical to graphene-django's view; only the parse/validate step
+    is replaced by apps.core.documents.get_document(). Validation includes the
+    query cost and depth budget (apps.core.complexity.QueryCostRule), and each
+    response reports the operation's cost under `extensions.cost`.
+
+    Reads are routed per operation (apps.core.routers): queries may go to a read
+    replica, and after a mutation its author is pinned to the primary for a while.
+    """
+
+    validation_rules = (*specified_rules, QueryCostRule)
+
+    _schema_validated = set()
+
+    @staticmethod
+    def get_extensions(request, data):
+        extensions = request.GET.get('extensions') or data.get('extensions')
+        if extensions and isinstance(extensions, str):
+            try:
+                extensions = json.loads(extensions)
+            except ValueError:
+                raise HttpError(HttpResponseBadRequest("Extensions are invalid JSON."))
+        return extensions
+
+    def prepare_document(self, request, data, query, operation_name, show_graphiql=False):
+        """
+        Resolves APQ, then fetches the cached (parsed, validated) document.
+
+        Returns (document, operation_ast, cost), or an ExecutionResult carrying the
+        errors that must be returned instead, or None when GraphiQL should be rendered.
+        """
+        try:
+            query, digest = resolve_persisted_query(query, self.get_extensions(request, data))
+        except GraphQLError as error:
+            return ExecutionResult(errors=[error])
+
+        if not query and not digest:
+            if show_graphiql:
+                return None
+            raise HttpError(HttpResponseBadRequest("Must provide query string."))
+
+        schema = self.schema.graphql_schema
+
+        # The schema never changes at runtime, so validate it once per process.
+        if id(schema) not in self._schema_validated:
+            schema_validation_errors = validate_schema(schema)
+            if schema_validation_errors:
+                return ExecutionResult(data=None, errors=schema_validation_errors)
+            self._schema_validated.add(id(schema))
+
+        try:
+            cached = get_document(
+                schema,
+                query,
+                self.validation_rules,
+                graphene_settings.MAX_VALIDATION_ERRORS,
+                digest=digest,
+            )
+        except GraphQLError as error:
+            return ExecutionResult(errors=[error])
+
+        if cached.document is None:
+            # Syntax error: reported before the GET/POST check, like graphene-django.
+            return ExecutionResult(errors=cached.errors)
+
+        document = cached.document
+        operation_ast = get_operation_ast(document, operation_name)
+
+        if (
+            request.method.lower() == "get"
+            and operation_ast is not None
+            and operation_ast.operation != OperationType.QUERY
+        ):
+            if show_graphiql:
+                return None
+
+            raise HttpError(
+                HttpResponseNotAllowed(
+                    ["POST"],
+                    "Can only perform a {} operation from a POST request.".format(
+                        operation_ast.operation.value
+                    ),
+                )
+            )
+
+        if cached.errors:
+            return ExecutionResult(data=None, errors=cached.errors)
+
+        return document, operation_ast, cached.cost_of(operation_ast)
+
+    def get_execute_options(self, request, variables, operation_name):
+        execute_options = {
+            "root_value": self.get_root_value(request),
+            "context_value": self.get_context(request),
+            "variable_values": variables,
+            "operation_name": operation_name,
+            "middleware": self.get_middleware(request),
+        }
+        if self.execution_context_class:
+            execute_options["execution_context_class"] = self.execution_context_class
+        return execute_options
+
+    def execute_graphql_request(
+        self, request, data, query, variables, operation_name, show_graphiql=False
+    ):
+        prepared = self.prepare_document(request, data, query, operation_name, show_graphiql)
+        if not isinstance(prepared, tuple):
+            return prepared
+        document, operation_ast, cost = prepared
+        schema = self.schema.graphql_schema
+
+        try:
+            execute_options = self.get_execute_options(request, variables, operation_name)
+
+            # DatabaseRoutingMiddleware picks the read database once the user is known.
+            with routing_scope():
+                if _is_mutation(operation_ast) and (
+                    graphene_settings.ATOMIC_MUTATIONS is True
+                    or connection.settings_dict.get("ATOMIC_MUTATIONS", False) is True
+                ):
+                    with transaction.atomic():
+                        result = execute(schema, document, **execute_options)
+                        if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+                            transaction.set_rollback(True)
+                else:
+                    result = execute(schema, document, **execute_options)
+
+            if _is_mutation(operation_ast):
+                pin_to_primary(getattr(request, 'user', None))
+            return with_cost(result, cost)
+        except Exception as e:
+            return ExecutionResult(errors=[e])
+
+    def get_response(self, request, data, show_graphiql=False):
+        query, variables, operation_name, id = self.get_graphql_params(request, data)
+
+        execution_result = self.execute_graphql_request(
+            request, data, query, variables, operation_name, show_graphiql
+        )
+
+        if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+            set_rollback()
+
+        if not execution_result:
+            return None, 200
+
+        if execution_result.errors:
+            set_rollback()
+        return self.encode_result(request, execution_result, id, pretty=show_graphiql)
+
+    def encode_result(self, request, execution_result, id, pretty=False):
+        """graphene-django's response body, plus the result's extensions (e.g. query cost)."""
+        status_code = 200
+        response = {}
+        if execution_result.errors:
+            response["errors"] = [self.format_error(e) for e in execution_result.errors]
+
+        if execution_result.errors and any(not getattr(e, "path", None) for e in execution_result.errors):
+            status_code = 400
+        else:
+            response["data"] = execution_result.data
+
+        if execution_result.extensions:
+            response["extensions"] = execution_result.extensions
+
+        if self.batch:
+            response["id"] = id
+            response["status"] = status_code
+
+        return self.json_encode(request, response, pretty=pretty), status_code
+
+
+class AsyncGraphQLView(CachedGraphQLView):
+    """
+    Async variant of CachedGraphQLView for the ASGI application.
+
+    The operation runs on the event loop against backend.async_schema, whose
+    resolvers use Django's async ORM and AsyncDataLoaders, so independent root
+    fields (e.g. `me` and `myMemberships`) execute concurrently and an idle or
+    slow request holds no worker thread. The JWT is verified once per request up
+    front instead of by the per-resolver JSONWebTokenMiddleware.
+    """
+
+    # GraphiQL rendering is synchronous; use the sync endpoint for it.
+    graphiql = False
+
+    def __init__(self, schema=None, **kwargs):
+        if schema is None:
+            from backend.async_schema import schema
+        super().__init__(schema=schema, **kwargs)
+
+    def dispatch(self, request, *args, **kwargs):
+        # Plain View.dispatch routes to the async get()/post() handlers below,
+        # which makes Django treat the whole view as a coroutine.
+        return View.dispatch(self, request, *args, **kwargs)
+
+    async def get(self, request, *args, **kwargs):
+        return await self.handle(request)
+
+    async def post(self, request, *args, **kwargs):
+        return await self.handle(request)
+
+    def get_middleware(self, request):
+        return [
+            middleware for middleware in (super().get_middleware(request) or [])
+            if not isinstance(middleware, JSONWebTokenMiddleware)
+        ]
+
+    async def handle(self, request):
+        try:
+            data = self.parse_body(request)
+
+            if self.batch:
+                responses = [await self.aget_response(request, entry) for entry in data]
+                result = "[{}]".format(",".join([response[0] for response in responses]))
+                status_code = (
+                    responses
+                    and max(responses, key=lambda response: response[1])[1]
+                    or 200
+                )
+            else:
+                result, status_code = await self.aget_response(request, data)
+
+            return HttpResponse(status=status_code, content=result, content_type="application/json")
+
+        except HttpError as e:
+            response = e.response
+            response["Content-Type"] = "application/json"
+            response.content = self.json_encode(request, {"errors": [self.format_error(e)]})
+            return response
+
+    async def aget_response(self, request, data):
+        query, variables, operation_name, id = self.get_graphql_params(request, data)
+
+        execution_result = await self.aexecute_graphql_request(request, data, query, variables, operation_name)
+        return self.encode_result(request, execution_result, id)
+
+    async def aexecute_graphql_request(self, request, data, query, variables, operation_name):
+        prepared = self.prepare_document(request, data, query, operation_name)
+        if not isinstance(prepared, tuple):
+            return prepared
+        document, operation_ast, cost = prepared
+
+        try:
+            request.user = await aget_request_user(request)
+        except JSONWebTokenError as error:
+            return ExecutionResult(errors=[GraphQLError(str(error))])
+
+        try:
+            operation = operation_ast.operation if operation_ast is not None else None
+            with routing_scope(await adatabase_for(operation, request.user)):
+                result = execute(
+                    self.schema.graphql_schema, document,
+                    **self.get_execute_options(request, variables, operation_name)
+                )
+                if isawaitable(result):
+                    result = await result
+
+            if _is_mutation(operation_ast):
+                await apin_to_primary(request.user)
+            return with_cost(result, cost)
+        except Exception as e:
+            return ExecutionResult(errors=[e])
+
+
+async def aget_request_user(request):
+    """
+    Async equivalent of JSONWebTokenMiddleware + CachedJSONWebTokenBackend: verifies
+    the `Authorization: JWT <token>` header (served from the token/user snapshot
+    cache when warm), falling back to the session user (if any) when no token is sent.
+    """
+    token = get_http_authorization(request)
+    if token is None:
+        if hasattr(request, 'auser'):
+            return await request.auser()
+        return AnonymousUser()
+
+    user = await aget_user_by_token(token, request)
+    if user is None:
+        raise JSONWebTokenError(_("User does not exist"))
+    return user
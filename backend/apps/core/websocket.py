@@ -0,0 +1,383 @@
+import asyncio
+import json
+import weakref
+from inspect import isawaitable
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.serializers.json import DjangoJSONEncoder
+from graphene_django.settings import graphene_settings
+from graphql import (
+    ExecutionResult,
+    GraphQLError,
+    OperationType,
+    create_source_event_stream,
+    execute,
+    get_operation_ast,
+    specified_rules,
+)
+from graphql_jwt.exceptions import JSONWebTokenError
+from graphql_jwt.settings import jwt_settings
+
+from apps.users.authentication import aget_user_by_token
+
+from .broker import QueueOverflow
+from .complexity import QueryCostRule
+from .documents import get_document, resolve_persisted_query
+
+PROTOCOL = 'graphql-transport-ws'
+# Per connection: concurrent subscriptions, seconds allowed before connection_init,
+# and the largest client message accepted.
+MAX_SUBSCRIPTIONS = getattr(settings, 'GRAPHQL_WS_MAX_SUBSCRIPTIONS', 8)
+INIT_TIMEOUT = getattr(settings, 'GRAPHQL_WS_INIT_TIMEOUT', 10)
+MAX_MESSAGE_BYTES = getattr(settings, 'GRAPHQL_WS_MAX_MESSAGE_BYTES', 64 * 1024)
+
+VALIDATION_RULES = (*specified_rules, QueryCostRule)
+
+# Close codes defined by graphql-transport-ws, plus RFC 6455's "message too big".
+BAD_REQUEST = 4400
+UNAUTHORIZED = 4401
+FORBIDDEN = 4403
+INIT_TIMED_OUT = 4408
+DUPLICATE_SUBSCRIBER = 4409
+TOO_MANY_INIT = 4429
+MESSAGE_TOO_BIG = 1009
+
+# {event: {(document, operation, variables): encoded payload}}. Events whose class sets
+# shared_result render once per distinct operation, however many subscribers they reach.
+_rendered = weakref.WeakKeyDictionary()
+
+
+async def _authenticate(token):
+    if token is None:
+        return AnonymousUser()
+    try:
+        user = await aget_user_by_token(token)
+    except JSONWebTokenError as error:
+        raise GraphQLError(str(error))
+    if user is None:
+        raise GraphQLError("User does not exist")
+    return user
+
+
+class SubscriptionContext:
+    """info.context of a subscription: carries the connection's user like request.user does."""
+
+    def __init__(self, user, scope, token=None):
+        self.user = user
+        self.scope = scope
+        self.token = token
+
+    async def reauthenticate(self):
+        """
+        Verifies the connection's token again and returns its user as stored now,
+        for streams that outlive their checks: raises GraphQLError once the token
+        has expired or its user was deactivated or deleted.
+        """
+        self.user = await _authenticate(self.token)
+        return self.user
+
+
+# --- 1. ONE SUBSCRIPTION ---
+
+class Operation:
+    """A running subscription of a connection: its source event stream and how to render events."""
+
+    __slots__ = ('stream', 'document', 'operation_name', 'variables', 'context', 'key')
+
+    def __init__(self, stream, cached, operation_name, variables, context):
+        self.stream = stream
+        self.document = cached.document
+        self.operation_name = operation_name
+        self.variables = variables
+        self.context = context
+        self.key = (id(cached), operation_name, json.dumps(variables, sort_keys=True))
+
+    async def render(self, schema, event):
+        shared = getattr(event, 'shared_result', False)
+        if shared:
+            payload = _rendered.get(event, {}).get(self.key)
+            if payload is not None:
+                return payload
+
+        result = execute(
+            schema, self.document, root_value=event, context_value=self.context,
+            variable_values=self.variables, operation_name=self.operation_name,
+        )
+        if isawaitable(result):
+            result = await result
+        payload = json.dumps(result.formatted, cls=DjangoJSONEncoder)
+
+        if shared:
+            _rendered.setdefault(event, {})[self.key] = payload
+        return payload
+
+    async def close(self):
+        aclose = getattr(self.stream, 'aclose', None)
+        if aclose is not None:
+            await aclose()
+
+
+# --- 2. ONE CONNECTION ---
+
+def _token(payload):
+    """The JWT from a connection_init payload: {"Authorization": "JWT <token>"} or {"authToken": "<token>"}."""
+    if not isinstance(payload, dict):
+        return None
+    value = payload.get('Authorization') or payload.get('authorization') or payload.get('authToken')
+    if not isinstance(value, str):
+        return None
+    parts = value.split()
+    if len(parts) == 2 and parts[0].lower() == jwt_settings.JWT_AUTH_HEADER_PREFIX.lower():
+        return parts[1]
+    return parts[0] if len(parts) == 1 else None
+
+
+def _errors(*errors):
+    return ExecutionResult(errors=list(errors))
+
+
+class GraphQLWebSocket:
+    """
+    One WebSocket connection speaking graphql-transport-ws, the protocol of the
+    `graphql-ws` client used with Apollo Client.
+
+    The client authenticates in connection_init (see _token()); the token is
+    verified again, from the token cache, for every subscription, so an expired
+    token cannot start new ones. Only subscription operations are served here:
+    queries and mutations keep using /graphql/ over HTTP.
+
+    Memory per connection is bounded: at most MAX_SUBSCRIPTIONS operations, each
+    with a broker queue of at most GRAPHQL_WS_QUEUE_SIZE shared events. A
+    subscription whose client falls further behind ends with a QUEUE_OVERFLOW
+    error, after which the client subscribes again and refetches.
+    """
+
+    __slots__ = ('schema', 'scope', 'receive', '_send', '_send_lock', 'token', 'initialised', 'acknowledged',
+                 'closed', 'operations')
+
+    def __init__(self, schema, scope, receive, send):
+        self.schema = schema
+        self.scope = scope
+        self.receive = receive
+        self._send = send
+        self._send_lock = asyncio.Lock()
+        self.token = None
+        self.initialised = False
+        self.acknowledged = False
+        self.closed = False
+        # {operation id: asyncio.Task}
+        self.operations = {}
+
+    async def run(self):
+        message = await self.receive()
+        if message['type'] != 'websocket.connect':
+            return
+        if PROTOCOL not in self.scope.get('subprotocols', ()):
+            # Closing before accepting rejects the handshake.
+            await self._send({'type': 'websocket.close', 'code': BAD_REQUEST})
+            return
+        await self._send({'type': 'websocket.accept', 'subprotocol': PROTOCOL})
+
+        try:
+            await self._serve()
+        finally:
+            tasks = list(self.operations.values())
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _serve(self):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + INIT_TIMEOUT
+        while not self.closed:
+            if self.acknowledged:
+                message = await self.receive()
+            else:
+                try:
+                    message = await asyncio.wait_for(self.receive(), max(deadline - loop.time(), 0))
+                except asyncio.TimeoutError:
+                    await self.close(INIT_TIMED_OUT, "Connection initialisation timeout")
+                    return
+
+            if message['type'] == 'websocket.disconnect':
+                return
+            if message['type'] != 'websocket.receive':
+                continue
+
+            text = message.get('text')
+            if text is None:
+                text = (message.get('bytes') or b'').decode('utf-8', 'replace')
+            if len(text) > MAX_MESSAGE_BYTES:
+                await self.close(MESSAGE_TOO_BIG, "Message too big")
+                return
+            try:
+                data = json.loads(text)
+            except ValueError:
+                data = None
+            await self.handle(data)
+
+    async def handle(self, data):
+        kind = data.get('type') if isinstance(data, dict) else None
+        if kind == 'connection_init':
+            await self._init(data.get('payload'))
+        elif kind == 'ping':
+            await self.send({'type': 'pong'})
+        elif kind == 'pong':
+            pass
+        elif kind == 'subscribe':
+            await self._subscribe(data.get('id'), data.get('payload'))
+        elif kind == 'complete':
+            task = self.operations.pop(data.get('id'), None)
+            if task is not None:
+                task.cancel()
+        else:
+            await self.close(BAD_REQUEST, "Invalid message received")
+
+    async def _init(self, payload):
+        if self.initialised:
+            await self.close(TOO_MANY_INIT, "Too many initialisation requests")
+            return
+        self.initialised = True
+
+        token = _token(payload)
+        if token is not None:
+            try:
+                user = await aget_user_by_token(token)
+            except JSONWebTokenError:
+                user = None
+            if user is None:
+                await self.close(FORBIDDEN, "Forbidden")
+                return
+        self.token = token
+        self.acknowledged = True
+        await self.send({'type': 'connection_ack'})
+
+    async def _subscribe(self, operation_id, payload):
+        if not self.acknowledged:
+            await self.close(UNAUTHORIZED, "Unauthorized")
+            return
+        if not isinstance(operation_id, str) or not isinstance(payload, dict):
+            await self.close(BAD_REQUEST, "Invalid message received")
+            return
+        if operation_id in self.operations:
+            await self.close(DUPLICATE_SUBSCRIBER, f"Subscriber for {operation_id} already exists")
+            return
+        if len(self.operations) >= MAX_SUBSCRIPTIONS:
+            await self._send_errors(operation_id, _errors(GraphQLError(
+                f"A connection may run at most {MAX_SUBSCRIPTIONS} subscriptions.",
+                extensions={'code': 'TOO_MANY_SUBSCRIPTIONS', 'maximum': MAX_SUBSCRIPTIONS},
+            )))
+            return
+        self.operations[operation_id] = asyncio.create_task(self._run_operation(operation_id, payload))
+
+    # --- SUBSCRIPTIONS ---
+
+    async def _start(self, payload):
+        """Returns a started Operation, or an ExecutionResult with the errors that prevented it."""
+        variables = payload.get('variables') or {}
+        operation_name = payload.get('operationName')
+        try:
+            query, digest = resolve_persisted_query(payload.get('query'), payload.get('extensions'))
+            if not query and not digest:
+                return _errors(GraphQLError("Must provide query string."))
+            cached = get_document(
+                self.schema, query, VALIDATION_RULES, graphene_settings.MAX_VALIDATION_ERRORS, digest=digest,
+            )
+        except GraphQLError as error:
+            return _errors(error)
+        if cached.document is None or cached.errors:
+            return ExecutionResult(errors=cached.errors)
+
+        operation_ast = get_operation_ast(cached.document, operation_name)
+        if operation_ast is None:
+            return _errors(GraphQLError("Must provide a valid operation name."))
+        if operation_ast.operation != OperationType.SUBSCRIPTION:
+            return _errors(GraphQLError(
+                "Only subscriptions are served over WebSocket; send queries and mutations to /graphql/."
+            ))
+
+        try:
+            context = SubscriptionContext(await _authenticate(self.token), self.scope, self.token)
+        except GraphQLError as error:
+            return _errors(error)
+        stream = await create_source_event_stream(
+            self.schema, cached.document, context_value=context,
+            variable_values=variables, operation_name=operation_name,
+        )
+        if isinstance(stream, ExecutionResult):
+            return stream
+        return Operation(stream, cached, operation_name, variables, context)
+
+    async def _run_operation(self, operation_id, payload):
+        operation = None
+        try:
+            operation = await self._start(payload)
+            if isinstance(operation, ExecutionResult):
+                await self._send_errors(operation_id, operation)
+                return
+            prefix = '{"id":%s,"type":"next","payload":' % json.dumps(operation_id)
+            async for event in operation.stream:
+                await self.send_text(prefix + await operation.render(self.schema, event) + '}')
+            await self.send({'id': operation_id, 'type': 'complete'})
+        except asyncio.CancelledError:
+            # Completed by the client, or the connection closed: nothing more to send.
+            raise
+        except QueueOverflow as error:
+            await self._send_errors(operation_id, _errors(GraphQLError(
+                str(error), extensions={'code': 'QUEUE_OVERFLOW', 'retryable': True},
+            )))
+        except Exception as error:
+            await self._send_errors(operation_id, _errors(
+                error if isinstance(error, GraphQLError) else GraphQLError(str(error), original_error=error)
+            ))
+        finally:
+            if self.operations.get(operation_id) is asyncio.current_task():
+                del self.operations[operation_id]
+            if isinstance(operation, Operation):
+                await operation.close()
+
+    async def _send_errors(self, operation_id, result):
+        await self.send({'id': operation_id, 'type': 'error', 'payload': result.formatted['errors']})
+
+    # --- SENDING ---
+
+    async def send(self, message):
+        await self.send_text(json.dumps(message, cls=DjangoJSONEncoder))
+
+    async def send_text(self, text):
+        if self.closed:
+            return
+        async with self._send_lock:
+            await self._send({'type': 'websocket.send', 'text': text})
+
+    async def close(self, code, reason):
+        if not self.closed:
+            self.closed = True
+            async with self._send_lock:
+                await self._send({'type': 'websocket.close', 'code': code, 'reason': reason})
+
+
+# --- 3. ASGI ROUTING ---
+
+class GraphQLWebSocketRouter:
+    """
+    ASGI application serving GraphQL subscriptions to WebSocket connections on
+    `path` (with backend.async_schema), and everything else with `application`.
+    """
+
+    def __init__(self, application, path='/graphql/', schema=None):
+        if schema is None:
+            from backend.async_schema import schema
+        self.application = application
+        self.path = path
+        self.schema = schema.graphql_schema
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'websocket':
+            return await self.application(scope, receive, send)
+        if scope['path'] != self.path:
+            await receive()
+            await send({'type': 'websocket.close', 'code': 1000})
+            return
+        await GraphQLWebSocket(self.schema, scope, receive, send).run()
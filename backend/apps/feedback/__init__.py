@@ -0,0 +1 @@
+default_app_config = 'apps.feedback.apps.FeedbackConfig'
\ No newline at end of file
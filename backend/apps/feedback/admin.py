@@ -0,0 +1,56 @@
+from django.contrib import admin, messages
+from django.db import transaction
+from django.db.models import F
+from django.urls import reverse
+from django.utils.html import format_html
+
+from .ingest import feature_requests
+from .models import FeatureRequest, FeatureRequestGroup
+
+
+# --- 1. Groups: what is asked for, and how often ---
+
+@admin.register(FeatureRequestGroup)
+class FeatureRequestGroupAdmin(admin.ModelAdmin):
+    # Counts include requests written within the last FEATURE_REQUEST_FLUSH_SECONDS only.
+    list_display = ('title', 'submission_count', 'status', 'last_submitted_at', 'requests_link')
+    list_editable = ('status',)
+    list_filter = ('status',)
+    search_fields = ('title',)
+    readonly_fields = ('id', 'submission_count', 'last_submitted_at', 'created_at', 'updated_at')
+    actions = ('merge_groups',)
+
+    @admin.display(description='Requests')
+    def requests_link(self, obj):
+        url = reverse('admin:feedback_featurerequest_changelist')
+        return format_html('<a href="{}?group__id__exact={}">View</a>', url, obj.pk)
+
+    @admin.action(description='Merge selected groups into the most requested one')
+    def merge_groups(self, request, queryset):
+        groups = list(queryset.order_by('-submission_count', 'created_at'))
+        if len(groups) < 2:
+            self.message_user(request, "Select at least two groups to merge.", messages.WARNING)
+            return
+        target, merged = groups[0], [group.pk for group in groups[1:]]
+        with transaction.atomic():
+            moved = FeatureRequest.objects.filter(group_id__in=merged).update(group=target)
+            FeatureRequestGroup.objects.filter(pk=target.pk).update(submission_count=F('submission_count') + moved)
+            FeatureRequestGroup.objects.filter(pk__in=merged).delete()
+        # Other processes notice the deleted groups when they next write into one (see FeatureRequestBuffer).
+        for group_id in merged:
+            feature_requests.groups.signatures.discard(group_id)
+        self.message_user(
+            request,
+            f"Merged {len(merged)} groups ({moved} requests) into \"{target.title}\".",
+        )
+
+
+# --- 2. Individual requests ---
+
+@admin.register(FeatureRequest)
+class FeatureRequestAdmin(admin.ModelAdmin):
+    list_display = ('title', 'user', 'group', 'created_at')
+    list_select_related = ('user', 'group')
+    search_fields = ('title', 'description', 'user__username')
+    raw_id_fields = ('group', 'user')
+    readonly_fields = ('id', 'created_at', 'updated_at')
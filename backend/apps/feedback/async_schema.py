@@ -0,0 +1,6 @@
+from apps.core.mutations import async_mutation
+
+from .schema import SubmitFeatureRequest
+
+# mutate() reads the requesting user, which may need the database: it runs in a worker thread.
+AsyncSubmitFeatureRequest = async_mutation(SubmitFeatureRequest)
@@ -0,0 +1,187 @@
+import logging
+import os
+import threading
+from array import array
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, F, PositiveIntegerField, Value, When
+from django.utils import timezone
+
+from apps.core.batches import apply_isolated
+from apps.core.drains import BackgroundDrain
+
+from .minhash import SignatureIndex, signature
+from .models import FeatureRequest, FeatureRequestGroup
+
+# Buffered requests are written at least every FLUSH_SECONDS, or as soon as FLUSH_BATCH
+# are waiting; beyond MAX_PENDING (the database is down) submissions are refused.
+FLUSH_SECONDS = getattr(settings, 'FEATURE_REQUEST_FLUSH_SECONDS', 2)
+FLUSH_BATCH = getattr(settings, 'FEATURE_REQUEST_FLUSH_BATCH', 500)
+MAX_PENDING = getattr(settings, 'FEATURE_REQUEST_MAX_PENDING', 10_000)
+# How similar (estimated Jaccard similarity of the titles' shingles, see minhash) a
+# request must be to a group's first one to join it.
+SIMILARITY = getattr(settings, 'FEATURE_REQUEST_SIMILARITY', 0.3)
+# Groups a process compares new requests with: the most recently requested.
+INDEX_GROUPS = getattr(settings, 'FEATURE_REQUEST_INDEX_GROUPS', 10_000)
+# Groups created by other processes are read back from a little before the last read,
+# in case their clocks run behind.
+CLOCK_SLACK = timedelta(seconds=60)
+
+logger = logging.getLogger(__name__)
+
+
+class BufferFull(Exception):
+    """MAX_PENDING requests are waiting to be written."""
+
+
+# --- 1. THE GROUPS NEW REQUESTS ARE COMPARED WITH ---
+
+class GroupIndex:
+    """
+    The signatures of the feature request groups, by group id (see minhash.SignatureIndex).
+
+    Read once, then topped up before every batch with the groups other processes
+    created since. Two processes may still each start a group for the same new
+    request within one FLUSH_SECONDS; those stay separate groups.
+    """
+
+    def __init__(self):
+        self.signatures = SignatureIndex()
+        self._read_until = None
+
+    def refresh(self):
+        groups = FeatureRequestGroup.objects.values_list('pk', 'signature')
+        if self._read_until is None:
+            groups = groups.order_by(F('last_submitted_at').desc(nulls_last=True))[:INDEX_GROUPS]
+        else:
+            groups = groups.filter(created_at__gte=self._read_until - CLOCK_SLACK).order_by()
+        read_until = timezone.now()
+        for group_id, values in groups:
+            if group_id not in self.signatures:
+                self.signatures.add(group_id, array('Q', bytes(values)))
+        self._read_until = read_until
+
+    def group_for(self, request, now):
+        """
+        The id of the group for a request: the most similar group, or a new one
+        (returned unsaved as the second value, and already in the index).
+        """
+        values = signature(request.title)
+        found = self.signatures.most_similar(values, SIMILARITY)
+        if found is not None:
+            return found[0], None
+        group = FeatureRequestGroup(title=request.title, signature=values.tobytes(), last_submitted_at=now)
+        self.signatures.add(group.pk, values)
+        return group.pk, group
+
+    def forget(self):
+        """Drops every signature; they are read again before the next batch."""
+        self.signatures.clear()
+        self._read_until = None
+
+
+# --- 2. BATCHED WRITES ---
+
+class FeatureRequestBuffer:
+    """
+    Feature requests submitted but not yet written.
+
+    A popular prompt sends a burst of near-identical requests at once. They are
+    grouped and written together: one bulk INSERT of the new groups, one of the
+    requests, and one UPDATE of every group's count (submission_count + CASE ...),
+    instead of three statements each. A background thread flushes every
+    FLUSH_SECONDS, or as soon as FLUSH_BATCH are waiting, so submitting never waits
+    for the database. The thread is stopped at exit without a last flush (see
+    BackgroundDrain), so a process stopping loses at most FLUSH_SECONDS of requests.
+
+    A request the database rejects (its submitter was deleted meanwhile, say) is
+    logged and dropped, and the rest of its batch written without it (see
+    apply_isolated()); only a failure of the whole batch keeps it for the next flush.
+    """
+
+    def __init__(self):
+        self.groups = GroupIndex()
+        self._pending = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self.background = BackgroundDrain(self.flush, FLUSH_SECONDS, FLUSH_BATCH, 'feature-request-flush')
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, request):
+        """Queues an unsaved FeatureRequest (without a group). Raises BufferFull when too many are waiting."""
+        with self._lock:
+            if len(self._pending) >= MAX_PENDING:
+                raise BufferFull()
+            self._pending.append(request)
+        self.background.recorded()
+
+    def flush(self):
+        """Groups and writes the buffered requests; returns how many were written."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            try:
+                written = apply_isolated(batch, self._write, self._drop)
+            except Exception:
+                # Requests already written one by one fail again on their primary keys
+                # when retried, and are dropped then, so none is written twice.
+                with self._lock:
+                    self._pending[:0] = batch
+                raise
+            return len(written)
+
+    def _write(self, batch):
+        now = timezone.now()
+        new_groups, counts = [], {}
+        try:
+            self.groups.refresh()
+            for request in batch:
+                request.group_id, group = self.groups.group_for(request, now)
+                if group is not None:
+                    new_groups.append(group)
+                counts[request.group_id] = counts.get(request.group_id, 0) + 1
+            FeatureRequestGroup.objects.bulk_create(new_groups)
+            FeatureRequest.objects.bulk_create(batch)
+            FeatureRequestGroup.objects.filter(pk__in=list(counts)).update(
+                submission_count=Case(
+                    *(When(pk=pk, then=F('submission_count') + Value(count)) for pk, count in counts.items()),
+                    default=F('submission_count'),
+                    output_field=PositiveIntegerField(),
+                ),
+                last_submitted_at=now,
+            )
+            # Foreign keys are checked at commit, after apply_isolated() has let go of
+            # the batch: a request whose submitter or group was deleted fails here instead.
+            connection.check_constraints(table_names=[FeatureRequest._meta.db_table])
+        except Exception:
+            # The new groups were not written, or a group was deleted meanwhile: the
+            # batch is grouped again, against groups read afresh, on the next attempt.
+            self.groups.forget()
+            raise
+
+    def _drop(self, request, error):
+        logger.error("Feature request %r from user %s could not be written and was dropped: %s",
+                     request.title, request.user_id, error)
+
+    def _after_fork(self):
+        # The parent writes what it buffered; the child starts empty (and so does its background drain).
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = []
+        self.groups.signatures._after_fork()
+
+    def reset(self):
+        """Forgets all unwritten requests and every group read."""
+        with self._lock:
+            self._pending.clear()
+        self.groups.forget()
+
+
+feature_requests = FeatureRequestBuffer()
+os.register_at_fork(after_in_child=feature_requests._after_fork)
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:14
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeatureRequestGroup',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, help_text='The unique primary key for this object.', primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='The date and time this object was created.')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='The date and time this object was last updated.')),
+                ('title', models.CharField(help_text="The title of the group's first request.", max_length=200)),
+                ('signature', models.BinaryField(help_text="MinHash signature of the first request's title, which later requests are compared with.")),
+                ('submission_count', models.PositiveIntegerField(default=0, help_text='Requests in the group (incremented in batches by apps.feedback.ingest).')),
+                ('last_submitted_at', models.DateTimeField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('open', 'Open'), ('planned', 'Planned'), ('done', 'Done'), ('declined', 'Declined')], default='open', max_length=20)),
+            ],
+            options={
+                'verbose_name': 'Feature Request Group',
+                'verbose_name_plural': 'Feature Request Groups',
+                'ordering': ('-submission_count',),
+                'indexes': [models.Index(fields=['-submission_count'], name='feature_group_count_idx'), models.Index(fields=['created_at'], name='feature_group_created_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='FeatureRequest',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, help_text='The unique primary key for this object.', primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='The date and time this object was created.')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='The date and time this object was last updated.')),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True, default='')),
+                ('user', models.ForeignKey(blank=True, help_text='Who submitted it; kept when the user is deleted.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='feature_requests', to=settings.AUTH_USER_MODEL)),
+                ('group', models.ForeignKey(help_text='The near-duplicates this request was grouped with.', on_delete=django.db.models.deletion.CASCADE, related_name='requests', to='feedback.featurerequestgroup')),
+            ],
+            options={
+                'verbose_name': 'Feature Request',
+                'verbose_name_plural': 'Feature Requests',
+                'ordering': ('-created_at',),
+                'indexes': [models.Index(fields=['group', '-created_at'], name='feature_request_group_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,122 @@
+import random
+import re
+import threading
+from array import array
+from hashlib import blake2b
+
+# Signature length, split into BANDS bands of ROWS values for locality-sensitive hashing:
+# two texts of similarity s share a band (and are compared) with probability
+# 1 - (1 - s**ROWS)**BANDS, so at 32 x 2 over 95% of the pairs above 0.3 are found
+# while pairs below 0.1 mostly are not.
+BANDS = 32
+ROWS = 2
+PERMUTATIONS = BANDS * ROWS
+# Characters per shingle, and how much of a submission is shingled.
+SHINGLE = 3
+MAX_TEXT = 2000
+
+# One random 64-bit mask per permutation: the minimum of hash ^ mask over a text's
+# shingles stands in for the minimum under a random permutation. Fixed, so every
+# process computes the same signatures as the ones stored with the groups.
+_random = random.Random(0x5EED)
+_MASKS = tuple(_random.getrandbits(64) for _ in range(PERMUTATIONS))
+_WORDS = re.compile(r'\w+')
+# How requests are worded rather than what they ask for: dropped before shingling, so
+# "Can you add dark mode please!" and "dark mode" compare as the same request.
+STOP_WORDS = frozenset('''
+    a an and are be can could do for feature from great have i in is it like love me my need of
+    on or our please pls plz request should so some thank thanks that the this to us want we
+    would you add asap allow ability option support really
+'''.split())
+
+
+def shingles(text):
+    """
+    The distinct SHINGLE-character pieces of the text: lower-cased, without STOP_WORDS
+    (unless that leaves nothing), punctuation or spaces, so a typo across a word
+    boundary ("dar kmode") changes no shingle.
+    """
+    words = _WORDS.findall(text[:MAX_TEXT].lower())
+    text = ''.join([word for word in words if word not in STOP_WORDS] or words)
+    if len(text) <= SHINGLE:
+        return {text}
+    return {text[start:start + SHINGLE] for start in range(len(text) - SHINGLE + 1)}
+
+
+def signature(text):
+    """The MinHash signature of a text: PERMUTATIONS unsigned 64-bit values."""
+    hashes = [
+        int.from_bytes(blake2b(shingle.encode(), digest_size=8).digest(), 'little')
+        for shingle in shingles(text)
+    ]
+    return array('Q', [min(map(mask.__xor__, hashes)) for mask in _MASKS])
+
+
+def similarity(first, second):
+    """The Jaccard similarity of two texts' shingles, estimated from their signatures."""
+    return sum(a == b for a, b in zip(first, second)) / PERMUTATIONS
+
+
+def _bands(values):
+    """A key per band: the hash of the band's number and values (a collision only adds a candidate)."""
+    return [hash((band, *values[band * ROWS:(band + 1) * ROWS])) for band in range(BANDS)]
+
+
+class SignatureIndex:
+    """
+    Signatures by key (feature request group ids), searchable for the most similar one.
+
+    Each signature is filed under its BANDS bands; a search compares only against
+    signatures sharing at least one band with it, so its cost depends on the number
+    of near-duplicates, not of signatures.
+    """
+
+    def __init__(self):
+        self._signatures = {}
+        # {band key: [keys]}
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def __contains__(self, key):
+        return key in self._signatures
+
+    def add(self, key, values):
+        with self._lock:
+            if key in self._signatures:
+                return
+            self._signatures[key] = values
+            for band in _bands(values):
+                self._buckets.setdefault(band, []).append(key)
+
+    def discard(self, key):
+        with self._lock:
+            values = self._signatures.pop(key, None)
+            if values is None:
+                return
+            for band in _bands(values):
+                keys = self._buckets[band]
+                keys.remove(key)
+                if not keys:
+                    del self._buckets[band]
+
+    def most_similar(self, values, threshold):
+        """(key, similarity) of the most similar signature at least `threshold` similar, or None."""
+        with self._lock:
+            candidates = {key for band in _bands(values) for key in self._buckets.get(band, ())}
+            best = None
+            for key in candidates:
+                score = similarity(values, self._signatures[key])
+                if score >= threshold and (best is None or score > best[1]):
+                    best = (key, score)
+            return best
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._signatures.clear()
+            self._buckets.clear()
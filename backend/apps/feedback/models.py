@@ -0,0 +1,79 @@
+from django.conf import settings
+from django.db import models
+
+from apps.core.models import AbstractBaseModel
+
+
+class FeatureRequestGroup(AbstractBaseModel):
+    """
+    Feature requests asking for nearly the same thing, as grouped by apps.feedback.ingest.
+
+    A group is represented by its first request: its title, and the MinHash
+    signature later requests are compared with (apps.feedback.minhash).
+    """
+
+    STATUS_CHOICES = (
+        ('open', 'Open'),
+        ('planned', 'Planned'),
+        ('done', 'Done'),
+        ('declined', 'Declined'),
+    )
+
+    title = models.CharField(max_length=200, help_text="The title of the group's first request.")
+    signature = models.BinaryField(
+        editable=False,
+        help_text="MinHash signature of the first request's title, which later requests are compared with."
+    )
+    submission_count = models.PositiveIntegerField(
+        default=0,
+        help_text='Requests in the group (incremented in batches by apps.feedback.ingest).'
+    )
+    last_submitted_at = models.DateTimeField(null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='open')
+
+    class Meta:
+        indexes = [
+            # The admin's default order: the most requested first.
+            models.Index(fields=['-submission_count'], name='feature_group_count_idx'),
+            # Groups created since a process last read them (GroupIndex.refresh()).
+            models.Index(fields=['created_at'], name='feature_group_created_idx'),
+        ]
+        ordering = ('-submission_count',)
+        verbose_name = 'Feature Request Group'
+        verbose_name_plural = 'Feature Request Groups'
+
+    def __str__(self):
+        return f"{self.title} ({self.submission_count})"
+
+
+class FeatureRequest(AbstractBaseModel):
+    """A feature request submitted from the app (written in batches by apps.feedback.ingest)."""
+
+    group = models.ForeignKey(
+        FeatureRequestGroup,
+        on_delete=models.CASCADE,
+        related_name='requests',
+        help_text='The near-duplicates this request was grouped with.'
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='feature_requests',
+        help_text='Who submitted it; kept when the user is deleted.'
+    )
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True, default='')
+
+    class Meta:
+        indexes = [
+            # A group's requests, newest first (the admin's list filtered by group).
+            models.Index(fields=['group', '-created_at'], name='feature_request_group_idx'),
+        ]
+        ordering = ('-created_at',)
+        verbose_name = 'Feature Request'
+        verbose_name_plural = 'Feature Requests'
+
+    def __str__(self):
+        return self.title
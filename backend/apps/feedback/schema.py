@@ -0,0 +1,42 @@
+import graphene
+from graphql import GraphQLError
+from graphql_jwt.decorators import login_required
+
+from .ingest import BufferFull, feature_requests
+from .models import FeatureRequest
+
+MAX_TITLE_LENGTH = FeatureRequest._meta.get_field('title').max_length
+MAX_DESCRIPTION_LENGTH = 5000
+
+
+class SubmitFeatureRequest(graphene.Mutation):
+    """
+    Submits a feature request. It is written, and grouped with near-identical
+    requests for the admins, in the next batch (apps.feedback.ingest), so nothing
+    about it is returned but whether it was accepted.
+    """
+
+    class Arguments:
+        title = graphene.String(required=True)
+        description = graphene.String(required=False)
+
+    success = graphene.Boolean()
+
+    @classmethod
+    @login_required
+    def mutate(cls, root, info, title, description=''):
+        title, description = ' '.join(title.split()), (description or '').strip()
+        if not title:
+            raise GraphQLError("A title is required.")
+        if '\x00' in title or '\x00' in description:
+            raise GraphQLError("Title and description cannot contain NUL characters.")
+        if len(title) > MAX_TITLE_LENGTH:
+            raise GraphQLError(f"Title must be at most {MAX_TITLE_LENGTH} characters.")
+        if len(description) > MAX_DESCRIPTION_LENGTH:
+            raise GraphQLError(f"Description must be at most {MAX_DESCRIPTION_LENGTH} characters.")
+
+        try:
+            feature_requests.add(FeatureRequest(user_id=info.context.user.pk, title=title, description=description))
+        except BufferFull:
+            raise GraphQLError("Feature requests cannot be accepted right now; please try again later.")
+        return SubmitFeatureRequest(success=True)
@@ -0,0 +1,147 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import OperationalError, connection
+from django.test import RequestFactory, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from backend.schema import schema
+
+from . import ingest
+from .ingest import FeatureRequestBuffer, feature_requests
+from .models import FeatureRequest, FeatureRequestGroup
+
+User = get_user_model()
+
+
+def buffered(*requests):
+    """A buffer holding the requests, whose background thread never starts."""
+    buffer = FeatureRequestBuffer()
+    buffer.background.stop()
+    for request in requests:
+        buffer.add(request)
+    return buffer
+
+
+def counts():
+    return sorted(FeatureRequestGroup.objects.values_list('title', 'submission_count'))
+
+
+# --- 1. GROUPING ---
+
+class GroupingTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='alice', email='alice@example.com')
+
+    def request(self, title):
+        return FeatureRequest(user=self.user, title=title)
+
+    def test_near_identical_requests_share_a_group(self):
+        buffer = buffered(
+            self.request('Add a dark mode to the app'),
+            self.request('Please add a dark mode to the app'),
+            self.request('add dark mode to the app!'),
+            self.request('Export my history as a CSV file'),
+        )
+
+        self.assertEqual(buffer.flush(), 4)
+
+        self.assertEqual(counts(), [('Add a dark mode to the app', 3), ('Export my history as a CSV file', 1)])
+        self.assertEqual(len(buffer), 0)
+
+    def test_later_batches_join_existing_groups_in_as_many_statements(self):
+        buffer = buffered(self.request('Add a dark mode to the app'))
+        buffer.flush()
+
+        buffer.add(self.request('We need a dark mode in the app'))
+        with CaptureQueriesContext(connection) as one:
+            buffer.flush()
+        for title in ('Dark mode for the app please', 'dark mode in the app', 'Add dark mode to the app'):
+            buffer.add(self.request(title))
+        with CaptureQueriesContext(connection) as three:
+            buffer.flush()
+
+        self.assertEqual(len(three), len(one))
+        self.assertEqual(counts(), [('Add a dark mode to the app', 5)])
+
+    def test_groups_created_by_other_processes_are_read_before_each_batch(self):
+        other = buffered(self.request('Add a dark mode to the app'))
+        buffer = buffered(self.request('Export my history as a CSV file'))
+        buffer.flush()
+        other.flush()
+
+        buffer.add(self.request('Dark mode for the app please'))
+        buffer.flush()
+
+        self.assertEqual(counts(), [('Add a dark mode to the app', 2), ('Export my history as a CSV file', 1)])
+
+    def test_a_failed_batch_is_kept_for_the_next_flush(self):
+        buffer = buffered(self.request('Add a dark mode to the app'), self.request('Export my history'))
+
+        with mock.patch.object(buffer.groups, 'refresh', side_effect=OperationalError('database gone')):
+            with self.assertRaises(OperationalError):
+                buffer.flush()
+        self.assertEqual(len(buffer), 2)
+
+        self.assertEqual(buffer.flush(), 2)
+        self.assertEqual(FeatureRequest.objects.count(), 2)
+
+
+# --- 2. REJECTED REQUESTS ---
+
+class RejectedRequestTests(TransactionTestCase):
+    # Foreign keys are only checked when a transaction commits, so these need real commits.
+
+    def test_a_rejected_request_is_dropped_and_the_rest_written(self):
+        alice = User.objects.create(username='alice', email='alice@example.com')
+        bob = User.objects.create(username='bob', email='bob@example.com')
+        buffer = buffered(
+            FeatureRequest(user=alice, title='Add a dark mode to the app'),
+            FeatureRequest(user=bob, title='Please add a dark mode to the app'),
+            FeatureRequest(user=alice, title='Export my history as a CSV file'),
+        )
+        bob.delete()
+
+        with self.assertLogs(ingest.logger, 'ERROR') as logs:
+            self.assertEqual(buffer.flush(), 2)
+
+        self.assertIn('Please add a dark mode', logs.output[0])
+        self.assertEqual(counts(), [('Add a dark mode to the app', 1), ('Export my history as a CSV file', 1)])
+        self.assertEqual(len(buffer), 0)
+
+
+# --- 3. submitFeatureRequest MUTATION ---
+
+SUBMIT = '''
+    mutation ($title: String!, $description: String) {
+        submitFeatureRequest(title: $title, description: $description) { success }
+    }
+'''
+
+
+class SubmitFeatureRequestTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='alice', email='alice@example.com')
+
+    def submit(self, **variables):
+        request = RequestFactory().post('/graphql/')
+        request.user = self.user
+        with mock.patch.object(feature_requests, 'add') as add:
+            result = schema.execute(SUBMIT, variable_values=variables, context_value=request)
+        return result, add
+
+    def test_buffers_the_normalised_request(self):
+        result, add = self.submit(title='  Add   dark mode ', description=' At night \n')
+
+        self.assertIsNone(result.errors)
+        [(request,), _] = add.call_args
+        self.assertEqual((request.user_id, request.title, request.description), (self.user.pk, 'Add dark mode', 'At night'))
+
+    def test_rejects_nul_characters(self):
+        for variables in ({'title': 'Dark\x00mode'}, {'title': 'Dark mode', 'description': 'At\x00night'}):
+            result, add = self.submit(**variables)
+
+            self.assertIn('NUL', result.errors[0].message)
+            add.assert_not_called()
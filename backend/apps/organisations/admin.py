@@ -1,5 +1,18 @@
 from django.contrib import admin
-from .models import Organisation, OrganisationMembership
+from django.db import transaction
+
+from . import audit, events
+from .cache import invalidate_organisations
+from .counters import recount
+from .events import publish_membership_change, publish_organisation_event
+from .models import AuditEvent, DailyContent, Organisation, OrganisationMembership
+
+
+def _members_by_organisation(memberships):
+    members = {}
+    for organisation_id, user_id in memberships.values_list('organisation_id', 'user_id'):
+        members.setdefault(organisation_id, []).append(user_id)
+    return members
 
 
 # --- 1. Inline for OrganisationMembership ---
@@ -23,18 +36,24 @@ class OrganisationAdmin(admin.ModelAdmin):
         'name',
         'slug',
         'is_active',
+        'is_public',
+        'member_count',
+        'admin_count',
         'created_by',
         'created_at',
         'id'  # Showing the ID can be useful
     )
-    list_filter = ('is_active',)
+    list_filter = ('is_active', 'is_public')
     search_fields = ('name', 'slug', 'created_by__username')
     prepopulated_fields = {'slug': ('name',)}
 
     # Organize fields into logical groups
     fieldsets = (
         ('Organisation Details', {
-            'fields': ('name', 'slug', 'is_active')
+            'fields': ('name', 'slug', 'is_active', 'is_public')
+        }),
+        ('Membership Counters', {
+            'fields': ('member_count', 'admin_count'),
         }),
         ('Audit/System Info', {
             'fields': ('id', 'created_by', 'created_at', 'updated_at'),
@@ -45,13 +64,69 @@ class OrganisationAdmin(admin.ModelAdmin):
     inlines = [OrganisationMembershipInline]
 
     # Read-only fields
-    readonly_fields = ('id', 'created_by', 'created_at', 'updated_at')
+    readonly_fields = ('id', 'created_by', 'created_at', 'updated_at', 'member_count', 'admin_count')
 
     # Set 'created_by' automatically on creation
     def save_model(self, request, obj, form, change):
         if not obj.pk:
             obj.created_by = request.user
         super().save_model(request, obj, form, change)
+        # The admin saves in a transaction, which the audit records join.
+        if not change:
+            audit.record(obj.pk, audit.ORGANISATION_CREATED, request.user.pk, name=obj.name, slug=obj.slug)
+        elif form.changed_data:
+            audit.record(obj.pk, audit.ORGANISATION_UPDATED, request.user.pk, **{
+                field: [form.initial.get(field), form.cleaned_data[field]] for field in form.changed_data
+            })
+        invalidate_organisations(obj.pk)
+
+    def save_related(self, request, form, formsets, change):
+        # The membership inline may have added, removed or promoted members.
+        super().save_related(request, form, formsets, change)
+        recount(Organisation.objects.filter(pk=form.instance.pk))
+        for formset in formsets:
+            for membership_form in formset.forms:
+                if not membership_form.has_changed():
+                    continue
+                initial = membership_form.initial
+                before = (form.instance.pk, initial['user'], initial['is_org_admin']) if initial.get('user') else None
+                membership = membership_form.instance
+                after = None if formset._should_delete_form(membership_form) else (
+                    form.instance.pk, membership.user_id, membership.is_org_admin
+                )
+                audit.record_membership_change(request.user.pk, before, after)
+                publish_membership_change(before, after)
+        changed_users = [
+            membership.user_id
+            for formset in formsets
+            for membership in (
+                formset.new_objects
+                + [membership for membership, _ in formset.changed_objects]
+                + formset.deleted_objects
+            )
+        ]
+        invalidate_organisations(form.instance.pk, user_ids=changed_users)
+
+    def delete_model(self, request, obj):
+        # Deleting clears obj.pk.
+        organisation_id = obj.pk
+        members = list(obj.memberships.values_list('user_id', flat=True))
+        super().delete_model(request, obj)
+        audit.record(organisation_id, audit.ORGANISATION_DELETED, request.user.pk, name=obj.name)
+        publish_organisation_event(organisation_id, events.MEMBERS_REMOVED, user_ids=members)
+        invalidate_organisations(organisation_id)
+
+    def delete_queryset(self, request, queryset):
+        organisations = list(queryset.values_list('pk', 'name'))
+        members = _members_by_organisation(OrganisationMembership.objects.filter(organisation__in=queryset))
+        with transaction.atomic():
+            super().delete_queryset(request, queryset)
+            for organisation_id, name in organisations:
+                audit.record(organisation_id, audit.ORGANISATION_DELETED, request.user.pk, name=name)
+                publish_organisation_event(
+                    organisation_id, events.MEMBERS_REMOVED, user_ids=members.get(organisation_id, ()),
+                )
+        invalidate_organisations(*[organisation_id for organisation_id, _ in organisations])
 
 
 # --- 3. OrganisationMembership Admin Configuration ---
@@ -67,4 +142,69 @@ class OrganisationMembershipAdmin(admin.ModelAdmin):
     list_filter = ('is_org_admin', 'organisation',)
     search_fields = ('user__username', 'organisation__name')
     raw_id_fields = ('user', 'organisation')
-    readonly_fields = ('created_at', 'updated_at')
\ No newline at end of file
+    readonly_fields = ('created_at', 'updated_at')
+
+    # Keep Organisation.member_count/admin_count exact, and the cached organisations
+    # and roles fresh, after every admin write.
+    def save_model(self, request, obj, form, change):
+        previous = form.initial.get('organisation') if change else None
+        previous_user = form.initial.get('user') if change else None
+        super().save_model(request, obj, form, change)
+        before = (previous, previous_user, form.initial.get('is_org_admin')) if change else None
+        after = (obj.organisation_id, obj.user_id, obj.is_org_admin)
+        audit.record_membership_change(request.user.pk, before, after)
+        publish_membership_change(before, after)
+        organisation_ids = {obj.organisation_id, previous} - {None}
+        recount(Organisation.objects.filter(pk__in=organisation_ids))
+        invalidate_organisations(*organisation_ids, user_ids=[obj.user_id, previous_user])
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        audit.record(obj.organisation_id, audit.MEMBER_REMOVED, request.user.pk, [obj.user_id])
+        publish_organisation_event(obj.organisation_id, events.MEMBERS_REMOVED, user_ids=[obj.user_id])
+        recount(Organisation.objects.filter(pk=obj.organisation_id))
+        invalidate_organisations(obj.organisation_id, user_ids=[obj.user_id])
+
+    def delete_queryset(self, request, queryset):
+        members = _members_by_organisation(queryset)
+        with transaction.atomic():
+            super().delete_queryset(request, queryset)
+            for organisation_id, user_ids in members.items():
+                audit.record(organisation_id, audit.MEMBER_REMOVED, request.user.pk, user_ids)
+                publish_organisation_event(organisation_id, events.MEMBERS_REMOVED, user_ids=user_ids)
+        recount(Organisation.objects.filter(pk__in=members))
+        invalidate_organisations(*members, user_ids=[user_id for user_ids in members.values() for user_id in user_ids])
+
+
+# --- 4. DailyContent Admin Configuration ---
+
+@admin.register(DailyContent)
+class DailyContentAdmin(admin.ModelAdmin):
+    # Written by `manage.py build_daily_content`; servers cache it, so edits here are
+    # not shown before DAILY_CONTENT_CACHE_SECONDS. Prefer `--rebuild`.
+    list_display = ('day', 'organisation', 'created_at')
+    list_filter = ('day',)
+    search_fields = ('organisation__name', 'organisation__slug')
+    raw_id_fields = ('organisation',)
+    readonly_fields = ('created_at', 'updated_at')
+
+
+# --- 5. AuditEvent Admin Configuration ---
+
+@admin.register(AuditEvent)
+class AuditEventAdmin(admin.ModelAdmin):
+    # Append-only: written by apps.organisations.audit, never edited here.
+    list_display = ('occurred_at', 'action', 'organisation_id', 'actor_id', 'subject_id')
+    list_filter = ('action',)
+    search_fields = ('=organisation_id', '=actor_id', '=subject_id')
+    # Filtered lists do not also count the whole, ever-growing log.
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -11,4 +11,8 @@ class OrganisationsConfig(AppConfig):
     label = 'organisations'
 
     # Optional: A human-readable name for the admin site
-    verbose_name = 'Organisations & Memberships'
\ No newline at end of file
+    verbose_name = 'Organisations & Memberships'
+
+    def ready(self):
+        # Publishes the organisation events of memberships deleted with their user.
+        from . import signals  # noqa: F401
@@ -0,0 +1,173 @@
+from uuid import UUID
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from graphql import GraphQLError
+from graphql_jwt.decorators import login_required
+from graphql_relay.node.node import from_global_id
+
+from apps.core.authorization import get_authorization
+from apps.core.mutations import async_mutation
+from apps.core.optimizer import optimize
+from apps.users.loaders import users_by_id
+from apps.users.schema import MAX_USER_SEARCH_RESULTS
+from apps.users.search import normalise, search_users
+
+from . import audit
+from .daily import daily_content
+from .leaderboard import leaderboards
+from .loaders import (
+    aorganisation_by_slug,
+    organisations_by_id,
+    queue_membership_fields,
+    queue_organisation_fields,
+)
+from .models import Organisation, OrganisationMembership
+from .schema import (
+    AddMemberToOrganisation,
+    CreateOrganisation,
+    ImportOrganisationMembers,
+    OrganisationQuery,
+    OrganisationSubscription,  # already async: shared by both schemas
+    PublishGameState,
+    RecordGameScore,
+    RemoveMemberFromOrganisation,
+    RemoveMembersFromOrganisation,
+    UpdateOrganisation,
+    UpdateOrganisationMembership,
+    UpdateOrganisationMemberships,
+    _audit_range,
+    _check_organisation_visible,
+    _decode_organisation_id,
+    _indexed_members,
+    _local_date,
+    _queue_audit_users,
+)
+
+User = get_user_model()
+
+
+async def _aget_organisation_and_check_admin(info, organisation_id):
+    """Async counterpart of schema._get_organisation_and_check_admin."""
+    user = info.context.user
+    if not user.is_authenticated:
+        raise GraphQLError("Authentication required.")
+
+    org_local_id = _decode_organisation_id(organisation_id)
+
+    authorization = await get_authorization(info).aload()
+    if not (authorization.is_superuser or authorization.is_org_admin_of(org_local_id)):
+        raise GraphQLError("Permission Denied: Organisation Admin privileges required.")
+
+    organisation = await organisations_by_id(info).load(org_local_id)
+    if organisation is None:
+        raise GraphQLError("Organisation not found.")
+
+    return organisation
+
+
+class AsyncOrganisationQuery(OrganisationQuery):
+    """OrganisationQuery with resolvers on Django's async ORM, for the async GraphQL view."""
+
+    @login_required
+    async def resolve_organisation(root, info, id=None, slug=None):
+        organisations_by_id(info).select(info.field_nodes)
+        # 1. Determine the organization object
+        if id:
+            try:
+                type_name, local_id = from_global_id(id)
+                org_local_id = UUID(local_id)
+            except ValueError:
+                raise GraphQLError("Invalid Global ID provided.")
+            org = await organisations_by_id(info).load(org_local_id)
+        elif slug:
+            org = await aorganisation_by_slug(info, slug)
+        else:
+            raise GraphQLError("Provide either 'id' or 'slug'.")
+
+        if org is None:
+            return None
+
+        # 2. PERMISSION CHECK (the context must be loaded before checking on the event loop)
+        await get_authorization(info).aload()
+        return _check_organisation_visible(info, org)
+
+    @login_required
+    async def resolve_my_organisations(root, info):
+        queryset = Organisation.objects.filter(memberships__user=info.context.user).distinct()
+        organisations = [org async for org in optimize(queryset, info)]
+        return queue_organisation_fields(info, organisations)
+
+    @login_required
+    async def resolve_my_memberships(root, info):
+        user = info.context.user
+        users_by_id(info).prime(user.pk, user)
+        queryset = OrganisationMembership.objects.filter(user=user)
+        memberships = [membership async for membership in optimize(queryset, info)]
+        return queue_membership_fields(info, memberships)
+
+    @login_required
+    async def resolve_all_memberships(root, info, organisationId):
+        organisation = await _aget_organisation_and_check_admin(info, organisationId)
+        memberships = [membership async for membership in optimize(organisation.memberships.all(), info)]
+        return queue_membership_fields(info, memberships)
+
+    @login_required
+    async def resolve_all_memberships_connection(root, info, organisationId, **kwargs):
+        organisation = await _aget_organisation_and_check_admin(info, organisationId)
+        return organisation.memberships.all()
+
+    @login_required
+    async def resolve_leaderboard(root, info, organisationId):
+        organisation = await organisations_by_id(info).load(_decode_organisation_id(organisationId))
+        if organisation is None:
+            raise GraphQLError("Organisation not found.")
+        await get_authorization(info).aload()
+        _check_organisation_visible(info, organisation)
+        # Only a board that is not loaded yet (or stale) needs the database.
+        return leaderboards.loaded(organisation.pk) or await sync_to_async(leaderboards.get)(organisation.pk)
+
+    @login_required
+    async def resolve_daily_content(root, info, organisationId=None, timeZone=None):
+        day = _local_date(timeZone)
+        organisation_id = None
+        if organisationId is not None:
+            organisation = await organisations_by_id(info).load(_decode_organisation_id(organisationId))
+            if organisation is None:
+                raise GraphQLError("Organisation not found.")
+            await get_authorization(info).aload()
+            _check_organisation_visible(info, organisation)
+            organisation_id = organisation.pk
+        # Nearly always in memory; only a scope this process has not read yet needs the database.
+        return daily_content.cached(organisation_id, day) or await sync_to_async(daily_content.get)(organisation_id, day)
+
+    @login_required
+    async def resolve_search_members(root, info, organisationId, prefix, first):
+        term, first = normalise(prefix), min(max(first, 0), MAX_USER_SEARCH_RESULTS)
+        organisation = await _aget_organisation_and_check_admin(info, organisationId)
+        user_ids = _indexed_members(organisation, term, first)
+        if user_ids is None:
+            return await sync_to_async(search_users)(
+                User.objects.filter(memberships__organisation=organisation), term, first,
+            )
+        users = await User.objects.ain_bulk(user_ids)
+        return [users[user_id] for user_id in user_ids if user_id in users]
+
+    @login_required
+    async def resolve_audit_log(root, info, organisationId, since, first, until=None, after=None):
+        organisation = await _aget_organisation_and_check_admin(info, organisationId)
+        since, until, first, after = _audit_range(since, until, first, after)
+        found = await sync_to_async(audit.events_between)(organisation.pk, since, until, first, after)
+        return _queue_audit_users(info, found)
+
+
+AsyncCreateOrganisation = async_mutation(CreateOrganisation)
+AsyncUpdateOrganisation = async_mutation(UpdateOrganisation)
+AsyncAddMemberToOrganisation = async_mutation(AddMemberToOrganisation)
+AsyncUpdateOrganisationMembership = async_mutation(UpdateOrganisationMembership)
+AsyncRemoveMemberFromOrganisation = async_mutation(RemoveMemberFromOrganisation)
+AsyncUpdateOrganisationMemberships = async_mutation(UpdateOrganisationMemberships)
+AsyncRemoveMembersFromOrganisation = async_mutation(RemoveMembersFromOrganisation)
+AsyncImportOrganisationMembers = async_mutation(ImportOrganisationMembers)
+AsyncPublishGameState = async_mutation(PublishGameState)
+AsyncRecordGameScore = async_mutation(RecordGameScore)
@@ -0,0 +1,132 @@
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.core.batches import apply_isolated
+from apps.core.drains import BackgroundDrain
+
+from .models import AuditEvent, AuditOutbox
+
+# Outbox rows are moved to AuditEvent every DRAIN_SECONDS (sooner once DRAIN_BATCH
+# changes were recorded), DRAIN_BATCH rows per transaction.
+DRAIN_SECONDS = getattr(settings, 'AUDIT_DRAIN_SECONDS', 1)
+DRAIN_BATCH = getattr(settings, 'AUDIT_DRAIN_BATCH', 1000)
+
+# AuditEvent.action values (models.AUDIT_ACTION_CHOICES).
+ORGANISATION_CREATED = 1
+ORGANISATION_UPDATED = 2
+ORGANISATION_DELETED = 3
+MEMBER_ADDED = 4
+MEMBER_REMOVED = 5
+ROLE_CHANGED = 6
+
+logger = logging.getLogger(__name__)
+
+
+# --- 1. RECORDING (inside the change's transaction) ---
+
+def record(organisation_id, action, actor_id=None, subject_ids=(), **details):
+    """
+    Adds a change to the audit log. Call it inside the transaction making the change:
+    it costs one small INSERT into the outbox, whatever the number of members in
+    `subject_ids`, and is rolled back with the change. ORGANISATION_CREATED's subject
+    is the creator, its first admin.
+    """
+    AuditOutbox.objects.create(
+        occurred_at=timezone.now(),
+        organisation_id=organisation_id,
+        action=action,
+        actor_id=actor_id,
+        subject_ids=[str(subject_id) for subject_id in subject_ids],
+        details=details or None,
+    )
+    transaction.on_commit(audit_drain.recorded)
+
+
+def record_membership_change(actor_id, before, after):
+    """
+    Records an edit of a membership made in the admin. `before` and `after` are its
+    (organisation id, user id, is_org_admin), None when it was added or deleted.
+    """
+    if before is not None and after is not None and before[:2] == after[:2]:
+        if before[2] != after[2]:
+            record(after[0], ROLE_CHANGED, actor_id, [after[1]], is_org_admin=after[2])
+        return
+    if before is not None:
+        record(before[0], MEMBER_REMOVED, actor_id, [before[1]])
+    if after is not None:
+        record(after[0], MEMBER_ADDED, actor_id, [after[1]], is_org_admin=after[2])
+
+
+# --- 2. DRAINING THE OUTBOX ---
+
+def _events(row):
+    return [
+        AuditEvent(
+            occurred_at=row.occurred_at,
+            organisation_id=row.organisation_id,
+            action=row.action,
+            actor_id=row.actor_id,
+            subject_id=subject_id,
+            details=row.details,
+        )
+        for subject_id in row.subject_ids or [None]
+    ]
+
+
+def _move(rows):
+    AuditEvent.objects.bulk_create([event for row in rows for event in _events(row)], batch_size=5000)
+    AuditOutbox.objects.filter(pk__in=[row.pk for row in rows]).delete()
+
+
+def _set_aside(row, error):
+    logger.error("Audit outbox row %s (organisation %s) could not be moved: %s", row.pk, row.organisation_id, error)
+    AuditOutbox.objects.filter(pk=row.pk).update(failed_at=timezone.now())
+
+
+def drain(batch=DRAIN_BATCH):
+    """
+    Moves every outbox row to AuditEvent, one row per member, `batch` outbox rows per
+    transaction: a bulk INSERT and a DELETE. A row that cannot be moved is set aside
+    (failed_at) rather than holding back the rest. Returns how many outbox rows were
+    moved. Processes draining at the same time take different rows (SKIP LOCKED).
+    """
+    moved = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                AuditOutbox.objects.select_for_update(skip_locked=True)
+                .filter(failed_at__isnull=True).order_by('id')[:batch]
+            )
+            if not rows:
+                return moved
+            moved += len(apply_isolated(rows, _move, _set_aside))
+        if len(rows) < batch:
+            return moved
+
+
+# Drains the outbox from a background thread once this process has recorded changes,
+# including rows other processes left; `manage.py drain_audit_outbox` does it on demand.
+audit_drain = BackgroundDrain(drain, DRAIN_SECONDS, DRAIN_BATCH, 'audit-drain')
+
+
+# --- 3. READING ---
+
+def events_between(organisation_id, since, until, first, after=None):
+    """
+    The organisation's audit events from `since` (inclusive) to `until` (exclusive),
+    oldest first, at most `first`, starting after the (occurred_at, id) of `after`.
+
+    The time range is what narrows the scan (the BRIN index on occurred_at), so
+    callers bound its length. Changes show up once drained, within DRAIN_SECONDS.
+    """
+    events = AuditEvent.objects.filter(
+        organisation_id=organisation_id, occurred_at__gte=since, occurred_at__lt=until,
+    )
+    if after is not None:
+        occurred_at, pk = after
+        events = events.filter(Q(occurred_at__gt=occurred_at) | Q(occurred_at=occurred_at, id__gt=pk))
+    return list(events.order_by('occurred_at', 'id')[:first])
@@ -0,0 +1,145 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router, transaction
+
+from apps.core import caches
+from apps.core.authorization import invalidate_roles
+
+from .leaderboard import leaderboards
+from .models import Organisation
+
+ORGANISATION_PREFIX = 'orgs:organisation:'
+SLUG_PREFIX = 'orgs:slug:'
+ORGANISATION_CACHE_TIMEOUT = getattr(settings, 'ORGANISATION_CACHE_TIMEOUT', 60 * 5)
+
+# Written over an invalidated entry for a few seconds. Refills use cache.add(), so a
+# reader that fetched the row just before a write committed cannot put it back.
+INVALIDATED = 'invalidated'
+INVALIDATION_GRACE = 5
+
+
+# --- 1. ORGANISATION RECORDS ---
+
+def _key(organisation_id):
+    return f"{ORGANISATION_PREFIX}{organisation_id}"
+
+
+def _fields():
+    return [field.attname for field in Organisation._meta.concrete_fields]
+
+
+def _record(organisation):
+    """The cacheable form of an organisation: every column, including the counters."""
+    return [getattr(organisation, name) for name in _fields()]
+
+
+def _from_record(record):
+    return Organisation.from_db(router.db_for_read(Organisation), _fields(), record)
+
+
+def _cached(found, keys):
+    return {
+        organisation_id: _from_record(found[key])
+        for organisation_id, key in keys.items()
+        if found.get(key) not in (None, INVALIDATED)
+    }
+
+
+def _fill(organisations):
+    for organisation in organisations:
+        cache.add(_key(organisation.pk), _record(organisation), ORGANISATION_CACHE_TIMEOUT)
+
+
+async def _afill(organisations):
+    for organisation in organisations:
+        await cache.aadd(_key(organisation.pk), _record(organisation), ORGANISATION_CACHE_TIMEOUT)
+
+
+def get_organisations(ids):
+    """
+    Returns {id: Organisation} for the given ids, reading the shared cache first and
+    the database only for the misses, which are then cached. Fresh instances are
+    built for every call, so callers may modify them.
+
+    Records are only cached when every process shares the cache (see
+    apps.core.caches): a write invalidates them in the cache it can reach, and a
+    per-process copy elsewhere would keep serving the old row.
+    """
+    if not caches.is_shared():
+        return Organisation.objects.in_bulk(list(ids))
+    keys = {organisation_id: _key(organisation_id) for organisation_id in ids}
+    organisations = _cached(cache.get_many(list(keys.values())), keys)
+    missing = [organisation_id for organisation_id in keys if organisation_id not in organisations]
+    if missing:
+        loaded = Organisation.objects.in_bulk(missing)
+        _fill(loaded.values())
+        organisations.update(loaded)
+    return organisations
+
+
+async def aget_organisations(ids):
+    if not caches.is_shared():
+        return await Organisation.objects.ain_bulk(list(ids))
+    keys = {organisation_id: _key(organisation_id) for organisation_id in ids}
+    organisations = _cached(await cache.aget_many(list(keys.values())), keys)
+    missing = [organisation_id for organisation_id in keys if organisation_id not in organisations]
+    if missing:
+        loaded = await Organisation.objects.ain_bulk(missing)
+        await _afill(loaded.values())
+        organisations.update(loaded)
+    return organisations
+
+
+# --- 2. SLUGS ---
+
+def _slug_key(slug):
+    return f"{SLUG_PREFIX}{slug}"
+
+
+def cached_id_for_slug(slug):
+    """
+    The organisation id last seen under `slug`, or None. Slugs can move between
+    organisations, so callers must check the slug of the record they load.
+    """
+    return cache.get(_slug_key(slug)) if caches.is_shared() else None
+
+
+async def acached_id_for_slug(slug):
+    return await cache.aget(_slug_key(slug)) if caches.is_shared() else None
+
+
+def remember_slug(organisation):
+    if caches.is_shared():
+        cache.set(_slug_key(organisation.slug), organisation.pk, ORGANISATION_CACHE_TIMEOUT)
+
+
+async def aremember_slug(organisation):
+    if caches.is_shared():
+        await cache.aset(_slug_key(organisation.slug), organisation.pk, ORGANISATION_CACHE_TIMEOUT)
+
+
+# --- 3. INVALIDATION ---
+
+def _tombstone(keys):
+    cache.set_many({key: INVALIDATED for key in keys}, INVALIDATION_GRACE)
+
+
+def invalidate_organisations(*organisation_ids, user_ids=()):
+    """
+    Drops the cached records of the given organisations, and the cached roles of
+    `user_ids` whose memberships in them changed. Membership changes also drop
+    this process's leaderboards of the organisations, to be rebuilt on next use.
+
+    Entries are dropped immediately and again when the surrounding transaction
+    commits, so neither the writer nor anyone else reads the pre-write row once
+    the write is visible.
+    """
+    keys = [_key(organisation_id) for organisation_id in set(organisation_ids) if organisation_id]
+    if keys and caches.is_shared():
+        _tombstone(keys)
+        transaction.on_commit(lambda: _tombstone(keys))
+    if user_ids:
+        invalidate_roles(*user_ids)
+        ids = [organisation_id for organisation_id in organisation_ids if organisation_id]
+        leaderboards.discard(*ids)
+        transaction.on_commit(lambda: leaderboards.discard(*ids))
@@ -0,0 +1,90 @@
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import Organisation, OrganisationMembership
+
+
+# --- 1. INCREMENTAL UPDATES (used by the membership mutations) ---
+
+def adjust_counters(organisation, members=0, admins=0):
+    """
+    Atomically shifts an organisation's member_count/admin_count by the given deltas
+    with a single F()-expression UPDATE. The in-memory instance is shifted too, so
+    the mutation response reflects the write without re-reading the row.
+    Must be called inside the same transaction as the membership write.
+    """
+    if not members and not admins:
+        return
+    Organisation.objects.filter(pk=organisation.pk).update(
+        member_count=F('member_count') + members,
+        admin_count=F('admin_count') + admins,
+    )
+    organisation.member_count += members
+    organisation.admin_count += admins
+
+
+def release_admin(organisation, remove_member=False):
+    """
+    Decrements admin_count (and member_count if remove_member) only if at least one
+    other admin remains. This is the last-admin guardrail as one conditional UPDATE:
+    returns False, changing nothing, when the admin is the organisation's sole admin.
+    """
+    return release_admins(organisation, 1, members=1 if remove_member else 0)
+
+
+def release_admins(organisation, admins, members=0):
+    """
+    Batch form of release_admin(): removes `admins` admins (and `members` members)
+    from the counters only if at least one admin is left afterwards, so the
+    last-admin guardrail is evaluated once against the final state of a batch.
+    """
+    updated = Organisation.objects.filter(pk=organisation.pk, admin_count__gt=admins).update(
+        member_count=F('member_count') - members,
+        admin_count=F('admin_count') - admins,
+    )
+    if not updated:
+        return False
+    organisation.member_count -= members
+    organisation.admin_count -= admins
+    return True
+
+
+# --- 2. RECONCILIATION (used by admin saves and the management command) ---
+
+def _counted(**filters):
+    return Coalesce(
+        Subquery(
+            OrganisationMembership.objects
+            .filter(organisation=OuterRef('pk'), **filters)
+            .order_by()
+            .values('organisation')
+            .annotate(total=Count('id'))
+            .values('total')
+        ),
+        Value(0),
+    )
+
+
+def recount(queryset=None):
+    """
+    Recomputes member_count/admin_count from the membership table in a single
+    UPDATE ... SET = (SELECT COUNT(*) ...) statement. Returns the number of rows updated.
+    """
+    if queryset is None:
+        queryset = Organisation.objects.all()
+    return queryset.update(
+        member_count=_counted(),
+        admin_count=_counted(is_org_admin=True),
+    )
+
+
+def drifted(queryset=None):
+    """Organisations whose stored counters disagree with the membership table."""
+    if queryset is None:
+        queryset = Organisation.objects.all()
+    return queryset.annotate(
+        actual_members=_counted(),
+        actual_admins=_counted(is_org_admin=True),
+    ).filter(
+        ~Q(member_count=F('actual_members')) | ~Q(admin_count=F('actual_admins'))
+    )
@@ -0,0 +1,180 @@
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.conf import settings
+from django.db import router
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import DailyContent
+
+# Days after today (UTC) that build_daily_content prepares in advance, and how long a
+# process keeps a scope's days before reading them again (each process picks a time
+# within +/-10% of it, so they do not all reload together).
+DAYS_AHEAD = getattr(settings, 'DAILY_CONTENT_DAYS_AHEAD', 2)
+CACHE_SECONDS = getattr(settings, 'DAILY_CONTENT_CACHE_SECONDS', 3600)
+CACHE_SCOPES = getattr(settings, 'DAILY_CONTENT_CACHE_SCOPES', 10000)
+DEFAULT_TIME_ZONE = getattr(settings, 'DAILY_CONTENT_TIME_ZONE', settings.TIME_ZONE)
+# Builds one day's payload: a callable (organisation id or None, date) -> JSON-serializable dict.
+BUILDER = getattr(settings, 'DAILY_CONTENT_BUILDER', 'apps.organisations.daily.build_content')
+
+# Puzzles get harder through the week, easiest on Monday.
+DIFFICULTIES = ('EASY', 'EASY', 'MEDIUM', 'MEDIUM', 'HARD', 'HARD', 'EXPERT')
+
+
+def build_content(organisation_id, day):
+    """
+    The default builder: the day's puzzle and game, derived deterministically from
+    the scope and the date, so building a day twice yields the same content.
+    """
+    digest = hashlib.sha256(f"{organisation_id or 'global'}:{day.isoformat()}".encode('ascii')).digest()
+    rng = random.Random(digest)
+    return {
+        'puzzle': {
+            'id': f"puzzle-{day.isoformat()}-{digest[:4].hex()}",
+            'seed': rng.getrandbits(32),
+            'difficulty': DIFFICULTIES[day.weekday()],
+        },
+        'game': {
+            'id': f"game-{day.isoformat()}-{digest[4:8].hex()}",
+            'seed': rng.getrandbits(32),
+        },
+    }
+
+
+def window(today=None):
+    """
+    The dates build_daily_content prepares: from yesterday (UTC) to DAYS_AHEAD days
+    ahead. Somewhere on Earth it is always yesterday, today or tomorrow in UTC.
+    """
+    today = today or timezone.now().date()
+    return [today + timedelta(days=offset) for offset in range(-1, DAYS_AHEAD + 1)]
+
+
+def local_date(time_zone=None):
+    """Today's date in an IANA time zone (DEFAULT_TIME_ZONE if None); ValueError if unknown."""
+    try:
+        zone = ZoneInfo(time_zone or DEFAULT_TIME_ZONE)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown time zone {time_zone!r}.")
+    return timezone.now().astimezone(zone).date()
+
+
+def serialize(organisation_id, day):
+    return json.dumps(import_string(BUILDER)(organisation_id, day), separators=(',', ':'), sort_keys=True)
+
+
+class Edition:
+    """One scope's content for one day, deserialized once per process."""
+
+    __slots__ = ('organisation_id', 'day', 'puzzle', 'game', 'generated_at')
+
+    def __init__(self, organisation_id, day, payload, generated_at):
+        content = json.loads(payload)
+        self.organisation_id = organisation_id
+        self.day = day
+        self.puzzle = content.get('puzzle')
+        self.game = content.get('game')
+        self.generated_at = generated_at
+
+
+# --- 1. PROCESS-LOCAL CACHE ---
+
+class _Scope:
+    __slots__ = ('editions', 'expires_at', 'lock')
+
+    def __init__(self):
+        self.editions = {}
+        self.expires_at = 0.0
+        self.lock = threading.Lock()
+
+
+class DailyContentCache:
+    """
+    Every scope's editions of the days in window(), per process.
+
+    A scope is read with one query for its whole window, so the editions of the next
+    day are in memory before any time zone reaches midnight: the rollover costs no
+    query at all. Reloads are spread out (jittered expiry) and single-flight: while
+    one thread rereads a scope, the others keep serving what it had. Only a day that
+    build_daily_content has not prepared is built on request, once per process.
+    """
+
+    def __init__(self, maxsize=CACHE_SCOPES):
+        self.maxsize = maxsize
+        self._scopes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _scope(self, organisation_id):
+        with self._lock:
+            scope = self._scopes.get(organisation_id)
+            if scope is None:
+                scope = self._scopes[organisation_id] = _Scope()
+            self._scopes.move_to_end(organisation_id)
+            while len(self._scopes) > self.maxsize:
+                self._scopes.popitem(last=False)
+            return scope
+
+    def cached(self, organisation_id, day):
+        """The edition if this process has it fresh in memory, else None (get() would query)."""
+        scope = self._scopes.get(organisation_id)
+        if scope is None or scope.expires_at < time.monotonic():
+            return None
+        return scope.editions.get(day)
+
+    def get(self, organisation_id, day):
+        """The scope's edition of `day`, loading or building it if this process lacks it."""
+        scope = self._scope(organisation_id)
+        edition = scope.editions.get(day)
+        if edition is not None and scope.expires_at >= time.monotonic():
+            return edition
+        if edition is not None and not scope.lock.acquire(blocking=False):
+            # Another thread is rereading this scope: serve what we have meanwhile.
+            return edition
+        if edition is None:
+            scope.lock.acquire()
+        try:
+            # The thread holding the lock before us may have loaded it already.
+            if scope.expires_at < time.monotonic() or day not in scope.editions:
+                self._load(scope, organisation_id, day)
+            return scope.editions[day]
+        finally:
+            scope.lock.release()
+
+    def _load(self, scope, organisation_id, day):
+        days = window()
+        if day not in days:
+            days.append(day)
+        rows = DailyContent.objects.filter(organisation_id=organisation_id, day__in=days).values_list(
+            'day', 'payload', 'created_at'
+        )
+        editions = {row_day: Edition(organisation_id, row_day, payload, created_at)
+                    for row_day, payload, created_at in rows}
+        if day not in editions:
+            editions[day] = self._build(organisation_id, day)
+        scope.editions = editions
+        scope.expires_at = time.monotonic() + CACHE_SECONDS * random.uniform(0.9, 1.1)
+
+    def _build(self, organisation_id, day):
+        # build_daily_content has not run for this day yet. Another process may be
+        # building it too: whichever inserts first wins, and both serve that row.
+        database = router.db_for_write(DailyContent)
+        DailyContent.objects.using(database).bulk_create(
+            [DailyContent(organisation_id=organisation_id, day=day, payload=serialize(organisation_id, day))],
+            ignore_conflicts=True,
+        )
+        row = DailyContent.objects.using(database).get(organisation_id=organisation_id, day=day)
+        return Edition(organisation_id, day, row.payload, row.created_at)
+
+    def clear(self):
+        with self._lock:
+            self._scopes.clear()
+
+
+daily_content = DailyContentCache()
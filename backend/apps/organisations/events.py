@@ -0,0 +1,65 @@
+from django.db import transaction
+from django.utils import timezone
+
+from apps.core.broker import broker
+from apps.users.search import tenant_indexes
+
+ORGANISATION_UPDATED = 'ORGANISATION_UPDATED'
+MEMBERS_ADDED = 'MEMBERS_ADDED'
+MEMBERS_REMOVED = 'MEMBERS_REMOVED'
+ROLES_CHANGED = 'ROLES_CHANGED'
+GAME_STATE = 'GAME_STATE'
+
+
+class OrganisationEvent:
+    """
+    Something that happened in an organisation, as delivered to its subscribed members.
+
+    Its fields do not depend on who receives it, so apps.core.websocket renders it
+    once per distinct subscription operation rather than once per subscriber.
+    """
+
+    shared_result = True
+
+    __slots__ = ('kind', 'organisation_id', 'user_ids', 'game_id', 'state', 'occurred_at', '__weakref__')
+
+    def __init__(self, kind, organisation_id, user_ids=(), game_id=None, state=None):
+        self.kind = kind
+        self.organisation_id = organisation_id
+        self.user_ids = tuple(user_ids)
+        self.game_id = game_id
+        self.state = state
+        self.occurred_at = timezone.now()
+
+    def removes(self, user_id):
+        return self.kind == MEMBERS_REMOVED and user_id in self.user_ids
+
+
+def topic(organisation_id):
+    return f"organisation:{organisation_id}"
+
+
+def publish_organisation_event(organisation_id, kind, user_ids=(), **details):
+    """
+    Tells the organisation's subscribers (the organisationEvents subscription)
+    about a write, once the surrounding transaction commits.
+    """
+    broker.publish_on_commit(topic(organisation_id), OrganisationEvent(kind, organisation_id, user_ids, **details))
+    if kind in (MEMBERS_ADDED, MEMBERS_REMOVED):
+        # The members searchMembers finds in memory, if the organisation is indexed there.
+        transaction.on_commit(lambda: tenant_indexes.invalidate(organisation_id))
+
+
+def publish_membership_change(before, after):
+    """
+    Publishes an edit of a membership made in the admin. `before` and `after` are its
+    (organisation id, user id, is_org_admin), None when it was added or deleted.
+    """
+    if before is not None and after is not None and before[:2] == after[:2]:
+        if before[2] != after[2]:
+            publish_organisation_event(after[0], ROLES_CHANGED, user_ids=[after[1]])
+        return
+    if before is not None:
+        publish_organisation_event(before[0], MEMBERS_REMOVED, user_ids=[before[1]])
+    if after is not None:
+        publish_organisation_event(after[0], MEMBERS_ADDED, user_ids=[after[1]])
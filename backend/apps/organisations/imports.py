@@ -0,0 +1,241 @@
+import csv
+import json
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+
+from . import audit
+from .cache import invalidate_organisations
+from .counters import recount
+from .models import Organisation, OrganisationMembership
+
+FORMATS = ('csv', 'ndjson')
+DEFAULT_CHUNK_SIZE = 1000
+# Error rows kept in the returned report; further errors are only counted.
+MAX_REPORTED_ERRORS = 1000
+
+_TRUE = {'1', 'true', 'yes', 'y', 't'}
+_FALSE = {'', '0', 'false', 'no', 'n', 'f'}
+
+
+class ImportRow:
+    """One parsed input row: a user identified by username or email, and its admin flag."""
+
+    __slots__ = ('line', 'username', 'email', 'is_org_admin', 'error')
+
+    def __init__(self, line, username=None, email=None, is_org_admin=False, error=None):
+        self.line = line
+        self.username = username
+        self.email = email
+        self.is_org_admin = is_org_admin
+        self.error = error
+
+    @property
+    def identifier(self):
+        return self.username or self.email or ''
+
+
+class RowError:
+    """A row that was not imported, with the reason."""
+
+    __slots__ = ('line', 'identifier', 'message')
+
+    def __init__(self, line, identifier, message):
+        self.line = line
+        self.identifier = identifier
+        self.message = message
+
+    def __str__(self):
+        return f"line {self.line} ({self.identifier or '-'}): {self.message}"
+
+
+class ImportReport:
+    """Running totals of an import. Only the first MAX_REPORTED_ERRORS errors are kept."""
+
+    def __init__(self, max_errors=MAX_REPORTED_ERRORS):
+        self.created = 0
+        self.already_members = 0
+        self.failed = 0
+        self.errors = []
+        self.max_errors = max_errors
+
+    def add_error(self, error):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append(error)
+
+    @property
+    def rows(self):
+        return self.created + self.already_members + self.failed
+
+
+# --- 1. STREAMING PARSERS ---
+
+def _parse_flag(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value if value is not None else '').strip().lower()
+    if text in _TRUE:
+        return True
+    if text in _FALSE:
+        return False
+    raise ValueError(f"Invalid is_org_admin value '{value}'.")
+
+
+def _row(line, record):
+    username = (record.get('username') or '').strip() or None
+    email = (record.get('email') or '').strip() or None
+    if not (username or email):
+        return ImportRow(line, error="Row has neither a username nor an email.")
+    try:
+        is_org_admin = _parse_flag(record.get('is_org_admin'))
+    except ValueError as error:
+        return ImportRow(line, username, email, error=str(error))
+    # A username wins over an email when both are given.
+    return ImportRow(line, username, None if username else email, is_org_admin)
+
+
+def parse_csv(lines):
+    """
+    Yields ImportRows from CSV text with a header row naming `username` and/or
+    `email`, and optionally `is_org_admin`. Reads one line at a time.
+    """
+    reader = csv.DictReader(lines)
+    fields = set(reader.fieldnames or ())
+    if not fields & {'username', 'email'}:
+        raise ValueError("CSV header must contain a 'username' or 'email' column.")
+    for record in reader:
+        yield _row(reader.line_num, record)
+
+
+def parse_ndjson(lines):
+    """Yields ImportRows from one JSON object per line, with the same keys as the CSV columns."""
+    for line, text in enumerate(lines, start=1):
+        if not text.strip():
+            continue
+        try:
+            record = json.loads(text)
+        except ValueError:
+            yield ImportRow(line, error="Invalid JSON.")
+            continue
+        if not isinstance(record, dict):
+            yield ImportRow(line, error="Expected a JSON object.")
+            continue
+        yield _row(line, record)
+
+
+def parse(lines, format):
+    if format not in FORMATS:
+        raise ValueError(f"Unsupported format '{format}'; expected one of {', '.join(FORMATS)}.")
+    return parse_csv(lines) if format == 'csv' else parse_ndjson(lines)
+
+
+# --- 2. CHUNKED IMPORT ---
+
+def _chunks(rows, size):
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def _resolve_users(chunk):
+    """Maps the chunk's usernames and emails to user ids with a single query."""
+    usernames = {row.username for row in chunk if row.username}
+    emails = {row.email for row in chunk if row.email}
+    found = get_user_model().objects.filter(
+        Q(username__in=usernames) | Q(email__in=emails)
+    ).values_list('pk', 'username', 'email').order_by()
+
+    by_username, by_email = {}, {}
+    for pk, username, email in found:
+        by_username[username] = pk
+        by_email[email] = pk
+    return by_username, by_email
+
+
+def _import_chunk(organisation, chunk, report, on_error, actor_id):
+    def fail(row, message):
+        error = RowError(row.line, row.identifier, message)
+        report.add_error(error)
+        if on_error is not None:
+            on_error(error)
+
+    valid = []
+    for row in chunk:
+        if row.error:
+            fail(row, row.error)
+        else:
+            valid.append(row)
+    if not valid:
+        return
+
+    by_username, by_email = _resolve_users(valid)
+    pending = {}
+    for row in valid:
+        user_id = by_username.get(row.username) if row.username else by_email.get(row.email)
+        if user_id is None:
+            fail(row, "User not found.")
+        elif user_id in pending:
+            fail(row, "Duplicate of an earlier row.")
+        else:
+            pending[user_id] = row
+    if not pending:
+        return
+
+    existing = _existing_members(organisation, pending)
+    memberships = [
+        OrganisationMembership(user_id=user_id, organisation=organisation, is_org_admin=row.is_org_admin)
+        for user_id, row in pending.items()
+        if user_id not in existing
+    ]
+    with transaction.atomic():
+        # ignore_conflicts covers rows a concurrent request inserted after the check
+        # above; the recount keeps member_count/admin_count exact either way.
+        OrganisationMembership.objects.bulk_create(memberships, ignore_conflicts=True)
+        if memberships:
+            # Primary keys are generated here, so only the rows actually inserted carry ours.
+            inserted = set(
+                OrganisationMembership.objects.filter(pk__in=[m.pk for m in memberships])
+                .values_list('pk', flat=True).order_by()
+            )
+            memberships = [m for m in memberships if m.pk in inserted]
+        recount(Organisation.objects.filter(pk=organisation.pk))
+        for is_org_admin in (False, True):
+            added = [m.user_id for m in memberships if m.is_org_admin == is_org_admin]
+            if added:
+                audit.record(organisation.pk, audit.MEMBER_ADDED, actor_id, added, is_org_admin=is_org_admin)
+        invalidate_organisations(organisation.pk, user_ids=[m.user_id for m in memberships])
+    report.created += len(memberships)
+    report.already_members += len(pending) - len(memberships)
+
+
+def _existing_members(organisation, user_ids):
+    return set(
+        OrganisationMembership.objects.filter(organisation=organisation, user_id__in=user_ids)
+        .values_list('user_id', flat=True).order_by()
+    )
+
+
+def import_memberships(organisation, rows, chunk_size=DEFAULT_CHUNK_SIZE, on_error=None, actor_id=None):
+    """
+    Adds the users of `rows` (an iterable of ImportRow, e.g. from parse()) to
+    `organisation`, `chunk_size` rows at a time.
+
+    Each chunk costs two queries plus one transaction (user lookup, existing
+    membership check, then bulk INSERT, reading back which rows it inserted and
+    the counter recount) regardless of the row count, and only one chunk is held
+    in memory. Existing members, including those added concurrently, are counted
+    and left unchanged. Rejected rows are passed to `on_error` as they occur and collected
+    in the returned ImportReport. The additions are audited as made by `actor_id`
+    (a user id; None for management commands).
+    """
+    report = ImportReport()
+    for chunk in _chunks(rows, chunk_size):
+        _import_chunk(organisation, chunk, report, on_error, actor_id)
+
+    organisation.member_count, organisation.admin_count = (
+        Organisation.objects.filter(pk=organisation.pk).values_list('member_count', 'admin_count').get()
+    )
+    return report
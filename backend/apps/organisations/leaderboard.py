@@ -0,0 +1,245 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import router, transaction
+from django.db.models import Case, F, OuterRef, PositiveBigIntegerField, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.core.batches import apply_isolated
+from apps.core.drains import BackgroundDrain
+from apps.core.ranking import RankedSkipList
+
+from .models import OrganisationMembership, ScoreOutbox
+
+logger = logging.getLogger(__name__)
+
+# Recorded points are added to the scores at least every FLUSH_SECONDS, or as soon as
+# FLUSH_BATCH awards are waiting. A leaderboard is reloaded when older than
+# REFRESH_SECONDS, which bounds how long other processes' points take to show up.
+FLUSH_SECONDS = getattr(settings, 'LEADERBOARD_FLUSH_SECONDS', 2)
+FLUSH_BATCH = getattr(settings, 'LEADERBOARD_FLUSH_BATCH', 500)
+REFRESH_SECONDS = getattr(settings, 'LEADERBOARD_REFRESH_SECONDS', 60)
+
+
+class Standing:
+    """A member's place on a leaderboard. Members with equal scores share a rank."""
+
+    __slots__ = ('rank', 'score', 'membership_id', 'user_id')
+
+    def __init__(self, rank, score, membership_id, user_id):
+        self.rank = rank
+        self.score = score
+        self.membership_id = membership_id
+        self.user_id = user_id
+
+
+# --- 1. ONE ORGANISATION'S LEADERBOARD ---
+
+class Leaderboard:
+    """
+    An organisation's members ordered by score, in memory.
+
+    Entries are keyed (-score, membership id) in a RankedSkipList, so a score
+    change, a member's rank and the start of any page are all O(log n); reading
+    k entries from there is O(k). A rank counts the members with a strictly
+    higher score, so ties share it (1, 2, 2, 4).
+    """
+
+    def __init__(self, organisation_id, rows):
+        # rows: (membership id, user id, score) of every member.
+        self.organisation_id = organisation_id
+        self.loaded_at = time.monotonic()
+        self._scores = {membership_id: score for membership_id, _, score in rows}
+        self._memberships = {user_id: membership_id for membership_id, user_id, _ in rows}
+        self._order = RankedSkipList.from_sorted(sorted(
+            ((-score, membership_id), user_id) for membership_id, user_id, score in rows
+        ))
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._order)
+
+    def is_stale(self):
+        return time.monotonic() - self.loaded_at > REFRESH_SECONDS
+
+    def membership_of(self, user_id):
+        return self._memberships.get(user_id)
+
+    def add_points(self, membership_id, points):
+        with self._lock:
+            score = self._scores[membership_id]
+            user_id = self._order.remove((-score, membership_id))
+            score += points
+            self._scores[membership_id] = score
+            self._order.insert((-score, membership_id), user_id)
+            return self._standing(membership_id, score, user_id)
+
+    def _rank(self, score):
+        return self._order.count_less((-score,)) + 1
+
+    def _standing(self, membership_id, score, user_id):
+        return Standing(self._rank(score), score, membership_id, user_id)
+
+    def _standings(self, start, count):
+        items = self._order.slice(start, count)
+        standings, rank, previous = [], None, None
+        for position, ((negated, membership_id), user_id) in enumerate(items, start + 1):
+            score = -negated
+            if score != previous:
+                # The first entry of a page may tie with entries before it.
+                rank = self._rank(score) if previous is None else position
+                previous = score
+            standings.append(Standing(rank, score, membership_id, user_id))
+        return standings
+
+    def top(self, count):
+        with self._lock:
+            return self._standings(0, count)
+
+    def standing_of(self, user_id):
+        with self._lock:
+            membership_id = self._memberships.get(user_id)
+            if membership_id is None:
+                return None
+            score = self._scores[membership_id]
+            return self._standing(membership_id, score, user_id)
+
+    def around(self, user_id, neighbours):
+        """The member's standing with up to `neighbours` members ranked above and below."""
+        with self._lock:
+            membership_id = self._memberships.get(user_id)
+            if membership_id is None:
+                return []
+            position = self._order.count_less((-self._scores[membership_id], membership_id))
+            start = max(position - neighbours, 0)
+            return self._standings(start, position - start + neighbours + 1)
+
+
+# --- 2. DURABLE SCORE WRITES ---
+
+def record_points(membership_id, points):
+    """
+    Records an award in ScoreOutbox, in the caller's transaction: a single INSERT,
+    so the points survive this process and concurrent awards to one member never
+    wait on each other. apply_points() adds them to the score.
+    """
+    ScoreOutbox.objects.create(membership_id=membership_id, points=points)
+    transaction.on_commit(score_drain.recorded)
+
+
+def _add_to_scores(rows):
+    totals = {}
+    for row in rows:
+        totals[row.membership_id] = totals.get(row.membership_id, 0) + row.points
+    OrganisationMembership.objects.filter(pk__in=list(totals)).update(score=Case(
+        *(When(pk=pk, then=F('score') + Value(points)) for pk, points in totals.items()),
+        default=F('score'),
+        output_field=PositiveBigIntegerField(),
+    ))
+    ScoreOutbox.objects.filter(pk__in=[row.pk for row in rows]).delete()
+
+
+def _set_aside(row, error):
+    logger.error("Leaderboard points %s could not be added to membership %s: %s", row.pk, row.membership_id, error)
+    ScoreOutbox.objects.filter(pk=row.pk).update(failed_at=timezone.now())
+
+
+def apply_points(batch=FLUSH_BATCH):
+    """
+    Adds recorded awards to their memberships' scores, `batch` outbox rows per
+    transaction: one UPDATE (score = score + CASE ...) and a DELETE, so a burst of
+    thousands of awards costs two statements. A row that cannot be added is set
+    aside (failed_at) rather than holding back the rest. Returns how many rows
+    were added. Processes applying at the same time take different rows (SKIP LOCKED).
+    """
+    applied = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                ScoreOutbox.objects.select_for_update(skip_locked=True)
+                .filter(failed_at__isnull=True).order_by('id')[:batch]
+            )
+            if not rows:
+                return applied
+            applied += len(apply_isolated(rows, _add_to_scores, _set_aside))
+        if len(rows) < batch:
+            return applied
+
+
+# Applies the outbox from a background thread once this process has recorded awards,
+# including rows other processes left; `manage.py apply_leaderboard_points` does it on demand.
+score_drain = BackgroundDrain(apply_points, FLUSH_SECONDS, FLUSH_BATCH, 'leaderboard-drain')
+
+
+# --- 3. PER-PROCESS REGISTRY ---
+
+class Leaderboards:
+    """
+    The leaderboards this process has loaded, rebuilt from the database on first
+    use, when stale, and after their membership changed.
+
+    Each process ranks its own awards immediately; awards made by other processes
+    appear once this process reloads the board.
+    """
+
+    def __init__(self):
+        self._boards = {}
+        self._lock = threading.Lock()
+
+    def _load(self, organisation_id):
+        # Scores plus the points recorded but not yet added, read from the primary.
+        database = router.db_for_write(OrganisationMembership)
+        pending = ScoreOutbox.objects.filter(
+            membership_id=OuterRef('pk'), failed_at__isnull=True,
+        ).values('membership_id').annotate(total=Sum('points')).values('total')
+        rows = OrganisationMembership.objects.using(database).filter(
+            organisation_id=organisation_id
+        ).values_list('pk', 'user_id', F('score') + Coalesce(Subquery(pending), 0))
+        board = Leaderboard(organisation_id, list(rows))
+        with self._lock:
+            self._boards[organisation_id] = board
+        return board
+
+    def loaded(self, organisation_id):
+        """The board if it is loaded and fresh, else None (get() would query the database)."""
+        board = self._boards.get(organisation_id)
+        if board is None or board.is_stale():
+            return None
+        return board
+
+    def get(self, organisation_id):
+        board = self.loaded(organisation_id)
+        if board is None:
+            board = self._load(organisation_id)
+        return board
+
+    def record(self, organisation_id, user_id, points):
+        """Adds points to a member's score; returns their new Standing. Raises KeyError for non-members."""
+        board = self.get(organisation_id)
+        membership_id = board.membership_of(user_id)
+        if membership_id is None and time.monotonic() - board.loaded_at > 1:
+            # The member may have joined in another process since the board was loaded.
+            board = self._load(organisation_id)
+            membership_id = board.membership_of(user_id)
+        if membership_id is None:
+            raise KeyError(user_id)
+
+        record_points(membership_id, points)
+        return board.add_points(membership_id, points)
+
+    def discard(self, *organisation_ids):
+        """Forgets loaded boards, e.g. after their members changed; they reload on next use."""
+        with self._lock:
+            for organisation_id in organisation_ids:
+                self._boards.pop(organisation_id, None)
+
+    def reset(self):
+        """Forgets every board."""
+        with self._lock:
+            self._boards.clear()
+
+
+leaderboards = Leaderboards()
@@ -0,0 +1,193 @@
+from collections import defaultdict
+
+from apps.core.dataloaders import AsyncDataLoader, DataLoader, cached_relation, clear_loader_key, get_loader
+from apps.core.optimizer import selection
+from apps.users.loaders import users_by_id
+
+from .cache import (
+    acached_id_for_slug,
+    aget_organisations,
+    aremember_slug,
+    cached_id_for_slug,
+    get_organisations,
+    invalidate_organisations,
+    remember_slug,
+)
+from .models import Organisation, OrganisationMembership
+
+
+# --- 1. BATCH FUNCTIONS ---
+
+def _organisations_factory(info):
+    def batch_load(keys):
+        # Organisation rows rarely change: they come from the shared cache (see .cache).
+        organisations = get_organisations(keys)
+        found = list(organisations.values())
+        # Queue the nested fields the next level will ask for.
+        queue_organisation_fields(info, found, loader.take_selection())
+        return [organisations.get(key) for key in keys]
+
+    loader = DataLoader(batch_load)
+    return loader
+
+
+def _async_organisations_factory(info):
+    async def batch_load(keys):
+        organisations = await aget_organisations(keys)
+        queue_organisation_fields(info, list(organisations.values()), loader.take_selection())
+        return [organisations.get(key) for key in keys]
+
+    loader = AsyncDataLoader(batch_load)
+    return loader
+
+
+def _group_memberships(info, keys, memberships, field_nodes):
+    grouped = defaultdict(list)
+    for membership in memberships:
+        grouped[membership.organisation_id].append(membership)
+    queue_membership_fields(info, memberships, field_nodes)
+    return [grouped.get(key, []) for key in keys]
+
+
+def _memberships_by_organisation_factory(info):
+    def batch_load(keys):
+        memberships = list(OrganisationMembership.objects.filter(organisation_id__in=keys))
+        return _group_memberships(info, keys, memberships, loader.take_selection())
+
+    loader = DataLoader(batch_load)
+    return loader
+
+
+def _async_memberships_by_organisation_factory(info):
+    async def batch_load(keys):
+        memberships = [m async for m in OrganisationMembership.objects.filter(organisation_id__in=keys)]
+        return _group_memberships(info, keys, memberships, loader.take_selection())
+
+    loader = AsyncDataLoader(batch_load)
+    return loader
+
+
+# --- 2. PER-REQUEST ACCESSORS ---
+
+def organisations_by_id(info):
+    return get_loader(info, 'organisations_by_id', _organisations_factory, _async_organisations_factory)
+
+
+def memberships_by_organisation(info):
+    return get_loader(
+        info,
+        'memberships_by_organisation',
+        _memberships_by_organisation_factory,
+        _async_memberships_by_organisation_factory,
+    )
+
+
+def organisation_by_slug(info, slug):
+    """
+    Looks an organisation up by slug through the shared cache and the per-request
+    loader; only the first lookup of a slug (or of a renamed one) reads the database.
+    """
+    organisation_id = cached_id_for_slug(slug)
+    if organisation_id is not None:
+        organisation = organisations_by_id(info).load(organisation_id)
+        if organisation is not None and organisation.slug == slug:
+            return organisation
+
+    organisation = Organisation.objects.filter(slug=slug).first()
+    if organisation is not None:
+        organisations_by_id(info).prime(organisation.pk, organisation)
+        remember_slug(organisation)
+    return organisation
+
+
+async def aorganisation_by_slug(info, slug):
+    organisation_id = await acached_id_for_slug(slug)
+    if organisation_id is not None:
+        organisation = await organisations_by_id(info).load(organisation_id)
+        if organisation is not None and organisation.slug == slug:
+            return organisation
+
+    organisation = await Organisation.objects.filter(slug=slug).afirst()
+    if organisation is not None:
+        organisations_by_id(info).prime(organisation.pk, organisation)
+        await aremember_slug(organisation)
+    return organisation
+
+
+# --- 3. QUEUEING HELPERS (called by list resolvers) ---
+
+_NOT_LOADED = object()
+
+
+def _selection(info, field_nodes, type_name):
+    if field_nodes is None:
+        return selection(info)
+    return selection(info, field_nodes, info.schema.get_type(type_name))
+
+
+def queue_membership_fields(info, memberships, field_nodes=None):
+    """
+    Enqueues the user and organisation keys of a list of memberships, for the
+    relations `field_nodes` (default: the field being resolved) select. Relations
+    the query optimizer already joined are primed into the loaders instead.
+    """
+    selected = _selection(info, field_nodes, 'OrganisationMembershipType')
+    users = users_by_id(info)
+    organisations = organisations_by_id(info).select(selected.get('organisation', ()))
+    preloaded = []
+    for membership in memberships:
+        user = cached_relation(membership, 'user', _NOT_LOADED)
+        if user is not _NOT_LOADED:
+            users.prime(membership.user_id, user)
+        elif 'user' in selected:
+            users.enqueue([membership.user_id])
+
+        organisation = cached_relation(membership, 'organisation', _NOT_LOADED)
+        if organisation is _NOT_LOADED:
+            if 'organisation' in selected:
+                organisations.enqueue([membership.organisation_id])
+        elif membership.organisation_id not in organisations:
+            organisations.prime(membership.organisation_id, organisation)
+            preloaded.append(organisation)
+    queue_organisation_fields(info, preloaded, selected.get('organisation', []))
+    return memberships
+
+
+def queue_organisation_fields(info, organisations, field_nodes=None):
+    """
+    Enqueues the creator and memberships keys of a list of organisations, for the
+    relations `field_nodes` (default: the field being resolved) select.
+    """
+    selected = _selection(info, field_nodes, 'OrganisationType')
+    users = users_by_id(info)
+    # `users` is read through the memberships too (OrganisationType.resolve_users).
+    wants_memberships = 'memberships' in selected or 'users' in selected
+    memberships_loader = memberships_by_organisation(info).select(selected.get('memberships', ()))
+    pending_memberships = []
+    for org in organisations:
+        created_by = cached_relation(org, 'created_by', _NOT_LOADED)
+        if created_by is _NOT_LOADED:
+            if 'createdBy' in selected:
+                users.enqueue([org.created_by_id])
+        elif created_by is not None:
+            users.prime(org.created_by_id, created_by)
+
+        memberships = cached_relation(org, 'memberships', _NOT_LOADED)
+        if memberships is _NOT_LOADED:
+            if wants_memberships:
+                pending_memberships.append(org.pk)
+        elif org.pk not in memberships_loader:
+            memberships_loader.prime(org.pk, memberships)
+            queue_membership_fields(info, memberships, selected.get('memberships', []))
+    memberships_loader.enqueue(pending_memberships)
+    return organisations
+
+
+def forget_organisation(info, organisation_id, user_ids=()):
+    """
+    Evicts an organisation that was just written: its memberships cached for this
+    request, its shared cache record, and the cached roles of `user_ids` whose
+    memberships in it changed.
+    """
+    clear_loader_key(info, 'memberships_by_organisation', organisation_id)
+    invalidate_organisations(organisation_id, user_ids=user_ids)
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from apps.organisations.leaderboard import FLUSH_BATCH, apply_points
+from apps.organisations.models import ScoreOutbox
+
+
+class Command(BaseCommand):
+    help = (
+        "Adds the recorded leaderboard points to the members' scores now, e.g. after a "
+        "server stopped before applying them. Safe to run while servers apply them too."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch',
+            type=int,
+            default=FLUSH_BATCH,
+            help='Outbox rows added per transaction.',
+        )
+
+    def handle(self, *args, batch=FLUSH_BATCH, **options):
+        applied = apply_points(batch)
+        self.stdout.write(self.style.SUCCESS(
+            f"Added {applied} outbox row(s) to the scores; {ScoreOutbox.objects.count()} left, "
+            f"{ScoreOutbox.objects.filter(failed_at__isnull=False).count()} of them set aside."
+        ))
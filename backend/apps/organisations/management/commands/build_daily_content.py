@@ -0,0 +1,70 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+
+from apps.organisations.daily import serialize, window
+from apps.organisations.models import DailyContent, Organisation
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = (
+        "Precomputes the daily puzzle and game of the global dashboard and of every active "
+        "organisation, from yesterday (UTC) to DAILY_CONTENT_DAYS_AHEAD days ahead. Run it "
+        "at least daily; days already built are kept unless --rebuild is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--organisation',
+            metavar='SLUG',
+            help='Only build this organisation (and not the global scope).',
+        )
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Replace days already built. Servers pick the new content up within DAILY_CONTENT_CACHE_SECONDS.',
+        )
+
+    def handle(self, *args, organisation=None, rebuild=False, **options):
+        organisations = Organisation.objects.filter(is_active=True).order_by('pk')
+        if organisation:
+            organisations = organisations.filter(slug=organisation)
+            if not organisations.exists():
+                raise CommandError(f"No active organisation with slug {organisation!r}.")
+            scopes = []
+        else:
+            scopes = [None]
+
+        scopes += list(organisations.values_list('pk', flat=True))
+        days = window()
+        built = kept = 0
+        for start in range(0, len(scopes), BATCH_SIZE):
+            created, existing = self._build(scopes[start:start + BATCH_SIZE], days, rebuild)
+            built += created
+            kept += existing
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Built {built} daily content payload(s) for {days[0]} to {days[-1]}; {kept} were already built."
+        ))
+
+    def _build(self, scopes, days, rebuild):
+        in_scopes = Q(organisation_id__in=[scope for scope in scopes if scope is not None])
+        if None in scopes:
+            in_scopes |= Q(organisation__isnull=True)
+        rows = DailyContent.objects.filter(in_scopes, day__in=days)
+
+        with transaction.atomic():
+            if rebuild:
+                rows.delete()
+                existing = set()
+            else:
+                existing = set(rows.values_list('organisation_id', 'day'))
+            missing = [
+                DailyContent(organisation_id=scope, day=day, payload=serialize(scope, day))
+                for scope in scopes for day in days if (scope, day) not in existing
+            ]
+            # A server may build a missing day on request meanwhile (see daily.DailyContentCache).
+            DailyContent.objects.bulk_create(missing, batch_size=BATCH_SIZE, ignore_conflicts=True)
+        return len(missing), len(existing)
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from apps.organisations.audit import DRAIN_BATCH, drain
+from apps.organisations.models import AuditOutbox
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves the audit outbox to the audit log now, e.g. after a server stopped before "
+        "draining it. Safe to run while servers drain too."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch',
+            type=int,
+            default=DRAIN_BATCH,
+            help='Outbox rows moved per transaction.',
+        )
+
+    def handle(self, *args, batch=DRAIN_BATCH, **options):
+        moved = drain(batch)
+        self.stdout.write(self.style.SUCCESS(
+            f"Moved {moved} outbox row(s) to the audit log; {AuditOutbox.objects.count()} left, "
+            f"{AuditOutbox.objects.filter(failed_at__isnull=False).count()} of them set aside."
+        ))
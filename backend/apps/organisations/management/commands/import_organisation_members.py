@@ -0,0 +1,50 @@
+import sys
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.organisations.imports import DEFAULT_CHUNK_SIZE, FORMATS, import_memberships, parse
+from apps.organisations.models import Organisation
+
+
+class Command(BaseCommand):
+    help = (
+        "Adds users to an organisation from a CSV (header: username and/or email, "
+        "optional is_org_admin) or NDJSON file, streaming it in chunks."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('organisation', help='Slug of the organisation to add members to.')
+        parser.add_argument('path', help="File to import, or '-' to read standard input.")
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help='Input format. Defaults to the file extension, or csv.',
+        )
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, organisation, path, format=None, chunk_size=DEFAULT_CHUNK_SIZE, **options):
+        try:
+            target = Organisation.objects.get(slug=organisation)
+        except Organisation.DoesNotExist:
+            raise CommandError(f"Organisation '{organisation}' does not exist.")
+
+        if format is None:
+            format = 'ndjson' if Path(path).suffix.lower() in ('.ndjson', '.jsonl') else 'csv'
+
+        def report_error(error):
+            self.stderr.write(str(error))
+
+        stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        try:
+            report = import_memberships(target, parse(stream, format), chunk_size, on_error=report_error)
+        except ValueError as error:
+            raise CommandError(str(error))
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{target.slug}: {report.created} added, {report.already_members} already members, "
+            f"{report.failed} failed. Now {target.member_count} members, {target.admin_count} admins."
+        ))
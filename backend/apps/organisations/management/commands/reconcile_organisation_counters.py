@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.organisations.cache import invalidate_organisations
+from apps.organisations.counters import drifted, recount
+
+
+class Command(BaseCommand):
+    help = "Recomputes Organisation.member_count and admin_count from the membership table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report organisations whose counters have drifted.',
+        )
+
+    def handle(self, *args, dry_run=False, **options):
+        stale = list(
+            drifted().values_list('pk', 'slug', 'member_count', 'actual_members', 'admin_count', 'actual_admins')
+        )
+        for _, slug, members, actual_members, admins, actual_admins in stale:
+            self.stdout.write(
+                f"{slug}: members {members} -> {actual_members}, admins {admins} -> {actual_admins}"
+            )
+
+        if dry_run:
+            self.stdout.write(f"{len(stale)} organisation(s) drifted (dry run, nothing changed).")
+            return
+
+        # Recount everything rather than only the drifted rows: a membership written
+        # between the report and the fix is then still counted correctly.
+        with transaction.atomic():
+            updated = recount()
+            # Rows that did not drift were rewritten with the same counts; only the
+            # drifted ones can be cached with wrong values.
+            invalidate_organisations(*(row[0] for row in stale))
+        self.stdout.write(self.style.SUCCESS(
+            f"Reconciled {updated} organisation(s); {len(stale)} had drifted."
+        ))
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organisations', '0003_organisationmembership_alter_organisation_users_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='organisationmembership',
+            index=models.Index(fields=['organisation', '-created_at', '-id'], name='membership_org_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:55
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Organisation = apps.get_model('organisations', 'Organisation')
+    OrganisationMembership = apps.get_model('organisations', 'OrganisationMembership')
+
+    def counted(**filters):
+        return Coalesce(
+            Subquery(
+                OrganisationMembership.objects
+                .filter(organisation=OuterRef('pk'), **filters)
+                .order_by()
+                .values('organisation')
+                .annotate(total=Count('id'))
+                .values('total')
+            ),
+            Value(0),
+        )
+
+    Organisation.objects.update(member_count=counted(), admin_count=counted(is_org_admin=True))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organisations', '0004_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='organisation',
+            name='admin_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of memberships in this organisation with admin privileges.'),
+        ),
+        migrations.AddField(
+            model_name='organisation',
+            name='member_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of memberships in this organisation.'),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
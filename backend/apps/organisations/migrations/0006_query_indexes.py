@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organisations', '0005_organisation_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='organisationmembership',
+            index=models.Index(fields=['user', '-created_at'], name='membership_user_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='organisationmembership',
+            index=models.Index(condition=models.Q(('is_org_admin', True)), fields=['organisation'], name='membership_org_admins_idx'),
+        ),
+    ]
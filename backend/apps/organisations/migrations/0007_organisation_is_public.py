@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organisations', '0006_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='organisation',
+            name='is_public',
+            field=models.BooleanField(default=False, help_text='Designates whether non-members may view the organisation.'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organisations', '0007_organisation_is_public'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='organisationmembership',
+            name='score',
+            field=models.PositiveBigIntegerField(default=0, help_text='Leaderboard points earned in this organisation (written in batches by apps.organisations.leaderboard).'),
+        ),
+        migrations.AddIndex(
+            model_name='organisationmembership',
+            index=models.Index(fields=['organisation', '-score', 'id'], name='membership_org_score_idx'),
+        ),
+    ]
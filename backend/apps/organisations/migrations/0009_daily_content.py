@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:37
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organisations', '0008_membership_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyContent',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, help_text='The unique primary key for this object.', primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='The date and time this object was created.')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='The date and time this object was last updated.')),
+                ('day', models.DateField(help_text='The local date this content is shown on, in any time zone.')),
+                ('payload', models.TextField(help_text='The content as JSON: {"puzzle": {...}, "game": {...}}.')),
+                ('organisation', models.ForeignKey(blank=True, help_text='The organisation whose dashboard shows this content; empty for the global dashboard.', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_content', to='organisations.organisation')),
+            ],
+            options={
+                'verbose_name': 'Daily Content',
+                'verbose_name_plural': 'Daily Content',
+                'constraints': [models.UniqueConstraint(fields=('organisation', 'day'), name='daily_content_org_day_uniq'), models.UniqueConstraint(condition=models.Q(('organisation__isnull', True)), fields=('day',), name='daily_content_global_day_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:22
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+from apps.core.operations import AddPostgresIndex
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organisations', '0009_daily_content'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditOutbox',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('occurred_at', models.DateTimeField()),
+                ('organisation_id', models.UUIDField()),
+                ('action', models.PositiveSmallIntegerField(choices=[(1, 'Organisation created'), (2, 'Organisation updated'), (3, 'Organisation deleted'), (4, 'Member added'), (5, 'Member removed'), (6, 'Role changed')])),
+                ('actor_id', models.UUIDField(null=True)),
+                ('subject_ids', models.JSONField(default=list, help_text='The users the change concerns.')),
+                ('details', models.JSONField(null=True)),
+            ],
+            options={
+                'verbose_name': 'Audit Outbox Entry',
+                'verbose_name_plural': 'Audit Outbox',
+            },
+        ),
+        migrations.CreateModel(
+            name='AuditEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('occurred_at', models.DateTimeField(help_text='When the change was made (its transaction recorded it).')),
+                ('organisation_id', models.UUIDField()),
+                ('action', models.PositiveSmallIntegerField(choices=[(1, 'Organisation created'), (2, 'Organisation updated'), (3, 'Organisation deleted'), (4, 'Member added'), (5, 'Member removed'), (6, 'Role changed')])),
+                ('actor_id', models.UUIDField(help_text='Who made the change; empty for management commands.', null=True)),
+                ('subject_id', models.UUIDField(help_text='The member the change concerns, if any.', null=True)),
+                ('details', models.JSONField(help_text='E.g. {"is_org_admin": true}, or changed fields as [old, new].', null=True)),
+            ],
+            options={
+                'verbose_name': 'Audit Event',
+                'verbose_name_plural': 'Audit Events',
+            },
+        ),
+        # BRIN is PostgreSQL's; other databases skip it (see AddPostgresIndex).
+        AddPostgresIndex(
+            model_name='auditevent',
+            index=django.contrib.postgres.indexes.BrinIndex(fields=['occurred_at'], name='audit_event_occurred_brin'),
+        ),
+    ]
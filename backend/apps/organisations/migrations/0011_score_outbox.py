@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organisations', '0010_audit_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreOutbox',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('membership_id', models.UUIDField(db_index=True)),
+                ('points', models.PositiveIntegerField()),
+                ('failed_at', models.DateTimeField(blank=True, help_text='When adding the points failed, if it did.', null=True)),
+            ],
+            options={
+                'verbose_name': 'Leaderboard Points Entry',
+                'verbose_name_plural': 'Leaderboard Points Outbox',
+            },
+        ),
+    ]
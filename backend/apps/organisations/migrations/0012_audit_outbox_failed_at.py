@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organisations', '0011_score_outbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auditoutbox',
+            name='failed_at',
+            field=models.DateTimeField(blank=True, help_text='When moving the row failed, if it did.', null=True),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.conf import settings
+from django.contrib.postgres.indexes import BrinIndex
 from django.db import models
 from apps.core.models import AbstractBaseModel  # Assuming this import path
 
@@ -31,9 +32,28 @@ class OrganisationMembership(AbstractBaseModel):
         help_text='If True, the user has administrative privileges within this specific organisation.'
     )
 
+    score = models.PositiveBigIntegerField(
+        default=0,
+        help_text="Leaderboard points earned in this organisation (written in batches by apps.organisations.leaderboard)."
+    )
+
     class Meta:
         # Crucial for preventing duplicate membership
         unique_together = ('user', 'organisation')
+        indexes = [
+            # Serves keyset pagination of an organisation's members (see apps.core.pagination).
+            models.Index(fields=['organisation', '-created_at', '-id'], name='membership_org_keyset_idx'),
+            # A user's memberships in the default (-created_at) order, e.g. myMemberships.
+            models.Index(fields=['user', '-created_at'], name='membership_user_recent_idx'),
+            # Admins of an organisation: admin_count recounts and admin lookups.
+            models.Index(
+                fields=['organisation'],
+                condition=models.Q(is_org_admin=True),
+                name='membership_org_admins_idx',
+            ),
+            # Loads an organisation's leaderboard already in rank order.
+            models.Index(fields=['organisation', '-score', 'id'], name='membership_org_score_idx'),
+        ]
         verbose_name = 'Organisation Membership'
         verbose_name_plural = 'Organisation Memberships'
 
@@ -53,6 +73,10 @@ class Organisation(AbstractBaseModel):
     name = models.CharField(max_length=255, unique=True, help_text='The full name of the organisation.')
     slug = models.SlugField(max_length=255, unique=True, help_text='A URL-friendly short name for the organisation.')
     is_active = models.BooleanField(default=True, help_text='Designates whether the organisation account is active.')
+    is_public = models.BooleanField(
+        default=False,
+        help_text='Designates whether non-members may view the organisation.'
+    )
 
     created_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -69,9 +93,162 @@ class Organisation(AbstractBaseModel):
         related_name='organisations'
     )
 
+    # Denormalised counters, maintained by apps.organisations.counters inside the
+    # same transaction as every membership write. Reconcile with
+    # `manage.py reconcile_organisation_counters` if they ever drift.
+    member_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text='Number of memberships in this organisation.'
+    )
+    admin_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text='Number of memberships in this organisation with admin privileges.'
+    )
+
+    COUNTER_FIELDS = ('member_count', 'admin_count')
+
     class Meta:
         verbose_name = 'Organisation'
         verbose_name_plural = 'Organisations'
 
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.name
+
+    def save(self, *args, **kwargs):
+        # Never write the counters back from a possibly stale instance: they are only
+        # changed by the F()-expression UPDATEs in apps.organisations.counters.
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+# --- 3. DAILY CONTENT ---
+
+class DailyContent(AbstractBaseModel):
+    """
+    The puzzle and game of one day for one organisation, or for everyone (global scope,
+    organisation NULL), serialized once by `manage.py build_daily_content` and served
+    from memory by apps.organisations.daily.
+    """
+
+    organisation = models.ForeignKey(
+        'organisations.Organisation',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='daily_content',
+        help_text='The organisation whose dashboard shows this content; empty for the global dashboard.'
+    )
+    day = models.DateField(help_text='The local date this content is shown on, in any time zone.')
+    payload = models.TextField(help_text='The content as JSON: {"puzzle": {...}, "game": {...}}.')
+
+    class Meta:
+        constraints = [
+            # Also the index a scope's days are loaded with.
+            models.UniqueConstraint(fields=['organisation', 'day'], name='daily_content_org_day_uniq'),
+            # NULLs are distinct in the constraint above, so the global scope needs its own.
+            models.UniqueConstraint(
+                fields=['day'],
+                condition=models.Q(organisation__isnull=True),
+                name='daily_content_global_day_uniq',
+            ),
+        ]
+        verbose_name = 'Daily Content'
+        verbose_name_plural = 'Daily Content'
+
+    def __str__(self):
+        return f"{self.organisation_id or 'global'} {self.day}"
+
+
+# --- 4. AUDIT LOG ---
+
+AUDIT_ACTION_CHOICES = (
+    (1, 'Organisation created'),
+    (2, 'Organisation updated'),
+    (3, 'Organisation deleted'),
+    (4, 'Member added'),
+    (5, 'Member removed'),
+    (6, 'Role changed'),
+)
+
+
+class AuditOutbox(models.Model):
+    """
+    Audit events not yet moved to AuditEvent (transactional outbox).
+
+    apps.organisations.audit.record() inserts one row per change inside the change's
+    own transaction, however many members it concerns, so the history commits or
+    rolls back with it. A background drain moves the rows to AuditEvent in batches.
+    Rows that cannot be moved are kept with failed_at set.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    occurred_at = models.DateTimeField()
+    organisation_id = models.UUIDField()
+    action = models.PositiveSmallIntegerField(choices=AUDIT_ACTION_CHOICES)
+    actor_id = models.UUIDField(null=True)
+    subject_ids = models.JSONField(default=list, help_text='The users the change concerns.')
+    details = models.JSONField(null=True)
+    failed_at = models.DateTimeField(null=True, blank=True, help_text='When moving the row failed, if it did.')
+
+    class Meta:
+        verbose_name = 'Audit Outbox Entry'
+        verbose_name_plural = 'Audit Outbox'
+
+
+class AuditEvent(models.Model):
+    """
+    One change to an organisation or to one of its memberships; append-only.
+
+    Kept compact for a table that only grows: a bigint key, no foreign keys (the
+    history outlives deleted users and organisations, and writes check nothing),
+    no unique constraints and no updates. Rows arrive in time order, so a BRIN
+    index on occurred_at serves time ranges at a tiny fraction of a B-tree's size,
+    and the table can later be range-partitioned on occurred_at as it stands.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    occurred_at = models.DateTimeField(help_text='When the change was made (its transaction recorded it).')
+    organisation_id = models.UUIDField()
+    action = models.PositiveSmallIntegerField(choices=AUDIT_ACTION_CHOICES)
+    actor_id = models.UUIDField(null=True, help_text='Who made the change; empty for management commands.')
+    subject_id = models.UUIDField(null=True, help_text='The member the change concerns, if any.')
+    details = models.JSONField(null=True, help_text='E.g. {"is_org_admin": true}, or changed fields as [old, new].')
+
+    class Meta:
+        indexes = [
+            # Time ranges (auditLog). PostgreSQL only, see migration 0010.
+            BrinIndex(fields=['occurred_at'], name='audit_event_occurred_brin'),
+        ]
+        verbose_name = 'Audit Event'
+        verbose_name_plural = 'Audit Events'
+
+    def __str__(self):
+        return f"{self.get_action_display()} ({self.occurred_at:%Y-%m-%d %H:%M:%S})"
+
+
+# --- 5. LEADERBOARD POINTS ---
+
+class ScoreOutbox(models.Model):
+    """
+    Leaderboard points awarded but not yet added to OrganisationMembership.score.
+
+    apps.organisations.leaderboard inserts one row per award, which survives the
+    process and takes no lock on the membership row, then adds the rows to the
+    scores in batches. Rows that cannot be added are kept with failed_at set.
+    No foreign key, like AuditOutbox: inserts check nothing and deleting members
+    stays a single DELETE; points of a deleted membership update no row.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    membership_id = models.UUIDField(db_index=True)
+    points = models.PositiveIntegerField()
+    failed_at = models.DateTimeField(null=True, blank=True, help_text='When adding the points failed, if it did.')
+
+    class Meta:
+        verbose_name = 'Leaderboard Points Entry'
+        verbose_name_plural = 'Leaderboard Points Outbox'
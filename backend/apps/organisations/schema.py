@@ -1,66 +1,232 @@
+import asyncio
+import io
+import json
+
 import graphene
 from graphene_django.types import DjangoObjectType
 from graphql import GraphQLError
-from graphql_relay.node.node import from_global_id
+from graphql_relay.node.node import from_global_id, to_global_id
+from graphql_relay.utils import base64, unbase64
 from graphql_jwt.decorators import login_required
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from django.db.models import Q
+from datetime import datetime, timedelta
+from django.utils import timezone
+from uuid import UUID
+
+from apps.core import ratelimit
+from apps.core.complexity import limit_list
+from apps.core.authorization import get_authorization
+from apps.core.broker import broker
+from apps.core.dataloaders import cached_relation, then
+from apps.core.optimizer import optimize, selection
+from apps.core.pagination import KeysetConnectionField
+from apps.users.loaders import users_by_id
+from apps.users.schema import MAX_USER_SEARCH_RESULTS
+from apps.users.search import MIN_INFIX_LENGTH, normalise, search_users, tenant_indexes
 
 # Assuming these are the correct model import paths
 from .models import Organisation, OrganisationMembership
+from . import audit
+from .counters import adjust_counters, release_admin, release_admins
+from .daily import daily_content, local_date
+from . import events
+from .events import publish_organisation_event
+from .imports import import_memberships, parse as parse_import
+from .leaderboard import leaderboards
+from .loaders import (
+    forget_organisation,
+    memberships_by_organisation,
+    organisation_by_slug,
+    organisations_by_id,
+    queue_membership_fields,
+    queue_organisation_fields,
+)
 
 # We no longer need to import the custom permission classes from core
 # as we are implementing basic checks inline.
 
 User = get_user_model()
 
+# Largest number of members one batch mutation may change.
+MAX_MEMBER_BATCH = 1000
+# Largest game state (JSON-encoded, with its game ID) PublishGameState relays to subscribers.
+MAX_GAME_STATE_BYTES = getattr(settings, 'GRAPHQL_GAME_STATE_MAX_BYTES', 4096)
+# Seconds between re-checks of an organisationEvents subscriber's token and membership.
+EVENTS_RECHECK_SECONDS = getattr(settings, 'GRAPHQL_WS_RECHECK_SECONDS', 60)
+# Most points one RecordGameScore call may award, and leaderboard page bounds.
+MAX_GAME_POINTS = getattr(settings, 'LEADERBOARD_MAX_POINTS', 10000)
+MAX_LEADERBOARD_PAGE = 100
+MAX_LEADERBOARD_NEIGHBOURS = 25
+limit_list('LeaderboardType.top', MAX_LEADERBOARD_PAGE)
+limit_list('LeaderboardType.aroundMe', MAX_LEADERBOARD_NEIGHBOURS, 'neighbours', lambda neighbours: 2 * neighbours + 1)
+# Longest time range and most events one auditLog page may cover.
+MAX_AUDIT_RANGE_DAYS = getattr(settings, 'AUDIT_MAX_RANGE_DAYS', 31)
+MAX_AUDIT_PAGE = 500
+limit_list('Query.auditLog', MAX_AUDIT_PAGE)
+AUDIT_CURSOR_PREFIX = 'audit:'
+limit_list('Query.searchMembers', MAX_USER_SEARCH_RESULTS)
+
 
 # --- LOCAL HELPER FUNCTIONS ---
 
+def _decode_organisation_id(organisation_id):
+    """Decodes an OrganisationType Global ID into the local UUID primary key."""
+    try:
+        # CRITICAL FIX: Decode the Global ID (Base64 string) back to the local UUID (PK)
+        type_name, org_local_id = from_global_id(organisation_id)
+    except Exception:
+        raise GraphQLError("Invalid Organisation ID format.")
+
+    # Optional: Check if the decoded type matches the expected model (best practice)
+    if type_name != 'OrganisationType':
+        raise GraphQLError(f"Invalid ID type provided. Expected OrganisationType, received {type_name}.")
+
+    try:
+        return UUID(org_local_id)
+    except ValueError:
+        raise GraphQLError("Invalid Organisation ID format.")
+
+
 def _get_organisation_and_check_admin(info, organisation_id):
     """Retrieves organisation and checks if the requesting user is an Admin or SuperUser.
 
     This function MUST decode the Graphene Global ID before querying the Django ORM.
+    The admin check is answered from the per-request authorization context, and the
+    organisation itself comes from the per-request loader, so repeated calls within
+    one request cost no further queries.
     """
     user = info.context.user
     if not user.is_authenticated:
         raise GraphQLError("Authentication required.")
 
+    org_local_id = _decode_organisation_id(organisation_id)
+
+    authorization = get_authorization(info)
+    if not (authorization.is_superuser or authorization.is_org_admin_of(org_local_id)):
+        raise GraphQLError("Permission Denied: Organisation Admin privileges required.")
+
+    organisation = organisations_by_id(info).load(org_local_id)
+    if organisation is None:
+        raise GraphQLError("Organisation not found.")
+
+    return organisation
+
+
+def _check_organisation_visible(info, org):
+    """Returns org if the requesting user may see it: SuperUser, member, or public organisation."""
+    if info.context.user.is_superuser:
+        return org
+
+    is_member = get_authorization(info).is_member_of(org.pk)
+    if is_member:
+        return org
+
+    if org.is_public:
+        return org
+
+    raise GraphQLError("Permission Denied: Not a member and organization is private.")
+
+
+def _local_date(time_zone):
+    """Today's date in an IANA time zone name, as chosen by the client (e.g. Europe/Berlin)."""
     try:
-        # CRITICAL FIX: Decode the Global ID (Base64 string) back to the local UUID (PK)
-        type_name, org_local_id = from_global_id(organisation_id)
+        return local_date(time_zone)
+    except ValueError as error:
+        raise GraphQLError(str(error))
+
+
+def _indexed_members(organisation, term, first):
+    """
+    The ids of the best matching members from the organisation's in-memory index
+    (apps.users.search.TenantIndexes), or None when the database must be searched:
+    the index is not built yet, or too few members start with the term and the
+    substring search has to fill up the rest.
+    """
+    index = tenant_indexes.get(organisation.pk, organisation.member_count)
+    if index is None:
+        return None
+    user_ids = index.search(term, first)
+    if len(user_ids) < first and len(term) >= MIN_INFIX_LENGTH:
+        return None
+    return user_ids
 
-        # Optional: Check if the decoded type matches the expected model (best practice)
-        if type_name != 'OrganisationType':
-            raise GraphQLError(f"Invalid ID type provided. Expected OrganisationType, received {type_name}.")
 
-        organisation = Organisation.objects.get(pk=org_local_id)
+def _audit_cursor(event):
+    return base64(f"{AUDIT_CURSOR_PREFIX}{event.occurred_at.isoformat()}|{event.pk}")
 
-    except Organisation.DoesNotExist:
-        raise GraphQLError("Organisation not found.")
-    except ValueError:
-        raise GraphQLError("Invalid Organisation ID format.")
-    except Exception as e:
-        # Catch the specific error raised by the type check if it occurs
-        if "Invalid ID type provided" in str(e):
-            raise GraphQLError(str(e))
-        # Re-raise generic errors that may occur during decoding/lookup
-        raise
 
-    if user.is_superuser:
-        return organisation
+def _audit_range(since, until, first, after):
+    """Checks auditLog's arguments; returns them as events_between() takes them."""
+    since, until = (
+        moment if moment is None or timezone.is_aware(moment) else timezone.make_aware(moment)
+        for moment in (since, until)
+    )
+    until = until or timezone.now()
+    if until <= since:
+        raise GraphQLError("`until` must be later than `since`.")
+    if until - since > timedelta(days=MAX_AUDIT_RANGE_DAYS):
+        raise GraphQLError(f"The time range can cover at most {MAX_AUDIT_RANGE_DAYS} days.")
+    if after is not None:
+        try:
+            value = unbase64(after)
+            if not value.startswith(AUDIT_CURSOR_PREFIX):
+                raise ValueError
+            occurred_at, pk = value[len(AUDIT_CURSOR_PREFIX):].split('|', 1)
+            after = datetime.fromisoformat(occurred_at), int(pk)
+        except (ValueError, TypeError):
+            raise GraphQLError("Invalid pagination cursor.")
+    return since, until, min(max(first, 0), MAX_AUDIT_PAGE), after
+
+
+def _queue_audit_users(info, audit_events):
+    """Queues the actors and members of a page of audit events, so resolving them costs one query."""
+    users_by_id(info).enqueue({
+        user_id for event in audit_events for user_id in (event.actor_id, event.subject_id) if user_id is not None
+    })
+    return audit_events
+
+
+def _decode_member_ids(info, member_ids):
+    """Parses a batch of member user IDs, enforcing the batch limit and the self-update guardrail."""
+    if not member_ids:
+        raise GraphQLError("Provide at least one member ID.")
+    if len(member_ids) > MAX_MEMBER_BATCH:
+        raise GraphQLError(f"A batch can change at most {MAX_MEMBER_BATCH} members.")
+    try:
+        user_ids = {UUID(str(member_id)) for member_id in member_ids}
+    except ValueError:
+        raise GraphQLError("Invalid member ID format.")
 
-    # Check for Admin status within the organization
-    is_admin = OrganisationMembership.objects.filter(
-        organisation=organisation,
-        user=user,
-        is_org_admin=True
-    ).exists()
+    # GUARDRAIL: Prevent Self-Update (checked once for the whole batch)
+    if info.context.user.pk in user_ids:
+        raise GraphQLError("Permission Denied: Organisation Admins cannot update their own membership status.")
+    return user_ids
 
-    if not is_admin:
-        raise GraphQLError("Permission Denied: Organisation Admin privileges required.")
 
-    return organisation
+def _lock_membership(organisation, user):
+    """Locks one member's membership row (SELECT ... FOR UPDATE) and returns it."""
+    try:
+        return OrganisationMembership.objects.select_for_update().get(organisation=organisation, user=user)
+    except OrganisationMembership.DoesNotExist:
+        raise GraphQLError("User is not a member of this organisation.")
+
+
+def _lock_memberships(organisation, user_ids):
+    """Locks the batch's membership rows and returns {user_id: (membership_id, is_org_admin)}."""
+    rows = OrganisationMembership.objects.select_for_update().filter(
+        organisation=organisation, user_id__in=user_ids
+    ).values_list('user_id', 'pk', 'is_org_admin').order_by()
+    locked = {user_id: (pk, is_org_admin) for user_id, pk, is_org_admin in rows}
+
+    missing = user_ids - locked.keys()
+    if missing:
+        raise GraphQLError(
+            "Users are not members of this organisation: " + ", ".join(sorted(str(pk) for pk in missing))
+        )
+    return locked
 
 
 # --- 1. TYPES ---
@@ -73,6 +239,14 @@ class OrganisationMembershipType(DjangoObjectType):
         fields = ('id', 'user', 'organisation', 'is_org_admin')
         interfaces = (graphene.Node,)
 
+    # Foreign keys go through the per-request loaders so a list of memberships
+    # costs one query per level instead of one per row.
+    def resolve_user(root, info):
+        return users_by_id(info).load(root.user_id)
+
+    def resolve_organisation(root, info):
+        return organisations_by_id(info).select(info.field_nodes).load(root.organisation_id)
+
 
 class OrganisationType(DjangoObjectType):
     """GraphQL Type for the Organisation model."""
@@ -85,10 +259,158 @@ class OrganisationType(DjangoObjectType):
         interfaces = (graphene.Node,)
 
     def resolve_member_count(root, info):
-        return root.users.count()
+        # Denormalised column, kept exact by apps.organisations.counters.
+        return root.member_count
 
     def resolve_memberships(root, info):
-        return root.memberships.all()
+        return memberships_by_organisation(info).select(info.field_nodes).load(root.pk)
+
+    def resolve_created_by(root, info):
+        return users_by_id(info).load(root.created_by_id)
+
+    def resolve_users(root, info):
+        prefetched = cached_relation(root, 'users')
+        if prefetched is not None:
+            return prefetched
+        return then(
+            memberships_by_organisation(info).load(root.pk),
+            lambda memberships: users_by_id(info).load_many([m.user_id for m in memberships]),
+        )
+
+
+class OrganisationConnection(graphene.relay.Connection):
+    class Meta:
+        node = OrganisationType
+
+
+class OrganisationMembershipConnection(graphene.relay.Connection):
+    class Meta:
+        node = OrganisationMembershipType
+
+
+class OrganisationEventKind(graphene.Enum):
+    ORGANISATION_UPDATED = events.ORGANISATION_UPDATED
+    MEMBERS_ADDED = events.MEMBERS_ADDED
+    MEMBERS_REMOVED = events.MEMBERS_REMOVED
+    ROLES_CHANGED = events.ROLES_CHANGED
+    GAME_STATE = events.GAME_STATE
+
+
+class OrganisationEventType(graphene.ObjectType):
+    """
+    A change in an organisation, pushed to its members over the organisationEvents
+    subscription. Events carry IDs only: clients refetch what they display.
+    """
+    kind = graphene.Field(OrganisationEventKind, required=True)
+    organisation_id = graphene.ID(required=True, description="Global ID of the organisation.")
+    user_ids = graphene.List(
+        graphene.NonNull(graphene.ID), required=True,
+        description="Users the event is about (the IDs membership mutations take as memberId).",
+    )
+    game_id = graphene.String(description="For GAME_STATE: the game the state belongs to.")
+    state = graphene.JSONString(description="For GAME_STATE: the state as published.")
+    occurred_at = graphene.DateTime(required=True)
+
+    def resolve_organisation_id(root, info):
+        return to_global_id('OrganisationType', root.organisation_id)
+
+
+class AuditAction(graphene.Enum):
+    ORGANISATION_CREATED = audit.ORGANISATION_CREATED
+    ORGANISATION_UPDATED = audit.ORGANISATION_UPDATED
+    ORGANISATION_DELETED = audit.ORGANISATION_DELETED
+    MEMBER_ADDED = audit.MEMBER_ADDED
+    MEMBER_REMOVED = audit.MEMBER_REMOVED
+    ROLE_CHANGED = audit.ROLE_CHANGED
+
+
+class AuditEventType(graphene.ObjectType):
+    """A change to an organisation or one of its memberships, from the audit log (apps.organisations.audit)."""
+    id = graphene.ID(required=True)
+    occurred_at = graphene.DateTime(required=True)
+    action = graphene.Field(AuditAction, required=True)
+    actor = graphene.Field(
+        'apps.users.schema.UserType',
+        description="Who made the change; empty for management commands and deleted users.",
+    )
+    member = graphene.Field('apps.users.schema.UserType', description="The member the change concerns, if any.")
+    details = graphene.JSONString(description="E.g. {\"is_org_admin\": true}, or changed fields as [old, new].")
+    cursor = graphene.String(required=True, description="Pass as `after` for the events following this one.")
+
+    def resolve_actor(root, info):
+        return None if root.actor_id is None else users_by_id(info).load(root.actor_id)
+
+    def resolve_member(root, info):
+        return None if root.subject_id is None else users_by_id(info).load(root.subject_id)
+
+    def resolve_cursor(root, info):
+        return _audit_cursor(root)
+
+
+class LeaderboardEntryType(graphene.ObjectType):
+    """A member's place on their organisation's leaderboard."""
+    rank = graphene.Int(required=True, description="1-based; members with equal scores share a rank.")
+    score = graphene.BigInt(required=True)
+    user = graphene.Field('apps.users.schema.UserType')
+
+    def resolve_user(root, info):
+        return users_by_id(info).load(root.user_id)
+
+
+def _queue_entries(info, standings):
+    """Queues the users of a page of standings, so resolving them costs one query."""
+    users_by_id(info).enqueue([standing.user_id for standing in standings])
+    return standings
+
+
+class LeaderboardType(graphene.ObjectType):
+    """An organisation's members ranked by score, served from memory (apps.organisations.leaderboard)."""
+    total = graphene.Int(required=True, description="Members on the leaderboard.")
+    top = graphene.List(
+        graphene.NonNull(LeaderboardEntryType),
+        first=graphene.Int(default_value=10),
+        description=f"The highest ranked members, at most {MAX_LEADERBOARD_PAGE}.",
+    )
+    me = graphene.Field(LeaderboardEntryType, description="The requesting user's standing, if they are a member.")
+    around_me = graphene.List(
+        graphene.NonNull(LeaderboardEntryType),
+        neighbours=graphene.Int(default_value=2),
+        description=f"The requesting user's standing between up to `neighbours` (at most {MAX_LEADERBOARD_NEIGHBOURS}) "
+                    "members ranked above and below them.",
+    )
+
+    def resolve_total(root, info):
+        return len(root)
+
+    def resolve_top(root, info, first):
+        return _queue_entries(info, root.top(min(max(first, 0), MAX_LEADERBOARD_PAGE)))
+
+    def resolve_me(root, info):
+        return root.standing_of(info.context.user.pk)
+
+    def resolve_around_me(root, info, neighbours):
+        neighbours = min(max(neighbours, 0), MAX_LEADERBOARD_NEIGHBOURS)
+        return _queue_entries(info, root.around(info.context.user.pk, neighbours))
+
+
+class DailyContentType(graphene.ObjectType):
+    """
+    A dashboard's puzzle and game of the day, the same for everyone in its scope and time
+    zone. Precomputed by `manage.py build_daily_content` and served from memory.
+    """
+    date = graphene.Date(required=True, description="The local date this content is for.")
+    organisation = graphene.Field(OrganisationType, description="Empty for the global dashboard.")
+    puzzle = graphene.JSONString()
+    game = graphene.JSONString()
+    generated_at = graphene.DateTime(required=True)
+
+    def resolve_date(root, info):
+        return root.day
+
+    def resolve_organisation(root, info):
+        if root.organisation_id is None:
+            return None
+        return organisations_by_id(info).select(info.field_nodes).load(root.organisation_id)
 
 
 # --- 2. QUERIES (RBAC Logic) ---
@@ -122,55 +444,146 @@ class OrganisationQuery(graphene.ObjectType):
         description="Lists all memberships for a specific organization (Org Admin required)."
     )
 
+    # Keyset-paginated variants of the lists above, for organisations too large to fetch at once.
+    my_organisations_connection = KeysetConnectionField(
+        OrganisationConnection,
+        prepare=queue_organisation_fields,
+        description="Paginated organisations the authenticated user is a member of, newest first."
+    )
+
+    all_memberships_connection = KeysetConnectionField(
+        OrganisationMembershipConnection,
+        organisationId=graphene.ID(required=True),
+        prepare=queue_membership_fields,
+        description="Paginated memberships of a specific organization, newest first (Org Admin required)."
+    )
+
+    leaderboard = graphene.Field(
+        LeaderboardType,
+        organisationId=graphene.ID(required=True),
+        description="The members of an organization ranked by score. Requires membership or public status."
+    )
+
+    daily_content = graphene.Field(
+        DailyContentType,
+        organisationId=graphene.ID(required=False),
+        timeZone=graphene.String(required=False),
+        description="Today's puzzle and game in an IANA time zone (default: the server's), for an organization's "
+                    "dashboard or, without organisationId, the global one. Requires membership or public status."
+    )
+
+    search_members = graphene.List(
+        graphene.NonNull('apps.users.schema.UserType'),
+        organisationId=graphene.ID(required=True),
+        prefix=graphene.String(required=True),
+        first=graphene.Int(default_value=10, description=f"At most {MAX_USER_SEARCH_RESULTS}."),
+        description="An organization's members whose username, email or name starts with `prefix` (from three "
+                    "characters, also those containing it), best match first (Org Admin required). Searched in "
+                    "memory for large organizations; searchUsers searches all users."
+    )
+
+    audit_log = graphene.List(
+        graphene.NonNull(AuditEventType),
+        organisationId=graphene.ID(required=True),
+        since=graphene.DateTime(required=True),
+        until=graphene.DateTime(required=False, description="Exclusive; defaults to now."),
+        first=graphene.Int(default_value=100, description=f"At most {MAX_AUDIT_PAGE}."),
+        after=graphene.String(required=False, description="The cursor of the last event of the previous page."),
+        description=f"Changes to an organisation and its memberships from `since` to `until` (at most "
+                    f"{MAX_AUDIT_RANGE_DAYS} days apart), oldest first (Org Admin required). Changes are "
+                    "written in batches and show up within seconds."
+    )
+
     @login_required
     def resolve_organisation(root, info, id=None, slug=None):
-        user = info.context.user
-
+        organisations_by_id(info).select(info.field_nodes)
         # 1. Determine the organization object
         try:
             if id:
                 type_name, local_id = from_global_id(id)
-                org = Organisation.objects.get(pk=local_id)
+                org = organisations_by_id(info).load(UUID(local_id))
+                if org is None:
+                    return None
             elif slug:
-                org = Organisation.objects.get(slug=slug)
+                org = organisation_by_slug(info, slug)
+                if org is None:
+                    return None
             else:
                 raise GraphQLError("Provide either 'id' or 'slug'.")
-        except Organisation.DoesNotExist:
-            return None
         except ValueError:
             raise GraphQLError("Invalid Global ID provided.")
 
         # 2. PERMISSION CHECK:
-        if user.is_superuser:
-            return org
-
-        is_member = org.users.filter(pk=user.pk).exists()
-        if is_member:
-            return org
-
-        if org.is_public:
-            return org
-
-        raise GraphQLError("Permission Denied: Not a member and organization is private.")
+        return _check_organisation_visible(info, org)
 
     @login_required
     def resolve_my_organisations(root, info):
         user = info.context.user
         # This returns the Organisation objects directly
-        return Organisation.objects.filter(memberships__user=user).distinct()
+        queryset = Organisation.objects.filter(memberships__user=user).distinct()
+        organisations = list(optimize(queryset, info))
+        return queue_organisation_fields(info, organisations)
 
     @login_required
     def resolve_my_memberships(root, info):
         user = info.context.user
         # This returns the OrganisationMembership objects, which contain the role (is_org_admin)
-        return OrganisationMembership.objects.filter(user=user)
+        users_by_id(info).prime(user.pk, user)
+        memberships = list(optimize(OrganisationMembership.objects.filter(user=user), info))
+        return queue_membership_fields(info, memberships)
 
     @login_required
     def resolve_all_memberships(root, info, organisationId):
         # CLEANUP: Rely on _get_organisation_and_check_admin to perform all checks and raise GraphQLError on failure.
+        organisation = _get_organisation_and_check_admin(info, organisationId)
+        memberships = list(optimize(organisation.memberships.all(), info))
+        return queue_membership_fields(info, memberships)
+
+    @login_required
+    def resolve_my_organisations_connection(root, info, **kwargs):
+        # KeysetConnectionField applies the optimizer, ordering and page slicing.
+        return Organisation.objects.filter(memberships__user=info.context.user)
+
+    @login_required
+    def resolve_all_memberships_connection(root, info, organisationId, **kwargs):
         organisation = _get_organisation_and_check_admin(info, organisationId)
         return organisation.memberships.all()
 
+    @login_required
+    def resolve_leaderboard(root, info, organisationId):
+        organisation = organisations_by_id(info).load(_decode_organisation_id(organisationId))
+        if organisation is None:
+            raise GraphQLError("Organisation not found.")
+        _check_organisation_visible(info, organisation)
+        return leaderboards.get(organisation.pk)
+
+    @login_required
+    def resolve_daily_content(root, info, organisationId=None, timeZone=None):
+        day = _local_date(timeZone)
+        if organisationId is None:
+            return daily_content.get(None, day)
+        organisation = organisations_by_id(info).load(_decode_organisation_id(organisationId))
+        if organisation is None:
+            raise GraphQLError("Organisation not found.")
+        _check_organisation_visible(info, organisation)
+        return daily_content.get(organisation.pk, day)
+
+    @login_required
+    def resolve_search_members(root, info, organisationId, prefix, first):
+        term, first = normalise(prefix), min(max(first, 0), MAX_USER_SEARCH_RESULTS)
+        organisation = _get_organisation_and_check_admin(info, organisationId)
+        user_ids = _indexed_members(organisation, term, first)
+        if user_ids is None:
+            return search_users(User.objects.filter(memberships__organisation=organisation), term, first)
+        users = User.objects.in_bulk(user_ids)
+        return [users[user_id] for user_id in user_ids if user_id in users]
+
+    @login_required
+    def resolve_audit_log(root, info, organisationId, since, first, until=None, after=None):
+        organisation = _get_organisation_and_check_admin(info, organisationId)
+        since, until, first, after = _audit_range(since, until, first, after)
+        return _queue_audit_users(info, audit.events_between(organisation.pk, since, until, first, after))
+
 
 # --- 3. MUTATIONS (Basic Inline Checks) ---
 
@@ -190,18 +603,28 @@ class CreateOrganisation(graphene.Mutation):
         # BASIC CHECK: Authentication is handled by @login_required
 
         user = info.context.user
-        organisation = Organisation.objects.create(
-            name=name,
-            slug=slug,
-            created_by=user,
-            is_public=is_public
-        )
-        # Assign the creator as the initial ORG ADMIN member
-        OrganisationMembership.objects.create(
-            user=user,
-            organisation=organisation,
-            is_org_admin=True
-        )
+        with transaction.atomic():
+            organisation = Organisation.objects.create(
+                name=name,
+                slug=slug,
+                created_by=user,
+                is_public=is_public,
+                # The creator's membership below is the first member and admin.
+                member_count=1,
+                admin_count=1,
+            )
+            # Assign the creator as the initial ORG ADMIN member
+            OrganisationMembership.objects.create(
+                user=user,
+                organisation=organisation,
+                is_org_admin=True
+            )
+            audit.record(
+                organisation.pk, audit.ORGANISATION_CREATED, user.pk, [user.pk],
+                name=name, slug=slug, is_public=is_public,
+            )
+        forget_organisation(info, organisation.pk, user_ids=[user.pk])
+        get_authorization(info).record_membership(organisation.pk, True)
         return CreateOrganisation(organisation=organisation)
 
 
@@ -221,16 +644,26 @@ class UpdateOrganisation(graphene.Mutation):
         # AUTHORIZATION CHECK: Must be an Org Admin or SuperUser
         organisation = _get_organisation_and_check_admin(info, organisationId)
 
+        changed, changes = [], {}
         for field, value in input.items():
             if value is not None:
                 if field == 'slug':
                     if Organisation.objects.filter(slug=value).exclude(pk=organisation.pk).exists():
                         raise GraphQLError("Slug is already in use by another organisation.")
 
+                if getattr(organisation, field) != value:
+                    changes[field] = [getattr(organisation, field), value]
                 setattr(organisation, field, value)
+                changed.append(field)
 
         organisation.full_clean()
-        organisation.save()
+        with transaction.atomic():
+            # The instance may come from the shared cache, so only write the fields set here.
+            organisation.save(update_fields=[*changed, 'updated_at'])
+            if changes:
+                audit.record(organisation.pk, audit.ORGANISATION_UPDATED, info.context.user.pk, **changes)
+        forget_organisation(info, organisation.pk)
+        publish_organisation_event(organisation.pk, events.ORGANISATION_UPDATED)
 
         return UpdateOrganisation(organisation=organisation)
 
@@ -259,11 +692,20 @@ class AddMemberToOrganisation(graphene.Mutation):
         if organisation.users.filter(pk=new_member.pk).exists():
             raise GraphQLError(f"User '{memberUsername}' is already a member.")
 
-        membership = OrganisationMembership.objects.create(
-            user=new_member,
-            organisation=organisation,
-            is_org_admin=makeAdmin
-        )
+        with transaction.atomic():
+            membership = OrganisationMembership.objects.create(
+                user=new_member,
+                organisation=organisation,
+                is_org_admin=makeAdmin
+            )
+            adjust_counters(organisation, members=1, admins=1 if makeAdmin else 0)
+            audit.record(
+                organisation.pk, audit.MEMBER_ADDED, info.context.user.pk, [new_member.pk], is_org_admin=makeAdmin,
+            )
+        forget_organisation(info, organisation.pk, user_ids=[new_member.pk])
+        publish_organisation_event(organisation.pk, events.MEMBERS_ADDED, user_ids=[new_member.pk])
+        if new_member.pk == info.context.user.pk:
+            get_authorization(info).record_membership(organisation.pk, makeAdmin)
 
         return AddMemberToOrganisation(membership=membership)
 
@@ -296,26 +738,27 @@ class UpdateOrganisationMembership(graphene.Mutation):
         if member_to_update.pk == user.pk:
             raise GraphQLError("Permission Denied: Organisation Admins cannot update their own membership status.")
 
-        try:
-            membership = OrganisationMembership.objects.get(
-                organisation=organisation,
-                user=member_to_update
-            )
-        except OrganisationMembership.DoesNotExist:
-            raise GraphQLError("User is not a member of this organisation.")
-
-        # GUARDRAIL 2: Prevent Last Admin Demotion
-        if membership.is_org_admin and not is_org_admin:
-            admin_count = OrganisationMembership.objects.filter(
-                organisation=organisation, is_org_admin=True
-            ).count()
-
-            if admin_count == 1:
+        with transaction.atomic():
+            # Locked and compared inside the transaction, so concurrent identical
+            # requests cannot both shift the counters.
+            membership = _lock_membership(organisation, member_to_update)
+            if membership.is_org_admin == is_org_admin:
+                return UpdateOrganisationMembership(membership=membership)
+
+            if is_org_admin:
+                adjust_counters(organisation, admins=1)
+            # GUARDRAIL 2: Prevent Last Admin Demotion (conditional UPDATE on admin_count)
+            elif not release_admin(organisation):
                 raise GraphQLError("Cannot revoke admin status: The targeted member is the sole Organisation Admin.")
 
-        # Update Status
-        membership.is_org_admin = is_org_admin
-        membership.save()
+            # Update Status
+            membership.is_org_admin = is_org_admin
+            membership.save(update_fields=['is_org_admin', 'updated_at'])
+            audit.record(
+                organisation.pk, audit.ROLE_CHANGED, user.pk, [member_to_update.pk], is_org_admin=is_org_admin,
+            )
+        forget_organisation(info, organisation.pk, user_ids=[member_to_update.pk])
+        publish_organisation_event(organisation.pk, events.ROLES_CHANGED, user_ids=[member_to_update.pk])
 
         return UpdateOrganisationMembership(membership=membership)
 
@@ -347,26 +790,235 @@ class RemoveMemberFromOrganisation(graphene.Mutation):
         if member_to_remove.pk == user.pk:
             raise GraphQLError("Permission Denied: Organisation Admins cannot update their own membership status.")
 
-        # GUARDRAIL: Check if the member to remove is the last admin
-        admin_memberships = OrganisationMembership.objects.filter(
-            organisation=organisation,
-            is_org_admin=True
+        with transaction.atomic():
+            # is_org_admin is read under the row lock, so a concurrent role change
+            # cannot make the counters below adjust the wrong one.
+            membership = _lock_membership(organisation, member_to_remove)
+            deleted, _ = OrganisationMembership.objects.filter(pk=membership.pk).delete()
+            if deleted:
+                # GUARDRAIL: Check if the member to remove is the last admin (conditional UPDATE
+                # on admin_count; raising rolls the delete back).
+                if not membership.is_org_admin:
+                    adjust_counters(organisation, members=-1)
+                elif not release_admin(organisation, remove_member=True):
+                    raise GraphQLError("Cannot remove the last Organisation Admin.")
+                audit.record(organisation.pk, audit.MEMBER_REMOVED, user.pk, [member_to_remove.pk])
+        forget_organisation(info, organisation.pk, user_ids=[member_to_remove.pk])
+        if deleted:
+            publish_organisation_event(organisation.pk, events.MEMBERS_REMOVED, user_ids=[member_to_remove.pk])
+
+        return RemoveMemberFromOrganisation(organisation=organisation, success=True)
+
+
+class UpdateOrganisationMemberships(graphene.Mutation):
+    """
+    Batch form of UpdateOrganisationMembership: sets the admin status of many members
+    at once, in one transaction with a single set-based UPDATE. The self-update and
+    last-admin guardrails are checked once, against the final state of the batch.
+    """
+
+    class Arguments:
+        organisationId = graphene.ID(required=True)
+        memberIds = graphene.List(graphene.NonNull(graphene.ID), required=True)
+        is_org_admin = graphene.Boolean(required=True)
+
+    memberships = graphene.List(OrganisationMembershipType)
+    updated = graphene.Int()
+
+    @classmethod
+    def mutate(cls, root, info, organisationId, memberIds, is_org_admin):
+        # AUTHORIZATION CHECK: Must be an Org Admin or SuperUser
+        organisation = _get_organisation_and_check_admin(info, organisationId)
+        user_ids = _decode_member_ids(info, memberIds)
+
+        with transaction.atomic():
+            locked = _lock_memberships(organisation, user_ids)
+            changing = {user_id: pk for user_id, (pk, is_admin) in locked.items() if is_admin != is_org_admin}
+            if changing:
+                OrganisationMembership.objects.filter(pk__in=changing.values()).update(
+                    is_org_admin=is_org_admin, updated_at=timezone.now()
+                )
+                if is_org_admin:
+                    adjust_counters(organisation, admins=len(changing))
+                # GUARDRAIL: Prevent Last Admin Demotion (one conditional UPDATE for the batch)
+                elif not release_admins(organisation, len(changing)):
+                    raise GraphQLError("Cannot revoke admin status: no Organisation Admin would remain.")
+                audit.record(
+                    organisation.pk, audit.ROLE_CHANGED, info.context.user.pk, list(changing), is_org_admin=is_org_admin,
+                )
+        forget_organisation(info, organisation.pk, user_ids=user_ids)
+        if changing:
+            publish_organisation_event(organisation.pk, events.ROLES_CHANGED, user_ids=list(changing))
+
+        memberships = list(OrganisationMembership.objects.filter(organisation=organisation, user_id__in=user_ids))
+        return UpdateOrganisationMemberships(
+            memberships=queue_membership_fields(info, memberships, selection(info).get('memberships', [])),
+            updated=len(changing),
         )
 
-        is_admin_to_remove = admin_memberships.filter(user=member_to_remove).exists()
-        if is_admin_to_remove and admin_memberships.count() == 1:
-            raise GraphQLError("Cannot remove the last Organisation Admin.")
+
+class RemoveMembersFromOrganisation(graphene.Mutation):
+    """
+    Batch form of RemoveMemberFromOrganisation: removes many members with a single
+    DELETE in one transaction, checking the self-removal and last-admin guardrails
+    once for the whole batch.
+    """
+
+    class Arguments:
+        organisationId = graphene.ID(required=True)
+        memberIds = graphene.List(graphene.NonNull(graphene.ID), required=True)
+
+    organisation = graphene.Field(OrganisationType)
+    removed = graphene.Int()
+    success = graphene.Boolean()
+
+    @classmethod
+    def mutate(cls, root, info, organisationId, memberIds):
+        # AUTHORIZATION CHECK: Must be an Org Admin or SuperUser
+        organisation = _get_organisation_and_check_admin(info, organisationId)
+        user_ids = _decode_member_ids(info, memberIds)
+
+        with transaction.atomic():
+            locked = _lock_memberships(organisation, user_ids)
+            admins = sum(1 for _, is_admin in locked.values() if is_admin)
+            removed, _ = OrganisationMembership.objects.filter(
+                pk__in=[pk for pk, _ in locked.values()]
+            ).delete()
+
+            # GUARDRAIL: Prevent removing the last admin (raising rolls the delete back)
+            if not admins:
+                adjust_counters(organisation, members=-removed)
+            elif not release_admins(organisation, admins, members=removed):
+                raise GraphQLError("Cannot remove the last Organisation Admin.")
+            if removed:
+                audit.record(organisation.pk, audit.MEMBER_REMOVED, info.context.user.pk, list(locked))
+        forget_organisation(info, organisation.pk, user_ids=user_ids)
+        if removed:
+            publish_organisation_event(organisation.pk, events.MEMBERS_REMOVED, user_ids=list(locked))
+
+        return RemoveMembersFromOrganisation(organisation=organisation, removed=removed, success=True)
+
+
+class MembershipImportError(graphene.ObjectType):
+    """A row of a bulk import that was not imported."""
+    line = graphene.Int()
+    identifier = graphene.String()
+    message = graphene.String()
+
+
+class ImportOrganisationMembers(graphene.Mutation):
+    """
+    Allows an Organisation Admin to add many users at once from CSV or NDJSON text.
+
+    Rows name a user by `username` or `email`, optionally with `is_org_admin`. They
+    are imported in chunks (see apps.organisations.imports), so a 20k-row file costs
+    a few dozen queries instead of four per user. Existing members are left unchanged.
+    """
+
+    class Arguments:
+        organisationId = graphene.ID(required=True)
+        data = graphene.String(required=True, description="CSV (with a header row) or NDJSON rows.")
+        format = graphene.String(required=False, default_value='csv', description="'csv' or 'ndjson'.")
+
+    organisation = graphene.Field(OrganisationType)
+    created = graphene.Int()
+    already_members = graphene.Int()
+    failed = graphene.Int()
+    errors = graphene.List(MembershipImportError)
+
+    @classmethod
+    def mutate(cls, root, info, organisationId, data, format):
+        # AUTHORIZATION CHECK: Must be an Org Admin or SuperUser
+        organisation = _get_organisation_and_check_admin(info, organisationId)
 
         try:
-            membership = OrganisationMembership.objects.get(
-                organisation=organisation,
-                user=member_to_remove
+            rows = parse_import(io.StringIO(data), format)
+            report = import_memberships(organisation, rows, actor_id=info.context.user.pk)
+        except ValueError as error:
+            raise GraphQLError(str(error))
+        forget_organisation(info, organisation.pk)
+        if report.created:
+            publish_organisation_event(organisation.pk, events.MEMBERS_ADDED)
+
+        return ImportOrganisationMembers(
+            organisation=organisation,
+            created=report.created,
+            already_members=report.already_members,
+            failed=report.failed,
+            errors=[
+                MembershipImportError(line=error.line, identifier=error.identifier, message=error.message)
+                for error in report.errors
+            ],
+        )
+
+
+class PublishGameState(graphene.Mutation):
+    """
+    Relays the state of a live game to the organisation's members subscribed to
+    organisationEvents. Nothing is stored: a member who subscribes later only sees
+    the states published after they subscribed.
+    """
+
+    class Arguments:
+        organisationId = graphene.ID(required=True)
+        gameId = graphene.String(required=True)
+        state = graphene.JSONString(required=True)
+
+    success = graphene.Boolean()
+
+    @classmethod
+    @login_required
+    def mutate(cls, root, info, organisationId, gameId, state):
+        org_local_id = _decode_organisation_id(organisationId)
+
+        # AUTHORIZATION CHECK: Must be a member or SuperUser
+        authorization = get_authorization(info)
+        if not (authorization.is_superuser or authorization.is_member_of(org_local_id)):
+            raise GraphQLError("Permission Denied: Organisation membership required.")
+
+        size = len(json.dumps([gameId, state]).encode('utf-8'))
+        if size > MAX_GAME_STATE_BYTES:
+            raise GraphQLError(
+                f"Game state is {size} bytes, exceeding the limit of {MAX_GAME_STATE_BYTES}.",
+                extensions={'code': 'GAME_STATE_TOO_LARGE', 'size': size, 'maximumSize': MAX_GAME_STATE_BYTES},
             )
-            membership.delete()
-        except OrganisationMembership.DoesNotExist:
-            raise GraphQLError("User is not a member of this organisation.")
 
-        return RemoveMemberFromOrganisation(organisation=organisation, success=True)
+        publish_organisation_event(
+            org_local_id, events.GAME_STATE, user_ids=[info.context.user.pk], game_id=gameId, state=state,
+        )
+        return PublishGameState(success=True)
+
+
+class RecordGameScore(graphene.Mutation):
+    """
+    Adds points won in a game to the requesting member's leaderboard score. The new
+    rank is returned at once. The points are saved with the call and added to the
+    stored score in the next batch. Calls are rate limited per user (GRAPHQL_RATE_LIMITS["recordGameScore"]).
+    """
+
+    class Arguments:
+        organisationId = graphene.ID(required=True)
+        points = graphene.Int(required=True)
+
+    entry = graphene.Field(LeaderboardEntryType)
+
+    @classmethod
+    @login_required
+    def mutate(cls, root, info, organisationId, points):
+        if not 0 < points <= MAX_GAME_POINTS:
+            raise GraphQLError(f"Points must be between 1 and {MAX_GAME_POINTS}.")
+        ratelimit.check_user(info)
+        org_local_id = _decode_organisation_id(organisationId)
+
+        # AUTHORIZATION CHECK: Must be a member
+        if not get_authorization(info).is_member_of(org_local_id):
+            raise GraphQLError("Permission Denied: Organisation membership required.")
+
+        try:
+            standing = leaderboards.record(org_local_id, info.context.user.pk, points)
+        except KeyError:
+            raise GraphQLError("User is not a member of this organisation.")
+        return RecordGameScore(entry=standing)
 
 
 class OrganisationMutation(graphene.ObjectType):
@@ -375,4 +1027,67 @@ class OrganisationMutation(graphene.ObjectType):
     update_organisation = UpdateOrganisation.Field()
     add_member_to_organisation = AddMemberToOrganisation.Field()
     update_organisation_membership = UpdateOrganisationMembership.Field()
-    remove_member_from_organisation = RemoveMemberFromOrganisation.Field()
\ No newline at end of file
+    remove_member_from_organisation = RemoveMemberFromOrganisation.Field()
+    update_organisation_memberships = UpdateOrganisationMemberships.Field()
+    remove_members_from_organisation = RemoveMembersFromOrganisation.Field()
+    import_organisation_members = ImportOrganisationMembers.Field()
+    publish_game_state = PublishGameState.Field()
+    record_game_score = RecordGameScore.Field()
+
+
+# --- 4. SUBSCRIPTIONS (served over WebSocket by apps.core.websocket) ---
+
+class OrganisationSubscription(graphene.ObjectType):
+    organisation_events = graphene.Field(
+        OrganisationEventType,
+        organisationId=graphene.ID(required=True),
+        description="Live changes and game states of an organisation (members only).",
+    )
+
+    async def subscribe_organisation_events(root, info, organisationId):
+        # Checked before the stream starts, so a refused subscription fails at once.
+        user = info.context.user
+        if not user.is_authenticated:
+            raise GraphQLError("Authentication required.")
+
+        org_local_id = _decode_organisation_id(organisationId)
+        authorization = await get_authorization(info).aload()
+        if not (authorization.is_superuser or authorization.is_member_of(org_local_id)):
+            raise GraphQLError("Permission Denied: Organisation membership required.")
+
+        return _organisation_events(broker.subscribe(events.topic(org_local_id)), info.context, org_local_id)
+
+
+async def _still_subscribed(context, organisation_id):
+    # Catches what no event announces: an expired token, a deactivated user, or a
+    # membership removed in another process or by a path that publishes nothing.
+    user = await context.reauthenticate()
+    if user.is_superuser:
+        return
+    if not await OrganisationMembership.objects.filter(organisation_id=organisation_id, user=user).aexists():
+        raise GraphQLError("Permission Denied: Organisation membership required.")
+
+
+async def _organisation_events(subscription, context, organisation_id):
+    user_id = context.user.pk
+    loop = asyncio.get_running_loop()
+    recheck_at = loop.time() + EVENTS_RECHECK_SECONDS
+    try:
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.__anext__(), max(recheck_at - loop.time(), 0))
+            except asyncio.TimeoutError:
+                event = None
+            except StopAsyncIteration:
+                return
+            if loop.time() >= recheck_at:
+                await _still_subscribed(context, organisation_id)
+                recheck_at = loop.time() + EVENTS_RECHECK_SECONDS
+            if event is None:
+                continue
+            yield event
+            # A removed member is told, then stops receiving the organisation's events.
+            if event.removes(user_id):
+                return
+    finally:
+        subscription.close()
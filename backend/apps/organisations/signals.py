@@ -0,0 +1,18 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+
+from . import events
+from .events import publish_organisation_event
+
+User = get_user_model()
+
+
+# --- TELL SUBSCRIBERS ABOUT MEMBERSHIPS REMOVED BY CASCADE ---
+
+@receiver(pre_delete, sender=User)
+def publish_removed_member(sender, instance, **kwargs):
+    # Deleting a user deletes their memberships without the mutations' events;
+    # published once the deletion commits, like theirs.
+    for organisation_id in instance.memberships.values_list('organisation_id', flat=True):
+        publish_organisation_event(organisation_id, events.MEMBERS_REMOVED, user_ids=[instance.pk])
@@ -1,3 +1,743 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import tempfile
+from datetime import datetime, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from graphql import GraphQLError
+from graphql_relay import to_global_id
+from graphql_relay.utils import base64
+
+from apps.core import ratelimit
+from apps.core.authorization import AuthorizationContext
+from apps.core.broker import Broker, QueueOverflow, broker
+from backend.schema import schema
+
+from . import audit, daily, events, leaderboard, schema as organisation_schema
+from .admin import OrganisationAdmin, OrganisationMembershipAdmin
+from .cache import get_organisations, invalidate_organisations
+from .imports import import_memberships, parse
+from .models import AuditEvent, AuditOutbox, DailyContent, Organisation, OrganisationMembership, ScoreOutbox
+
+User = get_user_model()
+
+
+def execute(query, user, **variables):
+    """Runs a GraphQL operation in-process as `user`; returns the ExecutionResult."""
+    request = RequestFactory().post('/graphql/')
+    request.user = user
+    return schema.execute(query, variable_values=variables, context_value=request)
+
+
+class OrganisationTestCase(TestCase):
+    """An organisation with one admin (`admin`) and two plain members (`members`)."""
+
+    def setUp(self):
+        cache.clear()
+        self.organisation = Organisation.objects.create(name='Test Org', slug='test-org')
+        self.organisation_id = to_global_id('OrganisationType', self.organisation.pk)
+        self.admin = self.create_member('admin', is_org_admin=True)
+        self.members = [self.create_member(f'member{number}') for number in range(2)]
+
+    def create_member(self, username, is_org_admin=False):
+        user = User.objects.create(username=username, email=f'{username}@example.com')
+        OrganisationMembership.objects.create(user=user, organisation=self.organisation, is_org_admin=is_org_admin)
+        Organisation.objects.filter(pk=self.organisation.pk).update(
+            member_count=self.organisation.memberships.count(),
+            admin_count=self.organisation.memberships.filter(is_org_admin=True).count(),
+        )
+        return user
+
+    def assertCounters(self, members, admins):
+        organisation = Organisation.objects.get(pk=self.organisation.pk)
+        self.assertEqual((organisation.member_count, organisation.admin_count), (members, admins))
+
+    def assertErrors(self, result, *messages):
+        self.assertEqual([error.message for error in result.errors or ()], list(messages))
+
+
+# --- 1. COUNTERS AND THE LAST-ADMIN GUARDRAIL (single-member mutations) ---
+
+UPDATE_MEMBERSHIP = '''
+    mutation ($id: ID!, $member: ID!, $admin: Boolean!) {
+        updateOrganisationMembership(organisationId: $id, memberId: $member, isOrgAdmin: $admin) {
+            membership { isOrgAdmin }
+        }
+    }
+'''
+REMOVE_MEMBER = '''
+    mutation ($id: ID!, $member: ID!) {
+        removeMemberFromOrganisation(organisationId: $id, memberId: $member) { success }
+    }
+'''
+
+
+class MembershipCounterTests(OrganisationTestCase):
+
+    def update(self, member, is_org_admin, actor=None):
+        return execute(
+            UPDATE_MEMBERSHIP, actor or self.admin, id=self.organisation_id, member=str(member.pk), admin=is_org_admin,
+        )
+
+    def test_promotion_and_demotion_shift_admin_count(self):
+        self.assertErrors(self.update(self.members[0], True))
+        self.assertCounters(members=3, admins=2)
+        self.assertErrors(self.update(self.members[0], False))
+        self.assertCounters(members=3, admins=1)
+
+    def test_repeated_promotion_counts_and_audits_once(self):
+        self.update(self.members[0], True)
+        result = self.update(self.members[0], True)
+
+        self.assertErrors(result)
+        self.assertTrue(result.data['updateOrganisationMembership']['membership']['isOrgAdmin'])
+        self.assertCounters(members=3, admins=2)
+        self.assertEqual(AuditOutbox.objects.count(), 1)
+
+    def test_last_admin_cannot_be_demoted(self):
+        superuser = User.objects.create(username='root', email='root@example.com', is_superuser=True)
+
+        result = self.update(self.admin, False, actor=superuser)
+
+        self.assertErrors(result, "Cannot revoke admin status: The targeted member is the sole Organisation Admin.")
+        self.assertTrue(OrganisationMembership.objects.get(user=self.admin).is_org_admin)
+        self.assertCounters(members=3, admins=1)
+
+    def test_removal_shifts_counters(self):
+        self.update(self.members[0], True)
+
+        self.assertErrors(execute(REMOVE_MEMBER, self.admin, id=self.organisation_id, member=str(self.members[0].pk)))
+        self.assertErrors(execute(REMOVE_MEMBER, self.admin, id=self.organisation_id, member=str(self.members[1].pk)))
+        self.assertCounters(members=1, admins=1)
+
+    def test_last_admin_cannot_be_removed(self):
+        superuser = User.objects.create(username='root', email='root@example.com', is_superuser=True)
+
+        result = execute(REMOVE_MEMBER, superuser, id=self.organisation_id, member=str(self.admin.pk))
+
+        self.assertErrors(result, "Cannot remove the last Organisation Admin.")
+        self.assertTrue(OrganisationMembership.objects.filter(user=self.admin).exists())
+        self.assertCounters(members=3, admins=1)
+
+    def test_removing_a_non_member_is_an_error(self):
+        outsider = User.objects.create(username='outsider', email='outsider@example.com')
+
+        result = execute(REMOVE_MEMBER, self.admin, id=self.organisation_id, member=str(outsider.pk))
+
+        self.assertErrors(result, "User is not a member of this organisation.")
+        self.assertCounters(members=3, admins=1)
+
+
+# --- 2. BATCH ROLE CHANGES AND REMOVALS ---
+
+UPDATE_MEMBERSHIPS = '''
+    mutation ($id: ID!, $members: [ID!]!, $admin: Boolean!) {
+        updateOrganisationMemberships(organisationId: $id, memberIds: $members, isOrgAdmin: $admin) { updated }
+    }
+'''
+REMOVE_MEMBERS = '''
+    mutation ($id: ID!, $members: [ID!]!) {
+        removeMembersFromOrganisation(organisationId: $id, memberIds: $members) { removed }
+    }
+'''
+
+
+class BatchMembershipTests(OrganisationTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.superuser = User.objects.create(username='root', email='root@example.com', is_superuser=True)
+
+    def update(self, users, is_org_admin, actor=None):
+        return execute(
+            UPDATE_MEMBERSHIPS, actor or self.admin,
+            id=self.organisation_id, members=[str(user.pk) for user in users], admin=is_org_admin,
+        )
+
+    def remove(self, users, actor=None):
+        return execute(
+            REMOVE_MEMBERS, actor or self.admin, id=self.organisation_id, members=[str(user.pk) for user in users],
+        )
+
+    def test_batch_promotion_counts_only_changed_members(self):
+        self.update(self.members[:1], True)
+
+        result = self.update(self.members, True)
+
+        self.assertErrors(result)
+        self.assertEqual(result.data['updateOrganisationMemberships']['updated'], 1)
+        self.assertCounters(members=3, admins=3)
+
+    def test_batch_demotion_may_not_remove_every_admin(self):
+        self.update(self.members, True)
+
+        result = self.update([self.admin, *self.members], False, actor=self.superuser)
+
+        self.assertErrors(result, "Cannot revoke admin status: no Organisation Admin would remain.")
+        self.assertCounters(members=3, admins=3)
+        self.assertErrors(self.update([self.admin, self.members[0]], False, actor=self.superuser))
+        self.assertCounters(members=3, admins=1)
+
+    def test_batch_removal_checks_the_last_admin_once(self):
+        self.update(self.members[:1], True)
+
+        self.assertErrors(self.remove([self.admin, *self.members], actor=self.superuser),
+                          "Cannot remove the last Organisation Admin.")
+        self.assertCounters(members=3, admins=2)
+
+        result = self.remove(self.members)
+
+        self.assertEqual(result.data['removeMembersFromOrganisation']['removed'], 2)
+        self.assertCounters(members=1, admins=1)
+
+    def test_batch_may_not_include_the_requester(self):
+        result = self.remove([self.admin, self.members[0]])
+
+        self.assertErrors(result, "Permission Denied: Organisation Admins cannot update their own membership status.")
+        self.assertCounters(members=3, admins=1)
+
+    def test_batch_with_a_non_member_changes_nothing(self):
+        outsider = User.objects.create(username='outsider', email='outsider@example.com')
+
+        result = self.remove([self.members[0], outsider])
+
+        self.assertErrors(result, f"Users are not members of this organisation: {outsider.pk}")
+        self.assertCounters(members=3, admins=1)
+
+
+# --- 3. CACHED ORGANISATIONS AND ROLES ---
+
+# A cache every process would see (a directory), standing in for Redis.
+SHARED_CACHE = {'default': {
+    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+    'LOCATION': tempfile.mkdtemp(),
+}}
+
+
+class OrganisationCacheTests(OrganisationTestCase):
+
+    def roles_of(self, user):
+        # A user rebuilt from a cached snapshot: groups known, roles read from the cache.
+        return AuthorizationContext(User.objects.get(pk=user.pk)).prime_groups([]).org_roles
+
+    @override_settings(CACHES=SHARED_CACHE)
+    def test_shared_cache_serves_records_until_a_write_invalidates_them(self):
+        cache.clear()
+        get_organisations([self.organisation.pk])
+        with self.assertNumQueries(0):
+            get_organisations([self.organisation.pk])
+
+        Organisation.objects.filter(pk=self.organisation.pk).update(name='Renamed')
+        invalidate_organisations(self.organisation.pk)
+
+        self.assertEqual(get_organisations([self.organisation.pk])[self.organisation.pk].name, 'Renamed')
+
+    @override_settings(CACHES=SHARED_CACHE)
+    def test_shared_cache_drops_roles_on_demotion(self):
+        cache.clear()
+        execute(UPDATE_MEMBERSHIP, self.admin, id=self.organisation_id, member=str(self.members[0].pk), admin=True)
+        self.assertTrue(self.roles_of(self.members[0])[self.organisation.pk])
+
+        execute(UPDATE_MEMBERSHIP, self.admin, id=self.organisation_id, member=str(self.members[0].pk), admin=False)
+
+        self.assertFalse(self.roles_of(self.members[0])[self.organisation.pk])
+
+    def test_process_local_cache_is_bypassed(self):
+        self.assertTrue(self.roles_of(self.admin)[self.organisation.pk])
+        get_organisations([self.organisation.pk])
+
+        # As another process would: nothing it invalidates reaches this process.
+        OrganisationMembership.objects.filter(user=self.admin).update(is_org_admin=False)
+        Organisation.objects.filter(pk=self.organisation.pk).update(name='Renamed')
+
+        self.assertFalse(self.roles_of(self.admin)[self.organisation.pk])
+        self.assertEqual(get_organisations([self.organisation.pk])[self.organisation.pk].name, 'Renamed')
+
+
+# --- 4. BULK MEMBERSHIP IMPORT ---
+
+class MembershipImportTests(OrganisationTestCase):
+
+    def setUp(self):
+        super().setUp()
+        for number in range(3):
+            User.objects.create(username=f'new{number}', email=f'new{number}@example.com')
+
+    def run_import(self, text, chunk_size=2):
+        return import_memberships(self.organisation, parse(text.splitlines(), 'csv'), chunk_size=chunk_size)
+
+    def test_import_adds_members_and_reports_rejected_rows(self):
+        report = self.run_import(
+            "username,email,is_org_admin\nnew0,,true\n,new1@example.com,no\nnobody,,\nnew0,,\nmember0,,\n",
+            chunk_size=10,
+        )
+
+        self.assertEqual((report.created, report.already_members, report.failed), (2, 1, 2))
+        self.assertEqual(
+            [(error.line, error.message) for error in report.errors],
+            [(4, "User not found."), (5, "Duplicate of an earlier row.")],
+        )
+        self.assertCounters(members=5, admins=2)
+
+    def test_rerun_reports_existing_members(self):
+        self.run_import("username\nnew0\nnew1\n")
+
+        report = self.run_import("username\nnew0\nnew1\nnew2\n")
+
+        self.assertEqual((report.created, report.already_members), (1, 2))
+        self.assertCounters(members=6, admins=1)
+
+    def test_memberships_added_concurrently_are_not_counted_as_created(self):
+        # As if another request added the users between the membership check and the insert.
+        with mock.patch('apps.organisations.imports._existing_members', return_value=set()):
+            report = self.run_import("username\nmember0\nnew0\n")
+
+        self.assertEqual((report.created, report.already_members), (1, 1))
+        self.assertCounters(members=4, admins=1)
+        added = AuditOutbox.objects.get()
+        self.assertEqual(added.subject_ids, [str(User.objects.get(username='new0').pk)])
+
+
+# --- 5. LIVE ORGANISATION EVENTS ---
+
+class SubscriptionQueueTests(SimpleTestCase):
+
+    def test_overflowing_subscription_is_closed(self):
+        async def run():
+            local = Broker(queue_size=2)
+            subscription = local.subscribe('topic')
+            for number in range(3):
+                local.publish('topic', number)
+            self.assertEqual(local.subscriber_count('topic'), 0)
+            with self.assertRaises(QueueOverflow):
+                await subscription.__anext__()
+
+        asyncio.run(run())
+
+
+class RemovalEventTests(OrganisationTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.request = RequestFactory().post('/admin/')
+        self.request.user = User.objects.create(username='root', email='root@example.com', is_superuser=True)
+        patcher = mock.patch.object(broker, 'publish')
+        self.publish = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def published(self):
+        return [(event.kind, set(event.user_ids)) for _, event in (call.args for call in self.publish.call_args_list)]
+
+    def test_admin_deletions_publish_removals(self):
+        membership_admin = OrganisationMembershipAdmin(OrganisationMembership, admin.site)
+        with self.captureOnCommitCallbacks(execute=True):
+            membership_admin.delete_model(self.request, OrganisationMembership.objects.get(user=self.members[0]))
+        with self.captureOnCommitCallbacks(execute=True):
+            membership_admin.delete_queryset(self.request, OrganisationMembership.objects.filter(user=self.members[1]))
+
+        self.assertEqual(self.published(), [
+            (events.MEMBERS_REMOVED, {self.members[0].pk}),
+            (events.MEMBERS_REMOVED, {self.members[1].pk}),
+        ])
+        self.assertCounters(members=1, admins=1)
+
+    def test_admin_organisation_deletion_publishes_every_removal(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            OrganisationAdmin(Organisation, admin.site).delete_model(self.request, self.organisation)
+
+        self.assertEqual(self.published(), [
+            (events.MEMBERS_REMOVED, {self.admin.pk, *(member.pk for member in self.members)}),
+        ])
+        self.assertEqual(AuditOutbox.objects.get().action, audit.ORGANISATION_DELETED)
+
+    def test_admin_move_publishes_a_removal_and_demotion_a_role_change(self):
+        other = Organisation.objects.create(name='Other Org', slug='other-org')
+        with self.captureOnCommitCallbacks(execute=True):
+            events.publish_membership_change(
+                (self.organisation.pk, self.admin.pk, True), (self.organisation.pk, self.admin.pk, False),
+            )
+            events.publish_membership_change(
+                (self.organisation.pk, self.members[0].pk, False), (other.pk, self.members[0].pk, False),
+            )
+
+        self.assertEqual(self.published(), [
+            (events.ROLES_CHANGED, {self.admin.pk}),
+            (events.MEMBERS_REMOVED, {self.members[0].pk}),
+            (events.MEMBERS_ADDED, {self.members[0].pk}),
+        ])
+
+    def test_user_deletion_publishes_a_removal(self):
+        member_id = self.members[0].pk
+        with self.captureOnCommitCallbacks(execute=True):
+            self.members[0].delete()
+
+        self.assertEqual(self.published(), [(events.MEMBERS_REMOVED, {member_id})])
+
+
+class FakeSubscriptionContext:
+    def __init__(self, user):
+        self.user = user
+
+    async def reauthenticate(self):
+        return await User.objects.aget(pk=self.user.pk)
+
+
+class SubscriptionRecheckTests(OrganisationTestCase):
+
+    @mock.patch.object(organisation_schema, 'EVENTS_RECHECK_SECONDS', 0)
+    async def test_stream_ends_once_membership_is_gone(self):
+        member = self.members[0]
+        stream = organisation_schema._organisation_events(
+            broker.subscribe(events.topic(self.organisation.pk)), FakeSubscriptionContext(member), self.organisation.pk,
+        )
+        # Removed without an event, as by another process.
+        await OrganisationMembership.objects.filter(user=member).adelete()
+
+        with self.assertRaisesMessage(GraphQLError, "Organisation membership required"):
+            await stream.__anext__()
+        self.assertEqual(broker.subscriber_count(events.topic(self.organisation.pk)), 0)
+
+
+# --- 6. LEADERBOARDS ---
+
+RECORD_SCORE = '''
+    mutation ($id: ID!, $points: Int!) {
+        recordGameScore(organisationId: $id, points: $points) { entry { rank score } }
+    }
+'''
+
+
+class LeaderboardTests(OrganisationTestCase):
+
+    def setUp(self):
+        super().setUp()
+        leaderboard.leaderboards.reset()
+        self.addCleanup(leaderboard.leaderboards.reset)
+
+    def record(self, user, points):
+        result = execute(RECORD_SCORE, user, id=self.organisation_id, points=points)
+        recorded = (result.data or {}).get('recordGameScore')
+        return recorded and recorded['entry'], result.errors
+
+    def scores(self):
+        return dict(OrganisationMembership.objects.values_list('user__username', 'score'))
+
+    def test_points_are_saved_before_they_are_ranked(self):
+        self.assertEqual(self.record(self.members[0], 50), ({'rank': 1, 'score': 50}, None))
+        self.assertEqual(self.record(self.members[1], 20), ({'rank': 2, 'score': 20}, None))
+
+        self.assertEqual(sorted(ScoreOutbox.objects.values_list('points', flat=True)), [20, 50])
+        # A process that lost its board (or never had it) counts the points not yet applied.
+        leaderboard.leaderboards.reset()
+        self.assertEqual(leaderboard.leaderboards.get(self.organisation.pk).standing_of(self.members[0].pk).score, 50)
+
+        self.assertEqual(leaderboard.apply_points(), 2)
+        self.assertEqual(self.scores(), {'admin': 0, 'member0': 50, 'member1': 20})
+        self.assertFalse(ScoreOutbox.objects.exists())
+
+    def test_awards_are_added_together_in_one_batch(self):
+        for points in (5, 7, 11):
+            self.record(self.members[0], points)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(leaderboard.apply_points(), 3)
+
+        statements = [query['sql'].split()[0] for query in queries if 'SAVEPOINT' not in query['sql']]
+        self.assertEqual(statements, ['SELECT', 'UPDATE', 'DELETE'])
+        self.assertEqual(self.scores()['member0'], 23)
+
+    def test_a_row_that_cannot_be_applied_is_set_aside(self):
+        self.record(self.members[0], 5)
+        self.record(self.members[1], 7)
+        bad = ScoreOutbox.objects.get(points=5)
+        original = leaderboard._add_to_scores
+
+        def add_to_scores(rows):
+            if any(row.pk == bad.pk for row in rows):
+                raise IntegrityError('constraint failed')
+            original(rows)
+
+        with mock.patch.object(leaderboard, '_add_to_scores', add_to_scores), self.assertLogs(leaderboard.logger):
+            self.assertEqual(leaderboard.apply_points(), 1)
+
+        self.assertEqual(self.scores(), {'admin': 0, 'member0': 0, 'member1': 7})
+        self.assertIsNotNone(ScoreOutbox.objects.get(pk=bad.pk).failed_at)
+        self.assertEqual(leaderboard.apply_points(), 0)
+
+    def test_awards_are_rate_limited_per_user(self):
+        buckets = ratelimit.LocalBuckets()
+        with mock.patch.object(ratelimit, 'buckets', buckets), \
+                mock.patch.object(ratelimit, 'limits', ratelimit._parse({'recordGameScore': {'user': '2/m'}})):
+            self.record(self.members[0], 1)
+            self.record(self.members[0], 1)
+            _, errors = self.record(self.members[0], 1)
+            self.assertEqual(self.record(self.members[1], 1)[1], None)
+
+        self.assertEqual(errors[0].extensions['code'], 'RATE_LIMITED')
+        self.assertEqual(ScoreOutbox.objects.count(), 3)
+
+
+# --- 7. AUDIT LOG ---
+
+AUDIT_LOG = '''
+    query ($id: ID!, $since: DateTime!, $until: DateTime, $first: Int, $after: String) {
+        auditLog(organisationId: $id, since: $since, until: $until, first: $first, after: $after) {
+            action cursor member { username }
+        }
+    }
+'''
+
+
+class AuditDrainTests(OrganisationTestCase):
+
+    def test_changes_are_moved_one_event_per_member(self):
+        audit.record(self.organisation.pk, audit.MEMBER_REMOVED, self.admin.pk, [member.pk for member in self.members])
+        audit.record(self.organisation.pk, audit.ORGANISATION_UPDATED, self.admin.pk, name=['Old', 'New'])
+
+        self.assertEqual(audit.drain(), 2)
+
+        self.assertEqual(
+            sorted(AuditEvent.objects.values_list('action', 'subject_id')),
+            sorted([(audit.MEMBER_REMOVED, member.pk) for member in self.members] + [(audit.ORGANISATION_UPDATED, None)]),
+        )
+        self.assertFalse(AuditOutbox.objects.exists())
+
+    def test_a_row_that_cannot_be_moved_is_set_aside(self):
+        audit.record(self.organisation.pk, audit.MEMBER_ADDED, self.admin.pk, [self.members[0].pk])
+        audit.record(self.organisation.pk, audit.MEMBER_ADDED, self.admin.pk, [self.members[1].pk])
+        AuditOutbox.objects.filter(subject_ids=[str(self.members[0].pk)]).update(subject_ids=['not-a-uuid'])
+
+        with self.assertLogs(audit.logger, 'ERROR'):
+            self.assertEqual(audit.drain(), 1)
+
+        self.assertEqual(list(AuditEvent.objects.values_list('subject_id', flat=True)), [self.members[1].pk])
+        self.assertIsNotNone(AuditOutbox.objects.get().failed_at)
+        self.assertEqual(audit.drain(), 0)
+
+
+class AuditRangeTests(SimpleTestCase):
+
+    since = timezone.make_aware(datetime(2026, 1, 1))
+
+    def assertRejected(self, message, since=since, until=None, after=None):
+        with self.assertRaisesMessage(GraphQLError, message):
+            organisation_schema._audit_range(since, until, 10, after)
+
+    def test_bounds_the_range_and_the_page(self):
+        until = self.since + timedelta(days=1)
+
+        self.assertEqual(organisation_schema._audit_range(self.since, until, 10_000, None), (self.since, until, 500, None))
+        self.assertEqual(organisation_schema._audit_range(self.since, until, -1, None)[2], 0)
+        self.assertRejected("`until` must be later than `since`.", until=self.since)
+        self.assertRejected("at most 31 days", until=self.since + timedelta(days=32))
+
+    def test_naive_times_are_read_in_the_current_time_zone_and_until_defaults_to_now(self):
+        naive = timezone.localtime().replace(tzinfo=None) - timedelta(hours=1)
+
+        since, until, _, _ = organisation_schema._audit_range(naive, None, 10, None)
+
+        self.assertEqual(since, timezone.make_aware(naive))
+        self.assertLess(timezone.now() - until, timedelta(seconds=5))
+
+    def test_cursors(self):
+        occurred_at = self.since + timedelta(hours=1)
+        after = base64(f"audit:{occurred_at.isoformat()}|42")
+
+        self.assertEqual(organisation_schema._audit_range(self.since, occurred_at, 10, after)[3], (occurred_at, 42))
+        for cursor in ('not base64', base64('arrayconnection:3'), base64('audit:yesterday|42'), base64('audit:|')):
+            self.assertRejected("Invalid pagination cursor.", until=occurred_at, after=cursor)
+
+
+class AuditLogQueryTests(OrganisationTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.since = timezone.now() - timedelta(hours=1)
+        same_moment = self.since + timedelta(minutes=1)
+        # Events recorded at the same moment are told apart by their id.
+        for member in self.members + [self.admin, self.members[0]]:
+            AuditEvent.objects.create(
+                occurred_at=same_moment, organisation_id=self.organisation.pk, action=audit.MEMBER_ADDED,
+                actor_id=self.admin.pk, subject_id=member.pk,
+            )
+        AuditEvent.objects.create(
+            occurred_at=same_moment + timedelta(minutes=1), organisation_id=self.organisation.pk,
+            action=audit.ROLE_CHANGED, actor_id=self.admin.pk, subject_id=self.members[1].pk,
+        )
+        AuditEvent.objects.create(
+            occurred_at=same_moment, organisation_id=Organisation.objects.create(name='Other', slug='other').pk,
+            action=audit.MEMBER_ADDED, subject_id=self.admin.pk,
+        )
+
+    def page(self, user=None, **variables):
+        result = execute(AUDIT_LOG, user or self.admin, id=self.organisation_id, since=self.since.isoformat(),
+                         **variables)
+        return result.errors, (result.data or {}).get('auditLog')
+
+    def test_pages_follow_each_other_without_gaps_or_repeats(self):
+        pages, after = [], None
+        while True:
+            errors, events = self.page(first=2, after=after)
+            self.assertIsNone(errors)
+            if not events:
+                break
+            pages.append([(event['action'], event['member']['username']) for event in events])
+            after = events[-1]['cursor']
+
+        self.assertEqual(pages, [
+            [('MEMBER_ADDED', 'member0'), ('MEMBER_ADDED', 'member1')],
+            [('MEMBER_ADDED', 'admin'), ('MEMBER_ADDED', 'member0')],
+            [('ROLE_CHANGED', 'member1')],
+        ])
+
+    def test_until_is_exclusive(self):
+        _, events = self.page(until=(self.since + timedelta(minutes=2)).isoformat())
+
+        self.assertEqual([event['action'] for event in events], ['MEMBER_ADDED'] * 4)
+
+    def test_org_admins_only(self):
+        errors, _ = self.page(self.members[0])
+
+        self.assertTrue(errors)
+
+
+# --- 8. BATCHED RESOLVERS ---
+
+MY_ORGANISATIONS = '''
+    query { myOrganisations { name createdBy { username } memberships { isOrgAdmin user { username } } } }
+'''
+
+
+class BatchedResolverTests(OrganisationTestCase):
+
+    def add_organisations(self, count):
+        for _ in range(count):
+            number = Organisation.objects.count()
+            organisation = Organisation.objects.create(name=f'Org {number}', slug=f'org-{number}', created_by=self.admin)
+            OrganisationMembership.objects.create(user=self.admin, organisation=organisation, is_org_admin=True)
+            for member in self.members:
+                OrganisationMembership.objects.create(user=member, organisation=organisation)
+
+    def run_query(self, query, **variables):
+        request = RequestFactory().post('/graphql/')
+        request.user = self.admin
+        result = schema.execute(query, variable_values=variables, context_value=request)
+        self.assertErrors(result)
+        return request, result.data
+
+    def pending(self, request):
+        return {name: list(loader._queue) for (name, _), loader in request._dataloaders.items() if loader._queue}
+
+    def test_nested_lists_cost_one_query_per_level(self):
+        self.add_organisations(1)
+        with CaptureQueriesContext(connection) as one:
+            self.run_query(MY_ORGANISATIONS)
+        self.add_organisations(4)
+        cache.clear()
+
+        with CaptureQueriesContext(connection) as five:
+            _, data = self.run_query(MY_ORGANISATIONS)
+
+        self.assertEqual(len(five), len(one))
+        self.assertEqual(len(data['myOrganisations']), 6)
+        self.assertTrue(all(len(organisation['memberships']) == 3 for organisation in data['myOrganisations']))
+
+    def test_only_selected_relations_are_queued(self):
+        request, _ = self.run_query('query { myOrganisations { name } }')
+        self.assertEqual(self.pending(request), {})
+
+        request, _ = self.run_query('''
+            query ($id: ID!) { allMemberships(organisationId: $id) { isOrgAdmin organisation { name } } }
+        ''', id=self.organisation_id)
+        self.assertNotIn('users_by_id', self.pending(request))
+
+        request, _ = self.run_query(UPDATE_MEMBERSHIPS, id=self.organisation_id, members=[str(self.members[0].pk)],
+                                    admin=True)
+        self.assertEqual(self.pending(request), {})
+
+
+# --- 9. DAILY CONTENT ---
+
+DAILY_CONTENT = '''
+    query ($id: ID, $timeZone: String) {
+        dailyContent(organisationId: $id, timeZone: $timeZone) { date puzzle game organisation { name } }
+    }
+'''
+
+
+class DailyContentTests(OrganisationTestCase):
+
+    def setUp(self):
+        super().setUp()
+        daily.daily_content.clear()
+        self.addCleanup(daily.daily_content.clear)
+
+    def build(self, *args):
+        call_command('build_daily_content', *args, stdout=io.StringIO())
+        return set(DailyContent.objects.values_list('organisation_id', 'day'))
+
+    def test_the_command_builds_every_scope_once(self):
+        Organisation.objects.create(name='Closed', slug='closed', is_active=False)
+        days = daily.window()
+
+        built = self.build()
+        self.assertEqual(built, {(scope, day) for scope in (None, self.organisation.pk) for day in days})
+
+        payloads = dict(DailyContent.objects.values_list('pk', 'payload'))
+        self.build()
+        self.assertEqual(dict(DailyContent.objects.values_list('pk', 'payload')), payloads)
+
+        self.build('--rebuild')
+        self.assertEqual(DailyContent.objects.count(), len(payloads))
+        self.assertFalse(set(DailyContent.objects.values_list('pk', flat=True)) & set(payloads))
+        self.assertEqual(set(DailyContent.objects.values_list('payload', flat=True)), set(payloads.values()))
+
+        with self.assertRaisesMessage(CommandError, "No active organisation with slug 'closed'."):
+            self.build('--organisation', 'closed')
+
+    def test_a_scope_is_read_once_for_its_whole_window(self):
+        self.build()
+        today, tomorrow = daily.window()[1:3]
+
+        with self.assertNumQueries(1):
+            edition = daily.daily_content.get(self.organisation.pk, today)
+        with self.assertNumQueries(0):
+            # Midnight somewhere: the next day is already in memory.
+            self.assertEqual(daily.daily_content.get(self.organisation.pk, tomorrow).day, tomorrow)
+            self.assertIs(daily.daily_content.cached(self.organisation.pk, today), edition)
+
+        self.assertEqual(edition.puzzle, daily.build_content(self.organisation.pk, today)['puzzle'])
+
+    def test_a_day_not_built_yet_is_built_on_request(self):
+        day = daily.window()[-1] + timedelta(days=1)
+
+        edition = daily.daily_content.get(None, day)
+
+        self.assertEqual(edition.game, daily.build_content(None, day)['game'])
+        self.assertTrue(DailyContent.objects.filter(organisation__isnull=True, day=day).exists())
+
+    def test_query(self):
+        day = daily.local_date('Pacific/Kiritimati')
+        result = execute(DAILY_CONTENT, self.members[0], id=self.organisation_id, timeZone='Pacific/Kiritimati')
+
+        self.assertErrors(result)
+        content = result.data['dailyContent']
+        self.assertEqual((content['date'], content['organisation']), (day.isoformat(), {'name': 'Test Org'}))
+        self.assertEqual(json.loads(content['puzzle']), daily.build_content(self.organisation.pk, day)['puzzle'])
+
+        self.assertIsNone(execute(DAILY_CONTENT, self.members[0]).data['dailyContent']['organisation'])
+        self.assertErrors(execute(DAILY_CONTENT, self.members[0], timeZone='Mars/Olympus'),
+                          "Unknown time zone 'Mars/Olympus'.")
+
+        private = Organisation.objects.create(name='Private', slug='private', is_public=False)
+        self.assertErrors(execute(DAILY_CONTENT, self.members[0], id=to_global_id('OrganisationType', private.pk)),
+                          "Permission Denied: Not a member and organization is private.")
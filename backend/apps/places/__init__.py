@@ -0,0 +1 @@
+default_app_config = 'apps.places.apps.PlacesConfig'
\ No newline at end of file
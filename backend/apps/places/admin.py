@@ -0,0 +1,13 @@
+from django.contrib import admin
+
+from .models import Place
+
+
+@admin.register(Place)
+class PlaceAdmin(admin.ModelAdmin):
+    # Saves and deletes here reach every server's spatial index (apps.places.signals
+    # for this process, the periodic sync for the others; deactivate rather than delete).
+    list_display = ('name', 'category', 'latitude', 'longitude', 'is_active', 'updated_at')
+    list_filter = ('category', 'is_active')
+    search_fields = ('name', 'category')
+    readonly_fields = ('id', 'created_at', 'updated_at')
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class PlacesConfig(AppConfig):
+    name = 'apps.places'
+    label = 'places'
+    verbose_name = 'Places'
+
+    def ready(self):
+        # Keeps this process's spatial index (apps.places.index) in step with writes.
+        from . import signals  # noqa: F401
@@ -0,0 +1,18 @@
+from asgiref.sync import sync_to_async
+from graphql_jwt.decorators import login_required
+
+from .index import place_index
+from .models import Place
+from .schema import PlaceQuery, _nearby, _search
+
+
+class AsyncPlaceQuery(PlaceQuery):
+    """PlaceQuery with resolvers on Django's async ORM, for the async GraphQL view."""
+
+    @login_required
+    async def resolve_near_me(root, info, lat, lng, radius, first, category=None):
+        # Only the first search after startup, or a periodic sync, needs the database.
+        if not place_index.is_current():
+            await sync_to_async(place_index.ensure_current)()
+        found = _search(lat, lng, radius, first, category)
+        return _nearby(found, await Place.objects.filter(is_active=True).ain_bulk([place_id for _, place_id in found]))
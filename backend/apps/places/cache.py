@@ -0,0 +1,273 @@
+import logging
+import math
+import os
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .index import BLOCK_DEGREES, KM_PER_DEGREE, distance_km, place_index
+
+# Neighbourhoods kept per process (0 turns the cache off), seconds each is served,
+# geohash length of their cells (7: about 150 m square), and places in each.
+CACHE_SIZE = getattr(settings, 'PLACES_CACHE_SIZE', 5000)
+CACHE_SECONDS = getattr(settings, 'PLACES_CACHE_SECONDS', 300)
+CACHE_PRECISION = getattr(settings, 'PLACES_CACHE_PRECISION', 7)
+NEIGHBOURHOOD = getattr(settings, 'PLACES_CACHE_NEIGHBOURHOOD', 64)
+# Seconds between the hit rate reports logged at INFO (0 turns them off).
+STATS_SECONDS = getattr(settings, 'PLACES_CACHE_STATS_SECONDS', 600)
+# Slack for the projected distances, which differ slightly around different points.
+MARGIN = 1e-3
+
+logger = logging.getLogger(__name__)
+
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def geohash(latitude, longitude, precision):
+    """The geohash of a point, and its cell as (south, west, north, east) in degrees."""
+    south, north, west, east = -90.0, 90.0, -180.0, 180.0
+    characters = []
+    bits = value = 0
+    even = True
+    while len(characters) < precision:
+        if even:
+            middle = (west + east) / 2
+            value = value * 2 + (longitude >= middle)
+            if longitude >= middle:
+                west = middle
+            else:
+                east = middle
+        else:
+            middle = (south + north) / 2
+            value = value * 2 + (latitude >= middle)
+            if latitude >= middle:
+                south = middle
+            else:
+                north = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            characters.append(GEOHASH_ALPHABET[value])
+            bits = value = 0
+    return ''.join(characters), (south, west, north, east)
+
+
+class _Neighbourhood:
+    """
+    The places around the centre of a geohash cell, nearest first. Every place of the
+    category nearer than `reach` km to the centre is here: all of those within
+    `radius` km, or the NEIGHBOURHOOD nearest when there are more.
+    """
+
+    __slots__ = ('latitude', 'longitude', 'radius', 'reach', 'latitudes', 'longitudes', 'ids', 'blocks', 'expires')
+
+    def __init__(self, latitude, longitude, radius, found, size, expires):
+        self.latitude = latitude
+        self.longitude = longitude
+        self.radius = radius
+        self.reach = found[-1][0] if len(found) >= size else radius
+        self.latitudes = array('d', [place[2] for place in found])
+        self.longitudes = array('d', [place[3] for place in found])
+        self.ids = [place[1] for place in found]
+        self.blocks = _blocks(latitude, longitude, self.reach)
+        self.expires = expires
+
+    def nearest(self, latitude, longitude, radius_km, first):
+        """
+        nearest() for a point in the cell, or None when places missing from the
+        neighbourhood could be among the answers.
+        """
+        # Every place nearer than this to the point is in the neighbourhood.
+        certain = self.reach * (1 - MARGIN) - distance_km(latitude, longitude, self.latitude, self.longitude)
+        kx = KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 1e-9)
+        ky = KM_PER_DEGREE
+        limit = radius_km * radius_km
+        distances = [
+            ((place_latitude - latitude) * ky) ** 2 + (((place_longitude - longitude + 180) % 360 - 180) * kx) ** 2
+            for place_latitude, place_longitude in zip(self.latitudes, self.longitudes)
+        ]
+        found = sorted((distance, index) for index, distance in enumerate(distances) if distance <= limit)[:first]
+        if radius_km > certain and (len(found) < first or certain <= 0 or found[-1][0] >= certain * certain):
+            return None
+        return sorted(
+            (distance_km(latitude, longitude, self.latitudes[index], self.longitudes[index]), self.ids[index])
+            for _, index in found
+        )
+
+
+def _blocks(latitude, longitude, reach):
+    """The index's BLOCK_DEGREES blocks that places within `reach` km of the point lie in."""
+    rows, columns = round(180 / BLOCK_DEGREES), round(360 / BLOCK_DEGREES)
+    delta_latitude = reach * (1 + MARGIN) / KM_PER_DEGREE
+    south, north = latitude - delta_latitude, latitude + delta_latitude
+    row_range = range(max(int((south + 90) / BLOCK_DEGREES), 0), min(int((north + 90) / BLOCK_DEGREES), rows - 1) + 1)
+    widest = math.cos(math.radians(min(max(abs(south), abs(north)), 90.0)))
+    if widest * KM_PER_DEGREE * 180 <= reach:
+        column_range = range(columns)
+    else:
+        delta_longitude = reach * (1 + MARGIN) / (KM_PER_DEGREE * widest)
+        first = math.floor((longitude - delta_longitude + 180) / BLOCK_DEGREES)
+        last = math.floor((longitude + delta_longitude + 180) / BLOCK_DEGREES)
+        column_range = range(first, min(last, first + columns - 1) + 1)
+    return tuple((row, column % columns) for row in row_range for column in column_range)
+
+
+# --- 1. THE CACHE ---
+
+class NearbyCache:
+    """
+    nearMe results by geohash cell and category, in front of a PlaceIndex.
+
+    Commuters on the same route search from almost the same points, yet every
+    distinct coordinate is a new query. The cache keeps, per cell and category,
+    the neighbourhood of the cell's centre (see _Neighbourhood) and answers any
+    point in the cell from it, ranked by the exact distance to that point. When the
+    neighbourhood cannot vouch for the answer (a wider radius, or a truncated
+    neighbourhood in a dense area) it is rebuilt from the index: results are always
+    the index's own.
+
+    Neighbourhoods expire after CACHE_SECONDS and the least recently used beyond
+    CACHE_SIZE are evicted. The index reports every place it adds or removes, and
+    the neighbourhoods within reach of it are dropped at once. Every
+    stats_seconds the first search logs stats() at INFO.
+    """
+
+    def __init__(self, index, maxsize=CACHE_SIZE, timeout=CACHE_SECONDS, precision=CACHE_PRECISION,
+                 neighbourhood=NEIGHBOURHOOD, stats_seconds=STATS_SECONDS):
+        self.index = index
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.precision = precision
+        self.neighbourhood = neighbourhood
+        self.stats_seconds = stats_seconds
+        self._entries = OrderedDict()
+        # {index block: {keys of the neighbourhoods reaching into it}}
+        self._by_block = {}
+        self._lock = threading.Lock()
+        # Bumped by every change, so a neighbourhood read from the index before a
+        # change is not stored after it.
+        self._version = 0
+        self.hits = 0
+        self.misses = 0
+        self._next_report = time.monotonic() + stats_seconds
+        index.subscribe(self)
+
+    @property
+    def hit_rate(self):
+        """Share of searches answered without the index, or None before the first."""
+        searches = self.hits + self.misses
+        return self.hits / searches if searches else None
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hit_rate, 'size': len(self._entries)}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def nearest(self, latitude, longitude, radius_km, first, category=None):
+        """PlaceIndex.nearest(), answered from the cell's neighbourhood when it can be."""
+        if not self.maxsize or first <= 0 or radius_km <= 0:
+            return self.index.nearest(latitude, longitude, radius_km, first, category)
+        longitude = (longitude + 180) % 360 - 180
+        cell, (south, west, north, east) = geohash(latitude, longitude, self.precision)
+        key = (cell, category)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires <= time.monotonic():
+                self._drop(key)
+                entry = None
+            elif entry is not None:
+                self._entries.move_to_end(key)
+            version = self._version
+        if entry is not None:
+            found = entry.nearest(latitude, longitude, radius_km, first)
+            if found is not None:
+                self._count(hit=True)
+                return found
+
+        self._count(hit=False)
+        centre_latitude, centre_longitude = (south + north) / 2, (west + east) / 2
+        radius = radius_km + distance_km(centre_latitude, centre_longitude, north, east)
+        if entry is not None:
+            radius = max(radius, entry.radius)
+        size = max(self.neighbourhood, first * 2)
+        entry = _Neighbourhood(
+            centre_latitude, centre_longitude, radius,
+            self.index.around(centre_latitude, centre_longitude, radius, size, category),
+            size, time.monotonic() + self.timeout,
+        )
+        with self._lock:
+            if version == self._version:
+                self._store(key, entry)
+        found = entry.nearest(latitude, longitude, radius_km, first)
+        if found is None:
+            return self.index.nearest(latitude, longitude, radius_km, first, category)
+        return found
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            now = time.monotonic()
+            report = self.stats_seconds and now >= self._next_report
+            if report:
+                self._next_report = now + self.stats_seconds
+                stats = self.stats()
+        if report:
+            logger.info(
+                "nearMe cache: %(hits)s hits, %(misses)s misses (hit rate %(hit_rate).3f), %(size)s neighbourhoods.",
+                stats,
+            )
+
+    def _store(self, key, entry):
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = entry
+        for block in entry.blocks:
+            self._by_block.setdefault(block, set()).add(key)
+        while len(self._entries) > self.maxsize:
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, key):
+        entry = self._entries.pop(key)
+        for block in entry.blocks:
+            keys = self._by_block[block]
+            keys.discard(key)
+            if not keys:
+                del self._by_block[block]
+
+    # --- INVALIDATION (called by the index, see PlaceIndex.subscribe()) ---
+
+    def changed(self, latitude, longitude, category):
+        """Drops the neighbourhoods a place added or removed at this point would belong to."""
+        row = min(int((latitude + 90) / BLOCK_DEGREES), round(180 / BLOCK_DEGREES) - 1)
+        column = int(((longitude + 180) % 360) / BLOCK_DEGREES) % round(360 / BLOCK_DEGREES)
+        with self._lock:
+            self._version += 1
+            for key in list(self._by_block.get((row, column), ())):
+                entry = self._entries[key]
+                if (key[1] in (None, category)
+                        and distance_km(latitude, longitude, entry.latitude, entry.longitude)
+                        <= entry.reach * (1 + MARGIN)):
+                    self._drop(key)
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+            self._by_block.clear()
+            self.hits = self.misses = 0
+            self._next_report = time.monotonic() + self.stats_seconds
+
+
+nearby_cache = NearbyCache(place_index)
+os.register_at_fork(after_in_child=nearby_cache._after_fork)
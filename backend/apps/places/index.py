@@ -0,0 +1,406 @@
+import math
+import os
+import threading
+import time
+from array import array
+from datetime import timedelta
+from heapq import heappop, heappush, heapreplace
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from .models import Place
+
+# Places per quadtree leaf before it splits in four, and how often a process picks up
+# places written by other processes.
+LEAF_SIZE = getattr(settings, 'PLACES_INDEX_LEAF_SIZE', 32)
+SYNC_SECONDS = getattr(settings, 'PLACES_INDEX_SYNC_SECONDS', 30)
+PRELOAD = getattr(settings, 'PLACES_INDEX_PRELOAD', True)
+# Side of the grid blocks each holding one quadtree, in degrees (about 55 km of
+# latitude), and how deep a quadtree may get (blocks of places at one spot stop there).
+BLOCK_DEGREES = 0.5
+MAX_DEPTH = 16
+# Writes that commit later than this after their updated_at may be missed by a sync.
+SYNC_OVERLAP = timedelta(seconds=10)
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_km(latitude1, longitude1, latitude2, longitude2):
+    """Great-circle distance between two points, in kilometres."""
+    phi1, phi2 = math.radians(latitude1), math.radians(latitude2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(longitude2 - longitude1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def distance_km(latitude1, longitude1, latitude2, longitude2):
+    """
+    Distance between two nearby points, in kilometres: within 0.1% of haversine_km()
+    up to PLACES_MAX_RADIUS_KM away except near the poles, at a third of the cost.
+    """
+    dx = (longitude2 - longitude1 + 180) % 360 - 180
+    dx *= math.cos(math.radians((latitude1 + latitude2) / 2))
+    return KM_PER_DEGREE * math.hypot(dx, latitude2 - latitude1)
+
+
+class _Node:
+    """
+    A square of a block's quadtree. Leaves keep their places as parallel arrays;
+    a leaf with more than LEAF_SIZE places splits into four quadrants.
+    """
+
+    __slots__ = ('bottom', 'left', 'size', 'count', 'children', 'latitudes', 'longitudes', 'ids')
+
+    def __init__(self, bottom, left, size):
+        self.bottom = bottom
+        self.left = left
+        self.size = size
+        self.count = 0
+        # [south-west, south-east, north-west, north-east], or None for a leaf.
+        self.children = None
+        self.latitudes = array('d')
+        self.longitudes = array('d')
+        self.ids = []
+
+    def _quadrant(self, latitude, longitude):
+        half = self.size / 2
+        return (latitude >= self.bottom + half) * 2 + (longitude >= self.left + half)
+
+    def add(self, place_id, latitude, longitude, depth=0):
+        node = self
+        while node.children is not None:
+            node.count += 1
+            node = node.children[node._quadrant(latitude, longitude)]
+            depth += 1
+        node.count += 1
+        node.latitudes.append(latitude)
+        node.longitudes.append(longitude)
+        node.ids.append(place_id)
+        if node.count > LEAF_SIZE and depth < MAX_DEPTH:
+            node._split(depth)
+
+    def _split(self, depth):
+        half = self.size / 2
+        self.children = [
+            _Node(self.bottom + half * (quadrant // 2), self.left + half * (quadrant % 2), half)
+            for quadrant in range(4)
+        ]
+        places = zip(self.ids, self.latitudes, self.longitudes)
+        self.latitudes, self.longitudes, self.ids = None, None, None
+        for place_id, latitude, longitude in places:
+            self.children[self._quadrant(latitude, longitude)].add(place_id, latitude, longitude, depth + 1)
+
+    def remove(self, place_id, latitude, longitude):
+        """Removes a place known to be in this tree at the given position. Leaves never merge back."""
+        node = self
+        while node.children is not None:
+            node.count -= 1
+            node = node.children[node._quadrant(latitude, longitude)]
+        node.count -= 1
+        # Move the last entry into the removed one's slot.
+        index, last = node.ids.index(place_id), len(node.ids) - 1
+        node.latitudes[index] = node.latitudes[last]
+        node.longitudes[index] = node.longitudes[last]
+        node.ids[index] = node.ids[last]
+        del node.latitudes[last], node.longitudes[last], node.ids[last]
+
+
+# --- 1. THE INDEX ---
+
+class PlaceIndex:
+    """
+    Every active place in memory: per category, a grid of BLOCK_DEGREES blocks, each
+    a quadtree whose leaves hold at most LEAF_SIZE places. Trees are deep in dense
+    cities and shallow elsewhere, so every leaf holds a useful number of places.
+
+    nearest() searches best-first: blocks, quadrants and leaves are visited in order
+    of their distance to the query point, and the search stops once the next one is
+    farther than the radius or than the k-th nearest place found so far. Empty
+    quadrants are never entered, so a query reads a few leaves in a dense city and
+    a few dozen blocks in the countryside, instead of every place.
+
+    Distances are measured in a local equirectangular projection around the query
+    point, exact enough over the radii allowed (PLACES_MAX_RADIUS_KM); see distance_km().
+    """
+
+    def __init__(self):
+        self.block_rows = round(180 / BLOCK_DEGREES)
+        self.block_columns = round(360 / BLOCK_DEGREES)
+        # {category: {(block row, block column): _Node}}
+        self._grids = {}
+        # {place id: (category, latitude, longitude)}
+        self._where = {}
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self.loaded = False
+        self.synced_at = None
+        self._checked = 0.0
+        # Told about every change, e.g. apps.places.cache.NearbyCache.
+        self._listeners = []
+
+    def __len__(self):
+        return len(self._where)
+
+    def _block_of(self, latitude, longitude):
+        row = min(int((latitude + 90) / BLOCK_DEGREES), self.block_rows - 1)
+        column = int((longitude + 180) / BLOCK_DEGREES) % self.block_columns
+        return row, column
+
+    # --- WRITES ---
+
+    def subscribe(self, listener):
+        """
+        Registers an object whose changed(latitude, longitude, category) is called
+        with the old and new position of every place written, and whose clear() is
+        called whenever the whole index is replaced.
+        """
+        self._listeners.append(listener)
+
+    def _changed(self, latitude, longitude, category):
+        for listener in self._listeners:
+            listener.changed(latitude, longitude, category)
+
+    def _cleared(self):
+        for listener in self._listeners:
+            listener.clear()
+
+    def _add(self, grids, where, place_id, latitude, longitude, category):
+        longitude = (longitude + 180) % 360 - 180
+        row, column = self._block_of(latitude, longitude)
+        blocks = grids.setdefault(category, {})
+        root = blocks.get((row, column))
+        if root is None:
+            root = blocks[(row, column)] = _Node(row * BLOCK_DEGREES - 90, column * BLOCK_DEGREES - 180, BLOCK_DEGREES)
+        root.add(place_id, latitude, longitude)
+        where[place_id] = (category, latitude, longitude)
+
+    def _discard(self, place_id):
+        location = self._where.pop(place_id, None)
+        if location is None:
+            return
+        category, latitude, longitude = location
+        self._changed(latitude, longitude, category)
+        blocks = self._grids[category]
+        key = self._block_of(latitude, longitude)
+        root = blocks[key]
+        root.remove(place_id, latitude, longitude)
+        if not root.count:
+            del blocks[key]
+            if not blocks:
+                del self._grids[category]
+
+    def apply(self, place_id, latitude, longitude, category, is_active=True):
+        """Indexes a saved place, replacing its previous position; inactive places are removed."""
+        with self._lock:
+            self._discard(place_id)
+            if is_active:
+                self._add(self._grids, self._where, place_id, latitude, longitude, category)
+                self._changed(latitude, longitude, category)
+
+    def discard(self, place_id):
+        with self._lock:
+            self._discard(place_id)
+
+    # --- LOADING ---
+
+    def load(self, rows=None):
+        """
+        Rebuilds the index from (id, latitude, longitude, category) rows, by default
+        every active place, and swaps it in whole: searches meanwhile use the old one.
+        """
+        started = timezone.now()
+        if rows is None:
+            rows = Place.objects.filter(is_active=True).values_list(
+                'pk', 'latitude', 'longitude', 'category'
+            ).iterator(chunk_size=10_000)
+        grids, where = {}, {}
+        for place_id, latitude, longitude, category in rows:
+            self._add(grids, where, place_id, latitude, longitude, category)
+        with self._lock:
+            self._grids, self._where = grids, where
+            self.loaded = True
+            self.synced_at = started
+            self._checked = time.monotonic()
+            self._cleared()
+
+    def sync(self):
+        """Applies the places saved since the last load or sync, by any process."""
+        started = timezone.now()
+        changed = Place.objects.filter(updated_at__gte=self.synced_at - SYNC_OVERLAP).values_list(
+            'pk', 'latitude', 'longitude', 'category', 'is_active'
+        )
+        for row in changed.iterator(chunk_size=10_000):
+            self.apply(*row)
+        self.synced_at = started
+
+    def is_current(self):
+        """Whether searching now needs no database query (see ensure_current())."""
+        return self.loaded and time.monotonic() - self._checked < SYNC_SECONDS
+
+    def ensure_current(self):
+        """
+        Loads the index on first use and syncs it every SYNC_SECONDS. Only one thread
+        does either; during a sync the others keep searching what is already loaded.
+        """
+        if self.is_current():
+            return
+        if not self.loaded:
+            with self._load_lock:
+                if not self.loaded:
+                    self.load()
+            return
+        if self._load_lock.acquire(blocking=False):
+            try:
+                if not self.is_current():
+                    self.sync()
+                    self._checked = time.monotonic()
+            finally:
+                self._load_lock.release()
+
+    def warm(self):
+        """Loads the index in a background thread, so the first searches need not wait."""
+        def run():
+            try:
+                self.ensure_current()
+            finally:
+                connection.close()
+
+        threading.Thread(target=run, name='place-index-load', daemon=True).start()
+
+    def _after_fork(self):
+        # A server forked while the parent was loading or syncing must not inherit
+        # locks held by threads that do not exist in the child.
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self._grids, self._where = {}, {}
+            self.loaded = False
+            self.synced_at = None
+            self._checked = 0.0
+            self._cleared()
+
+    # --- SEARCH ---
+
+    def _bound(self, latitude, longitude, kx, bottom, left, size):
+        """Squared projected distance (km²) from the point to a square."""
+        if latitude < bottom:
+            dy = bottom - latitude
+        elif latitude > bottom + size:
+            dy = latitude - bottom - size
+        else:
+            dy = 0.0
+        if longitude < left:
+            dx = left - longitude
+        elif longitude > left + size:
+            dx = longitude - left - size
+        else:
+            dx = 0.0
+        dy *= KM_PER_DEGREE
+        dx *= kx
+        return dx * dx + dy * dy
+
+    def nearest(self, latitude, longitude, radius_km, first, category=None):
+        """
+        Up to `first` (distance in km, place id) pairs within radius_km of the point,
+        nearest first, optionally only places of one category.
+        """
+        return [
+            (distance, place_id)
+            for distance, place_id, _, _ in self.around(latitude, longitude, radius_km, first, category)
+        ]
+
+    def around(self, latitude, longitude, radius_km, first, category=None):
+        """nearest(), as (distance in km, place id, latitude, longitude) tuples."""
+        if first <= 0 or radius_km <= 0:
+            return []
+        longitude = (longitude + 180) % 360 - 180
+        # Kilometres per degree of longitude here; never zero, even at a pole.
+        kx = KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 1e-9)
+        ky = KM_PER_DEGREE
+        block_columns = self.block_columns
+        start = self._block_of(latitude, longitude)
+        limit = radius_km * radius_km
+        best = []  # max-heap of the nearest so far: (-squared distance, id, latitude, longitude)
+
+        with self._lock:
+            if category is None:
+                grids = list(self._grids.values())
+            else:
+                grids = [self._grids[category]] if category in self._grids else []
+            if not grids:
+                return []
+
+            # Entries: (squared distance bound, tie breaker, node, shift, block position).
+            # Blocks are entered by position, (row, unwrapped column), with node None: a
+            # block across the antimeridian is measured on the query's side of it, and
+            # `shift` (degrees) moves its places' longitudes there.
+            frontier = [(0.0, 0, None, 0.0, start)]
+            seen = {start}
+            counter = 1
+            while frontier:
+                bound, _, node, shift, position = heappop(frontier)
+                if bound > limit:
+                    break
+
+                if node is None:
+                    row, column = position
+                    shift = 360.0 * (column // block_columns)
+                    key = (row, column % block_columns)
+                    children = [grid[key] for grid in grids if key in grid]
+                    for neighbour in ((row - 1, column), (row + 1, column), (row, column - 1), (row, column + 1)):
+                        if (neighbour in seen or not 0 <= neighbour[0] < self.block_rows
+                                or abs(neighbour[1] - start[1]) > block_columns // 2):
+                            continue
+                        seen.add(neighbour)
+                        neighbour_bound = self._bound(
+                            latitude, longitude, kx, neighbour[0] * BLOCK_DEGREES - 90,
+                            neighbour[1] * BLOCK_DEGREES - 180, BLOCK_DEGREES,
+                        )
+                        if neighbour_bound <= limit:
+                            heappush(frontier, (neighbour_bound, counter, None, 0.0, neighbour))
+                            counter += 1
+                elif node.children is not None:
+                    children = node.children
+                else:
+                    distances = [
+                        ((place_latitude - latitude) * ky) ** 2 + ((place_longitude + shift - longitude) * kx) ** 2
+                        for place_latitude, place_longitude in zip(node.latitudes, node.longitudes)
+                    ]
+                    for index, distance in enumerate(distances):
+                        if distance > limit:
+                            continue
+                        entry = (-distance, node.ids[index], node.latitudes[index], node.longitudes[index])
+                        if len(best) < first:
+                            heappush(best, entry)
+                        else:
+                            heapreplace(best, entry)
+                        if len(best) == first:
+                            limit = -best[0][0]
+                    continue
+
+                for child in children:
+                    if child.count:
+                        child_bound = self._bound(latitude, longitude, kx, child.bottom, child.left + shift, child.size)
+                        if child_bound <= limit:
+                            heappush(frontier, (child_bound, counter, child, shift, None))
+                            counter += 1
+
+        return sorted(
+            (distance_km(latitude, longitude, place_latitude, place_longitude), place_id, place_latitude, place_longitude)
+            for _, place_id, place_latitude, place_longitude in best
+        )
+
+
+place_index = PlaceIndex()
+os.register_at_fork(after_in_child=place_index._after_fork)
+
+
+def preload():
+    """Called by backend.wsgi and backend.asgi: starts loading the index, unless PLACES_INDEX_PRELOAD is off."""
+    if PRELOAD:
+        place_index.warm()
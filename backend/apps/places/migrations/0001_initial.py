@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:53
+
+import django.core.validators
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Place',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, help_text='The unique primary key for this object.', primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='The date and time this object was created.')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='The date and time this object was last updated.')),
+                ('name', models.CharField(help_text='The name shown to users.', max_length=255)),
+                ('category', models.CharField(help_text='The kind of place, e.g. "Cafe" or "Park".', max_length=50)),
+                ('description', models.TextField(blank=True, default='')),
+                ('latitude', models.FloatField(validators=[django.core.validators.MinValueValidator(-90), django.core.validators.MaxValueValidator(90)])),
+                ('longitude', models.FloatField(validators=[django.core.validators.MinValueValidator(-180), django.core.validators.MaxValueValidator(180)])),
+                ('is_active', models.BooleanField(default=True, help_text='Inactive places are not found. Deactivate rather than delete, so every server notices.')),
+            ],
+            options={
+                'verbose_name': 'Place',
+                'verbose_name_plural': 'Places',
+                'indexes': [models.Index(fields=['updated_at'], name='place_updated_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import models
+
+from apps.core.models import AbstractBaseModel
+
+
+class Place(AbstractBaseModel):
+    """
+    A local resource (cafe, park, gallery, ...) shown by "Find Near Me".
+
+    Searched in memory by apps.places.index, which every server process keeps in
+    step with saves and deletes; the table itself is only read by primary key.
+    """
+
+    name = models.CharField(max_length=255, help_text='The name shown to users.')
+    category = models.CharField(max_length=50, help_text='The kind of place, e.g. "Cafe" or "Park".')
+    description = models.TextField(blank=True, default='')
+    latitude = models.FloatField(validators=[MinValueValidator(-90), MaxValueValidator(90)])
+    longitude = models.FloatField(validators=[MinValueValidator(-180), MaxValueValidator(180)])
+    is_active = models.BooleanField(
+        default=True,
+        help_text='Inactive places are not found. Deactivate rather than delete, so every server notices.'
+    )
+
+    class Meta:
+        indexes = [
+            # Serves the periodic index sync: places changed since the last one.
+            models.Index(fields=['updated_at'], name='place_updated_idx'),
+        ]
+        verbose_name = 'Place'
+        verbose_name_plural = 'Places'
+
+    def __str__(self):
+        return f"{self.name} ({self.category})"
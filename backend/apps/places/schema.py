@@ -0,0 +1,66 @@
+import graphene
+from django.conf import settings
+from graphene_django.types import DjangoObjectType
+from graphql import GraphQLError
+from graphql_jwt.decorators import login_required
+
+from apps.core.complexity import limit_list
+
+from .cache import nearby_cache
+from .index import place_index
+from .models import Place
+
+# Widest search radius (km) and most places nearMe returns.
+MAX_RADIUS_KM = getattr(settings, 'PLACES_MAX_RADIUS_KM', 50)
+MAX_NEAR_ME_RESULTS = 100
+limit_list('Query.nearMe', MAX_NEAR_ME_RESULTS)
+
+
+class PlaceType(DjangoObjectType):
+    class Meta:
+        model = Place
+        fields = ('id', 'name', 'category', 'description', 'latitude', 'longitude')
+        interfaces = (graphene.Node,)
+
+
+class NearbyPlaceType(graphene.ObjectType):
+    """A place found by nearMe, with its distance from the search point."""
+    place = graphene.Field(PlaceType, required=True)
+    distance = graphene.Float(required=True, description="Kilometres from the search point.")
+
+
+def _search(lat, lng, radius, first, category):
+    """Checks nearMe's arguments, then returns (distance, place id) pairs from the spatial index or its cache."""
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise GraphQLError("Invalid coordinates.")
+    if not 0 < radius <= MAX_RADIUS_KM:
+        raise GraphQLError(f"Radius must be more than 0 and at most {MAX_RADIUS_KM:g} km.")
+    first = min(max(first, 0), MAX_NEAR_ME_RESULTS)
+    return nearby_cache.nearest(lat, lng, radius, first, category or None)
+
+
+def _nearby(found, places):
+    """The found places in distance order, without any deactivated since the index last saw them."""
+    return [
+        NearbyPlaceType(place=places[place_id], distance=round(distance, 3))
+        for distance, place_id in found if place_id in places
+    ]
+
+
+class PlaceQuery(graphene.ObjectType):
+    near_me = graphene.List(
+        graphene.NonNull(NearbyPlaceType),
+        lat=graphene.Float(required=True),
+        lng=graphene.Float(required=True),
+        radius=graphene.Float(default_value=5.0, description=f"In kilometres, at most {MAX_RADIUS_KM:g}."),
+        category=graphene.String(required=False),
+        first=graphene.Int(default_value=20, description=f"At most {MAX_NEAR_ME_RESULTS}."),
+        description="The places nearest to a point within a radius, nearest first, optionally of one category. "
+                    "Searched in memory (apps.places.index); only the places found are read from the database."
+    )
+
+    @login_required
+    def resolve_near_me(root, info, lat, lng, radius, first, category=None):
+        place_index.ensure_current()
+        found = _search(lat, lng, radius, first, category)
+        return _nearby(found, Place.objects.filter(is_active=True).in_bulk([place_id for _, place_id in found]))
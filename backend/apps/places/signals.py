@@ -0,0 +1,25 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .index import place_index
+from .models import Place
+
+
+# --- KEEP THIS PROCESS'S SPATIAL INDEX (apps.places.index) IN SYNC ---
+# Other processes pick the change up at their next sync (PLACES_INDEX_SYNC_SECONDS).
+# QuerySet.update() sends no signal and leaves updated_at alone, so set it explicitly.
+
+@receiver(post_save, sender=Place)
+def index_place(sender, instance, **kwargs):
+    if place_index.loaded:
+        transaction.on_commit(lambda: place_index.apply(
+            instance.pk, instance.latitude, instance.longitude, instance.category, instance.is_active,
+        ))
+
+
+@receiver(post_delete, sender=Place)
+def unindex_place(sender, instance, **kwargs):
+    if place_index.loaded:
+        place_id = instance.pk
+        transaction.on_commit(lambda: place_index.discard(place_id))
@@ -0,0 +1,163 @@
+import random
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, SimpleTestCase, TestCase
+
+from backend.schema import schema
+
+from . import cache
+from .cache import NearbyCache, nearby_cache
+from .index import PlaceIndex, distance_km, place_index
+from .models import Place
+
+User = get_user_model()
+
+
+# --- 1. SPATIAL INDEX ---
+
+class PlaceIndexTests(SimpleTestCase):
+
+    def setUp(self):
+        rng = random.Random(0)
+        # A dense city spanning several blocks, and a scattered region across the antimeridian.
+        self.places = [
+            (number, 51.5 + rng.uniform(-0.6, 0.6), -0.1 + rng.uniform(-0.9, 0.9), rng.choice(['Cafe', 'Park']))
+            for number in range(3000)
+        ] + [
+            (number, rng.uniform(-17, -16), rng.uniform(179, 181) - (360 if rng.random() < 0.5 else 0), 'Cafe')
+            for number in range(3000, 3500)
+        ]
+        self.index = PlaceIndex()
+        self.index.load(self.places)
+
+    def scan(self, latitude, longitude, radius_km, first, category=None):
+        found = sorted(
+            (distance_km(latitude, longitude, place_latitude, place_longitude), place_id)
+            for place_id, place_latitude, place_longitude, place_category in self.places
+            if category in (None, place_category)
+        )
+        return [(distance, place_id) for distance, place_id in found if distance <= radius_km][:first]
+
+    def assertSameResults(self, found, expected):
+        self.assertEqual([place_id for _, place_id in found], [place_id for _, place_id in expected])
+        for (distance, _), (expected_distance, _) in zip(found, expected):
+            self.assertAlmostEqual(distance, expected_distance, places=6)
+
+    def test_matches_a_full_scan(self):
+        rng = random.Random(1)
+        for _ in range(50):
+            latitude, longitude = 51.5 + rng.uniform(-0.8, 0.8), -0.1 + rng.uniform(-1.2, 1.2)
+            radius, first = rng.choice([0.5, 2, 10, 50]), rng.choice([1, 5, 20])
+            category = rng.choice([None, 'Cafe', 'Park'])
+
+            self.assertSameResults(
+                self.index.nearest(latitude, longitude, radius, first, category),
+                self.scan(latitude, longitude, radius, first, category),
+            )
+
+    def test_searches_across_the_antimeridian(self):
+        for longitude in (179.95, -179.95):
+            found = self.index.nearest(-16.5, longitude, 50, 20)
+
+            self.assertSameResults(found, self.scan(-16.5, longitude, 50, 20))
+            self.assertEqual(len(found), 20)
+
+    def test_writes_apply_incrementally(self):
+        self.index.apply('new', 51.5, -0.1, 'Cafe')
+        self.assertEqual(self.index.nearest(51.5, -0.1, 1, 1, 'Cafe'), [(0.0, 'new')])
+
+        self.index.apply('new', 51.5, -0.1, 'Cafe', is_active=False)
+        self.index.discard(0)
+
+        found = [place_id for _, place_id in self.index.nearest(51.5, -0.1, 200, 5000)]
+        self.assertNotIn('new', found)
+        self.assertNotIn(0, found)
+        self.assertEqual(len(self.index), len(self.places) - 1)
+
+    def test_empty_and_degenerate_searches(self):
+        self.assertEqual(self.index.nearest(51.5, -0.1, 5, 0), [])
+        self.assertEqual(self.index.nearest(51.5, -0.1, 5, 10, 'Museum'), [])
+        self.assertEqual(self.index.nearest(0, 0, 50, 10), [])
+
+
+# --- 2. NEARBY CACHE ---
+
+class NearbyCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        rng = random.Random(2)
+        self.index = PlaceIndex()
+        self.index.load([
+            (number, 51.5 + rng.uniform(-0.1, 0.1), -0.1 + rng.uniform(-0.1, 0.1), 'Cafe') for number in range(500)
+        ])
+
+    def test_answers_match_the_index_and_count_hits(self):
+        nearby = NearbyCache(self.index)
+        for longitude in (-0.1, -0.10001, -0.10002):
+            self.assertEqual(nearby.nearest(51.5, longitude, 2, 10), self.index.nearest(51.5, longitude, 2, 10))
+
+        self.assertEqual(nearby.stats(), {'hits': 2, 'misses': 1, 'hit_rate': 2 / 3, 'size': 1})
+
+    def test_logs_the_hit_rate_periodically(self):
+        now = [0.0]
+        with mock.patch.object(cache.time, 'monotonic', lambda: now[0]):
+            nearby = NearbyCache(self.index, stats_seconds=60)
+            with self.assertNoLogs(cache.logger):
+                nearby.nearest(51.5, -0.1, 2, 10)
+            now[0] = 61
+            with self.assertLogs(cache.logger, 'INFO') as logs:
+                nearby.nearest(51.5, -0.1, 2, 10)
+                nearby.nearest(51.5, -0.1, 2, 10)
+
+        [message] = logs.output
+        self.assertIn('1 hits, 1 misses (hit rate 0.500)', message)
+
+
+# --- 3. nearMe QUERY ---
+
+NEAR_ME = '''
+    query ($lat: Float!, $lng: Float!, $radius: Float, $category: String) {
+        nearMe(lat: $lat, lng: $lng, radius: $radius, category: $category) { place { name } distance }
+    }
+'''
+
+
+class NearMeQueryTests(TestCase):
+
+    def setUp(self):
+        place_index.reset()
+        nearby_cache.clear()
+        self.addCleanup(place_index.reset)
+        self.addCleanup(nearby_cache.clear)
+        self.user = User.objects.create(username='alice', email='alice@example.com')
+        Place.objects.create(name='Near', category='Cafe', latitude=51.5, longitude=-0.1)
+        Place.objects.create(name='Far', category='Cafe', latitude=51.52, longitude=-0.1)
+        Place.objects.create(name='Park', category='Park', latitude=51.501, longitude=-0.1)
+
+    def near_me(self, **variables):
+        request = RequestFactory().post('/graphql/')
+        request.user = self.user
+        result = schema.execute(
+            NEAR_ME, variable_values={'lat': 51.5, 'lng': -0.1, **variables}, context_value=request,
+        )
+        found = (result.data or {}).get('nearMe')
+        return result.errors, found and [nearby['place']['name'] for nearby in found]
+
+    def test_nearest_first_within_the_radius(self):
+        self.assertEqual(self.near_me(), (None, ['Near', 'Park', 'Far']))
+        self.assertEqual(self.near_me(radius=1.0, category='Cafe'), (None, ['Near']))
+
+    def test_deactivated_places_disappear(self):
+        self.near_me()
+        with self.captureOnCommitCallbacks(execute=True):
+            place = Place.objects.get(name='Near')
+            place.is_active = False
+            place.save()
+
+        self.assertEqual(self.near_me(), (None, ['Park', 'Far']))
+
+    def test_radius_is_bounded(self):
+        errors, _ = self.near_me(radius=1000.0)
+
+        self.assertIn("Radius must be more than 0", errors[0].message)
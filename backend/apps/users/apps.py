@@ -11,4 +11,8 @@ class UsersConfig(AppConfig):
     label = 'users'
 
     # Optional: A human-readable name for the admin site
-    verbose_name = 'Users'
\ No newline at end of file
+    verbose_name = 'Users'
+
+    def ready(self):
+        # Invalidates cached JWT user snapshots when users or their groups change.
+        from . import signals  # noqa: F401
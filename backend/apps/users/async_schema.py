@@ -0,0 +1,40 @@
+import graphql_jwt
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from graphql_jwt.decorators import login_required
+
+from apps.core.authorization import get_authorization
+from apps.core.mutations import async_mutation
+from apps.core.optimizer import optimize
+
+from .schema import (
+    MAX_USER_SEARCH_RESULTS,
+    ObtainJSONWebToken,
+    RegisterUser,
+    UpdateUser,
+    UserQuery,
+    _check_can_search_users,
+)
+from .search import normalise, search_users
+
+
+class AsyncUserQuery(UserQuery):
+    """UserQuery with resolvers on Django's async ORM, for the async GraphQL view."""
+
+    async def resolve_users(self, info):
+        return [user async for user in optimize(get_user_model().objects.all(), info)]
+
+    @login_required
+    async def resolve_search_users(self, info, prefix, first):
+        await get_authorization(info).aload()
+        _check_can_search_users(info)
+        return await sync_to_async(search_users)(
+            get_user_model().objects.all(), normalise(prefix), min(max(first, 0), MAX_USER_SEARCH_RESULTS),
+        )
+
+
+AsyncRegisterUser = async_mutation(RegisterUser)
+AsyncUpdateUser = async_mutation(UpdateUser)
+AsyncObtainJSONWebToken = async_mutation(ObtainJSONWebToken)
+AsyncVerify = async_mutation(graphql_jwt.Verify)
+AsyncRefresh = async_mutation(graphql_jwt.Refresh)
@@ -0,0 +1,207 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import router
+from django.utils.translation import gettext as _
+from graphql_jwt.backends import JSONWebTokenBackend
+from graphql_jwt.exceptions import JSONWebTokenError
+from graphql_jwt.settings import jwt_settings
+from graphql_jwt.utils import get_credentials, get_payload
+
+from apps.core import caches
+from apps.core.authorization import authorization_for
+
+TOKEN_PREFIX = 'auth:jwt:'
+USER_PREFIX = 'auth:user:'
+USER_SNAPSHOT_TIMEOUT = getattr(settings, 'AUTH_USER_SNAPSHOT_TIMEOUT', 60 * 5)
+
+# Everything permission checks and the `me` query read. Other columns (password,
+# last_login, ...) are deferred and only loaded if something actually touches them.
+SNAPSHOT_FIELDS = (
+    'id', 'username', 'email', 'first_name', 'last_name', 'phone_number', 'profile_image',
+    'is_active', 'is_staff', 'is_superuser',
+)
+
+
+# --- 1. VERIFIED TOKEN PAYLOADS ---
+
+def _token_key(token):
+    return TOKEN_PREFIX + hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+def _remaining_lifetime(payload):
+    exp = payload.get('exp')
+    if exp is None:
+        return USER_SNAPSHOT_TIMEOUT
+    return int(exp - time.time())
+
+
+def get_cached_payload(token, context=None):
+    """
+    Returns the verified payload of `token`, decoding and checking its signature
+    only the first time the token is seen. A payload never outlives the token's
+    `exp`, after which get_payload() runs again and reports the expiry.
+    """
+    key = _token_key(token)
+    payload = cache.get(key)
+    if payload is None:
+        payload = get_payload(token, context)
+        timeout = _remaining_lifetime(payload)
+        if timeout > 0:
+            cache.set(key, payload, timeout)
+    return payload
+
+
+async def aget_cached_payload(token, context=None):
+    key = _token_key(token)
+    payload = await cache.aget(key)
+    if payload is None:
+        payload = get_payload(token, context)
+        timeout = _remaining_lifetime(payload)
+        if timeout > 0:
+            await cache.aset(key, payload, timeout)
+    return payload
+
+
+# --- 2. USER SNAPSHOTS ---
+
+def _user_key(username):
+    return USER_PREFIX + hashlib.sha256(username.encode('utf-8')).hexdigest()
+
+
+def _username(payload):
+    username = jwt_settings.JWT_PAYLOAD_GET_USERNAME_HANDLER(payload)
+    if not username:
+        raise JSONWebTokenError(_("Invalid payload"))
+    return username
+
+
+def _check_active(user):
+    if user is not None and not getattr(user, 'is_active', True):
+        raise JSONWebTokenError(_("User is disabled"))
+    return user
+
+
+def snapshot(user, group_names):
+    """The cacheable form of a user: SNAPSHOT_FIELDS plus the names of its groups."""
+    fields = {field.attname: getattr(user, field.attname) for field in _snapshot_fields()}
+    return {'fields': fields, 'groups': list(group_names)}
+
+
+def user_from_snapshot(data):
+    """
+    Rebuilds a User instance from a snapshot without touching the database.
+
+    Columns outside SNAPSHOT_FIELDS are deferred, and the user's AuthorizationContext
+    is primed with the cached group names.
+    """
+    UserModel = get_user_model()
+    fields = data['fields']
+    field_names = [field.attname for field in _snapshot_fields() if field.attname in fields]
+    user = UserModel.from_db(
+        router.db_for_read(UserModel),
+        field_names,
+        [fields[name] for name in field_names],
+    )
+    authorization_for(user).prime_groups(data['groups'])
+    return user
+
+
+def _snapshot_fields():
+    return [
+        field for field in get_user_model()._meta.concrete_fields
+        if field.attname in SNAPSHOT_FIELDS
+    ]
+
+
+def _group_names(user):
+    return user.groups.values_list('name', flat=True)
+
+
+def get_user_by_payload(payload):
+    """
+    Cached equivalent of graphql_jwt.utils.get_user_by_payload(). Snapshots are only
+    cached in a cache every process shares: apps.users.signals drops them in the
+    process that saved the user, and a deactivated user must not stay signed in
+    on the others.
+    """
+    username = _username(payload)
+    if not caches.is_shared():
+        return _check_active(jwt_settings.JWT_GET_USER_BY_NATURAL_KEY_HANDLER(username))
+    key = _user_key(username)
+
+    data = cache.get(key)
+    if data is not None:
+        return _check_active(user_from_snapshot(data))
+
+    user = jwt_settings.JWT_GET_USER_BY_NATURAL_KEY_HANDLER(username)
+    if user is not None:
+        group_names = list(_group_names(user))
+        authorization_for(user).prime_groups(group_names)
+        cache.set(key, snapshot(user, group_names), USER_SNAPSHOT_TIMEOUT)
+    return _check_active(user)
+
+
+async def aget_user_by_payload(payload):
+    username = _username(payload)
+    shared = caches.is_shared()
+    key = _user_key(username)
+
+    data = await cache.aget(key) if shared else None
+    if data is not None:
+        return _check_active(user_from_snapshot(data))
+
+    UserModel = get_user_model()
+    try:
+        user = await UserModel._default_manager.aget(**{UserModel.USERNAME_FIELD: username})
+    except UserModel.DoesNotExist:
+        return None
+    if not shared:
+        return _check_active(user)
+    group_names = [name async for name in _group_names(user)]
+    authorization_for(user).prime_groups(group_names)
+    await cache.aset(key, snapshot(user, group_names), USER_SNAPSHOT_TIMEOUT)
+    return _check_active(user)
+
+
+def get_user_by_token(token, context=None):
+    return get_user_by_payload(get_cached_payload(token, context))
+
+
+async def aget_user_by_token(token, context=None):
+    return await aget_user_by_payload(await aget_cached_payload(token, context))
+
+
+def invalidate_users(*usernames):
+    """Drops the cached snapshots of the given users, e.g. after they were modified."""
+    keys = [_user_key(username) for username in set(usernames) if username]
+    if keys:
+        cache.delete_many(keys)
+
+
+# --- 3. AUTHENTICATION BACKEND ---
+
+class CachedJSONWebTokenBackend(JSONWebTokenBackend):
+    """
+    Drop-in replacement for graphql_jwt's JSONWebTokenBackend.
+
+    The verified payload is cached per token until it expires, and the user as a
+    snapshot per username until apps.users.signals invalidates it. An authenticated
+    request on a warm cache therefore neither verifies a signature nor reads the
+    user or group tables. With a per-process cache (no REDIS_URL) only payloads are
+    cached, and the user is read on every request.
+    """
+
+    def authenticate(self, request=None, **kwargs):
+        if request is None or getattr(request, "_jwt_token_auth", False):
+            return None
+
+        token = get_credentials(request, **kwargs)
+
+        if token is not None:
+            return get_user_by_token(token, request)
+
+        return None
@@ -0,0 +1,141 @@
+import threading
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.test.utils import override_settings
+
+# PBKDF2 is deliberately slow; these bound how many cores one server process's
+# sign-ins may use. Each process has its own pool, so N processes use up to N * WORKERS.
+WORKERS = getattr(settings, 'PASSWORD_HASHING_WORKERS', 0)
+QUEUE = getattr(settings, 'PASSWORD_HASHING_QUEUE', 16)
+WAIT = getattr(settings, 'PASSWORD_HASHING_WAIT', 2.0)
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing pool and its queue are full for longer than PASSWORD_HASHING_WAIT."""
+
+    def __init__(self):
+        super().__init__("Too many sign-ins in progress; please try again in a moment.")
+
+
+# --- 1. WORKER PROCESS SIDE ---
+
+def _initialize_worker():
+    # The worker inherits DJANGO_SETTINGS_MODULE from the server's environment.
+    import django
+    django.setup()
+
+
+def _hashers(password_hashers):
+    # A spawned worker loads settings afresh and misses any override_settings() in
+    # the server process, so each call carries the caller's PASSWORD_HASHERS.
+    if password_hashers == settings.PASSWORD_HASHERS:
+        return nullcontext()
+    return override_settings(PASSWORD_HASHERS=password_hashers)
+
+
+def _make_password(password_hashers, raw_password):
+    with _hashers(password_hashers):
+        return hashers.make_password(raw_password)
+
+
+def _verify_password(password_hashers, raw_password, encoded):
+    with _hashers(password_hashers):
+        return hashers.verify_password(raw_password, encoded)
+
+
+# --- 2. BOUNDED POOL ---
+
+class HashingPool:
+    """
+    Runs password hashing in `workers` processes instead of on request workers.
+
+    However many logins arrive at once, hashing never uses more cores than the
+    pool has, so cheap requests keep theirs. At most `queue` further hashes may
+    wait for a worker; beyond that callers wait up to `wait` seconds for room and
+    then get HashingBusy rather than joining an ever longer queue. With
+    workers=0 (the default) hashing runs inline on the calling thread, as in
+    plain Django.
+
+    The pool belongs to one server process, not the machine. Its workers are
+    spawned, re-importing the main module, so a script that hashes with
+    workers > 0 needs an `if __name__ == '__main__':` guard.
+    """
+
+    def __init__(self, workers=WORKERS, queue=QUEUE, wait=WAIT):
+        self.workers = workers
+        self.wait = wait
+        self._slots = threading.BoundedSemaphore(workers + queue) if workers > 0 else None
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a server process with live threads and database
+                # connections is unsafe, and the workers need neither.
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=get_context('spawn'),
+                    initializer=_initialize_worker,
+                )
+            return self._executor
+
+    def _reset(self, executor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def run(self, function, *args):
+        if self._slots is None:
+            return function(*args)
+        if not self._slots.acquire(timeout=self.wait):
+            raise HashingBusy()
+        try:
+            executor = self._get_executor()
+            try:
+                return executor.submit(function, *args).result()
+            except BrokenProcessPool:
+                # A worker died (e.g. killed by the OOM killer): start a fresh pool once.
+                self._reset(executor)
+                return self._get_executor().submit(function, *args).result()
+        finally:
+            self._slots.release()
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+
+pool = HashingPool()
+
+
+# --- 3. PUBLIC API ---
+
+def make_password(raw_password):
+    """django.contrib.auth.hashers.make_password(), run in the hashing pool."""
+    if raw_password is None:
+        # Unusable passwords involve no hashing.
+        return hashers.make_password(None)
+    return pool.run(_make_password, settings.PASSWORD_HASHERS, raw_password)
+
+
+def verify_password(raw_password, encoded):
+    """
+    django.contrib.auth.hashers.verify_password(), run in the hashing pool: returns
+    (is_correct, must_update). Unusable or unknown hashes still cost one hash, to
+    keep Django's timing protection against user enumeration.
+    """
+    return pool.run(_verify_password, settings.PASSWORD_HASHERS, raw_password, encoded)
+
+
+amake_password = sync_to_async(make_password, thread_sensitive=False)
+averify_password = sync_to_async(verify_password, thread_sensitive=False)
@@ -0,0 +1,25 @@
+from django.contrib.auth import get_user_model
+
+from apps.core.dataloaders import AsyncDataLoader, DataLoader, get_loader
+
+User = get_user_model()
+
+
+def _batch_load_users(keys):
+    users = User.objects.in_bulk(keys)
+    return [users.get(key) for key in keys]
+
+
+async def _abatch_load_users(keys):
+    users = await User.objects.ain_bulk(keys)
+    return [users.get(key) for key in keys]
+
+
+def users_by_id(info):
+    """Per-request loader returning User instances keyed by primary key."""
+    return get_loader(
+        info,
+        'users_by_id',
+        lambda info: DataLoader(_batch_load_users),
+        lambda info: AsyncDataLoader(_abatch_load_users),
+    )
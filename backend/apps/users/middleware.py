@@ -0,0 +1,26 @@
+import math
+
+from django.http import HttpResponse
+
+from .hashing import WAIT, HashingBusy
+
+
+class HashingBusyMiddleware:
+    """
+    Answers requests that gave up waiting for the password hashing pool (admin
+    sign-in, password change forms) with 503 and Retry-After instead of a 500.
+    GraphQL sign-ins report HashingBusy as a retryable error themselves.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_exception(self, request, exception):
+        if not isinstance(exception, HashingBusy):
+            return None
+        response = HttpResponse(str(exception), status=503, content_type='text/plain; charset=utf-8')
+        response['Retry-After'] = str(max(1, math.ceil(WAIT)))
+        return response
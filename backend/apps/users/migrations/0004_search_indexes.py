@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:06
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+from apps.core.operations import AddPostgresIndex
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0003_query_indexes'),
+    ]
+
+    # The indexes use PostgreSQL collations and operator classes; other databases skip
+    # them (see AddPostgresIndex).
+    operations = [
+        TrigramExtension(),
+        AddPostgresIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.comparison.Collate(django.db.models.functions.text.Upper('username'), 'C'), name='user_username_prefix_idx'),
+        ),
+        AddPostgresIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.comparison.Collate(django.db.models.functions.text.Upper('email'), 'C'), name='user_email_prefix_idx'),
+        ),
+        AddPostgresIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.comparison.Collate(django.db.models.functions.text.Upper('first_name'), 'C'), name='user_first_name_prefix_idx'),
+        ),
+        AddPostgresIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.comparison.Collate(django.db.models.functions.text.Upper('last_name'), 'C'), name='user_last_name_prefix_idx'),
+        ),
+        AddPostgresIndex(
+            model_name='user',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('username'), name='gin_trgm_ops'), django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('email'), name='gin_trgm_ops'), django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('first_name'), name='gin_trgm_ops'), django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('last_name'), name='gin_trgm_ops'), name='user_search_trgm_idx'),
+        ),
+    ]
@@ -1,6 +1,11 @@
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Collate, Upper
 from apps.core.models import AbstractBaseModel  # Assuming this import path
+from apps.core.authorization import authorization_for
+
+from . import hashing
 
 
 class User(AbstractUser, AbstractBaseModel):
@@ -27,14 +32,20 @@ class User(AbstractUser, AbstractBaseModel):
     email = models.EmailField(unique=True)
 
     # --- PERMISSION CHECKING METHODS ---
+    # All checks read from the AuthorizationContext cached on this instance, which
+    # loads groups and memberships in one query the first time any of them is used.
+
+    @property
+    def authorization(self):
+        return authorization_for(self)
 
     def has_role(self, role_name: str) -> bool:
         """
         Checks if the user belongs to a specific Global Group (Role).
         """
         if role_name == self.SUPER_ADMIN:
-            return self.is_superuser or self.groups.filter(name=self.SUPER_ADMIN).exists()
-        return self.groups.filter(name=role_name).exists()
+            return self.is_superuser or self.authorization.has_role(self.SUPER_ADMIN)
+        return self.authorization.has_role(role_name)
 
     def is_super_admin(self):
         return self.has_role(self.SUPER_ADMIN)
@@ -43,14 +54,61 @@ class User(AbstractUser, AbstractBaseModel):
         """
         Checks if the user is an admin of a specific organization via the junction table.
         """
-        return self.memberships.filter(
-            organisation__id=organisation_id,
-            is_org_admin=True
-        ).exists()
+        return self.authorization.is_org_admin_of(organisation_id)
+
+    def is_member_of(self, organisation_id) -> bool:
+        return self.authorization.is_member_of(organisation_id)
+
+    # --- PASSWORDS ---
+    # Hashing runs in the bounded process pool of apps.users.hashing, so registration,
+    # token auth (ModelBackend) and the admin never hash on the request worker.
+
+    def set_password(self, raw_password):
+        self.password = hashing.make_password(raw_password)
+        self._password = raw_password
+
+    def check_password(self, raw_password):
+        is_correct, must_update = hashing.verify_password(raw_password, self.password)
+        if is_correct and must_update:
+            self._upgrade_password(raw_password)
+        return is_correct
+
+    async def acheck_password(self, raw_password):
+        is_correct, must_update = await hashing.averify_password(raw_password, self.password)
+        if is_correct and must_update:
+            self.password = await hashing.amake_password(raw_password)
+            await self.asave(update_fields=['password'])
+        return is_correct
+
+    def _upgrade_password(self, raw_password):
+        self.password = hashing.make_password(raw_password)
+        # Re-hashing with the current hasher is not a password change (see AbstractBaseUser).
+        self.save(update_fields=['password'])
 
     # --- META AND METHODS ---
 
     class Meta:
+        indexes = [
+            # Serves keyset pagination of users (see apps.core.pagination).
+            models.Index(fields=['-created_at', '-id'], name='user_keyset_idx'),
+            # UpdateUser checks phone numbers for uniqueness; without this it scans users.
+            models.Index(fields=['phone_number'], name='user_phone_number_idx'),
+            # searchUsers and searchMembers (apps.users.search) read prefix matches from these
+            # in order, stopping after the few they return. "C" collation makes LIKE 'AB%'
+            # a range scan and matches the order it ranks in. PostgreSQL only.
+            models.Index(Collate(Upper('username'), 'C'), name='user_username_prefix_idx'),
+            models.Index(Collate(Upper('email'), 'C'), name='user_email_prefix_idx'),
+            models.Index(Collate(Upper('first_name'), 'C'), name='user_first_name_prefix_idx'),
+            models.Index(Collate(Upper('last_name'), 'C'), name='user_last_name_prefix_idx'),
+            # Substring matches, for user search and the admin's search box (icontains). PostgreSQL only.
+            GinIndex(
+                OpClass(Upper('username'), name='gin_trgm_ops'),
+                OpClass(Upper('email'), name='gin_trgm_ops'),
+                OpClass(Upper('first_name'), name='gin_trgm_ops'),
+                OpClass(Upper('last_name'), name='gin_trgm_ops'),
+                name='user_search_trgm_idx',
+            ),
+        ]
         verbose_name = 'User'
         verbose_name_plural = 'Users'
 
@@ -1,3 +1,6 @@
+import math
+from contextlib import contextmanager
+
 import graphene
 from graphene_django.types import DjangoObjectType
 from django.contrib.auth import get_user_model
@@ -6,8 +9,20 @@ import graphql_jwt
 from graphql_jwt.shortcuts import get_token
 from graphql_jwt.decorators import login_required
 
+from apps.core.authorization import get_authorization
+from apps.core.complexity import limit_list
+from apps.core.optimizer import optimize
+from apps.core.pagination import KeysetConnectionField
+
+from . import hashing
+from .search import normalise, search_users
+
 User = get_user_model()
 
+# Most users one searchUsers call returns.
+MAX_USER_SEARCH_RESULTS = 50
+limit_list('Query.searchUsers', MAX_USER_SEARCH_RESULTS)
+
 
 class UserType(DjangoObjectType):
     class Meta:
@@ -23,6 +38,40 @@ class UserType(DjangoObjectType):
         )
 
 
+class UserConnection(graphene.relay.Connection):
+    class Meta:
+        node = UserType
+
+
+def _check_can_search_users(info):
+    """searchUsers is for member pickers: super admins and organisation admins."""
+    authorization = get_authorization(info)
+    if not (authorization.is_superuser or any(authorization.org_roles.values())):
+        raise GraphQLError("Permission Denied: Organisation Admin privileges required.")
+
+
+@contextmanager
+def retry_when_hashing_busy():
+    """Reports hashing.HashingBusy as a GraphQL error telling the client to retry."""
+    try:
+        yield
+    except hashing.HashingBusy as error:
+        raise GraphQLError(str(error), extensions={
+            'code': 'HASHING_BUSY',
+            'retryable': True,
+            'retryAfter': max(1, math.ceil(hashing.WAIT)),
+        }) from error
+
+
+class ObtainJSONWebToken(graphql_jwt.ObtainJSONWebToken):
+    """graphql_jwt's tokenAuth, with a busy hashing pool reported as a retryable error."""
+
+    @classmethod
+    def mutate(cls, root, info, **kwargs):
+        with retry_when_hashing_busy():
+            return super().mutate(root, info, **kwargs)
+
+
 class CreateUser():
     def create(self, username, password, email):
         user = get_user_model()(
@@ -50,10 +99,11 @@ class RegisterUser(graphene.Mutation):
         if User.objects.filter(email=email).exists():
             raise GraphQLError("Email already exists")
 
-        user = CreateUser().create(
-            username=username,
-            email=email,
-            password=password)
+        with retry_when_hashing_busy():
+            user = CreateUser().create(
+                username=username,
+                email=email,
+                password=password)
 
         # 🔑 Minimal change to generate JWT token using the shortcut
         token = get_token(user)
@@ -72,7 +122,9 @@ class UpdateUser(graphene.Mutation):
 
     @login_required
     def mutate(self, info, **input):
-        user = info.context.user
+        # The request user may be a cached snapshot with deferred columns; full_clean()
+        # reads every column, so load the complete row once.
+        user = User.objects.get(pk=info.context.user.pk)
 
         ALLOWED_FIELDS = ['first_name', 'last_name', 'phone_number', 'profile_image']
 
@@ -103,7 +155,7 @@ class UserMutation(graphene.ObjectType):
     register_user = RegisterUser.Field()
 
     # 2. Login: The built-in mutation from django-graphql-jwt
-    token_auth = graphql_jwt.ObtainJSONWebToken.Field()
+    token_auth = ObtainJSONWebToken.Field()
 
     # 3. Utilities: Built-in mutations for security
     verify_token = graphql_jwt.Verify.Field()
@@ -114,10 +166,27 @@ class UserMutation(graphene.ObjectType):
 class UserQuery(graphene.ObjectType):
     me = graphene.Field(UserType)
     users = graphene.List(UserType)
+    users_connection = KeysetConnectionField(UserConnection)
+    search_users = graphene.List(
+        graphene.NonNull(UserType),
+        prefix=graphene.String(required=True),
+        first=graphene.Int(default_value=10, description=f"At most {MAX_USER_SEARCH_RESULTS}."),
+        description="Users whose username, email or name starts with `prefix` (from three characters, also those "
+                    "containing it), best match first, for member pickers (Org Admin of any organization required). "
+                    "searchMembers searches one organization's members."
+    )
 
     def resolve_users(self, info):
+        return optimize(get_user_model().objects.all(), info)
+
+    def resolve_users_connection(self, info, **kwargs):
         return get_user_model().objects.all()
 
+    @login_required
+    def resolve_search_users(self, info, prefix, first):
+        _check_can_search_users(info)
+        return search_users(User.objects.all(), normalise(prefix), min(max(first, 0), MAX_USER_SEARCH_RESULTS))
+
     def resolve_me(self, info):
         user = info.context.user
         if user.is_anonymous:
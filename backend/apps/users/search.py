@@ -0,0 +1,245 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, connections
+from django.db.models import Q
+from django.db.models.functions import Collate, Upper
+
+User = get_user_model()
+
+# Hot organisations whose members are searched in memory (0 turns it off), seconds such
+# an index is used before it is rebuilt, and how big an organisation must be to get one.
+TENANT_INDEXES = getattr(settings, 'USER_SEARCH_TENANT_INDEXES', 32)
+TENANT_INDEX_SECONDS = getattr(settings, 'USER_SEARCH_TENANT_INDEX_SECONDS', 60)
+TENANT_INDEX_MIN_MEMBERS = getattr(settings, 'USER_SEARCH_TENANT_INDEX_MIN_MEMBERS', 2000)
+# Trigram indexes serve substring matches only from three characters on.
+MIN_INFIX_LENGTH = 3
+
+# Ranking tiers: a match on the username beats one on the email, which beats one on
+# the first, last or full name, which beats a match inside any of them.
+USERNAME, EMAIL, NAME, INFIX = range(4)
+SEARCH_FIELDS = ('username', 'email', 'first_name', 'last_name')
+
+
+def normalise(prefix):
+    """The search term for what was typed: trimmed, single-spaced and upper case, as indexed."""
+    return ' '.join(prefix.split()).upper()[:150]
+
+
+def _names(first_name, last_name):
+    return [name for name in (first_name, last_name, f"{first_name} {last_name}".strip()) if name]
+
+
+def rank(term, username, email, first_name, last_name):
+    """
+    The sort key of a user found by `term`: the tier of the best match, then the
+    matched value, in the (upper case, code point) order of the prefix indexes.
+    """
+    username, email = username.upper(), email.upper()
+    if username.startswith(term):
+        return USERNAME, username, username
+    if email.startswith(term):
+        return EMAIL, email, username
+    names = [name for name in _names(first_name.upper(), last_name.upper()) if name.startswith(term)]
+    if names:
+        return NAME, min(names), username
+    return INFIX, username, username
+
+
+# --- 1. DATABASE SEARCH ---
+
+def _prefix_branch(queryset, field, term, first):
+    """
+    The first users by UPPER(field) starting with the term, in code point order. On
+    PostgreSQL the key is collated "C", as in the user_*_prefix_idx indexes, so the
+    filter and the order are both served by one index range scan that stops after
+    `first` rows. SQLite compares code points already.
+    """
+    key = Upper(field)
+    if connections[queryset.db].vendor == 'postgresql':
+        key = Collate(key, 'C')
+    return queryset.alias(search_key=key).filter(search_key__startswith=term).order_by('search_key')[:first]
+
+
+def search_users(queryset, term, first):
+    """
+    Up to `first` users of the queryset matching the normalised term, best first.
+
+    Every prefix branch reads at most `first` rows from its index (see
+    _prefix_branch()), so a one-letter prefix costs as little as a long one. Only
+    when they find too few does a substring search through user_search_trgm_idx
+    fill up the rest.
+    """
+    if not term or first <= 0:
+        return []
+    branches = [_prefix_branch(queryset, field, term, first) for field in SEARCH_FIELDS]
+    first_name, _, last_name = term.partition(' ')
+    if last_name:
+        branches.append(_prefix_branch(queryset.filter(last_name__istartswith=last_name), 'first_name', first_name, first))
+
+    if connections[queryset.db].features.supports_slicing_ordering_in_compound:
+        # One round trip: (... LIMIT n) UNION ALL (... LIMIT n) ...
+        found = {user.pk: user for user in branches[0].union(*branches[1:], all=True)}
+    else:
+        found = {}
+        for branch in branches:
+            # Branches come in tier order: once one fills the page, later ones cannot rank higher.
+            if len(found) >= first:
+                break
+            found.update((user.pk, user) for user in branch)
+
+    if len(found) < first and len(term) >= MIN_INFIX_LENGTH:
+        infix = queryset.filter(reduce(or_, (Q(**{f"{field}__icontains": term}) for field in SEARCH_FIELDS)))
+        for user in infix.exclude(pk__in=list(found)).order_by()[:first - len(found)]:
+            found[user.pk] = user
+
+    ranked = sorted(
+        found.values(),
+        key=lambda user: rank(term, user.username, user.email, user.first_name, user.last_name),
+    )
+    return ranked[:first]
+
+
+# --- 2. IN-MEMORY PREFIX INDEX ---
+
+class PrefixIndex:
+    """
+    The users of one organisation, searchable by prefix without the database.
+
+    A flattened trie: per tier, the sorted upper-case keys (usernames; emails; first,
+    last and full names) next to their user ids. The keys starting with a prefix are
+    one contiguous run, found by bisection, and are already in rank order, so a
+    search reads only the `first` entries it returns (plus duplicates).
+    """
+
+    def __init__(self, rows):
+        """`rows` are (id, username, email, first_name, last_name) tuples."""
+        tiers = ([], [], [])
+        self.user_ids = set()
+        for user_id, username, email, first_name, last_name in rows:
+            self.user_ids.add(user_id)
+            tiers[USERNAME].append((username.upper(), user_id))
+            tiers[EMAIL].append((email.upper(), user_id))
+            for name in _names(first_name.upper(), last_name.upper()):
+                tiers[NAME].append((name, user_id))
+        self._keys, self._ids = [], []
+        for entries in tiers:
+            entries.sort()
+            self._keys.append([key for key, _ in entries])
+            self._ids.append([user_id for _, user_id in entries])
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    def search(self, term, first):
+        """The ids of up to `first` users whose username, email or name starts with the term, best first."""
+        found = {}
+        for keys, ids in zip(self._keys, self._ids):
+            for index in range(bisect_left(keys, term), len(keys)):
+                if len(found) >= first or not keys[index].startswith(term):
+                    break
+                found.setdefault(ids[index], None)
+        return list(found)
+
+
+class TenantIndexes:
+    """
+    PrefixIndexes for the organisations whose members are being searched right now.
+
+    An organisation of at least TENANT_INDEX_MIN_MEMBERS members gets one when it is
+    searched a second time within TENANT_INDEX_SECONDS: it is built in a background
+    thread, and searches use the database until it is ready. At most TENANT_INDEXES
+    are kept, least recently used first out. Membership changes (through
+    apps.organisations.events) and profile changes drop the indexes concerned in
+    this process; other processes rebuild theirs every TENANT_INDEX_SECONDS.
+    """
+
+    def __init__(self, maxsize=TENANT_INDEXES, timeout=TENANT_INDEX_SECONDS, min_members=TENANT_INDEX_MIN_MEMBERS):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.min_members = min_members
+        # {organisation id: (PrefixIndex, expires)}
+        self._indexes = OrderedDict()
+        # {organisation id: when it was last searched without an index}
+        self._searched = OrderedDict()
+        self._building = set()
+        self._lock = threading.Lock()
+        # Bumped by every invalidation, so an index read before one is not kept after it.
+        self._version = 0
+
+    def get(self, organisation_id, member_count):
+        """The organisation's PrefixIndex, or None (search the database) while there is none."""
+        if not self.maxsize or member_count < self.min_members:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._indexes.get(organisation_id)
+            if entry is not None:
+                # An expired index is still used while its replacement is built.
+                self._indexes.move_to_end(organisation_id)
+                if entry[1] > now or organisation_id in self._building:
+                    return entry[0]
+            else:
+                searched = self._searched.pop(organisation_id, None)
+                self._searched[organisation_id] = now
+                while len(self._searched) > self.maxsize * 8:
+                    self._searched.popitem(last=False)
+                if organisation_id in self._building or searched is None or now - searched > self.timeout:
+                    return None
+            self._building.add(organisation_id)
+            version = self._version
+        threading.Thread(
+            target=self._build, args=(organisation_id, version), name='user-search-index', daemon=True,
+        ).start()
+        return entry and entry[0]
+
+    def _build(self, organisation_id, version):
+        try:
+            rows = User.objects.filter(memberships__organisation_id=organisation_id).values_list(
+                'pk', 'username', 'email', 'first_name', 'last_name',
+            ).order_by().iterator(chunk_size=10_000)
+            index = PrefixIndex(rows)
+            with self._lock:
+                if version == self._version:
+                    self._indexes[organisation_id] = (index, time.monotonic() + self.timeout)
+                    self._indexes.move_to_end(organisation_id)
+                    while len(self._indexes) > self.maxsize:
+                        self._indexes.popitem(last=False)
+        finally:
+            with self._lock:
+                self._building.discard(organisation_id)
+            connection.close()
+
+    def invalidate(self, organisation_id):
+        """Drops an organisation's index, e.g. after members joined or left."""
+        with self._lock:
+            self._version += 1
+            self._indexes.pop(organisation_id, None)
+
+    def forget_user(self, user_id):
+        """Drops the indexes holding a user whose username, email or names may have changed."""
+        with self._lock:
+            self._version += 1
+            for organisation_id in [key for key, (index, _) in self._indexes.items() if user_id in index.user_ids]:
+                del self._indexes[organisation_id]
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+        self._building = set()
+
+    def clear(self):
+        with self._lock:
+            self._version += 1
+            self._indexes.clear()
+            self._searched.clear()
+
+
+tenant_indexes = TenantIndexes()
+os.register_at_fork(after_in_child=tenant_indexes._after_fork)
@@ -0,0 +1,45 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+
+from .authentication import invalidate_users
+from .search import tenant_indexes
+
+User = get_user_model()
+
+
+# --- KEEP CACHED USER SNAPSHOTS (apps.users.authentication) IN SYNC ---
+
+@receiver(post_init, sender=User)
+def remember_loaded_username(sender, instance, **kwargs):
+    # A renamed user must also drop the snapshot cached under its previous name.
+    instance._loaded_username = instance.__dict__.get('username')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user(sender, instance, **kwargs):
+    invalidate_users(instance._loaded_username, instance.username)
+    instance._loaded_username = instance.username
+    # Organisations' member search indexes hold usernames, emails and names.
+    tenant_indexes.forget_user(instance.pk)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_group_members(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        invalidate_users(instance.username)
+    elif action == 'pre_clear':
+        invalidate_users(*instance.user_set.values_list('username', flat=True))
+    else:
+        invalidate_users(*User.objects.filter(pk__in=pk_set).values_list('username', flat=True))
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def invalidate_group(sender, instance, **kwargs):
+    # Snapshots carry group names, so renaming or deleting a group affects its members.
+    invalidate_users(*instance.user_set.values_list('username', flat=True))
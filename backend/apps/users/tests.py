@@ -1,3 +1,254 @@
-from django.test import TestCase
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from graphql_jwt.exceptions import JSONWebTokenError
+from graphql_relay import to_global_id
+
+from apps.core.authorization import AuthorizationContext
+from apps.organisations.models import Organisation, OrganisationMembership
+
+from backend.schema import schema
+
+from . import hashing
+from .authentication import get_user_by_payload
+from .search import MIN_INFIX_LENGTH, PrefixIndex, tenant_indexes
+
+User = get_user_model()
+
+
+# --- 1. AUTHORIZATION CONTEXT ---
+
+class AuthorizationContextTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='alice', email='alice@example.com')
+        self.user.groups.add(Group.objects.create(name=User.MEMBER))
+        self.admin_of = Organisation.objects.create(name='Admin Org', slug='admin-org')
+        self.member_of = Organisation.objects.create(name='Member Org', slug='member-org')
+        self.outside = Organisation.objects.create(name='Other Org', slug='other-org')
+        OrganisationMembership.objects.create(user=self.user, organisation=self.admin_of, is_org_admin=True)
+        OrganisationMembership.objects.create(user=self.user, organisation=self.member_of)
+
+    def test_groups_and_roles_load_in_one_query(self):
+        context = AuthorizationContext(User.objects.get(pk=self.user.pk))
+
+        with self.assertNumQueries(1):
+            self.assertTrue(context.has_role(User.MEMBER))
+            self.assertFalse(context.has_role(User.SUPER_ADMIN))
+            self.assertTrue(context.is_org_admin_of(self.admin_of.pk))
+            self.assertFalse(context.is_org_admin_of(self.member_of.pk))
+            self.assertTrue(context.is_member_of(str(self.member_of.pk)))
+            self.assertFalse(context.is_member_of(self.outside.pk))
+            self.assertFalse(context.is_member_of('not-a-uuid'))
+
+    def test_writes_made_during_the_request_are_reflected(self):
+        context = AuthorizationContext(User.objects.get(pk=self.user.pk))
+        context.is_member_of(self.outside.pk)
+
+        context.record_membership(self.outside.pk, True)
+        context.forget_membership(self.member_of.pk)
+
+        with self.assertNumQueries(0):
+            self.assertTrue(context.is_org_admin_of(self.outside.pk))
+            self.assertFalse(context.is_member_of(self.member_of.pk))
+
+    def test_user_without_memberships(self):
+        loner = User.objects.create(username='bob', email='bob@example.com')
+
+        context = AuthorizationContext(loner)
+
+        self.assertEqual(context.org_roles, {})
+        self.assertEqual(context.groups, frozenset())
+
+
+# --- 2. CACHED JWT AUTHENTICATION ---
+
+def shared_cache():
+    """A cache every process would see (a directory), standing in for Redis."""
+    return override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': tempfile.mkdtemp(),
+    }})
+
+
+class CachedAuthenticationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='alice', email='alice@example.com')
+        self.payload = {'username': 'alice'}
+
+    def test_shared_cache_serves_the_snapshot(self):
+        with shared_cache():
+            get_user_by_payload(self.payload)
+            with self.assertNumQueries(0):
+                user = get_user_by_payload(self.payload)
+                self.assertEqual(user.pk, self.user.pk)
+
+    def test_deactivation_drops_the_shared_snapshot(self):
+        with shared_cache():
+            get_user_by_payload(self.payload)
+            self.user.is_active = False
+            self.user.save()
+
+            with self.assertRaises(JSONWebTokenError):
+                get_user_by_payload(self.payload)
+
+    def test_process_local_cache_reads_the_user_every_time(self):
+        get_user_by_payload(self.payload)
+        # As another process would: its signals cannot reach this process's cache.
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+
+        with self.assertRaises(JSONWebTokenError):
+            get_user_by_payload(self.payload)
+
+
+# --- 3. PASSWORD HASHING POOL ---
+
+def execute(query, **variables):
+    request = RequestFactory().post('/graphql/')
+    return schema.execute(query, variable_values=variables, context_value=request)
+
+
+TOKEN_AUTH = '''
+    mutation ($username: String!, $password: String!) {
+        tokenAuth(username: $username, password: $password) { token }
+    }
+'''
+REGISTER_USER = '''
+    mutation ($username: String!, $email: String!, $password: String!) {
+        registerUser(username: $username, email: $email, password: $password) { token }
+    }
+'''
+
+
+class HashingPoolTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='alice', email='alice@example.com')
+        self.user.set_password('correct horse')
+        self.user.save()
+
+    def busy(self):
+        return mock.patch.object(hashing.pool, 'run', side_effect=hashing.HashingBusy)
+
+    def assertRetryable(self, result):
+        [error] = result.errors
+        self.assertEqual(error.extensions['code'], 'HASHING_BUSY')
+        self.assertTrue(error.extensions['retryable'])
+        self.assertGreaterEqual(error.extensions['retryAfter'], 1)
+
+    def test_inline_by_default(self):
+        self.assertEqual(hashing.pool.workers, 0)
+        self.assertTrue(self.user.check_password('correct horse'))
+
+    def test_busy_sign_in_is_retryable(self):
+        with self.busy():
+            result = execute(TOKEN_AUTH, username='alice', password='correct horse')
+
+        self.assertRetryable(result)
+
+    def test_busy_registration_is_retryable_and_creates_nobody(self):
+        with self.busy():
+            result = execute(REGISTER_USER, username='bob', email='bob@example.com', password='secret')
+
+        self.assertRetryable(result)
+        self.assertFalse(User.objects.filter(username='bob').exists())
+
+    def test_busy_admin_sign_in_is_503(self):
+        with self.busy():
+            response = self.client.post('/admin/login/', {'username': 'alice', 'password': 'correct horse'})
+
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response.headers)
+
+    @override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+    def test_workers_use_the_callers_hashers(self):
+        pool = hashing.HashingPool(workers=1, queue=0)
+        self.addCleanup(pool.shutdown)
+
+        with mock.patch.object(hashing, 'pool', pool):
+            encoded = hashing.make_password('secret')
+            self.assertTrue(encoded.startswith('md5$'))
+            self.assertEqual(hashing.verify_password('secret', encoded), (True, False))
+
+
+# --- 4. USER SEARCH ---
+
+SEARCH_USERS = 'query ($prefix: String!) { searchUsers(prefix: $prefix) { username } }'
+SEARCH_MEMBERS = '''
+    query ($id: ID!, $prefix: String!) { searchMembers(organisationId: $id, prefix: $prefix) { username } }
+'''
+
+
+class UserSearchTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.organisation = Organisation.objects.create(name='Org', slug='org')
+        self.organisation_id = to_global_id('OrganisationType', self.organisation.pk)
+        self.admin = self.create('admin', member=True, is_org_admin=True)
+        self.alice = self.create('alice', 'Alice', 'Johnson', member=True)
+        self.zed = self.create('zed', 'Zed', 'Hanson', email='alan@example.com', member=True)
+        self.alma = self.create('xavier', 'Alma', 'Stone')
+
+    def create(self, username, first_name='', last_name='', email=None, member=False, is_org_admin=False):
+        user = User.objects.create(username=username, email=email or f'{username}@example.com',
+                                   first_name=first_name, last_name=last_name)
+        if member:
+            OrganisationMembership.objects.create(user=user, organisation=self.organisation, is_org_admin=is_org_admin)
+        return user
+
+    def search(self, query, user=None, **variables):
+        request = RequestFactory().post('/graphql/')
+        request.user = user or self.admin
+        result = schema.execute(query, variable_values=variables, context_value=request)
+        if result.errors:
+            return result.errors[0].message
+        [found] = result.data.values()
+        return [user['username'] for user in found]
+
+    def test_prefix_matches_rank_username_then_email_then_name(self):
+        self.assertEqual(self.search(SEARCH_USERS, prefix=' al '), ['alice', 'zed', 'xavier'])
+        self.assertEqual(self.search(SEARCH_USERS, prefix='alma st'), ['xavier'])
+
+    def test_substrings_are_matched_from_three_characters(self):
+        self.assertEqual(len('son'), MIN_INFIX_LENGTH)
+
+        self.assertEqual(self.search(SEARCH_USERS, prefix='so'), [])
+        self.assertEqual(sorted(self.search(SEARCH_USERS, prefix='son')), ['alice', 'zed'])
+
+    def test_members_are_searched_within_their_organisation(self):
+        self.assertEqual(self.search(SEARCH_MEMBERS, id=self.organisation_id, prefix='al'), ['alice', 'zed'])
+
+        other = Organisation.objects.create(name='Other', slug='other')
+        OrganisationMembership.objects.create(user=self.alma, organisation=other, is_org_admin=True)
+        self.assertEqual(self.search(SEARCH_MEMBERS, self.alma, id=to_global_id('OrganisationType', other.pk),
+                                     prefix='al'), ['xavier'])
+
+    def test_org_admins_only(self):
+        denied = "Permission Denied: Organisation Admin privileges required."
+
+        self.assertEqual(self.search(SEARCH_USERS, self.alice, prefix='al'), denied)
+        self.assertIn("Permission Denied", self.search(SEARCH_MEMBERS, self.alice, id=self.organisation_id, prefix='al'))
+        self.assertIn("Permission Denied", self.search(SEARCH_MEMBERS, self.alma, id=self.organisation_id, prefix='al'))
+
+    def test_indexed_organisations_fall_back_to_the_database_for_substrings(self):
+        rows = OrganisationMembership.objects.filter(organisation=self.organisation).values_list(
+            'user__pk', 'user__username', 'user__email', 'user__first_name', 'user__last_name',
+        )
+        index = PrefixIndex(rows)
+
+        with mock.patch.object(tenant_indexes, 'get', return_value=index), CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.search(SEARCH_MEMBERS, id=self.organisation_id, prefix='jo'), ['alice'])
+        self.assertFalse([query for query in queries if 'UPPER(' in query['sql']])
+
+        with mock.patch.object(tenant_indexes, 'get', return_value=index):
+            self.assertEqual(sorted(self.search(SEARCH_MEMBERS, id=self.organisation_id, prefix='son')), ['alice', 'zed'])
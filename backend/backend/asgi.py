@@ -13,5 +13,18 @@ from django.core.asgi import get_asgi_application
 
 # Ensure this path matches your project's settings module path (e.g., 'backend.settings')
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+# Under ASGI, /graphql/ runs on the event loop (apps.core.views.AsyncGraphQLView)
+os.environ.setdefault('GRAPHQL_ASYNC_VIEW', 'True')
 
-application = get_asgi_application()
\ No newline at end of file
+django_application = get_asgi_application()
+
+# GraphQL subscriptions: WebSocket connections to /graphql/ (apps.core.websocket).
+# Imported once Django is set up, as it loads the schema.
+from apps.core.websocket import GraphQLWebSocketRouter  # noqa: E402
+
+application = GraphQLWebSocketRouter(django_application)
+
+# Build the "Find Near Me" spatial index in the background rather than on the first search.
+from apps.places.index import preload  # noqa: E402
+
+preload()
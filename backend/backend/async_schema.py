@@ -0,0 +1,58 @@
+import graphene
+from apps.users.async_schema import (
+    AsyncUserQuery,
+    AsyncRegisterUser,
+    AsyncUpdateUser,
+    AsyncObtainJSONWebToken,
+    AsyncVerify,
+    AsyncRefresh,
+)
+from apps.organisations.async_schema import (
+    AsyncOrganisationQuery,
+    AsyncCreateOrganisation,
+    AsyncUpdateOrganisation,
+    AsyncAddMemberToOrganisation,
+    AsyncUpdateOrganisationMembership,
+    AsyncRemoveMemberFromOrganisation,
+    AsyncUpdateOrganisationMemberships,
+    AsyncRemoveMembersFromOrganisation,
+    AsyncImportOrganisationMembers,
+    AsyncPublishGameState,
+    AsyncRecordGameScore,
+    OrganisationSubscription,
+)
+from apps.places.async_schema import AsyncPlaceQuery
+from apps.feedback.async_schema import AsyncSubmitFeatureRequest
+
+# Same fields and type names as backend.schema, resolved on the event loop.
+# Served by apps.core.views.AsyncGraphQLView under ASGI, and over WebSocket
+# (subscriptions) by apps.core.websocket.
+
+class Query(AsyncUserQuery, AsyncOrganisationQuery, AsyncPlaceQuery, graphene.ObjectType):
+    hello = graphene.String(default_value="Hello, world!")
+
+
+class Mutation(graphene.ObjectType):
+    register_user = AsyncRegisterUser.Field()
+    update_user = AsyncUpdateUser.Field()
+    token_auth = AsyncObtainJSONWebToken.Field()
+    create_organisation = AsyncCreateOrganisation.Field()
+    update_organisation = AsyncUpdateOrganisation.Field()
+    add_member_to_organisation = AsyncAddMemberToOrganisation.Field()
+    update_organisation_membership = AsyncUpdateOrganisationMembership.Field()
+    remove_member_from_organisation = AsyncRemoveMemberFromOrganisation.Field()
+    update_organisation_memberships = AsyncUpdateOrganisationMemberships.Field()
+    remove_members_from_organisation = AsyncRemoveMembersFromOrganisation.Field()
+    import_organisation_members = AsyncImportOrganisationMembers.Field()
+    publish_game_state = AsyncPublishGameState.Field()
+    record_game_score = AsyncRecordGameScore.Field()
+    submit_feature_request = AsyncSubmitFeatureRequest.Field()
+    verify_token = AsyncVerify.Field()
+    refresh_token = AsyncRefresh.Field()
+
+
+class Subscription(OrganisationSubscription, graphene.ObjectType):
+    pass
+
+# Create schema
+schema = graphene.Schema(query=Query, mutation=Mutation, subscription=Subscription)
@@ -1,28 +1,47 @@
 import graphene
 import graphql_jwt
-from apps.users.schema import UserMutation, UserQuery
+from apps.users.schema import ObtainJSONWebToken, UserMutation, UserQuery
 from apps.organisations.schema import (
     OrganisationQuery,
     CreateOrganisation,
     UpdateOrganisation,
     AddMemberToOrganisation,
     UpdateOrganisationMembership,
-    RemoveMemberFromOrganisation
+    RemoveMemberFromOrganisation,
+    UpdateOrganisationMemberships,
+    RemoveMembersFromOrganisation,
+    ImportOrganisationMembers,
+    PublishGameState,
+    RecordGameScore,
+    OrganisationSubscription,
 )
+from apps.places.schema import PlaceQuery
+from apps.feedback.schema import SubmitFeatureRequest
 
-class Query( UserQuery, OrganisationQuery, graphene.ObjectType):
+class Query( UserQuery, OrganisationQuery, PlaceQuery, graphene.ObjectType):
     hello = graphene.String(default_value="Hello, world!")
 
 
 class Mutation( UserMutation, graphene.ObjectType):
-    token_auth = graphql_jwt.ObtainJSONWebToken.Field()
+    token_auth = ObtainJSONWebToken.Field()
     create_organisation = CreateOrganisation.Field()
     update_organisation = UpdateOrganisation.Field()
     add_member_to_organisation = AddMemberToOrganisation.Field()
     update_organisation_membership = UpdateOrganisationMembership.Field()
     remove_member_from_organisation = RemoveMemberFromOrganisation.Field()
+    update_organisation_memberships = UpdateOrganisationMemberships.Field()
+    remove_members_from_organisation = RemoveMembersFromOrganisation.Field()
+    import_organisation_members = ImportOrganisationMembers.Field()
+    publish_game_state = PublishGameState.Field()
+    record_game_score = RecordGameScore.Field()
+    submit_feature_request = SubmitFeatureRequest.Field()
     verify_token = graphql_jwt.Verify.Field()
     refresh_token = graphql_jwt.Refresh.Field()
 
+
+# Subscriptions need an event loop: apps.core.websocket serves them with backend.async_schema.
+class Subscription(OrganisationSubscription, graphene.ObjectType):
+    pass
+
 # Create schema
-schema = graphene.Schema(query=Query, mutation=Mutation)
\ No newline at end of file
+schema = graphene.Schema(query=Query, mutation=Mutation, subscription=Subscription)
\ No newline at end of file
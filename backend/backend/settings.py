@@ -32,6 +32,8 @@ INSTALLED_APPS = [
     # Our apps
     'apps.users.apps.UsersConfig',
     'apps.organisations.apps.OrganisationsConfig',
+    'apps.places.apps.PlacesConfig',
+    'apps.feedback.apps.FeedbackConfig',
 ]
 
 MIDDLEWARE = [
@@ -47,6 +49,8 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # Answers sign-ins outside GraphQL (the admin) with 503 while the hashing pool is busy
+    'apps.users.middleware.HashingBusyMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -86,6 +90,57 @@ DATABASES = {
     }
 }
 
+# Read replicas (optional): comma-separated host[:port] list of streaming replicas of
+# the database above. GraphQL queries read from them (apps.core.routers); mutations,
+# the admin and everything else use `default`. Needs a shared cache (REDIS_URL) for
+# read-your-writes pins; without one every read stays on `default`.
+DATABASE_REPLICAS = []
+for index, address in enumerate(filter(None, os.environ.get("POSTGRES_REPLICA_HOSTS", "").split(","))):
+    host, _, port = address.strip().partition(":")
+    alias = f"replica_{index}"
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['apps.core.routers.PrimaryReplicaRouter']
+# Seconds a user's reads stay on the primary after they ran a mutation (read-your-writes)
+DATABASE_REPLICA_PIN_SECONDS = int(os.environ.get("DATABASE_REPLICA_PIN_SECONDS", "5"))
+
+# Cache shared by every server process (optional), e.g. redis://localhost:6379/0. Without
+# it each process has its own LocMemCache, and what writes must invalidate everywhere is
+# not cached (apps.core.caches.is_shared): user snapshots (apps.users.authentication),
+# organisation records and members' roles (apps.organisations.cache, apps.core.authorization),
+# and read-your-writes pins, without which replicas are not read (apps.core.routers)
+REDIS_URL = os.environ.get("REDIS_URL")
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+
+# Logging: the apps log background failures (e.g. batched writes that could not be made)
+# and periodic statistics to the console, at LOG_LEVEL and above
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "console": {"format": "%(asctime)s %(levelname)s %(name)s: %(message)s"},
+    },
+    "handlers": {
+        "console": {"class": "logging.StreamHandler", "formatter": "console"},
+    },
+    "loggers": {
+        "apps": {"handlers": ["console"], "level": LOG_LEVEL},
+    },
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -109,10 +164,109 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 GRAPHENE = {
     "SCHEMA": "backend.schema.schema",
     "MIDDLEWARE": [
+        # Runs inside the JWT middleware (graphql-core nests later entries outside),
+        # so it routes reads knowing the authenticated user.
+        "apps.core.routers.DatabaseRoutingMiddleware",
         "graphql_jwt.middleware.JSONWebTokenMiddleware",
+        # Outermost, so throttled sign-ins are rejected before any other work.
+        "apps.core.ratelimit.RateLimitMiddleware",
     ],
 }
 
+# Parsed-and-validated GraphQL documents kept in memory per process (apps.core.documents)
+GRAPHQL_DOCUMENT_CACHE_SIZE = int(os.environ.get("GRAPHQL_DOCUMENT_CACHE_SIZE", "256"))
+# How long automatic persisted query texts stay registered in the Django cache (seconds)
+GRAPHQL_PERSISTED_QUERY_TIMEOUT = int(os.environ.get("GRAPHQL_PERSISTED_QUERY_TIMEOUT", str(60 * 60 * 24)))
+# Static query cost budget enforced during validation (apps.core.complexity)
+GRAPHQL_MAX_QUERY_COST = int(os.environ.get("GRAPHQL_MAX_QUERY_COST", "5000"))
+GRAPHQL_MAX_QUERY_DEPTH = int(os.environ.get("GRAPHQL_MAX_QUERY_DEPTH", "10"))
+# Assumed length of list fields without a known size when estimating query cost
+GRAPHQL_DEFAULT_LIST_SIZE = int(os.environ.get("GRAPHQL_DEFAULT_LIST_SIZE", "10"))
+# How long a verified JWT user snapshot is cached (apps.users.authentication); writes
+# invalidate it. Only with a shared cache (REDIS_URL)
+AUTH_USER_SNAPSHOT_TIMEOUT = int(os.environ.get("AUTH_USER_SNAPSHOT_TIMEOUT", "300"))
+# How long organisation records and users' organisation roles are cached
+# (apps.organisations.cache, apps.core.authorization); writes invalidate them. Only with
+# a shared cache (REDIS_URL)
+ORGANISATION_CACHE_TIMEOUT = int(os.environ.get("ORGANISATION_CACHE_TIMEOUT", "300"))
+# Password hashing pool (apps.users.hashing): worker processes per server process (0, the
+# default, hashes on the request thread), hashes allowed to wait for a worker, and seconds
+# to wait for room before a sign-in is rejected as busy
+PASSWORD_HASHING_WORKERS = int(os.environ.get("PASSWORD_HASHING_WORKERS", "0"))
+PASSWORD_HASHING_QUEUE = int(os.environ.get("PASSWORD_HASHING_QUEUE", "16"))
+PASSWORD_HASHING_WAIT = float(os.environ.get("PASSWORD_HASHING_WAIT", "2"))
+# Token-bucket limits on sign-in and registration mutations (apps.core.ratelimit):
+# "local" buckets per process or "cache" to share them through the Django cache, and the
+# META key of a trusted proxy's client address header (e.g. HTTP_X_FORWARDED_FOR)
+GRAPHQL_RATE_LIMIT_BACKEND = os.environ.get("GRAPHQL_RATE_LIMIT_BACKEND", "local")
+GRAPHQL_RATE_LIMIT_IP_HEADER = os.environ.get("GRAPHQL_RATE_LIMIT_IP_HEADER") or None
+# GraphQL subscriptions over WebSocket (apps.core.websocket, apps.core.broker): events
+# buffered per subscription before it is closed as overflowed, subscriptions per connection,
+# seconds allowed before connection_init, seconds between re-checks of a subscriber's token
+# and membership, largest client message, and largest game state publishGameState
+# relays (bytes)
+GRAPHQL_WS_QUEUE_SIZE = int(os.environ.get("GRAPHQL_WS_QUEUE_SIZE", "32"))
+GRAPHQL_WS_MAX_SUBSCRIPTIONS = int(os.environ.get("GRAPHQL_WS_MAX_SUBSCRIPTIONS", "8"))
+GRAPHQL_WS_INIT_TIMEOUT = float(os.environ.get("GRAPHQL_WS_INIT_TIMEOUT", "10"))
+GRAPHQL_WS_RECHECK_SECONDS = float(os.environ.get("GRAPHQL_WS_RECHECK_SECONDS", "60"))
+GRAPHQL_WS_MAX_MESSAGE_BYTES = int(os.environ.get("GRAPHQL_WS_MAX_MESSAGE_BYTES", str(64 * 1024)))
+GRAPHQL_GAME_STATE_MAX_BYTES = int(os.environ.get("GRAPHQL_GAME_STATE_MAX_BYTES", "4096"))
+# Leaderboards (apps.organisations.leaderboard): seconds and recorded awards before the
+# points outbox is added to the scores, seconds before a process reloads a board (how long
+# other processes' points take to show), and the most points one recordGameScore may award
+# (calls are also rate limited per user, see GRAPHQL_RATE_LIMITS in apps.core.ratelimit)
+LEADERBOARD_FLUSH_SECONDS = float(os.environ.get("LEADERBOARD_FLUSH_SECONDS", "2"))
+LEADERBOARD_FLUSH_BATCH = int(os.environ.get("LEADERBOARD_FLUSH_BATCH", "500"))
+LEADERBOARD_REFRESH_SECONDS = float(os.environ.get("LEADERBOARD_REFRESH_SECONDS", "60"))
+LEADERBOARD_MAX_POINTS = int(os.environ.get("LEADERBOARD_MAX_POINTS", "10000"))
+# Daily dashboard content (apps.organisations.daily, `manage.py build_daily_content`): days
+# built ahead of today (UTC), seconds a process serves a scope's days before rereading them,
+# scopes kept per process, the time zone of clients that send none, and the payload builder
+DAILY_CONTENT_DAYS_AHEAD = int(os.environ.get("DAILY_CONTENT_DAYS_AHEAD", "2"))
+DAILY_CONTENT_CACHE_SECONDS = float(os.environ.get("DAILY_CONTENT_CACHE_SECONDS", "3600"))
+DAILY_CONTENT_CACHE_SCOPES = int(os.environ.get("DAILY_CONTENT_CACHE_SCOPES", "10000"))
+DAILY_CONTENT_TIME_ZONE = os.environ.get("DAILY_CONTENT_TIME_ZONE", TIME_ZONE)
+DAILY_CONTENT_BUILDER = os.environ.get("DAILY_CONTENT_BUILDER", "apps.organisations.daily.build_content")
+# "Find Near Me" (apps.places.index): places per quadtree leaf, seconds between a process's
+# syncs of places written elsewhere, widest nearMe radius (km), and whether servers load
+# the index in the background at startup rather than on the first search
+PLACES_INDEX_LEAF_SIZE = int(os.environ.get("PLACES_INDEX_LEAF_SIZE", "32"))
+PLACES_INDEX_SYNC_SECONDS = float(os.environ.get("PLACES_INDEX_SYNC_SECONDS", "30"))
+PLACES_MAX_RADIUS_KM = float(os.environ.get("PLACES_MAX_RADIUS_KM", "50"))
+PLACES_INDEX_PRELOAD = os.environ.get("PLACES_INDEX_PRELOAD", "True") == "True"
+# nearMe results cached per geohash cell and category (apps.places.cache): cells kept per
+# process (0 turns the cache off), seconds each is served, geohash length of the cells,
+# and places kept around each cell's centre
+PLACES_CACHE_SIZE = int(os.environ.get("PLACES_CACHE_SIZE", "5000"))
+PLACES_CACHE_SECONDS = float(os.environ.get("PLACES_CACHE_SECONDS", "300"))
+PLACES_CACHE_PRECISION = int(os.environ.get("PLACES_CACHE_PRECISION", "7"))
+PLACES_CACHE_NEIGHBOURHOOD = int(os.environ.get("PLACES_CACHE_NEIGHBOURHOOD", "64"))
+# Seconds between the cache's hit rate reports, logged at INFO by apps.places.cache
+# (0 turns them off)
+PLACES_CACHE_STATS_SECONDS = float(os.environ.get("PLACES_CACHE_STATS_SECONDS", "600"))
+# searchMembers (apps.users.search): organisations searched in memory
+# per process (0 turns it off), seconds such an index is used before it is rebuilt, and
+# members an organisation needs to get one
+USER_SEARCH_TENANT_INDEXES = int(os.environ.get("USER_SEARCH_TENANT_INDEXES", "32"))
+USER_SEARCH_TENANT_INDEX_SECONDS = float(os.environ.get("USER_SEARCH_TENANT_INDEX_SECONDS", "60"))
+USER_SEARCH_TENANT_INDEX_MIN_MEMBERS = int(os.environ.get("USER_SEARCH_TENANT_INDEX_MIN_MEMBERS", "2000"))
+# Feature requests (apps.feedback.ingest): seconds and buffered requests before they are
+# written, requests buffered before submissions are refused, how similar a title must be
+# to join a group (0-1), and groups each process compares new requests with
+FEATURE_REQUEST_FLUSH_SECONDS = float(os.environ.get("FEATURE_REQUEST_FLUSH_SECONDS", "2"))
+FEATURE_REQUEST_FLUSH_BATCH = int(os.environ.get("FEATURE_REQUEST_FLUSH_BATCH", "500"))
+FEATURE_REQUEST_MAX_PENDING = int(os.environ.get("FEATURE_REQUEST_MAX_PENDING", "10000"))
+FEATURE_REQUEST_SIMILARITY = float(os.environ.get("FEATURE_REQUEST_SIMILARITY", "0.3"))
+FEATURE_REQUEST_INDEX_GROUPS = int(os.environ.get("FEATURE_REQUEST_INDEX_GROUPS", "10000"))
+# Membership audit log (apps.organisations.audit): seconds before recorded changes are
+# moved from the outbox to the log, outbox rows moved per transaction, and the longest
+# time range one auditLog query may cover
+AUDIT_DRAIN_SECONDS = float(os.environ.get("AUDIT_DRAIN_SECONDS", "1"))
+AUDIT_DRAIN_BATCH = int(os.environ.get("AUDIT_DRAIN_BATCH", "1000"))
+AUDIT_MAX_RANGE_DAYS = int(os.environ.get("AUDIT_MAX_RANGE_DAYS", "31"))
+# Serve /graphql/ with the async view (backend.async_schema); backend/asgi.py turns this on
+GRAPHQL_ASYNC_VIEW = os.environ.get("GRAPHQL_ASYNC_VIEW", "False") == "True"
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -122,7 +276,7 @@ AUTH_USER_MODEL = 'users.User'
 # New: Authentication Backends (Best practice when customizing User Model)
 # Ensures Django still uses the ModelBackend for login
 AUTHENTICATION_BACKENDS = [
-    "graphql_jwt.backends.JSONWebTokenBackend",
+    "apps.users.authentication.CachedJSONWebTokenBackend",
     "django.contrib.auth.backends.ModelBackend",
 ]
 
@@ -2,24 +2,26 @@ from django.contrib import admin
 from django.urls import path
 from django.views.decorators.csrf import csrf_exempt
 from django.conf import settings # Import settings to check DEBUG status
-from graphene_django.views import GraphQLView
+from apps.core.views import AsyncGraphQLView, CachedGraphQLView
 
 # Get the value for the 'graphiql' flag based on Django's DEBUG setting
 # This ensures the interactive interface is only available in development.
 SHOULD_ENABLE_GRAPHIQL = settings.DEBUG
 
+# The ASGI application serves GraphQL from the async view; WSGI keeps the sync one.
+if settings.GRAPHQL_ASYNC_VIEW:
+    graphql_view = AsyncGraphQLView.as_view()
+else:
+    graphql_view = CachedGraphQLView.as_view(graphiql=SHOULD_ENABLE_GRAPHIQL)
+
 urlpatterns = [
     # Standard Django Admin
     path('admin/', admin.site.urls),
 
-    # GraphQL Endpoint
+    # GraphQL Endpoint (parsed-document cache + automatic persisted queries)
     path(
         'graphql/',
-        csrf_exempt(
-            GraphQLView.as_view(
-                graphiql=SHOULD_ENABLE_GRAPHIQL
-            )
-        ),
+        csrf_exempt(graphql_view),
         name='graphql_endpoint' # Giving it a name is good practice
     ),
 ]
\ No newline at end of file
@@ -14,4 +14,9 @@ from django.core.wsgi import get_wsgi_application
 # Ensure this path matches your project's settings module path (e.g., 'backend.settings')
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
-application = get_wsgi_application()
\ No newline at end of file
+application = get_wsgi_application()
+
+# Build the "Find Near Me" spatial index in the background rather than on the first search.
+from apps.places.index import preload  # noqa: E402
+
+preload()
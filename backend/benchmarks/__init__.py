@@ -0,0 +1,9 @@
+import os
+
+import django
+
+
+def setup():
+    """Configures Django for standalone benchmark scripts run from backend/."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+    django.setup()
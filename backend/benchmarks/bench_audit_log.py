@@ -0,0 +1,192 @@
+"""
+Recording membership changes in the audit log, and reading a time range back.
+
+    cd backend && python -m benchmarks.bench_audit_log [--changes 2000] [--members 100]
+        [--events 1000000] [--organisations 50] [--queries 200] [--output results.json]
+
+Three measurements, against organisations that exist only in the log (AuditEvent has
+no foreign keys):
+
+    outbox   `--changes` transactions that each remove `--members` members, recorded
+             with apps.organisations.audit.record as the mutations do: one outbox row
+             per change. The background drain is held back and the outbox is then
+             drained on its own, so both costs are reported
+    direct   the same changes writing one AuditEvent per member inside the change's
+             transaction (a bulk INSERT each)
+    query    `--events` events spread over 90 days and `--organisations` organisations,
+             then `--queries` auditLog reads (audit.events_between) of one organisation's
+             day, 100 events at most. On PostgreSQL the BRIN index on occurred_at
+             narrows the scan; SQLite has no index there and scans the whole log
+
+Reported: changes recorded per second and p50/p99 time per change's transaction for
+outbox and direct, outbox rows and events drained per second, the query's p50/p99
+latency, and the size of the BRIN index when there is one, as JSON.
+
+Every row written is deleted again; still, use a scratch database.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+import uuid
+from datetime import timedelta
+
+from . import setup
+from .bench_graphql_load import _percentile
+
+
+def _latencies(samples):
+    return {
+        'p50_ms': round(_percentile(samples, 50) * 1000, 3),
+        'p99_ms': round(_percentile(samples, 99) * 1000, 3),
+    }
+
+
+def run_outbox(organisation_id, changes, members):
+    from django.db import transaction
+
+    from apps.organisations import audit
+
+    subject_ids = [uuid.uuid4() for _ in range(members)]
+    samples = []
+    started = time.perf_counter()
+    for _ in range(changes):
+        change_started = time.perf_counter()
+        with transaction.atomic():
+            audit.record(organisation_id, audit.MEMBER_REMOVED, subject_ids=subject_ids)
+        samples.append(time.perf_counter() - change_started)
+    elapsed = time.perf_counter() - started
+
+    drain_started = time.perf_counter()
+    moved = audit.drain()
+    drain_elapsed = time.perf_counter() - drain_started
+    return {
+        'changes': changes,
+        'per_second': round(changes / elapsed),
+        **_latencies(samples),
+        'drained_rows': moved,
+        'drained_rows_per_second': round(moved / drain_elapsed),
+        'drained_events_per_second': round(moved * members / drain_elapsed),
+    }
+
+
+def run_direct(organisation_id, changes, members):
+    from django.db import transaction
+    from django.utils import timezone
+
+    from apps.organisations import audit
+    from apps.organisations.models import AuditEvent
+
+    subject_ids = [uuid.uuid4() for _ in range(members)]
+    samples = []
+    started = time.perf_counter()
+    for _ in range(changes):
+        change_started = time.perf_counter()
+        with transaction.atomic():
+            occurred_at = timezone.now()
+            AuditEvent.objects.bulk_create([
+                AuditEvent(
+                    occurred_at=occurred_at, organisation_id=organisation_id,
+                    action=audit.MEMBER_REMOVED, subject_id=subject_id,
+                )
+                for subject_id in subject_ids
+            ])
+        samples.append(time.perf_counter() - change_started)
+    elapsed = time.perf_counter() - started
+    return {'changes': changes, 'per_second': round(changes / elapsed), **_latencies(samples)}
+
+
+def seed_events(organisation_ids, count, rng):
+    """Writes `count` events, oldest first as the drain would, over the last 90 days."""
+    from django.utils import timezone
+
+    from apps.organisations.models import AuditEvent
+
+    start = timezone.now() - timedelta(days=90)
+    step = timedelta(days=90) / count
+    batch = []
+    for number in range(count):
+        batch.append(AuditEvent(
+            occurred_at=start + step * number,
+            organisation_id=rng.choice(organisation_ids),
+            action=rng.randint(1, 6),
+            subject_id=uuid.uuid4(),
+        ))
+        if len(batch) == 10_000:
+            AuditEvent.objects.bulk_create(batch)
+            batch = []
+    AuditEvent.objects.bulk_create(batch)
+    return start
+
+
+def run_query(organisation_ids, events, queries, rng):
+    from django.db import connection
+
+    from apps.organisations import audit
+
+    started = time.perf_counter()
+    start = seed_events(organisation_ids, events, rng)
+    seeded = time.perf_counter() - started
+
+    samples, found = [], 0
+    for _ in range(queries):
+        since = start + timedelta(days=rng.uniform(0, 89))
+        query_started = time.perf_counter()
+        found += len(audit.events_between(rng.choice(organisation_ids), since, since + timedelta(days=1), 100))
+        samples.append(time.perf_counter() - query_started)
+
+    result = {
+        'events': events,
+        'seed_seconds': round(seeded, 1),
+        'queries': queries,
+        'events_per_query': round(found / queries, 1),
+        **_latencies(samples),
+    }
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_relation_size('audit_event_occurred_brin'), "
+                           "pg_relation_size('organisations_auditevent')")
+            result['brin_index_bytes'], result['table_bytes'] = cursor.fetchone()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--changes', type=int, default=2000)
+    parser.add_argument('--members', type=int, default=100, help="Members each change removes.")
+    parser.add_argument('--events', type=int, default=1_000_000)
+    parser.add_argument('--organisations', type=int, default=50)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='audit-log-results.json')
+    args = parser.parse_args()
+
+    setup()
+    from apps.organisations import audit
+    from apps.organisations.models import AuditEvent, AuditOutbox
+
+    # Keeps this process's drain thread from moving rows while the changes are timed.
+    audit.DRAIN_SECONDS, audit.DRAIN_BATCH = 86_400, sys.maxsize
+
+    rng = random.Random(args.seed)
+    organisation_ids = [uuid.UUID(int=rng.getrandbits(128)) for _ in range(args.organisations)]
+    result = {}
+    try:
+        result['outbox'] = run_outbox(organisation_ids[0], args.changes, args.members)
+        result['direct'] = run_direct(organisation_ids[0], args.changes, args.members)
+        AuditEvent.objects.filter(organisation_id__in=organisation_ids).delete()
+        result['query'] = run_query(organisation_ids, args.events, args.queries, rng)
+    finally:
+        AuditOutbox.objects.filter(organisation_id__in=organisation_ids).delete()
+        AuditEvent.objects.filter(organisation_id__in=organisation_ids).delete()
+
+    with open(args.output, 'w', encoding='utf-8') as handle:
+        json.dump({'meta': vars(args), 'result': result}, handle, indent=2)
+    for mode, figures in result.items():
+        print(f"{mode:<8}" + '  '.join(f"{name} {value}" for name, value in figures.items()))
+    print(f"\nWrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Parse/validate time saved per request by apps.core.documents.
+
+    cd backend && python -m benchmarks.bench_document_cache [--iterations N]
+
+For each client operation this times the uncached path (parse + validate, what
+graphene-django's GraphQLView does on every request) against a warm document
+cache lookup, both by full query text and by APQ hash only.
+"""
+import argparse
+import statistics
+import time
+
+from . import setup
+
+
+def _time_per_call(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    setup()
+    from graphql import parse, validate
+
+    from apps.core.documents import document_cache, get_document, query_hash
+    from backend.schema import schema
+
+    from .operations import client_operations
+
+    graphql_schema = schema.graphql_schema
+    document_cache.clear()
+
+    print(f"{'operation':<22}{'parse+validate':>16}{'cached (text)':>16}{'cached (hash)':>16}{'saved':>10}")
+    for name, query in client_operations().items():
+        digest = query_hash(query)
+        uncached = _time_per_call(lambda: validate(graphql_schema, parse(query)), args.iterations)
+        get_document(graphql_schema, query)  # warm up
+        by_text = _time_per_call(lambda: get_document(graphql_schema, query), args.iterations)
+        by_hash = _time_per_call(lambda: get_document(graphql_schema, None, digest=digest), args.iterations)
+        print(
+            f"{name:<22}{uncached:>13.1f} us{by_text:>13.1f} us{by_hash:>13.1f} us"
+            f"{uncached - by_hash:>7.1f} us"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+"""
+A burst of feature requests through the write buffer, against writing each one as it comes.
+
+    cd backend && python -m benchmarks.bench_feature_requests [--requests 20000] [--topics 40]
+        [--direct 2000] [--output results.json]
+
+Generates `--requests` submissions about `--topics` features, the way a popular
+in-app prompt gets them: the same few words with different politeness, word
+order, punctuation and typos ("Add dark mode", "pls add a drak mode!"). Then:
+
+    buffered  submits them through apps.feedback.ingest.FeatureRequestBuffer as
+              submitFeatureRequest does, in one burst, while its thread writes
+              batches of FEATURE_REQUEST_FLUSH_BATCH; done when all are written
+    direct    writes `--direct` of them one by one, as a naive mutation would: find
+              the group by exact title, create it if new, insert the request and
+              increment the count, in one transaction each
+
+Reported: submissions written per second and p50/p99 submit latency for both, how
+often the buffer was full (FEATURE_REQUEST_MAX_PENDING) and the submission retried, and
+how well the groups match the topics: groups per topic (1 is ideal) and purity (the share of
+requests grouped with a majority of their own topic; 1 is ideal), as JSON.
+
+Every group and request created is deleted again; still, use a scratch database.
+"""
+import argparse
+import json
+import random
+import time
+from collections import Counter
+
+from . import setup
+from .bench_graphql_load import _percentile
+
+TOPICS = (
+    'dark mode', 'export the leaderboard to csv', 'invite members with a link', 'offline mode',
+    'push notifications for new puzzles', 'a weekly game', 'two factor authentication', 'sign in with google',
+    'larger text in the puzzle', 'organisation chat', 'custom avatars', 'a calendar of events',
+    'search organisations by name', 'transfer organisation ownership', 'archive old organisations',
+    'email digest of scores', 'team leaderboards', 'hints in the daily puzzle', 'colour blind mode',
+    'bulk import members from excel', 'public organisation pages', 'a desktop app', 'an api for developers',
+    'filter places by opening hours', 'save favourite places', 'directions to places', 'share puzzle results',
+    'streaks for daily games', 'mute notifications at night', 'delete my account', 'download my data',
+    'admin audit log', 'role for moderators', 'pin announcements', 'polls for members', 'multiple languages',
+    'right to left languages', 'keyboard shortcuts', 'a tablet layout', 'faster loading on slow networks',
+)
+OPENINGS = ('', 'add ', 'please add ', 'can you add ', 'we need ', 'would love ', 'i want ', 'feature request: ')
+ENDINGS = ('', ' please', '!', ' pls', ' asap', ' to the app', '!!', ' thanks', ' would be great')
+
+
+def _typo(text, rng):
+    if len(text) < 4:
+        return text
+    position = rng.randrange(len(text) - 1)
+    return text[:position] + text[position + 1] + text[position] + text[position + 2:]
+
+
+def submissions(count, topics, rng):
+    """[(topic, title)]: `count` submissions spread over the first `topics` TOPICS, skewed."""
+    weights = [1 / (rank + 1) for rank in range(topics)]
+    found = []
+    for topic in rng.choices(range(topics), weights=weights, k=count):
+        title = f"{rng.choice(OPENINGS)}{TOPICS[topic]}{rng.choice(ENDINGS)}"
+        if rng.random() < 0.3:
+            title = _typo(title, rng)
+        if rng.random() < 0.5:
+            title = title.capitalize()
+        found.append((topic, title))
+    return found
+
+
+def grouping_quality(topics_by_group):
+    """(groups per topic, purity) for {group id: [topic of each request]}."""
+    majorities = Counter()
+    pure = total = 0
+    for topics in topics_by_group.values():
+        topic, count = Counter(topics).most_common(1)[0]
+        majorities[topic] += 1
+        pure += count
+        total += len(topics)
+    return round(len(topics_by_group) / max(len(majorities), 1), 2), round(pure / max(total, 1), 3)
+
+
+def run_buffered(items):
+    from apps.feedback.ingest import BufferFull, FeatureRequestBuffer
+    from apps.feedback.models import FeatureRequest
+
+    buffer = FeatureRequestBuffer()
+    requests, samples, refused = [], [], 0
+    started = time.perf_counter()
+    for _, title in items:
+        request = FeatureRequest(title=title)
+        requests.append(request)
+        while True:
+            submitted = time.perf_counter()
+            try:
+                buffer.add(request)
+                break
+            except BufferFull:
+                # As a client would: try again shortly.
+                refused += 1
+                time.sleep(0.01)
+        samples.append(time.perf_counter() - submitted)
+    while buffer.flush():
+        pass
+    elapsed = time.perf_counter() - started
+
+    topics_by_group = {}
+    for (topic, _), request in zip(items, requests):
+        topics_by_group.setdefault(request.group_id, []).append(topic)
+    groups_per_topic, purity = grouping_quality(topics_by_group)
+    return {
+        'requests': len(items),
+        'per_second': round(len(items) / elapsed),
+        'submit_p50_ms': round(_percentile(samples, 50) * 1000, 4),
+        'submit_p99_ms': round(_percentile(samples, 99) * 1000, 4),
+        'refused': refused,
+        'groups': len(topics_by_group),
+        'groups_per_topic': groups_per_topic,
+        'purity': purity,
+    }, set(topics_by_group)
+
+
+def run_direct(items):
+    from django.db import transaction
+    from django.db.models import F
+
+    from apps.feedback.models import FeatureRequest, FeatureRequestGroup
+
+    group_ids, samples = set(), []
+    started = time.perf_counter()
+    for _, title in items:
+        submitted = time.perf_counter()
+        with transaction.atomic():
+            group = FeatureRequestGroup.objects.filter(title=title).first()
+            if group is None:
+                group = FeatureRequestGroup.objects.create(title=title, signature=b'')
+            FeatureRequest.objects.create(group=group, title=title)
+            FeatureRequestGroup.objects.filter(pk=group.pk).update(submission_count=F('submission_count') + 1)
+        group_ids.add(group.pk)
+        samples.append(time.perf_counter() - submitted)
+    elapsed = time.perf_counter() - started
+    return {
+        'requests': len(items),
+        'per_second': round(len(items) / elapsed),
+        'submit_p50_ms': round(_percentile(samples, 50) * 1000, 4),
+        'submit_p99_ms': round(_percentile(samples, 99) * 1000, 4),
+        'groups': len(group_ids),
+    }, group_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=20_000)
+    parser.add_argument('--topics', type=int, default=len(TOPICS), choices=range(1, len(TOPICS) + 1),
+                        metavar=f"1..{len(TOPICS)}")
+    parser.add_argument('--direct', type=int, default=2000, help="Submissions written one by one.")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='feature-request-results.json')
+    args = parser.parse_args()
+
+    setup()
+    from apps.feedback.models import FeatureRequestGroup
+
+    items = submissions(args.requests, args.topics, random.Random(args.seed))
+    result, created = {}, set()
+    try:
+        result['buffered'], groups = run_buffered(items)
+        created |= groups
+        result['direct'], groups = run_direct(items[:args.direct])
+        created |= groups
+    finally:
+        FeatureRequestGroup.objects.filter(pk__in=list(created)).delete()
+
+    with open(args.output, 'w', encoding='utf-8') as handle:
+        json.dump({'meta': vars(args), 'result': result}, handle, indent=2)
+    for mode, figures in result.items():
+        print(f"{mode:<10}" + '  '.join(f"{name} {value}" for name, value in figures.items()))
+    print(f"\nWrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
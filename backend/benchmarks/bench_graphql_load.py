@@ -0,0 +1,412 @@
+"""
+End-to-end GraphQL load benchmark against a seeded dataset.
+
+    cd backend && python -m benchmarks.bench_graphql_load [--users N] [--organisations M]
+        [--big-org-members K] [--iterations I] [--transport inprocess,wsgi,asgi]
+        [--output results.json] [--compare baseline.json] [--no-seed]
+
+Seeds N users and M organisations with a skewed membership distribution (one
+organisation of K members, then a Zipf-like tail), then replays the operations
+the React client sends, using its own query texts:
+
+    inprocess  backend.schema.schema.execute(), no HTTP layer
+    wsgi       Django's WSGI request handler (django.test.Client): middleware,
+               URL routing, JWT authentication and CachedGraphQLView
+    asgi       Django's ASGI request handler (django.test.AsyncClient) with the
+               async view, as served by backend/asgi.py
+
+Each transport runs in its own process, since the URLconf picks the GraphQL view
+at import time. For every operation it reports p50/p95/p99 latency, throughput
+and SQL queries per request, and writes them as JSON so runs on different commits
+can be compared with --compare.
+
+Seeding writes to the configured database (only rows prefixed `bench-`).
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+from . import setup
+
+TRANSPORTS = ('inprocess', 'wsgi', 'asgi')
+TOKEN_LIFETIME = 60  # seconds before a fresh JWT is issued; well inside JWT_EXPIRATION_DELTA
+
+
+# --- 1. SQL QUERY COUNTING ---
+
+class QueryCounter:
+    """
+    Counts SQL statements on every database connection of the process, including
+    the per-thread connections the async ORM opens in sync_to_async workers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._installed = set()
+        self.value = 0
+
+    def install(self):
+        from django.db import connections
+        from django.db.backends.signals import connection_created
+
+        for connection in connections.all():
+            self._wrap(connection)
+        connection_created.connect(self._on_connection_created, weak=False)
+
+    def _on_connection_created(self, sender, connection, **kwargs):
+        self._wrap(connection)
+
+    def _wrap(self, connection):
+        if id(connection) not in self._installed:
+            self._installed.add(id(connection))
+            connection.execute_wrappers.append(self)
+
+    def __call__(self, execute, sql, params, many, context):
+        with self._lock:
+            self.value += 1
+        return execute(sql, params, many, context)
+
+
+# --- 2. SCENARIOS ---
+
+def scenarios(dataset):
+    """
+    Returns [(label, operation name, variables factory)] in the order they run.
+
+    The member mutations form a cycle (add, promote, demote, remove) over users
+    outside the target organisation, so every iteration starts from the same state.
+    """
+    from graphql_relay import to_global_id
+
+    big_org_id = to_global_id('OrganisationType', dataset['big_org'].pk)
+    target_org_id = to_global_id('OrganisationType', dataset['target_org'].pk)
+    outsiders = dataset['outsiders']
+
+    def member(i):
+        return outsiders[i % len(outsiders)]
+
+    return [
+        ('Me', 'Me', lambda i: {}),
+        ('GetUserMemberships', 'GetUserMemberships', lambda i: {}),
+        ('GetOrgMembers', 'GetOrgMembers', lambda i: {'orgId': target_org_id}),
+        ('GetOrgMembers (big org)', 'GetOrgMembers', lambda i: {'orgId': big_org_id}),
+        ('AddOrgMember', 'AddOrgMember', lambda i: {
+            'organisationId': target_org_id, 'memberUsername': member(i).username, 'makeAdmin': False,
+        }),
+        ('UpdateMemberRole (promote)', 'UpdateMemberRole', lambda i: {
+            'organisationId': target_org_id, 'memberId': str(member(i).pk), 'isOrgAdmin': True,
+        }),
+        ('UpdateMemberRole (demote)', 'UpdateMemberRole', lambda i: {
+            'organisationId': target_org_id, 'memberId': str(member(i).pk), 'isOrgAdmin': False,
+        }),
+        ('RemoveOrgMember', 'RemoveOrgMember', lambda i: {
+            'organisationId': target_org_id, 'memberId': str(member(i).pk),
+        }),
+    ]
+
+
+# --- 3. TRANSPORTS ---
+
+class Credentials:
+    """A JWT for the actor, re-issued before it can expire during a long run."""
+
+    def __init__(self, user):
+        self.user = user
+        self._token = None
+        self._issued = 0
+
+    @property
+    def token(self):
+        from graphql_jwt.shortcuts import get_token
+
+        if self._token is None or time.monotonic() - self._issued > TOKEN_LIFETIME:
+            self._token, self._issued = get_token(self.user), time.monotonic()
+        return self._token
+
+
+def _errors(payload):
+    errors = payload.get('errors') if isinstance(payload, dict) else None
+    return [error.get('message') for error in errors] if errors else []
+
+
+def _response_errors(response):
+    """GraphQL errors of an HTTP response; anything but JSON (an error page) is one error."""
+    if response.get('Content-Type', '').partition(';')[0].strip() != 'application/json':
+        return [f"HTTP {response.status_code} ({response.get('Content-Type')})"]
+    return _errors(response.json())
+
+
+def inprocess_sender(credentials):
+    from django.contrib.auth import get_user_model
+    from django.test import RequestFactory
+
+    from backend.schema import schema
+
+    factory = RequestFactory()
+    UserModel = get_user_model()
+
+    def prepare():
+        # A fresh user per request, like authentication middleware would attach.
+        request = factory.post('/graphql/')
+        request.user = UserModel.objects.get(pk=credentials.user.pk)
+        return request
+
+    def send(query, variables, request):
+        result = schema.execute(query, variable_values=variables, context_value=request)
+        return [error.message for error in result.errors or []]
+
+    return prepare, send
+
+
+def wsgi_sender(credentials):
+    from django.test import Client
+
+    client = Client()
+
+    def prepare():
+        return credentials.token
+
+    def send(query, variables, token):
+        response = client.post(
+            '/graphql/', json.dumps({'query': query, 'variables': variables}),
+            content_type='application/json', HTTP_AUTHORIZATION=f"JWT {token}",
+        )
+        return _response_errors(response)
+
+    return prepare, send
+
+
+# --- 4. MEASUREMENT ---
+
+def _percentile(samples, percent):
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method='inclusive')[percent - 1]
+
+
+def summarise(label, operation, transport, samples, queries, errors):
+    total = sum(samples)
+    return {
+        'label': label,
+        'operation': operation,
+        'transport': transport,
+        'iterations': len(samples),
+        'p50_ms': round(_percentile(samples, 50) * 1000, 3),
+        'p95_ms': round(_percentile(samples, 95) * 1000, 3),
+        'p99_ms': round(_percentile(samples, 99) * 1000, 3),
+        'mean_ms': round(statistics.fmean(samples) * 1000, 3),
+        'throughput_rps': round(len(samples) / total, 2) if total else None,
+        'queries_per_request': round(statistics.fmean(queries), 2),
+        'errors': len(errors),
+        'first_error': errors[0] if errors else None,
+    }
+
+
+def run_sync(transport, dataset, iterations, warmup):
+    from .operations import client_operations
+
+    operations = client_operations()
+    prepare, send = {'inprocess': inprocess_sender, 'wsgi': wsgi_sender}[transport](Credentials(dataset['actor']))
+    counter = QueryCounter()
+    counter.install()
+
+    plan = scenarios(dataset)
+    samples = {label: [] for label, _, _ in plan}
+    queries = {label: [] for label, _, _ in plan}
+    errors = {label: [] for label, _, _ in plan}
+
+    for i in range(warmup + iterations):
+        for label, operation, variables in plan:
+            context = prepare()
+            before = counter.value
+            start = time.perf_counter()
+            failures = send(operations[operation], variables(i), context)
+            elapsed = time.perf_counter() - start
+            if i >= warmup:
+                samples[label].append(elapsed)
+                queries[label].append(counter.value - before)
+                errors[label].extend(failures)
+
+    return [
+        summarise(label, operation, transport, samples[label], queries[label], errors[label])
+        for label, operation, _ in plan
+    ]
+
+
+def run_asgi(dataset, iterations, warmup):
+    from django.test import AsyncClient
+
+    from .operations import client_operations
+
+    operations = client_operations()
+    credentials = Credentials(dataset['actor'])
+    counter = QueryCounter()
+    counter.install()
+    plan = scenarios(dataset)
+
+    async def main():
+        client = AsyncClient()
+        results = {label: ([], [], []) for label, _, _ in plan}
+        for i in range(warmup + iterations):
+            for label, operation, variables in plan:
+                token = credentials.token
+                before = counter.value
+                start = time.perf_counter()
+                response = await client.post(
+                    '/graphql/', json.dumps({'query': operations[operation], 'variables': variables(i)}),
+                    content_type='application/json', headers={'Authorization': f"JWT {token}"},
+                )
+                elapsed = time.perf_counter() - start
+                if i >= warmup:
+                    samples, queries, errors = results[label]
+                    samples.append(elapsed)
+                    queries.append(counter.value - before)
+                    errors.extend(_response_errors(response))
+        return results
+
+    results = asyncio.run(main())
+    return [
+        summarise(label, operation, 'asgi', *results[label])
+        for label, operation, _ in plan
+    ]
+
+
+# --- 5. REPORTING ---
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_table(results):
+    print(
+        f"{'transport':<11}{'operation':<28}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+        f"{'req/s':>10}{'queries':>9}{'errors':>8}"
+    )
+    for row in results:
+        print(
+            f"{row['transport']:<11}{row['label']:<28}{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}"
+            f"{row['p99_ms']:>10.2f}{row['throughput_rps'] or 0:>10.1f}{row['queries_per_request']:>9.1f}"
+            f"{row['errors']:>8}"
+        )
+
+
+def print_comparison(results, baseline_path):
+    with open(baseline_path, encoding='utf-8') as handle:
+        baseline = {(row['transport'], row['label']): row for row in json.load(handle)['results']}
+
+    print(f"\nChange against {baseline_path} (p95 latency, queries per request):")
+    for row in results:
+        before = baseline.get((row['transport'], row['label']))
+        if before is None:
+            continue
+        change = (row['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100 if before['p95_ms'] else 0.0
+        print(
+            f"{row['transport']:<11}{row['label']:<28}{change:>+9.1f}%"
+            f"{before['queries_per_request']:>8.1f} ->{row['queries_per_request']:>6.1f}"
+        )
+
+
+def run_worker(transport, args):
+    """Runs one transport in a fresh process and returns its result rows."""
+    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as handle:
+        path = handle.name
+    env = dict(os.environ, GRAPHQL_ASYNC_VIEW='True' if transport == 'asgi' else 'False')
+    command = [
+        sys.executable, '-m', 'benchmarks.bench_graphql_load', '--worker', transport,
+        '--iterations', str(args.iterations), '--warmup', str(args.warmup), '--output', path,
+    ]
+    try:
+        subprocess.run(command, env=env, check=True)
+        with open(path, encoding='utf-8') as handle:
+            return json.load(handle)
+    finally:
+        os.unlink(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=60_000)
+    parser.add_argument('--organisations', type=int, default=500)
+    parser.add_argument('--big-org-members', type=int, default=50_000)
+    parser.add_argument('--skew', type=float, default=1.1, help="Zipf exponent of the organisation sizes.")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed of the dataset.")
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--transport', default=','.join(TRANSPORTS))
+    parser.add_argument('--output', default='benchmark-results.json')
+    parser.add_argument('--compare', help="A previous --output file to compare against.")
+    parser.add_argument('--no-seed', action='store_true', help="Reuse the dataset of a previous run.")
+    parser.add_argument('--worker', choices=TRANSPORTS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    setup()
+    from . import datasets
+
+    if args.worker:
+        if args.worker != 'inprocess':
+            # The test clients send Host "testserver", which ALLOWED_HOSTS only accepts here.
+            from django.test.utils import setup_test_environment
+            setup_test_environment()
+        dataset = datasets.load()
+        if args.worker == 'asgi':
+            results = run_asgi(dataset, args.iterations, args.warmup)
+        else:
+            results = run_sync(args.worker, dataset, args.iterations, args.warmup)
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(results, handle)
+        return
+
+    transports = [name.strip() for name in args.transport.split(',') if name.strip()]
+    unknown = set(transports) - set(TRANSPORTS)
+    if unknown:
+        parser.error(f"Unknown transport(s): {', '.join(sorted(unknown))}")
+
+    shape = None
+    if not args.no_seed:
+        start = time.perf_counter()
+        shape = datasets.seed(args.users, args.organisations, args.big_org_members, args.skew, args.seed)
+        print(f"Seeded {shape['memberships']} memberships in {time.perf_counter() - start:.1f}s")
+
+    results = []
+    for transport in transports:
+        results.extend(run_worker(transport, args))
+
+    from django.db import connection
+
+    report = {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'dataset': shape,
+            'iterations': args.iterations,
+            'warmup': args.warmup,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as handle:
+        json.dump(report, handle, indent=2)
+
+    print_table(results)
+    print(f"\nWrote {args.output}")
+    if args.compare:
+        print_comparison(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+"""
+Nearest-places search with the spatial index, against a scan of every place.
+
+    cd backend && python -m benchmarks.bench_near_me [--places 1000000] [--queries 2000]
+        [--scan-queries 20] [--routes 200] [--commuters 20000] [--output results.json]
+
+Builds apps.places.index.PlaceIndex from `--places` synthetic places (in memory,
+no database): most of them in a few dense cities, the rest scattered over the
+world. Then times queries around random places, half in a city and half anywhere:
+
+    knn     the 20 nearest places within 5 km
+    radius  up to 100 places within 1 km, nearest first
+    sparse  the 20 nearest within 50 km of a random point (mostly empty areas)
+    category  knn, restricted to one of the categories
+
+`--scan-queries` of the knn and radius queries also run as the naive alternative:
+haversine to every place, then sort. Both must return the same places.
+
+Then `--commuters` searches from stops along `--routes` city routes, with GPS
+jitter, go through apps.places.cache.NearbyCache, as the nearMe resolver does:
+
+    commute         knn from the stops, through the cache
+    commute_index   the same queries on the index alone
+
+Reported: build time, resident memory per place, p50/p99 latency per query kind, and
+the cache's hit rate, as JSON.
+"""
+import argparse
+import heapq
+import json
+import random
+import gc
+import time
+
+from . import setup
+from .bench_graphql_load import _percentile
+from .bench_subscriptions import rss_bytes
+
+CATEGORIES = ('Cafe', 'Park', 'Gallery', 'Bookstore', 'Restaurant', 'Library', 'Gym', 'Museum')
+# (latitude, longitude, spread in degrees) of the dense cities.
+CITIES = (
+    (51.507, -0.128, 0.12),    # London
+    (40.713, -74.006, 0.10),   # New York
+    (35.690, 139.692, 0.15),   # Tokyo
+    (-33.869, 151.209, 0.10),  # Sydney
+    (-1.286, 36.817, 0.06),    # Nairobi
+)
+CITY_SHARE = 0.8
+# Stops per commuter route, and the standard deviation of a phone's position at one (degrees, about 20 m).
+ROUTE_STOPS = 15
+GPS_JITTER = 0.0002
+
+
+def synthetic_places(count, rng):
+    places = []
+    for place_id in range(count):
+        if rng.random() < CITY_SHARE:
+            latitude, longitude, spread = rng.choice(CITIES)
+            latitude = min(max(rng.gauss(latitude, spread), -90.0), 90.0)
+            longitude = rng.gauss(longitude, spread)
+        else:
+            latitude, longitude = rng.uniform(-60.0, 70.0), rng.uniform(-180.0, 180.0)
+        places.append((place_id, latitude, (longitude + 180.0) % 360.0 - 180.0, rng.choice(CATEGORIES)))
+    return places
+
+
+def scan(places, latitude, longitude, radius_km, first, haversine_km):
+    """The naive search: the distance to every place."""
+    within = (
+        (distance, place_id)
+        for distance, place_id in (
+            (haversine_km(latitude, longitude, place_latitude, place_longitude), place_id)
+            for place_id, place_latitude, place_longitude, _ in places
+        )
+        if distance <= radius_km
+    )
+    return heapq.nsmallest(first, within)
+
+
+def commute_queries(route_count, count, rng):
+    """knn queries from stops along city routes, most of them on a few busy routes."""
+    routes = []
+    for _ in range(route_count):
+        latitude, longitude, spread = rng.choice(CITIES)
+        start = (rng.gauss(latitude, spread), rng.gauss(longitude, spread))
+        end = (start[0] + rng.uniform(-0.1, 0.1), start[1] + rng.uniform(-0.1, 0.1))
+        routes.append([
+            (start[0] + (end[0] - start[0]) * stop / ROUTE_STOPS, start[1] + (end[1] - start[1]) * stop / ROUTE_STOPS)
+            for stop in range(ROUTE_STOPS + 1)
+        ])
+    weights = [1 / (rank + 1) for rank in range(route_count)]
+    queries = []
+    for route in rng.choices(routes, weights, k=count):
+        latitude, longitude = rng.choice(route)
+        queries.append((rng.gauss(latitude, GPS_JITTER), rng.gauss(longitude, GPS_JITTER), 5.0, 20, None))
+    return queries
+
+
+def time_queries(index, queries):
+    samples = []
+    for latitude, longitude, radius_km, first, category in queries:
+        started = time.perf_counter()
+        index.nearest(latitude, longitude, radius_km, first, category)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def summarise(samples):
+    return {
+        'queries': len(samples),
+        'p50_ms': round(_percentile(samples, 50) * 1000, 4),
+        'p99_ms': round(_percentile(samples, 99) * 1000, 4),
+        'max_ms': round(max(samples) * 1000, 4),
+    }
+
+
+def run(place_count, query_count, scan_count, route_count, commuter_count, random_seed):
+    from apps.places.cache import NearbyCache
+    from apps.places.index import PlaceIndex, haversine_km
+
+    rng = random.Random(random_seed)
+    places = synthetic_places(place_count, rng)
+
+    gc.collect()
+    rss_before = rss_bytes()
+    started = time.perf_counter()
+    index = PlaceIndex()
+    index.load(places)
+    build_seconds = time.perf_counter() - started
+    gc.collect()
+    rss_after = rss_bytes()
+
+    def near_a_place():
+        _, latitude, longitude, _ = rng.choice(places)
+        return latitude + rng.uniform(-0.01, 0.01), longitude + rng.uniform(-0.01, 0.01)
+
+    kinds = {
+        'knn': [(*near_a_place(), 5.0, 20, None) for _ in range(query_count)],
+        'radius': [(*near_a_place(), 1.0, 100, None) for _ in range(query_count)],
+        'sparse': [(rng.uniform(-60, 70), rng.uniform(-180, 180), 50.0, 20, None) for _ in range(query_count)],
+        'category': [(*near_a_place(), 5.0, 20, rng.choice(CATEGORIES)) for _ in range(query_count)],
+    }
+    result = {
+        'places': place_count,
+        'build_seconds': round(build_seconds, 2),
+        'rss_bytes_per_place': rss_before and round((rss_after - rss_before) / place_count),
+    }
+    for kind, queries in kinds.items():
+        result[kind] = summarise(time_queries(index, queries))
+
+    for kind in ('knn', 'radius'):
+        samples, mismatches = [], 0
+        for latitude, longitude, radius_km, first, category in kinds[kind][:scan_count]:
+            started = time.perf_counter()
+            expected = scan(places, latitude, longitude, radius_km, first, haversine_km)
+            samples.append(time.perf_counter() - started)
+            found = index.nearest(latitude, longitude, radius_km, first, category)
+            # The index ranks by projected distance: only the last place may differ, on a near tie.
+            if {place_id for _, place_id in found[:-1]} - {place_id for _, place_id in expected}:
+                mismatches += 1
+        result[f"{kind}_scan"] = {**summarise(samples), 'mismatches': mismatches}
+        result[f"{kind}_speedup"] = round(result[f"{kind}_scan"]['p50_ms'] / result[kind]['p50_ms'])
+
+    queries = commute_queries(route_count, commuter_count, rng)
+    nearby = NearbyCache(index, maxsize=100_000, timeout=3600)
+    result['commute'] = summarise(time_queries(nearby, queries))
+    result['commute_index'] = summarise(time_queries(index, queries))
+    result['commute_cache'] = {**nearby.stats(), 'mismatches': sum(
+        # As above: only the last place may differ, on a near tie.
+        bool({place_id for _, place_id in nearby.nearest(*query)[:-1]} - {place_id for _, place_id in index.nearest(*query)})
+        for query in queries[:query_count]
+    )}
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--places', type=int, default=1_000_000)
+    parser.add_argument('--queries', type=int, default=2000, help="Queries per kind.")
+    parser.add_argument('--scan-queries', type=int, default=20, help="Queries per kind also run as a full scan.")
+    parser.add_argument('--routes', type=int, default=200, help="Commuter routes.")
+    parser.add_argument('--commuters', type=int, default=20_000, help="Searches from stops along the routes.")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='near-me-results.json')
+    args = parser.parse_args()
+
+    setup()
+    result = run(args.places, args.queries, args.scan_queries, args.routes, args.commuters, args.seed)
+
+    with open(args.output, 'w', encoding='utf-8') as handle:
+        json.dump({'meta': vars(args), 'result': result}, handle, indent=2)
+    for name, value in result.items():
+        print(f"{name:<20}{value}")
+    print(f"\nWrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+"""
+Request latency during a login spike, with password hashing inline and offloaded.
+
+    cd backend && python -m benchmarks.bench_password_hashing [--logins 16] [--readers 4]
+        [--duration 20] [--workers N] [--modes inline,offload] [--output results.json]
+
+Simulates a shift-start spike through Django's WSGI request handler in a threaded
+server: `--logins` threads send tokenAuth mutations (one PBKDF2 verification
+each) back to back, while `--readers` threads send a cheap authenticated query
+(`me`, answered from the JWT snapshot cache) and measure how long it takes.
+
+    inline   PASSWORD_HASHING_WORKERS=0: every login hashes on its request thread
+    offload  hashing runs in apps.users.hashing's pool of --workers processes,
+             with its queue bound and backpressure (rejected logins are counted)
+
+Each mode runs in its own process. Reported per request class: p50/p95/p99
+latency, throughput and errors, as JSON like bench_graphql_load.
+
+Creates users prefixed `bench-hash-` in the configured database.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from . import setup
+from .bench_graphql_load import _percentile
+
+MODES = ('inline', 'offload')
+USER_PREFIX = 'bench-hash-'
+PASSWORD = 'bench-hash-password'
+
+LOGIN = (
+    'mutation ($username: String!, $password: String!) '
+    '{ tokenAuth(username: $username, password: $password) { token } }'
+)
+CHEAP_QUERY = 'query { me { id username } }'
+
+
+# --- 1. DATASET ---
+
+def ensure_users(count):
+    """Creates the login users once; they all share one hash, computed a single time."""
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.hashers import make_password
+
+    User = get_user_model()
+    existing = set(User.objects.filter(username__startswith=USER_PREFIX).values_list('username', flat=True))
+    password = make_password(PASSWORD)
+    User.objects.bulk_create([
+        User(username=name, email=f"{name}@bench.invalid", password=password)
+        for name in (f"{USER_PREFIX}{index:04d}" for index in range(count))
+        if name not in existing
+    ])
+
+
+# --- 2. LOAD ---
+
+def _post(client, query, variables=None, token=None):
+    headers = {'HTTP_AUTHORIZATION': f"JWT {token}"} if token else {}
+    start = time.perf_counter()
+    response = client.post(
+        '/graphql/', json.dumps({'query': query, 'variables': variables or {}}),
+        content_type='application/json', **headers,
+    )
+    elapsed = time.perf_counter() - start
+    errors = response.json().get('errors') or []
+    return elapsed, [error.get('message') for error in errors]
+
+
+def run_mode(mode, logins, readers, duration):
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    from django.test import Client
+    from graphql_jwt.shortcuts import get_token
+
+    User = get_user_model()
+    reader_token = get_token(User.objects.get(username=f"{USER_PREFIX}0000"))
+    connection.close()
+
+    results = {'login': ([], []), 'cheap': ([], [])}
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def login_loop(index):
+        client = Client()
+        variables = {'username': f"{USER_PREFIX}{index:04d}", 'password': PASSWORD}
+        while not stop.is_set():
+            elapsed, errors = _post(client, LOGIN, variables)
+            with lock:
+                results['login'][0].append(elapsed)
+                results['login'][1].extend(errors)
+
+    def reader_loop():
+        client = Client()
+        while not stop.is_set():
+            elapsed, errors = _post(client, CHEAP_QUERY, token=reader_token)
+            with lock:
+                results['cheap'][0].append(elapsed)
+                results['cheap'][1].extend(errors)
+            # Pace readers like interactive clients rather than saturating the GIL.
+            time.sleep(0.01)
+
+    # Warm the cheap path (snapshot cache, document cache) and the hashing pool.
+    _post(Client(), CHEAP_QUERY, token=reader_token)
+    _post(Client(), LOGIN, {'username': f"{USER_PREFIX}0000", 'password': PASSWORD})
+
+    threads = [threading.Thread(target=login_loop, args=(index,)) for index in range(logins)]
+    threads += [threading.Thread(target=reader_loop) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    return [summarise(mode, label, samples, errors, duration) for label, (samples, errors) in results.items()]
+
+
+def summarise(mode, label, samples, errors, duration):
+    samples = samples or [0.0]
+    return {
+        'mode': mode,
+        'requests': label,
+        'count': len(samples),
+        'p50_ms': round(_percentile(samples, 50) * 1000, 3),
+        'p95_ms': round(_percentile(samples, 95) * 1000, 3),
+        'p99_ms': round(_percentile(samples, 99) * 1000, 3),
+        'mean_ms': round(statistics.fmean(samples) * 1000, 3),
+        'throughput_rps': round(len(samples) / duration, 2),
+        'errors': len(errors),
+        'first_error': errors[0] if errors else None,
+    }
+
+
+# --- 3. DRIVER ---
+
+def run_worker(mode, args):
+    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as handle:
+        path = handle.name
+    workers = '0' if mode == 'inline' else str(args.workers or os.cpu_count() or 1)
+    env = dict(os.environ, PASSWORD_HASHING_WORKERS=workers)
+    command = [
+        sys.executable, '-m', 'benchmarks.bench_password_hashing', '--worker', mode,
+        '--logins', str(args.logins), '--readers', str(args.readers),
+        '--duration', str(args.duration), '--output', path,
+    ]
+    try:
+        subprocess.run(command, env=env, check=True)
+        with open(path, encoding='utf-8') as handle:
+            return json.load(handle)
+    finally:
+        os.unlink(path)
+
+
+def print_table(results):
+    print(f"{'mode':<9}{'requests':<9}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>9}{'errors':>8}")
+    for row in results:
+        print(
+            f"{row['mode']:<9}{row['requests']:<9}{row['count']:>7}{row['p50_ms']:>10.1f}"
+            f"{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}{row['throughput_rps']:>9.1f}{row['errors']:>8}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--logins', type=int, default=16, help="Concurrent login threads.")
+    parser.add_argument('--readers', type=int, default=4, help="Concurrent cheap-request threads.")
+    parser.add_argument('--duration', type=float, default=20.0, help="Seconds per mode.")
+    parser.add_argument('--workers', type=int, help="Hashing processes for offload (default: CPU count).")
+    parser.add_argument('--modes', default=','.join(MODES))
+    parser.add_argument('--output', default='password-hashing-results.json')
+    parser.add_argument('--worker', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    setup()
+
+    if args.worker:
+        results = run_mode(args.worker, args.logins, args.readers, args.duration)
+        from apps.users.hashing import pool
+        pool.shutdown()
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(results, handle)
+        return
+
+    modes = [name.strip() for name in args.modes.split(',') if name.strip()]
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        parser.error(f"Unknown mode(s): {', '.join(sorted(unknown))}")
+
+    ensure_users(max(args.logins, 1))
+    results = []
+    for mode in modes:
+        results.extend(run_worker(mode, args))
+
+    with open(args.output, 'w', encoding='utf-8') as handle:
+        json.dump({'meta': vars(args) | {'cpus': os.cpu_count()}, 'results': results}, handle, indent=2)
+    print_table(results)
+    print(f"\nWrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
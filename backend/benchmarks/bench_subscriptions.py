@@ -0,0 +1,253 @@
+"""
+Concurrent GraphQL subscribers per process, and how fast events fan out to them.
+
+    cd backend && python -m benchmarks.bench_subscriptions [--connections 10000]
+        [--events 50] [--slow 0.1] [--output results.json]
+
+Opens `--connections` WebSocket connections against the ASGI application in this
+process (backend.asgi, through an in-memory transport instead of sockets), each
+running the graphql-transport-ws handshake and one `organisationEvents`
+subscription on the same organisation. Then publishes `--events` GAME_STATE
+events from a worker thread, like a mutation would, and waits for every
+subscriber to receive each of them.
+
+A `--slow` fraction of the connections stop reading after their first event, so
+their subscription queues fill up. Memory must stay bounded regardless: each
+queue holds at most GRAPHQL_WS_QUEUE_SIZE events, shared with every other
+subscriber, and a subscription that overflows it is closed.
+
+Reported: traced memory per connection (including the in-memory transport),
+process RSS before and after the events, the time until the last subscriber has
+an event (fan-out) and per-delivery latency percentiles, as JSON.
+
+Creates an organisation `bench-live` and a member `bench-live-member`.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import time
+import tracemalloc
+from collections import deque
+
+from . import setup
+from .bench_graphql_load import _percentile
+
+ORGANISATION_SLUG = 'bench-live'
+USERNAME = 'bench-live-member'
+SUBSCRIPTION = (
+    'subscription ($organisationId: ID!) '
+    '{ organisationEvents(organisationId: $organisationId) { kind gameId state occurredAt } }'
+)
+
+
+# --- 1. DATASET ---
+
+def ensure_member():
+    from django.contrib.auth import get_user_model
+    from apps.organisations.models import Organisation, OrganisationMembership
+
+    User = get_user_model()
+    user, _ = User.objects.get_or_create(username=USERNAME, defaults={'email': f"{USERNAME}@bench.invalid"})
+    organisation, created = Organisation.objects.get_or_create(
+        slug=ORGANISATION_SLUG, defaults={'name': 'Bench live games', 'created_by': user},
+    )
+    if created:
+        OrganisationMembership.objects.create(user=user, organisation=organisation, is_org_admin=True)
+        Organisation.objects.filter(pk=organisation.pk).update(member_count=1, admin_count=1)
+    return user, organisation
+
+
+def rss_bytes():
+    try:
+        with open('/proc/self/statm', encoding='ascii') as handle:
+            return int(handle.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+
+# --- 2. IN-MEMORY WEBSOCKET CLIENT ---
+
+class Stats:
+    def __init__(self):
+        self.published_at = 0.0
+        self.expected = 0
+        self.delivered = 0
+        self.latencies = []
+        self.all_delivered = None
+
+
+class Client:
+    """The client end of one connection: feeds ASGI messages in, counts `next` messages out."""
+
+    __slots__ = ('stats', 'slow', 'inbox', 'waiter', 'acknowledged', 'events', 'closed', 'stalled')
+
+    def __init__(self, stats, slow):
+        self.stats = stats
+        self.slow = slow
+        self.inbox = deque([{'type': 'websocket.connect'}])
+        self.waiter = None
+        self.acknowledged = None
+        self.events = 0
+        self.closed = False
+        self.stalled = None
+
+    def push(self, message):
+        self.inbox.append(message)
+        if self.waiter is not None and not self.waiter.done():
+            self.waiter.set_result(None)
+
+    async def receive(self):
+        while not self.inbox:
+            self.waiter = asyncio.get_running_loop().create_future()
+            await self.waiter
+        return self.inbox.popleft()
+
+    async def send(self, message):
+        kind = message['type']
+        if kind == 'websocket.close':
+            self.closed = True
+            if self.acknowledged is not None and not self.acknowledged.done():
+                self.acknowledged.set_exception(RuntimeError(f"closed with {message.get('code')}"))
+        elif kind == 'websocket.send':
+            text = message['text']
+            if text.startswith('{"id"') and '"type":"next"' in text:
+                self.events += 1
+                if self.events > 1 and self.slow:
+                    # Stop reading: the server's queue for this subscriber fills up.
+                    self.stalled = asyncio.get_running_loop().create_future()
+                    await self.stalled
+                self.stats.latencies.append(time.perf_counter() - self.stats.published_at)
+                self.stats.delivered += 1
+                if self.stats.delivered == self.stats.expected:
+                    self.stats.all_delivered.set()
+            elif '"connection_ack"' in text:
+                self.acknowledged.set_result(None)
+            elif '"type":"error"' in text:
+                raise RuntimeError(text)
+
+
+async def open_connection(application, client, token, organisation_id):
+    scope = {
+        'type': 'websocket', 'path': '/graphql/', 'subprotocols': ['graphql-transport-ws'],
+        'headers': [], 'query_string': b'', 'client': ('127.0.0.1', 0), 'server': ('127.0.0.1', 80),
+    }
+    client.acknowledged = asyncio.get_running_loop().create_future()
+    server = asyncio.create_task(application(scope, client.receive, client.send))
+    client.push({'type': 'websocket.receive', 'text': json.dumps(
+        {'type': 'connection_init', 'payload': {'Authorization': f"JWT {token}"}}
+    )})
+    await client.acknowledged
+    client.push({'type': 'websocket.receive', 'text': json.dumps({
+        'id': '1', 'type': 'subscribe',
+        'payload': {'query': SUBSCRIPTION, 'variables': {'organisationId': organisation_id}},
+    })})
+    return server
+
+
+# --- 3. RUN ---
+
+async def run(connections, events, slow_fraction, batch):
+    from asgiref.sync import sync_to_async
+    from graphql_jwt.shortcuts import get_token
+    from graphql_relay import to_global_id
+
+    from apps.core.broker import broker
+    from apps.organisations import events as organisation_events
+    from backend.asgi import application
+
+    user, organisation = await sync_to_async(ensure_member)()
+    token = await sync_to_async(get_token)(user)
+    organisation_id = to_global_id('OrganisationType', organisation.pk)
+    topic = organisation_events.topic(organisation.pk)
+    stats = Stats()
+    slow_every = round(1 / slow_fraction) if slow_fraction else 0
+
+    # Warm the token, user and role caches and the document cache with one connection.
+    warm = Client(stats, slow=False)
+    warm_server = await open_connection(application, warm, token, organisation_id)
+
+    gc.collect()
+    tracemalloc.start()
+    traced_before = tracemalloc.get_traced_memory()[0]
+    clients, servers = [], []
+    started = time.perf_counter()
+    for offset in range(0, connections, batch):
+        group = [
+            Client(stats, slow=bool(slow_every) and index % slow_every == 0)
+            for index in range(offset, min(offset + batch, connections))
+        ]
+        servers += await asyncio.gather(*(
+            open_connection(application, client, token, organisation_id) for client in group
+        ))
+        clients += group
+    while broker.subscriber_count(topic) < connections + 1:
+        await asyncio.sleep(0.01)
+    connect_seconds = time.perf_counter() - started
+    gc.collect()
+    traced_connected = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    fast = sum(1 for client in clients if not client.slow) + 1
+    rss_before = rss_bytes()
+    fanout = []
+    for index in range(events):
+        readers = fast + (len(clients) - fast + 1 if index == 0 else 0)
+        stats.expected = stats.delivered + readers
+        stats.all_delivered = asyncio.Event()
+        event = organisation_events.OrganisationEvent(
+            organisation_events.GAME_STATE, organisation.pk, [user.pk],
+            game_id='bench', state={'round': index, 'scores': {'a': index, 'b': index * 2}},
+        )
+        stats.published_at = time.perf_counter()
+        await asyncio.to_thread(broker.publish, topic, event)
+        await stats.all_delivered.wait()
+        fanout.append(time.perf_counter() - stats.published_at)
+    gc.collect()
+    rss_after = rss_bytes()
+    latencies = list(stats.latencies)
+
+    # Disconnecting cancels every subscription, including those stalled in send().
+    for client in [warm, *clients]:
+        client.push({'type': 'websocket.disconnect', 'code': 1000})
+    await asyncio.gather(warm_server, *servers)
+
+    return {
+        'connections': connections,
+        'slow_connections': len(clients) - fast + 1,
+        'events': events,
+        'connect_seconds': round(connect_seconds, 2),
+        'traced_bytes_per_connection': round((traced_connected - traced_before) / connections),
+        'rss_before_events_mb': rss_before and round(rss_before / 2**20, 1),
+        'rss_after_events_mb': rss_after and round(rss_after / 2**20, 1),
+        'fanout_p50_ms': round(_percentile(fanout, 50) * 1000, 2),
+        'fanout_p99_ms': round(_percentile(fanout, 99) * 1000, 2),
+        'fanout_max_ms': round(max(fanout) * 1000, 2),
+        'delivery_p50_ms': round(_percentile(latencies, 50) * 1000, 2),
+        'delivery_p99_ms': round(_percentile(latencies, 99) * 1000, 2),
+        'deliveries_per_second': round(len(latencies) / sum(fanout)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--connections', type=int, default=10_000)
+    parser.add_argument('--events', type=int, default=50)
+    parser.add_argument('--slow', type=float, default=0.1, help="Fraction of connections that stop reading.")
+    parser.add_argument('--batch', type=int, default=500, help="Connections opened concurrently.")
+    parser.add_argument('--output', default='subscriptions-results.json')
+    args = parser.parse_args()
+
+    setup()
+    result = asyncio.run(run(args.connections, args.events, args.slow, args.batch))
+
+    with open(args.output, 'w', encoding='utf-8') as handle:
+        json.dump({'meta': vars(args), 'result': result}, handle, indent=2)
+    for name, value in result.items():
+        print(f"{name:<30}{value}")
+    print(f"\nWrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+"""
+searchUsers on a large user table: the database search and an organisation's in-memory index.
+
+    cd backend && python -m benchmarks.bench_user_search [--users 1000000] [--members 50000]
+        [--queries 300] [--no-seed] [--output results.json]
+
+Seeds `--users` users with common first and last names (rows prefixed `bench-`, so
+use a scratch database), then times apps.users.search.search_users() for what an
+admin types into the member picker, letter by letter:
+
+    first_name  1 to 5 letters of someone's first name
+    last_name   1 to 5 letters of their last name
+    full_name   their first name, a space and 1 to 3 letters of the last
+    infix       3 to 5 letters from the middle of their last name (trigram search)
+
+Then builds the PrefixIndex an organisation of `--members` of them gets when its
+members are searched (apps.users.search.TenantIndexes), and times the same prefixes
+against it.
+
+On PostgreSQL the database searches read the user_*_prefix_idx and
+user_search_trgm_idx indexes; other databases scan the table, so only the
+PostgreSQL figures say anything about production.
+
+Reported: p50/p99 latency and results per kind and length, the index's build time
+and memory per member, as JSON.
+"""
+import argparse
+import gc
+import json
+import random
+import time
+
+from . import setup
+from .bench_graphql_load import _percentile
+from .bench_subscriptions import rss_bytes
+
+FIRST_NAMES = (
+    'James', 'Mary', 'John', 'Patricia', 'Robert', 'Jennifer', 'Michael', 'Linda', 'David', 'Elizabeth',
+    'William', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica', 'Thomas', 'Sarah', 'Christopher', 'Karen',
+    'Mohammed', 'Fatima', 'Wei', 'Mei', 'Aarav', 'Priya', 'Kwame', 'Amara', 'Mateo', 'Sofia',
+    'Lucas', 'Chloe', 'Oliver', 'Amelia', 'Noah', 'Olivia', 'Liam', 'Emma', 'Hiroshi', 'Yuki',
+)
+LAST_NAMES = (
+    'Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez', 'Martinez',
+    'Hernandez', 'Lopez', 'Gonzalez', 'Wilson', 'Anderson', 'Thomas', 'Taylor', 'Moore', 'Jackson', 'Martin',
+    'Lee', 'Perez', 'Thompson', 'White', 'Harris', 'Sanchez', 'Clark', 'Ramirez', 'Lewis', 'Robinson',
+    'Okafor', 'Mensah', 'Nakamura', 'Tanaka', 'Chen', 'Wang', 'Singh', 'Patel', 'Kowalski', 'Novak',
+    'Silva', 'Santos', 'Dubois', 'Rossi', 'Muller', 'Schmidt', 'Ivanova', 'Petrov', 'Haddad', 'Nasser',
+)
+BATCH = 10_000
+
+
+def seed(count, rng):
+    from django.contrib.auth import get_user_model
+    from django.db import transaction
+
+    from .datasets import BENCH_PREFIX, clear
+
+    User = get_user_model()
+    clear()
+    for start in range(0, count, BATCH):
+        users = []
+        for index in range(start, min(start + BATCH, count)):
+            first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            handle = f"{first_name}.{last_name}.{index}".lower()
+            users.append(User(
+                username=f"{BENCH_PREFIX}{handle}", email=f"{handle}@bench.invalid",
+                first_name=first_name, last_name=last_name, password='!',
+            ))
+        with transaction.atomic():
+            User.objects.bulk_create(users)
+
+
+def typed_queries(people, count, rng):
+    """{(kind, length): [term]}: what is typed while looking for random people."""
+    from apps.users.search import normalise
+
+    queries = {}
+    for first_name, last_name in rng.choices(people, k=count):
+        for length in range(1, 6):
+            queries.setdefault(('first_name', length), []).append(first_name[:length])
+            queries.setdefault(('last_name', length), []).append(last_name[:length])
+        for length in range(1, 4):
+            queries.setdefault(('full_name', length), []).append(f"{first_name} {last_name[:length]}")
+        for length in range(3, 6):
+            if len(last_name) > length:
+                queries.setdefault(('infix', length), []).append(last_name[1:1 + length])
+    return {key: [normalise(term) for term in terms] for key, terms in queries.items()}
+
+
+def time_searches(search, terms):
+    samples, found = [], 0
+    for term in terms:
+        started = time.perf_counter()
+        found += len(search(term))
+        samples.append(time.perf_counter() - started)
+    return {
+        'queries': len(samples),
+        'p50_ms': round(_percentile(samples, 50) * 1000, 3),
+        'p99_ms': round(_percentile(samples, 99) * 1000, 3),
+        'results': round(found / len(samples), 1),
+    }
+
+
+def run(member_count, query_count, first, random_seed):
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+
+    from apps.users.search import PrefixIndex, search_users
+
+    from .datasets import BENCH_PREFIX
+
+    User = get_user_model()
+    rng = random.Random(random_seed)
+    users = User.objects.filter(username__startswith=BENCH_PREFIX)
+    people = [(first_name, last_name) for first_name in FIRST_NAMES for last_name in LAST_NAMES]
+    queries = typed_queries(people, query_count, rng)
+
+    result = {'database': connection.vendor, 'users': users.count(), 'first': first}
+    for (kind, length), terms in queries.items():
+        result[f"db_{kind}_{length}"] = time_searches(lambda term: search_users(users, term, first), terms)
+
+    rows = list(users.order_by('?' if member_count < result['users'] else 'pk').values_list(
+        'pk', 'username', 'email', 'first_name', 'last_name',
+    )[:member_count])
+    gc.collect()
+    rss_before = rss_bytes()
+    started = time.perf_counter()
+    index = PrefixIndex(rows)
+    result['index_members'] = len(index)
+    result['index_build_seconds'] = round(time.perf_counter() - started, 3)
+    gc.collect()
+    result['index_rss_bytes_per_member'] = rss_before and round((rss_bytes() - rss_before) / max(len(index), 1))
+    for (kind, length), terms in queries.items():
+        if kind != 'infix':
+            result[f"index_{kind}_{length}"] = time_searches(lambda term: index.search(term, first), terms)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=1_000_000)
+    parser.add_argument('--members', type=int, default=50_000, help="Members in the in-memory index.")
+    parser.add_argument('--queries', type=int, default=300, help="People looked for; one query per kind and length.")
+    parser.add_argument('--first', type=int, default=10, help="Results per search, as the member picker asks.")
+    parser.add_argument('--no-seed', action='store_true', help="Reuse the users of a previous run.")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='user-search-results.json')
+    args = parser.parse_args()
+
+    setup()
+    if not args.no_seed:
+        started = time.perf_counter()
+        seed(args.users, random.Random(args.seed))
+        print(f"Seeded {args.users} users in {time.perf_counter() - started:.0f} s")
+    result = run(args.members, args.queries, args.first, args.seed)
+
+    with open(args.output, 'w', encoding='utf-8') as handle:
+        json.dump({'meta': vars(args), 'result': result}, handle, indent=2)
+    for name, value in result.items():
+        print(f"{name:<28}{value}")
+    print(f"\nWrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
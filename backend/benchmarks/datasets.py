@@ -0,0 +1,176 @@
+"""
+Seeded datasets for the load benchmarks.
+
+Everything created here is prefixed with BENCH_PREFIX, so seeding and clearing
+never touch real rows of the configured database.
+"""
+import random
+
+BENCH_PREFIX = 'bench-'
+PASSWORD = 'bench-password'
+
+# How many organisations the benchmark actor is an admin of (GetUserMemberships).
+ACTOR_ORGANISATIONS = 50
+# Benchmark places are scattered within about 10 km of this point (nearMe).
+PLACES_CENTRE = (51.507, -0.128)
+PLACE_CATEGORIES = ('Cafe', 'Park', 'Gallery', 'Bookstore')
+
+
+def _username(index):
+    return f"{BENCH_PREFIX}{index:07d}"
+
+
+def _org_slug(index):
+    return f"{BENCH_PREFIX}org-{index:05d}"
+
+
+def _org_sizes(users, organisations, big_org_members, skew):
+    """Member counts per organisation: one huge org, then a Zipf-like long tail."""
+    sizes = [min(big_org_members, users)]
+    largest_tail = max(2, users // 20)
+    for rank in range(1, organisations):
+        sizes.append(min(users, max(2, int(largest_tail / rank ** skew))))
+    return sizes
+
+
+def clear():
+    from django.contrib.auth import get_user_model
+
+    from apps.organisations.models import AuditEvent, Organisation, OrganisationMembership
+    from apps.places.models import Place
+
+    Place.objects.filter(name__startswith=BENCH_PREFIX).delete()
+    AuditEvent.objects.filter(
+        organisation_id__in=Organisation.objects.filter(slug__startswith=BENCH_PREFIX).values('pk'),
+    ).delete()
+    OrganisationMembership.objects.filter(organisation__slug__startswith=BENCH_PREFIX).delete()
+    Organisation.objects.filter(slug__startswith=BENCH_PREFIX).delete()
+    get_user_model().objects.filter(username__startswith=BENCH_PREFIX).delete()
+
+
+def seed(users=60_000, organisations=500, big_org_members=50_000, skew=1.1, random_seed=0, places=2000):
+    """
+    Replaces the benchmark rows with a fresh dataset and returns its shape.
+
+    Organisation 0 has `big_org_members` members; the others follow a skewed
+    distribution. User 0 (the benchmark actor) is an admin of the first
+    ACTOR_ORGANISATIONS organisations, including the big one. Every organisation's
+    audit log starts with its creation by the actor. `places` places are scattered
+    around PLACES_CENTRE.
+    """
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.hashers import make_password
+    from django.db import transaction
+
+    from apps.organisations import audit
+    from apps.organisations.counters import recount
+    from apps.organisations.models import AuditEvent, Organisation, OrganisationMembership
+    from apps.places.models import Place
+
+    User = get_user_model()
+    rng = random.Random(random_seed)
+    clear()
+
+    # Hashing once keeps seeding fast; every benchmark user shares the password.
+    password = make_password(PASSWORD)
+    with transaction.atomic():
+        people = User.objects.bulk_create(
+            [
+                User(username=_username(i), email=f"{_username(i)}@bench.invalid", password=password)
+                for i in range(users)
+            ],
+            batch_size=5000,
+        )
+        actor = people[0]
+
+        orgs = Organisation.objects.bulk_create(
+            [
+                Organisation(name=f"Bench Organisation {i}", slug=_org_slug(i), created_by=actor)
+                for i in range(organisations)
+            ],
+            batch_size=5000,
+        )
+
+        memberships = []
+        sizes = _org_sizes(users, organisations, big_org_members, skew)
+        for index, (org, size) in enumerate(zip(orgs, sizes)):
+            members = set(rng.sample(range(1, users), min(size, users - 1)))
+            if index < ACTOR_ORGANISATIONS:
+                members.discard(max(members, default=0))
+                members.add(0)
+            for position, member in enumerate(sorted(members)):
+                memberships.append(OrganisationMembership(
+                    user=people[member],
+                    organisation=org,
+                    # One admin per 50 members, plus the actor wherever it is a member.
+                    is_org_admin=member == 0 or position % 50 == 1,
+                ))
+        OrganisationMembership.objects.bulk_create(memberships, batch_size=5000)
+        recount(Organisation.objects.filter(slug__startswith=BENCH_PREFIX))
+        AuditEvent.objects.bulk_create(
+            [
+                AuditEvent(
+                    occurred_at=org.created_at,
+                    organisation_id=org.pk,
+                    action=audit.ORGANISATION_CREATED,
+                    actor_id=actor.pk,
+                    subject_id=actor.pk,
+                )
+                for org in orgs
+            ],
+            batch_size=5000,
+        )
+
+        latitude, longitude = PLACES_CENTRE
+        Place.objects.bulk_create(
+            [
+                Place(
+                    name=f"{BENCH_PREFIX}place-{i:05d}",
+                    category=PLACE_CATEGORIES[i % len(PLACE_CATEGORIES)],
+                    latitude=latitude + rng.uniform(-0.09, 0.09),
+                    longitude=longitude + rng.uniform(-0.15, 0.15),
+                )
+                for i in range(places)
+            ],
+            batch_size=5000,
+        )
+
+    return {
+        'users': users,
+        'organisations': organisations,
+        'memberships': len(memberships),
+        'big_org_members': sizes[0],
+        'skew': skew,
+        'random_seed': random_seed,
+        'places': places,
+    }
+
+
+def load(candidates=500):
+    """
+    Returns the rows the benchmark scenarios act on, read back from the database
+    so separate worker processes agree on them.
+    """
+    from django.contrib.auth import get_user_model
+
+    from apps.organisations.models import Organisation
+
+    User = get_user_model()
+    actor = User.objects.filter(username=_username(0)).first()
+    if actor is None:
+        raise SystemExit("No benchmark dataset found; run without --no-seed first.")
+
+    big_org = Organisation.objects.get(slug=_org_slug(0))
+    # The mutation scenarios add and remove members of a mid-sized organisation.
+    target_org = Organisation.objects.get(slug=_org_slug(1))
+    outsiders = list(
+        User.objects.filter(username__startswith=BENCH_PREFIX)
+        .exclude(memberships__organisation=target_org)
+        .order_by('username')[:candidates]
+    )
+    return {
+        'actor': actor,
+        'big_org': big_org,
+        'target_org': target_org,
+        'outsiders': outsiders,
+    }
@@ -0,0 +1,20 @@
+import re
+from pathlib import Path
+
+# The operations the React client actually sends, read straight from its source so
+# benchmarks never drift from what production traffic looks like.
+CLIENT_GRAPHQL_DIR = Path(__file__).resolve().parent.parent.parent / 'client' / 'src' / 'graphql'
+
+_GQL_BLOCK = re.compile(r'gql`(.*?)`', re.S)
+_OPERATION_NAME = re.compile(r'\b(?:query|mutation|subscription)\s+(\w+)')
+
+
+def client_operations(directory=CLIENT_GRAPHQL_DIR):
+    """Returns {operation name: query text} for every gql`` block under the client's graphql folder."""
+    operations = {}
+    for path in sorted(directory.rglob('*.ts')):
+        for block in _GQL_BLOCK.findall(path.read_text(encoding='utf-8')):
+            match = _OPERATION_NAME.search(block)
+            if match:
+                operations[match.group(1)] = block.strip()
+    return operations
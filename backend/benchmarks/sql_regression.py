@@ -0,0 +1,508 @@
+"""
+SQL regression harness: query counts and query plans for every root field.
+
+    cd backend && python -m benchmarks.sql_regression [--update] [--report report.json]
+        [--users N] [--organisations M] [--big-org-members K] [--no-seed]
+
+Runs one scenario for every query and mutation of backend.schema against a seeded
+dataset (see benchmarks.datasets), in-process and as the benchmark actor. Each
+scenario runs inside a transaction that is rolled back, so mutations leave the
+dataset as they found it. For every scenario it records:
+
+    queries    SQL statements issued (transaction control statements excluded)
+    errors     GraphQL error messages
+    scans      large tables (LARGE_TABLES) some statement reads with a full scan,
+               taken from the database's query plans: EXPLAIN (FORMAT JSON) with
+               enable_seqscan off on PostgreSQL, EXPLAIN QUERY PLAN on SQLite
+
+and compares them with the committed baseline (sql_baseline.json). The run fails
+when a root field has no scenario, a scenario issues more queries than its
+baseline, reports an error the baseline does not list, or starts scanning a large
+table. --update rewrites the baseline from the current run; review its diff like
+any other change. --report writes every statement with its plan, for finding the
+query behind a regression.
+
+Counts are taken with a cold cache: the configured Django cache is cleared before
+every scenario. Seeding writes to the configured database (only rows prefixed
+`bench-`), so point both at scratch instances.
+"""
+import argparse
+import json
+import re
+import sys
+from pathlib import Path
+
+from . import setup
+
+BASELINE_PATH = Path(__file__).resolve().parent / 'sql_baseline.json'
+
+# Tables that grow with the number of users; a full scan of any of them is a regression.
+LARGE_TABLES = (
+    'users_user',
+    'organisations_organisation',
+    'organisations_organisationmembership',
+)
+
+_TRANSACTION_CONTROL = re.compile(r'^\s*(BEGIN|COMMIT|ROLLBACK|SAVEPOINT|RELEASE)\b', re.I)
+_EXPLAINABLE = re.compile(r'^\s*(SELECT|UPDATE|DELETE|WITH)\b', re.I)
+# SQLite plan rows: "SCAN users_user" is a full scan, "SEARCH ..." or "SCAN ... USING INDEX" are not.
+_SQLITE_SCAN = re.compile(r'^SCAN (\w+)(?: AS \w+)?$')
+
+
+# --- 1. SQL CAPTURE ---
+
+class StatementRecorder:
+    """Execute wrapper that keeps (sql, params) of every statement run while installed."""
+
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if not _TRANSACTION_CONTROL.match(sql):
+            self.statements.append((sql, params))
+        return execute(sql, params, many, context)
+
+
+def run_operation(request, query, variables):
+    """Executes one operation in a rolled-back transaction; returns (statements, errors)."""
+    from django.core.cache import cache
+    from django.db import connection, transaction
+
+    from apps.feedback.ingest import feature_requests
+    from apps.organisations.daily import daily_content
+    from apps.organisations.leaderboard import leaderboards
+    from apps.places.cache import nearby_cache
+    from apps.places.index import place_index
+    from backend.schema import schema
+
+    # Shared caches (organisations, roles, leaderboards, daily content) would hide the
+    # queries a cold request makes.
+    cache.clear()
+    leaderboards.reset()
+    daily_content.clear()
+    nearby_cache.clear()
+    # The places index, by contrast, is loaded once per server process, not per request.
+    place_index.ensure_current()
+    recorder = StatementRecorder()
+    with transaction.atomic():
+        with connection.execute_wrapper(recorder):
+            result = schema.execute(query, variable_values=variables, context_value=request)
+        transaction.set_rollback(True)
+    # Buffered feature requests would otherwise be written by its background thread, outside the rollback.
+    feature_requests.reset()
+    return recorder.statements, [error.message for error in result.errors or []]
+
+
+# --- 2. QUERY PLANS ---
+
+def _postgres_scans(plan, found):
+    if plan.get('Node Type') == 'Seq Scan' and plan.get('Relation Name') in LARGE_TABLES:
+        found.add(plan['Relation Name'])
+    for child in plan.get('Plans', ()):
+        _postgres_scans(child, found)
+
+
+def explain(statements):
+    """
+    Returns ([(sql, plan)], large tables scanned) for the statements a plan can be
+    asked for. Unsupported database vendors return no plans.
+    """
+    from django.db import connection, transaction
+
+    plans, scans = [], set()
+    if connection.vendor not in ('postgresql', 'sqlite'):
+        return plans, scans
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # Report a scan only when no index could serve the statement at all,
+                # not when the planner prefers one on a small seeded table.
+                cursor.execute('SET LOCAL enable_seqscan = off')
+            for sql, params in statements:
+                if not _EXPLAINABLE.match(sql):
+                    continue
+                if connection.vendor == 'postgresql':
+                    cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+                    plan = cursor.fetchone()[0]
+                    plan = json.loads(plan) if isinstance(plan, str) else plan
+                    _postgres_scans(plan[0]['Plan'], scans)
+                else:
+                    cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+                    plan = [row[-1] for row in cursor.fetchall()]
+                    for detail in plan:
+                        match = _SQLITE_SCAN.match(detail)
+                        if match and match.group(1) in LARGE_TABLES:
+                            scans.add(match.group(1))
+                plans.append((sql, plan))
+        transaction.set_rollback(True)
+    return plans, scans
+
+
+# --- 3. SCENARIOS ---
+
+ORGANISATION_FIELDS = 'id name slug isPublic memberCount createdBy { id username }'
+MEMBERSHIP_FIELDS = 'id isOrgAdmin user { id username email } organisation { id name slug }'
+
+
+class Scenario:
+    """One operation on one root field, with its variables and whether it runs authenticated."""
+
+    def __init__(self, field, query, variables=None, authenticated=True):
+        self.field = field
+        self.query = query
+        self.variables = variables or {}
+        self.authenticated = authenticated
+
+
+def scenarios(dataset):
+    """Returns {root field: Scenario}, covering every query and mutation of backend.schema."""
+    from datetime import timedelta
+
+    from graphql_jwt.shortcuts import get_token
+    from graphql_relay import to_global_id
+
+    from .datasets import PASSWORD, PLACES_CENTRE
+
+    actor = dataset['actor']
+    big_org_id = to_global_id('OrganisationType', dataset['big_org'].pk)
+    target_org_id = to_global_id('OrganisationType', dataset['target_org'].pk)
+    outsiders = dataset['outsiders']
+    members = [str(pk) for pk in dataset['members']]
+    token = get_token(actor)
+
+    def scenario(field, query, variables=None, authenticated=True):
+        return field, Scenario(field, query, variables, authenticated)
+
+    return dict([
+        # Queries
+        scenario('hello', 'query { hello }', authenticated=False),
+        scenario('me', 'query { me { id username email firstName lastName phoneNumber } }'),
+        scenario('users', 'query { users { id username email } }'),
+        scenario(
+            'usersConnection',
+            'query { usersConnection(first: 50) { edges { node { id username } } pageInfo { hasNextPage endCursor } } }',
+        ),
+        scenario(
+            'organisation',
+            f'query ($id: ID) {{ organisation(id: $id) {{ {ORGANISATION_FIELDS} memberships {{ {MEMBERSHIP_FIELDS} }} }} }}',
+            {'id': target_org_id},
+        ),
+        scenario('myOrganisations', f'query {{ myOrganisations {{ {ORGANISATION_FIELDS} }} }}'),
+        scenario('myMemberships', f'query {{ myMemberships {{ {MEMBERSHIP_FIELDS} }} }}'),
+        scenario(
+            'allMemberships',
+            f'query ($id: ID!) {{ allMemberships(organisationId: $id) {{ {MEMBERSHIP_FIELDS} }} }}',
+            {'id': target_org_id},
+        ),
+        scenario(
+            'myOrganisationsConnection',
+            f'query {{ myOrganisationsConnection(first: 20) {{ edges {{ node {{ {ORGANISATION_FIELDS} }} }} '
+            'pageInfo { hasNextPage endCursor } } }',
+        ),
+        scenario(
+            'allMembershipsConnection',
+            f'query ($id: ID!) {{ allMembershipsConnection(organisationId: $id, first: 50) {{ '
+            f'edges {{ node {{ {MEMBERSHIP_FIELDS} }} }} pageInfo {{ hasNextPage endCursor }} }} }}',
+            {'id': big_org_id},
+        ),
+        scenario(
+            'leaderboard',
+            'query ($id: ID!) { leaderboard(organisationId: $id) { total top(first: 10) { rank score user { id username } } '
+            'me { rank score } aroundMe(neighbours: 2) { rank score user { id username } } } }',
+            {'id': target_org_id},
+        ),
+        scenario(
+            'dailyContent',
+            'query ($id: ID!) { dailyContent(organisationId: $id, timeZone: "Pacific/Auckland") { '
+            'date puzzle game generatedAt } }',
+            {'id': target_org_id},
+        ),
+        scenario(
+            'searchUsers',
+            'query { searchUsers(prefix: "bench-00001", first: 10) { id username email firstName lastName } }',
+        ),
+        scenario(
+            'searchMembers',
+            'query ($id: ID!) { searchMembers(organisationId: $id, prefix: "bench-00001", first: 10) { '
+            'id username email firstName lastName } }',
+            {'id': big_org_id},
+        ),
+        scenario(
+            'nearMe',
+            'query ($lat: Float!, $lng: Float!) { nearMe(lat: $lat, lng: $lng, radius: 2, first: 20) { '
+            'distance place { id name category latitude longitude } } }',
+            {'lat': PLACES_CENTRE[0], 'lng': PLACES_CENTRE[1]},
+        ),
+        # The week after the target organisation was seeded, which holds at least its
+        # creation (see datasets.seed()): the count does not depend on when it runs.
+        scenario(
+            'auditLog',
+            'query ($id: ID!, $since: DateTime!, $until: DateTime!) { auditLog(organisationId: $id, since: $since, '
+            'until: $until, first: 50) { id occurredAt action details cursor actor { id username } '
+            'member { id username } } }',
+            {
+                'id': target_org_id,
+                'since': dataset['target_org'].created_at.isoformat(),
+                'until': (dataset['target_org'].created_at + timedelta(days=7)).isoformat(),
+            },
+        ),
+        # Mutations
+        scenario(
+            'registerUser',
+            'mutation ($username: String!, $email: String!, $password: String!) { '
+            'registerUser(username: $username, email: $email, password: $password) { user { id } token } }',
+            {'username': 'bench-sql-new-user', 'email': 'bench-sql-new-user@bench.invalid', 'password': PASSWORD},
+            authenticated=False,
+        ),
+        scenario(
+            'tokenAuth',
+            'mutation ($username: String!, $password: String!) { '
+            'tokenAuth(username: $username, password: $password) { token } }',
+            {'username': actor.username, 'password': PASSWORD},
+            authenticated=False,
+        ),
+        scenario(
+            'verifyToken',
+            'mutation ($token: String!) { verifyToken(token: $token) { payload } }',
+            {'token': token},
+            authenticated=False,
+        ),
+        scenario(
+            'refreshToken',
+            'mutation ($token: String!) { refreshToken(token: $token) { token payload } }',
+            {'token': token},
+            authenticated=False,
+        ),
+        scenario(
+            'updateUser',
+            'mutation ($phone: String) { updateUser(phoneNumber: $phone, firstName: "Bench") { user { id phoneNumber } } }',
+            {'phone': '+15550000000'},
+        ),
+        scenario(
+            'createOrganisation',
+            'mutation { createOrganisation(name: "Bench SQL", slug: "bench-sql-new", isPublic: true) { '
+            'organisation { id slug memberCount } } }',
+        ),
+        scenario(
+            'updateOrganisation',
+            'mutation ($id: ID!) { updateOrganisation(organisationId: $id, name: "Bench renamed", slug: "bench-renamed") { '
+            'organisation { id name slug } } }',
+            {'id': target_org_id},
+        ),
+        scenario(
+            'addMemberToOrganisation',
+            'mutation ($id: ID!, $username: String!) { addMemberToOrganisation('
+            f'organisationId: $id, memberUsername: $username, makeAdmin: true) {{ membership {{ {MEMBERSHIP_FIELDS} }} }} }}',
+            {'id': target_org_id, 'username': outsiders[0].username},
+        ),
+        scenario(
+            'updateOrganisationMembership',
+            'mutation ($id: ID!, $member: ID!) { updateOrganisationMembership('
+            'organisationId: $id, memberId: $member, isOrgAdmin: true) { membership { id isOrgAdmin } } }',
+            {'id': target_org_id, 'member': members[0]},
+        ),
+        scenario(
+            'removeMemberFromOrganisation',
+            'mutation ($id: ID!, $member: ID!) { removeMemberFromOrganisation('
+            'organisationId: $id, memberId: $member) { success organisation { id memberCount } } }',
+            {'id': target_org_id, 'member': members[0]},
+        ),
+        scenario(
+            'updateOrganisationMemberships',
+            'mutation ($id: ID!, $members: [ID!]!) { updateOrganisationMemberships('
+            'organisationId: $id, memberIds: $members, isOrgAdmin: true) { updated memberships { id isOrgAdmin } } }',
+            {'id': target_org_id, 'members': members},
+        ),
+        scenario(
+            'removeMembersFromOrganisation',
+            'mutation ($id: ID!, $members: [ID!]!) { removeMembersFromOrganisation('
+            'organisationId: $id, memberIds: $members) { removed success organisation { id memberCount } } }',
+            {'id': target_org_id, 'members': members},
+        ),
+        scenario(
+            'importOrganisationMembers',
+            'mutation ($id: ID!, $data: String!) { importOrganisationMembers(organisationId: $id, data: $data) { '
+            'created alreadyMembers failed errors { line message } } }',
+            {
+                'id': target_org_id,
+                'data': 'username,is_org_admin\n' + ''.join(f'{user.username},false\n' for user in outsiders)
+                + 'bench-sql-missing-user,false\n',
+            },
+        ),
+        scenario(
+            'publishGameState',
+            'mutation ($id: ID!) { publishGameState(organisationId: $id, gameId: "bench", state: "{\\"round\\": 1}") { '
+            'success } }',
+            {'id': target_org_id},
+        ),
+        scenario(
+            'recordGameScore',
+            'mutation ($id: ID!) { recordGameScore(organisationId: $id, points: 50) { entry { rank score } } }',
+            {'id': target_org_id},
+        ),
+        scenario(
+            'submitFeatureRequest',
+            'mutation { submitFeatureRequest(title: "bench dark mode", description: "For the daily puzzle.") { success } }',
+        ),
+    ])
+
+
+def load_dataset():
+    """
+    The benchmark dataset, plus some members of the target organisation other than the
+    actor, with the target organisation's daily content built.
+    """
+    from django.core.management import call_command
+
+    from apps.organisations.models import OrganisationMembership
+
+    from .datasets import load
+
+    dataset = load(candidates=100)
+    dataset['members'] = list(
+        OrganisationMembership.objects.filter(organisation=dataset['target_org'])
+        .exclude(user=dataset['actor']).order_by('user__username')
+        .values_list('user_id', flat=True)[:20]
+    )
+    call_command('build_daily_content', organisation=dataset['target_org'].slug, verbosity=0)
+    return dataset
+
+
+def root_fields():
+    from backend.schema import schema
+
+    graphql_schema = schema.graphql_schema
+    return {
+        name
+        for root in (graphql_schema.query_type, graphql_schema.mutation_type)
+        for name in root.fields
+    }
+
+
+# --- 4. RUN AND COMPARE ---
+
+def measure(dataset, plan):
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.models import AnonymousUser
+    from django.test import RequestFactory
+
+    factory = RequestFactory()
+    UserModel = get_user_model()
+
+    def request(scenario):
+        # A fresh user per request, like authentication middleware would attach.
+        request = factory.post('/graphql/')
+        request.user = (
+            UserModel.objects.get(pk=dataset['actor'].pk) if scenario.authenticated else AnonymousUser()
+        )
+        return request
+
+    # One pass to warm the document cache and other per-process state, so counts are stable.
+    for scenario in plan.values():
+        run_operation(request(scenario), scenario.query, scenario.variables)
+
+    results, details = {}, {}
+    for field, scenario in sorted(plan.items()):
+        statements, errors = run_operation(request(scenario), scenario.query, scenario.variables)
+        plans, scans = explain(statements)
+        results[field] = {'queries': len(statements), 'errors': errors, 'scans': sorted(scans)}
+        details[field] = {
+            'statements': [{'sql': sql, 'plan': plan} for sql, plan in plans]
+            + [{'sql': sql, 'plan': None} for sql, _ in statements if not _EXPLAINABLE.match(sql)],
+        }
+    return results, details
+
+
+def compare(results, baseline, vendor):
+    """Returns the regressions of `results` against `baseline`, as messages."""
+    failures = []
+    for field, result in results.items():
+        before = baseline.get(field)
+        if before is None:
+            failures.append(f"{field}: no baseline entry; run with --update and commit it.")
+            continue
+        if result['queries'] > before['queries']:
+            failures.append(f"{field}: {before['queries']} -> {result['queries']} queries.")
+        new_errors = set(result['errors']) - set(before.get('errors', ()))
+        for error in sorted(new_errors):
+            failures.append(f"{field}: new error: {error}")
+        new_scans = set(result['scans']) - set(before.get('scans', {}).get(vendor, ()))
+        for table in sorted(new_scans):
+            failures.append(f"{field}: full scan of {table} on {vendor}.")
+    return failures
+
+
+def updated_baseline(results, baseline, vendor):
+    """The baseline with this run's counts and errors, and its scans for this vendor only."""
+    merged = {}
+    for field, result in sorted(results.items()):
+        scans = dict(baseline.get(field, {}).get('scans', {}))
+        scans[vendor] = result['scans']
+        merged[field] = {'queries': result['queries'], 'errors': result['errors'], 'scans': scans}
+    return merged
+
+
+def print_table(results, baseline):
+    print(f"{'root field':<32}{'queries':>9}{'baseline':>10}  scans / errors")
+    for field, result in sorted(results.items()):
+        before = baseline.get(field, {}).get('queries', '-')
+        notes = ', '.join(result['scans'] + result['errors'])
+        print(f"{field:<32}{result['queries']:>9}{before:>10}  {notes}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=2_000)
+    parser.add_argument('--organisations', type=int, default=20)
+    parser.add_argument('--big-org-members', type=int, default=1_500)
+    parser.add_argument('--update', action='store_true', help="Rewrite the baseline from this run.")
+    parser.add_argument('--report', help="Write every statement and its plan to this JSON file.")
+    parser.add_argument('--baseline', default=str(BASELINE_PATH))
+    parser.add_argument('--no-seed', action='store_true', help="Reuse the dataset of a previous run.")
+    args = parser.parse_args()
+
+    setup()
+    from django.db import connection
+
+    from . import datasets
+
+    if not args.no_seed:
+        datasets.seed(args.users, args.organisations, args.big_org_members)
+
+    plan = scenarios(load_dataset())
+    missing = root_fields() - plan.keys()
+    if missing:
+        print("Root fields without a scenario: " + ', '.join(sorted(missing)), file=sys.stderr)
+        return 1
+
+    results, details = measure(load_dataset(), plan)
+
+    baseline_path = Path(args.baseline)
+    baseline = json.loads(baseline_path.read_text(encoding='utf-8')) if baseline_path.exists() else {}
+    print_table(results, baseline)
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as handle:
+            json.dump({'database': connection.vendor, 'results': results, 'details': details}, handle, indent=2)
+        print(f"\nWrote {args.report}")
+
+    if args.update:
+        baseline_path.write_text(
+            json.dumps(updated_baseline(results, baseline, connection.vendor), indent=2) + '\n', encoding='utf-8',
+        )
+        print(f"\nUpdated {baseline_path}")
+        return 0
+
+    failures = compare(results, baseline, connection.vendor)
+    if failures:
+        print("\nSQL regressions:", file=sys.stderr)
+        for failure in failures:
+            print(f"  {failure}", file=sys.stderr)
+        return 1
+    print("\nNo SQL regressions.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
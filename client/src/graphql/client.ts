@@ -1,5 +1,6 @@
 import { ApolloClient, InMemoryCache, createHttpLink } from "@apollo/client";
 import { setContext } from "@apollo/client/link/context";
+import { createPersistedQueryLink } from "@apollo/client/link/persisted-queries";
 
 const API_URI = "http://localhost:8000/graphql/";
 
@@ -7,6 +8,17 @@ const httpLink = createHttpLink({
     uri: API_URI,
 });
 
+// Automatic persisted queries: send only the sha256 of each operation and fall
+// back to the full text the first time the server has not seen it.
+const sha256 = async (query: string) => {
+    const digest = await crypto.subtle.digest("SHA-256", new TextEncoder().encode(query));
+    return Array.from(new Uint8Array(digest))
+        .map((byte) => byte.toString(16).padStart(2, "0"))
+        .join("");
+};
+
+const persistedQueriesLink = createPersistedQueryLink({ sha256 });
+
 const authLink = setContext((_, { headers }) => {
     const token = localStorage.getItem("token");
     return {
@@ -18,7 +30,7 @@ const authLink = setContext((_, { headers }) => {
 });
 
 export const client = new ApolloClient({
-    link: authLink.concat(httpLink),
+    link: authLink.concat(persistedQueriesLink).concat(httpLink),
     cache: new InMemoryCache(),
 });
 